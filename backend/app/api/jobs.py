@@ -1,13 +1,55 @@
 """
 Job (任务) API 路由
 """
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, status, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
 from app.schemas.podcast import JobResponse
 from app.services.data_service import data_service
+from app.services.job_events import job_events, JobEvent
+from app.tasks.process_podcast import job_scheduler
+from app.config import settings
 
 router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
 
+SSE_RETRY_MS = 3000  # 断线后浏览器重连的等待时间
+
+
+def parse_event_id(value: Any) -> Optional[int]:
+    """解析客户端传来的事件 ID，无效时视为没有"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def ensure_known(job_id: str) -> bool:
+    """
+    确保事件总线知道该任务
+    
+    本进程创建或更新过的任务已由数据层发布；否则（例如进程重启后）从存储读取一次，
+    之后连接到同一任务的客户端都不再读取存储
+    """
+    if job_events.known(job_id):
+        return True
+    job = await data_service.get_job_async(job_id)
+    if not job:
+        return False
+    job_events.prime(job)
+    return True
+
+
+def job_payload(event: JobEvent) -> Dict[str, Any]:
+    """事件对应的任务状态（与 GET /jobs/{id} 的响应一致）"""
+    job = dict(event.data)
+    if job.get("status") == "pending":
+        job["queue_position"] = job_scheduler.position(event.job_id)
+    return JobResponse.model_validate(job).model_dump(mode="json")
+
 
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(job_id: str):
@@ -16,9 +58,9 @@ async def get_job(job_id: str):
     
     - **job_id**: 任务ID
     
-    返回任务的当前状态、进度和错误信息（如果有）
+    返回任务的当前状态、进度、排队位置和错误信息（如果有）
     """
-    job = data_service.get_job(job_id)
+    job = await data_service.get_job_async(job_id)
     
     if not job:
         raise HTTPException(
@@ -26,5 +68,122 @@ async def get_job(job_id: str):
             detail=f"任务不存在: {job_id}"
         )
     
+    if job.get("status") == "pending":
+        job["queue_position"] = job_scheduler.position(job_id)
+    
     return job
 
+
+@router.get("/{job_id}/events")
+async def job_event_stream(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    订阅任务进度（Server-Sent Events）
+    
+    - **job_id**: 任务ID
+    
+    连接后立即推送任务当前状态，之后每次进度或状态变化推送一条 `job` 事件（内容与 GET /jobs/{id} 相同），
+    任务完成或失败后推送最后一条事件并结束；任务被删除时推送 `deleted` 事件。
+    无事件时定期发送注释行作为心跳。浏览器 EventSource 断线重连时自动带上 Last-Event-ID，
+    服务端补发错过的事件。
+    """
+    if not await ensure_known(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"任务不存在: {job_id}"
+        )
+    
+    async def stream():
+        subscription = job_events.subscription()
+        try:
+            if not subscription.subscribe(job_id, parse_event_id(last_event_id)):
+                return
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while True:
+                event = await subscription.get(settings.job_events_heartbeat)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                if event.data is None:
+                    yield f"id: {event.id}\nevent: deleted\ndata: {{}}\n\n"
+                else:
+                    data = json.dumps(job_payload(event), ensure_ascii=False)
+                    yield f"id: {event.id}\nevent: job\ndata: {data}\n\n"
+                if event.terminal:
+                    return
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def job_event_socket(websocket: WebSocket):
+    """
+    订阅多个任务的进度（WebSocket）
+    
+    客户端发送：
+    - `{"action": "subscribe", "job_id": "...", "last_event_id": 123}`（last_event_id 可选，用于重连补发）
+    - `{"action": "unsubscribe", "job_id": "..."}`
+    
+    服务端推送：
+    - `{"type": "job", "job_id", "id", "data"}`：任务状态（data 与 GET /jobs/{id} 相同），任务结束后自动退订
+    - `{"type": "deleted", "job_id", "id"}`：任务已删除
+    - `{"type": "ping"}`：心跳
+    - `{"type": "error", "job_id", "detail"}`：请求无效或任务不存在
+    """
+    await websocket.accept()
+    subscription = job_events.subscription()
+    send_lock = asyncio.Lock()
+    
+    async def send(message: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+    
+    async def receive():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                action, job_id = message.get("action"), message.get("job_id")
+            except (ValueError, AttributeError):
+                await send({"type": "error", "job_id": None, "detail": "无效的消息格式"})
+                continue
+            
+            if action == "subscribe":
+                last_event_id = parse_event_id(message.get("last_event_id"))
+                if not job_id or not await ensure_known(job_id) or not subscription.subscribe(job_id, last_event_id):
+                    await send({"type": "error", "job_id": job_id, "detail": f"任务不存在: {job_id}"})
+            elif action == "unsubscribe":
+                subscription.unsubscribe(job_id)
+            else:
+                await send({"type": "error", "job_id": job_id, "detail": f"未知操作: {action}"})
+    
+    async def push():
+        while True:
+            event = await subscription.get(settings.job_events_heartbeat)
+            if event is None:
+                await send({"type": "ping"})
+            elif event.data is None:
+                await send({"type": "deleted", "job_id": event.job_id, "id": event.id})
+            else:
+                await send({"type": "job", "job_id": event.job_id, "id": event.id, "data": job_payload(event)})
+                if event.terminal:
+                    subscription.unsubscribe(event.job_id)
+    
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(push())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
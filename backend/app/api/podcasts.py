@@ -1,50 +1,68 @@
 """
 Podcast API 路由
 """
-from fastapi import APIRouter, File, UploadFile, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
-from typing import Optional, List
+from fastapi import APIRouter, File, UploadFile, HTTPException, status, Query, Header
+from fastapi.responses import StreamingResponse, Response
+from typing import Optional, List, Union
+import os
 import uuid
 from pathlib import Path
-import io
 
-from app.schemas.podcast import UploadResponse, ApiResponse, PodcastResponse, GenerateRequest
+from app.schemas.podcast import (
+    UploadResponse, ApiResponse, PodcastResponse, PodcastSummary, PodcastPage, GenerateRequest,
+    UploadUrlRequest, UploadUrlResponse, PODCAST_FIELDS, PODCAST_SUMMARY_FIELDS,
+    podcast_list_adapter, podcast_page_adapter
+)
 from app.services.data_service import data_service
-from app.utils.s3_storage import s3_storage
+from app.utils.s3_storage import s3_storage, audio_cache, UploadRejected
+from app.utils.range_request import resolve_range, aiter_file_chunks, RangeNotSatisfiable
+from app.utils.live_audio import live_audio
+from app.utils.audio_info import s3_audio_info
+from app.utils.blocking import run_blocking
+from app.tasks.scheduler import QueueFull
 from app.config import settings
 
 router = APIRouter(prefix="/api/v1/podcasts", tags=["podcasts"])
 
 
-def validate_file(file: UploadFile) -> tuple[bool, Optional[str]]:
+def queue_full_error() -> HTTPException:
+    """任务队列已满时返回 429，客户端稍后重试"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="任务队列已满，请稍后重试",
+        headers={"Retry-After": "30"}
+    )
+
+
+def validate_filename(filename: Optional[str]) -> tuple[bool, Optional[str]]:
     """
-    验证上传文件
+    验证上传文件名和类型
     
     Returns:
         (是否有效, 错误消息)
     """
     # 检查文件名
-    if not file.filename:
+    if not filename:
         return False, "文件名不能为空"
     
     # 检查文件扩展名
-    file_ext = Path(file.filename).suffix.lower()
+    file_ext = Path(filename).suffix.lower()
     if file_ext not in settings.allowed_extensions:
         return False, f"不支持的文件类型: {file_ext}。支持的类型: {', '.join(settings.allowed_extensions)}"
     
-    # 检查文件大小
-    file.file.seek(0, 2)  # 移动到文件末尾
-    file_size = file.file.tell()
-    file.file.seek(0)  # 重置到开头
-    
-    if file_size > settings.max_upload_size:
-        max_size_mb = settings.max_upload_size / (1024 * 1024)
-        return False, f"文件过大: {file_size / (1024 * 1024):.2f}MB。最大允许: {max_size_mb}MB"
+    return True, None
+
+
+def validate_file(file: UploadFile) -> tuple[bool, Optional[str]]:
+    """
+    验证上传文件
     
-    if file_size == 0:
-        return False, "文件为空"
+    文件大小在上传过程中逐段检查（见 S3Storage.upload_stream）
     
-    return True, None
+    Returns:
+        (是否有效, 错误消息)
+    """
+    return validate_filename(file.filename)
 
 
 @router.post("/upload", response_model=UploadResponse)
@@ -52,11 +70,14 @@ async def upload_file(file: UploadFile = File(...)):
     """
     上传文件创建播客
     
-    1. 验证文件（类型、大小）
-    2. 上传到 S3
+    1. 验证文件（文件名、类型）
+    2. 分段流式上传到 S3（同时检查大小）
     3. 创建 podcast 和 job 记录
-    4. 返回 podcast_id 和 job_id
+    4. 提交到任务队列（队列已满返回 429）
+    5. 返回 podcast_id、job_id 和排队位置
     """
+    from app.tasks.process_podcast import start_processing_task, job_scheduler
+    
     # 1. 验证文件
     is_valid, error_msg = validate_file(file)
     if not is_valid:
@@ -65,26 +86,32 @@ async def upload_file(file: UploadFile = File(...)):
             detail=error_msg
         )
     
+    # 队列已满时在上传前拒绝，避免白白传输文件
+    if job_scheduler.is_full():
+        raise queue_full_error()
+    
     try:
-        # 2. 上传文件到 S3
-        file_content = await file.read()
-        
-        # 重新包装为 BytesIO 对象
-        import io
-        file_obj = io.BytesIO(file_content)
-        
-        s3_key = s3_storage.upload_file(
-            file_obj=file_obj,
-            original_filename=file.filename,
-            prefix="uploads",
-            content_type=file.content_type
-        )
+        # 2. 分段流式上传到 S3
+        try:
+            uploaded = await s3_storage.upload_stream(
+                read=file.read,
+                original_filename=file.filename,
+                prefix="uploads",
+                content_type=file.content_type,
+                max_size=settings.max_upload_size
+            )
+        except UploadRejected as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
-        if not s3_key:
+        if not uploaded:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="文件上传到 S3 失败"
             )
+        s3_key, file_size = uploaded
         
         # 3. 创建 podcast 和 job 记录
         podcast_id = str(uuid.uuid4())
@@ -96,14 +123,14 @@ async def upload_file(file: UploadFile = File(...)):
             "title": file.filename,  # 使用文件名作为标题
             "original_filename": file.filename,
             "s3_key": s3_key,
-            "file_size_bytes": len(file_content),
+            "file_size_bytes": file_size,
             "status": "processing"
         }
         
-        success = data_service.save_podcast(podcast_data)
+        success = await data_service.save_podcast_async(podcast_data)
         if not success:
             # 回滚 S3 上传
-            s3_storage.delete_file(s3_key)
+            await s3_storage.delete_file_async(s3_key)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="保存播客记录失败"
@@ -118,26 +145,33 @@ async def upload_file(file: UploadFile = File(...)):
             "s3_key": s3_key
         }
         
-        success = data_service.save_job(job_data)
+        success = await data_service.save_job_async(job_data)
         if not success:
             # 回滚
-            data_service.delete_podcast(podcast_id)
-            s3_storage.delete_file(s3_key)
+            await data_service.delete_podcast_async(podcast_id)
+            await s3_storage.delete_file_async(s3_key)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="保存任务记录失败"
             )
         
-        # 4. 启动后台处理
-        from app.tasks.process_podcast import start_processing_task
-        start_processing_task(podcast_id, job_id, s3_key)
+        # 4. 提交后台处理
+        try:
+            position = start_processing_task(podcast_id, job_id, s3_key)
+        except QueueFull:
+            # 回滚
+            await data_service.delete_job_async(job_id)
+            await data_service.delete_podcast_async(podcast_id)
+            await s3_storage.delete_file_async(s3_key)
+            raise queue_full_error()
         
         # 5. 返回响应
         return UploadResponse(
             podcast_id=podcast_id,
             job_id=job_id,
             status="processing",
-            message=f"文件 '{file.filename}' 上传成功，正在处理中"
+            message=f"文件 '{file.filename}' 上传成功，正在处理中",
+            queue_position=position
         )
     
     except HTTPException:
@@ -150,41 +184,249 @@ async def upload_file(file: UploadFile = File(...)):
         )
 
 
-@router.get("", response_model=List[PodcastResponse])
+@router.post("/upload-url", response_model=UploadUrlResponse)
+async def create_upload_url(request: UploadUrlRequest):
+    """
+    获取直传 S3 的预签名上传表单（适合大体积音视频）
+    
+    1. 验证文件名、类型和大小
+    2. 生成带大小、类型限制的预签名 POST 表单
+    3. 创建状态为 uploading 的 podcast 记录
+    
+    浏览器上传完成后调用 POST /{podcast_id}/uploaded 确认并开始处理
+    """
+    is_valid, error_msg = validate_filename(request.filename)
+    if is_valid and request.file_size and request.file_size > settings.max_upload_size:
+        max_size_mb = settings.max_upload_size / (1024 * 1024)
+        is_valid, error_msg = False, f"文件过大: {request.file_size / (1024 * 1024):.2f}MB。最大允许: {max_size_mb}MB"
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_msg
+        )
+    
+    try:
+        post = s3_storage.generate_presigned_post(
+            original_filename=request.filename,
+            prefix="uploads",
+            content_type=request.content_type,
+            max_size=settings.max_upload_size,
+            expires_in=settings.presigned_upload_expires
+        )
+        if not post:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="生成上传地址失败"
+            )
+        
+        podcast_id = str(uuid.uuid4())
+        podcast_data = {
+            "id": podcast_id,
+            "title": request.filename,
+            "original_filename": request.filename,
+            "s3_key": post["key"],
+            "status": "uploading"
+        }
+        if not await data_service.save_podcast_async(podcast_data):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="保存播客记录失败"
+            )
+        
+        return UploadUrlResponse(
+            podcast_id=podcast_id,
+            s3_key=post["key"],
+            url=post["url"],
+            fields=post["fields"],
+            expires_in=settings.presigned_upload_expires
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ 生成上传地址异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"生成上传地址失败: {str(e)}"
+        )
+
+
+@router.post("/{podcast_id}/uploaded", response_model=UploadResponse)
+async def confirm_upload(podcast_id: str):
+    """
+    确认直传 S3 已完成
+    
+    1. 原子地把播客从 uploading 改为 processing（重复确认 / 并发重试返回 409，不会创建两个任务）
+    2. 用 head_object 校验文件已存在且大小合法
+    3. 创建 job 记录并启动后台处理；任何一步失败都恢复为 uploading，客户端可以重新确认
+    
+    - **podcast_id**: 播客ID（来自 /upload-url）
+    """
+    from app.tasks.process_podcast import start_processing_task, job_scheduler
+    
+    if job_scheduler.is_full():
+        raise queue_full_error()
+    
+    # 先认领再访问 S3：检查状态和修改状态在同一次 mutate 中完成
+    claimed = []
+    
+    def claim(current: dict) -> Optional[dict]:
+        if current.get("status") != "uploading":
+            return None
+        claimed.append(True)
+        return {"status": "processing"}
+    
+    podcast = await data_service.mutate_async("podcasts", podcast_id, claim)
+    if not podcast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"播客不存在: {podcast_id}"
+        )
+    if not claimed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"播客不在待上传状态: {podcast.get('status')}"
+        )
+    
+    job_id = None
+    try:
+        s3_key = podcast["s3_key"]
+        info = await s3_storage.get_file_info_async(s3_key)
+        if not info:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="未找到已上传的文件，请先完成上传"
+            )
+        if info["size"] == 0 or info["size"] > settings.max_upload_size:
+            await s3_storage.delete_file_async(s3_key)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"文件大小无效: {info['size']} bytes"
+            )
+        
+        job_id = str(uuid.uuid4())
+        job_data = {
+            "id": job_id,
+            "podcast_id": podcast_id,
+            "status": "pending",
+            "progress": 0,
+            "s3_key": s3_key
+        }
+        if not await data_service.save_job_async(job_data):
+            job_id = None
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="保存任务记录失败"
+            )
+        
+        await data_service.update_podcast_async(podcast_id, {"file_size_bytes": info["size"]})
+        
+        # 提交后台处理；队列已满时恢复 uploading 状态，客户端可稍后重新确认
+        try:
+            position = start_processing_task(podcast_id, job_id, s3_key)
+        except QueueFull:
+            raise queue_full_error()
+        
+        return UploadResponse(
+            podcast_id=podcast_id,
+            job_id=job_id,
+            status="processing",
+            message=f"文件 '{podcast.get('original_filename')}' 上传成功，正在处理中",
+            queue_position=position
+        )
+    
+    except Exception as e:
+        # 撤销认领（以及已创建的任务）
+        if job_id:
+            await data_service.delete_job_async(job_id)
+        await data_service.mutate_async(
+            "podcasts",
+            podcast_id,
+            lambda current: {"status": "uploading"} if current.get("status") == "processing" else None
+        )
+        if isinstance(e, HTTPException):
+            raise
+        print(f"❌ 确认上传异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"确认上传失败: {str(e)}"
+        )
+
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    """
+    解析列表接口的 fields 参数（逗号分隔的字段名）
+    
+    未指定时返回不含稿件的默认字段；id 总是返回
+    
+    Raises:
+        HTTPException: 包含未知字段
+    """
+    if not fields:
+        return PODCAST_SUMMARY_FIELDS
+    
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in PODCAST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"未知字段: {', '.join(unknown)}。可选字段: {', '.join(PODCAST_FIELDS)}"
+        )
+    return tuple(dict.fromkeys(["id", *names]))
+
+
+def project_podcasts(podcasts: List[dict], fields: tuple) -> List[dict]:
+    """只保留指定字段（记录中没有的字段为 None）；请求稿件时从 blob 加载"""
+    items = [{field: podcast.get(field) for field in fields} for podcast in podcasts]
+    if "transcript" in fields:
+        for item, podcast in zip(items, podcasts):
+            item["transcript"] = data_service.load_podcast_text(podcast)
+    return items
+
+
+@router.get("", response_model=Union[List[PodcastSummary], PodcastPage])
 async def get_podcasts(
     page: int = Query(1, ge=1, description="页码"),
     limit: int = Query(20, ge=1, le=100, description="每页数量"),
-    search: Optional[str] = Query(None, description="搜索标题")
+    search: Optional[str] = Query(None, description="搜索标题和文稿"),
+    cursor: Optional[str] = Query(None, description="分页游标（传空字符串获取第一页）"),
+    fields: Optional[str] = Query(None, description="返回的字段，逗号分隔，例如 id,title,status（默认不含稿件）")
 ):
     """
     获取播客列表
     
     - **page**: 页码（从1开始）
     - **limit**: 每页数量（1-100）
-    - **search**: 搜索关键词（匹配标题）
+    - **search**: 搜索关键词（全文匹配标题和文稿，中文按二元组匹配，最后一个英文词按前缀匹配；分页模式下按相关度排序）
+    - **cursor**: 游标分页。传入该参数时忽略 page，返回 `{items, next_cursor}`；
+      第一页传空字符串，之后传上一页返回的 next_cursor
+    - **fields**: 只返回指定字段（可选 PodcastResponse 中的任意字段，id 总是返回）。
+      默认返回 PodcastSummary 的字段，不含稿件；需要稿件时指定 transcript
     """
     try:
-        # 读取所有播客
-        all_podcasts = data_service.read_podcasts()
-        
-        # 搜索过滤
-        if search:
-            search_lower = search.lower()
-            all_podcasts = [
-                p for p in all_podcasts 
-                if search_lower in p.get("title", "").lower()
-            ]
-        
-        # 排序：按创建时间降序
-        all_podcasts.sort(
-            key=lambda x: x.get("created_at", ""),
-            reverse=True
-        )
-        
-        # 分页
-        start = (page - 1) * limit
-        end = start + limit
-        podcasts = all_podcasts[start:end]
+        selected = parse_fields(fields)
+        next_cursor = None
+        
+        if cursor is not None:
+            # 游标分页：沿 (created_at, id) 有序索引定位，翻页成本与页码无关
+            try:
+                podcasts, next_cursor = await data_service.page_podcasts_async(
+                    cursor=cursor or None,
+                    limit=limit,
+                    search=search
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+        else:
+            # 搜索、排序（按创建时间降序）和分页由数据层完成
+            podcasts = await data_service.list_podcasts_async(
+                search=search,
+                offset=(page - 1) * limit,
+                limit=limit
+            )
         
         # 为每个播客设置流式播放 URL
         for podcast in podcasts:
@@ -192,8 +434,20 @@ async def get_podcasts(
                 # 使用后端流式播放端点
                 podcast["audio_url"] = f"/api/v1/podcasts/{podcast['id']}/stream"
         
-        return podcasts
+        if "transcript" in selected:
+            items = await run_blocking(project_podcasts, podcasts, selected)
+        else:
+            items = project_podcasts(podcasts, selected)
+        
+        # 直接用预先构建的序列化器输出 JSON，跳过逐项的响应模型校验
+        if cursor is not None:
+            content = podcast_page_adapter.dump_json({"items": items, "next_cursor": next_cursor})
+        else:
+            content = podcast_list_adapter.dump_json(items)
+        return Response(content=content, media_type="application/json")
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ 获取播客列表异常: {e}")
         raise HTTPException(
@@ -209,7 +463,7 @@ async def get_podcast(podcast_id: str):
     
     - **podcast_id**: 播客ID
     """
-    podcast = data_service.get_podcast(podcast_id)
+    podcast = await data_service.get_podcast_async(podcast_id)
     
     if not podcast:
         raise HTTPException(
@@ -221,10 +475,85 @@ async def get_podcast(podcast_id: str):
     if podcast.get("audio_s3_key"):
         # 使用后端流式播放端点
         podcast["audio_url"] = f"/api/v1/podcasts/{podcast_id}/stream"
+        
+        # 早期上传的音频没有记录时长：从 S3 读取文件头计算一次并保存
+        # （无法解析时记下 duration_unknown，之后的请求不再重复读取 S3）
+        key = podcast["audio_s3_key"]
+        if (
+            podcast.get("duration_seconds") is None
+            and not podcast.get("duration_unknown")
+            and key.lower().endswith((".mp3", ".wav"))
+        ):
+            info = await run_blocking(s3_audio_info, s3_storage, key)
+            if info:
+                podcast["duration_seconds"] = round(info.duration)
+                await data_service.update_podcast_async(podcast_id, {"duration_seconds": podcast["duration_seconds"]})
+            else:
+                await data_service.update_podcast_async(podcast_id, {"duration_unknown": True})
+    
+    # 稿件保存在 blob 中，只有详情接口按需加载（列表接口不返回稿件）
+    podcast["transcript"] = await run_blocking(data_service.load_podcast_text, podcast)
     
     return podcast
 
 
+@router.get("/{podcast_id}/transcript")
+async def get_transcript(
+    podcast_id: str,
+    accept_encoding: Optional[str] = Header(None, alias="Accept-Encoding"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
+):
+    """
+    获取播客稿件（纯文本，流式返回）
+    
+    - **podcast_id**: 播客ID
+    
+    客户端接受 gzip 时直接发送压缩保存的 blob 文件（服务端不解压）；
+    ETag 为稿件内容的 SHA-256，未变化时返回 304
+    """
+    podcast = await data_service.get_podcast_async(podcast_id)
+    if not podcast:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"播客不存在: {podcast_id}"
+        )
+    
+    digest = podcast.get("transcript_blob") or podcast.get("extracted_text_blob")
+    if not digest:
+        # 旧记录：稿件内联保存在记录中
+        text = podcast.get("transcript") or podcast.get("extracted_text")
+        if not text:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="播客稿件尚未生成"
+            )
+        return Response(content=text, media_type="text/plain; charset=utf-8")
+    
+    headers = {"ETag": f'"{digest}"', "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if if_none_match and headers["ETag"] in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    compressed = bool(accept_encoding) and "gzip" in accept_encoding.lower()
+    file_obj = await run_blocking(data_service.text_blobs.open, digest, compressed)
+    if file_obj is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="播客稿件文件不存在"
+        )
+    
+    length = None
+    if compressed:
+        length = os.fstat(file_obj.fileno()).st_size
+        headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(length)
+    
+    return StreamingResponse(
+        aiter_file_chunks(file_obj, length, settings.stream_chunk_size),
+        media_type="text/plain; charset=utf-8",
+        headers=headers
+    )
+
+
 @router.delete("/{podcast_id}")
 async def delete_podcast(podcast_id: str):
     """
@@ -234,7 +563,7 @@ async def delete_podcast(podcast_id: str):
     """
     try:
         # 获取播客信息
-        podcast = data_service.get_podcast(podcast_id)
+        podcast = await data_service.get_podcast_async(podcast_id)
         
         if not podcast:
             raise HTTPException(
@@ -245,15 +574,15 @@ async def delete_podcast(podcast_id: str):
         # 删除 S3 文件
         s3_key = podcast.get("s3_key")
         if s3_key:
-            s3_storage.delete_file(s3_key)
+            await s3_storage.delete_file_async(s3_key)
         
         # 删除音频文件（如果存在）
         audio_s3_key = podcast.get("audio_s3_key")
         if audio_s3_key:
-            s3_storage.delete_file(audio_s3_key)
+            await s3_storage.delete_file_async(audio_s3_key)
         
         # 删除数据库记录
-        success = data_service.delete_podcast(podcast_id)
+        success = await data_service.delete_podcast_async(podcast_id)
         
         if not success:
             raise HTTPException(
@@ -261,6 +590,9 @@ async def delete_podcast(podcast_id: str):
                 detail="删除播客记录失败"
             )
         
+        # 删除不再被引用的稿件 blob
+        await run_blocking(data_service.release_text_blobs, podcast)
+        
         return {
             "success": True,
             "message": f"播客 '{podcast.get('title')}' 已删除"
@@ -287,7 +619,7 @@ async def download_podcast(podcast_id: str):
     """
     try:
         # 获取播客信息
-        podcast = data_service.get_podcast(podcast_id)
+        podcast = await data_service.get_podcast_async(podcast_id)
         
         if not podcast:
             raise HTTPException(
@@ -336,17 +668,24 @@ async def download_podcast(podcast_id: str):
 
 
 @router.get("/{podcast_id}/stream")
-async def stream_podcast(podcast_id: str):
+async def stream_podcast(
+    podcast_id: str,
+    range_header: Optional[str] = Header(None, alias="Range")
+):
     """
     流式播放播客音频
     
     - **podcast_id**: 播客ID
     
-    直接从 S3 流式传输音频数据
+    从本地磁盘缓存或 S3 分块转发音频数据，支持 Range 请求（HTTP 206），
+    浏览器拖动进度条时只会读取对应的字节区间。
+    
+    音频仍在合成时返回已合成的部分并持续推送后续数据，直到合成结束
+    （长度未知，不支持 Range）
     """
     try:
         # 获取播客信息
-        podcast = data_service.get_podcast(podcast_id)
+        podcast = await data_service.get_podcast_async(podcast_id)
         
         if not podcast:
             raise HTTPException(
@@ -357,37 +696,81 @@ async def stream_podcast(podcast_id: str):
         # 检查音频是否已生成
         audio_s3_key = podcast.get("audio_s3_key")
         if not audio_s3_key:
+            live = live_audio.get(podcast_id)
+            if live:
+                return StreamingResponse(
+                    live.iter_chunks(settings.stream_chunk_size),
+                    media_type=live.media_type,
+                    headers={"Cache-Control": "no-store", "X-Live": "1"}
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="播客音频尚未生成，请稍后再试"
             )
         
-        # 从 S3 下载音频数据
-        audio_data = s3_storage.download_file(audio_s3_key)
-        if not audio_data:
+        # 获取音频大小，用于解析 Range 头
+        file_info = await s3_storage.get_file_info_async(audio_s3_key)
+        if not file_info:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="音频文件下载失败"
+                detail="音频文件读取失败"
             )
+        total_size = file_info["size"]
         
         # 对文件名进行URL编码以支持中文
         from urllib.parse import quote
-        from io import BytesIO
         
         filename = podcast.get('title', 'podcast')
         encoded_filename = quote(filename)
+        headers = {
+            "Content-Disposition": f"inline; filename*=UTF-8''{encoded_filename}.mp3",
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "public, max-age=3600"
+        }
+        
+        try:
+            byte_range = resolve_range(range_header, total_size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{total_size}", "Accept-Ranges": "bytes"}
+            )
+        
+        if byte_range:
+            start, end = byte_range
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{total_size}"
+        else:
+            start, end = 0, total_size - 1
+            status_code = status.HTTP_200_OK
+        
+        # 优先读取本地磁盘缓存（ETag 与 S3 一致时命中）；未命中时按范围直接读取 S3，缓存在后台填充
+        body = None
+        if settings.audio_cache_enabled:
+            body = await audio_cache.open_async(audio_s3_key, file_info["etag"], total_size, start)
+        headers["X-Cache"] = "HIT" if body else "MISS"
+        
+        if body is None:
+            if byte_range:
+                body = await s3_storage.open_file_stream_async(audio_s3_key, start, end)
+            else:
+                body = await s3_storage.open_file_stream_async(audio_s3_key)
+        
+        if body is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="音频文件下载失败"
+            )
+        
+        # 按固定大小分块转发，单个请求占用的内存不超过一个数据块
+        content_length = end - start + 1
+        headers["Content-Length"] = str(content_length)
         
-        # 使用 BytesIO 包装音频数据，确保可以被多次读取
-        # 并添加 Content-Length 头让浏览器知道音频总长度
         return StreamingResponse(
-            BytesIO(audio_data),
+            aiter_file_chunks(body, content_length, settings.stream_chunk_size),
+            status_code=status_code,
             media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": f"inline; filename*=UTF-8''{encoded_filename}.mp3",
-                "Content-Length": str(len(audio_data)),
-                "Accept-Ranges": "bytes",
-                "Cache-Control": "public, max-age=3600"
-            }
+            headers=headers
         )
     
     except HTTPException:
@@ -411,7 +794,15 @@ async def generate_podcast(request: GenerateRequest):
     - **topic**: 播客主题 (5-500字符)
     - **style**: 播客风格 (单人脱口秀/双人对话/故事叙述)
     - **duration_minutes**: 目标时长 (3-15分钟)
+    - **use_cache**: 是否复用相同参数的 Gemini 生成结果 (默认 true)
+    
+    任务队列已满时返回 429
     """
+    from app.tasks.process_podcast import start_processing_task, job_scheduler
+    
+    if job_scheduler.is_full():
+        raise queue_full_error()
+    
     try:
         # 1. 创建 podcast 和 job 记录
         podcast_id = str(uuid.uuid4())
@@ -428,7 +819,7 @@ async def generate_podcast(request: GenerateRequest):
             "status": "processing"
         }
         
-        success = data_service.save_podcast(podcast_data)
+        success = await data_service.save_podcast_async(podcast_data)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -444,31 +835,38 @@ async def generate_podcast(request: GenerateRequest):
                 "topic": request.topic,
                 "style": request.style,
                 "duration_minutes": request.duration_minutes,
-                "language": request.language
+                "language": request.language,
+                "use_cache": request.use_cache
             },
             "status": "pending",
             "progress": 0
         }
         
-        success = data_service.save_job(job_data)
+        success = await data_service.save_job_async(job_data)
         if not success:
             # 回滚
-            data_service.delete_podcast(podcast_id)
+            await data_service.delete_podcast_async(podcast_id)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="保存任务记录失败"
             )
         
-        # 2. 启动后台 AI 生成任务
-        from app.tasks.process_podcast import start_processing_task
-        start_processing_task(podcast_id, job_id, None)  # s3_key 为 None（无需下载文件）
+        # 2. 提交后台 AI 生成任务
+        try:
+            position = start_processing_task(podcast_id, job_id, None)  # s3_key 为 None（无需下载文件）
+        except QueueFull:
+            # 回滚
+            await data_service.delete_job_async(job_id)
+            await data_service.delete_podcast_async(podcast_id)
+            raise queue_full_error()
         
         # 3. 返回响应
         return UploadResponse(
             podcast_id=podcast_id,
             job_id=job_id,
             status="processing",
-            message=f"正在生成播客：{title}"
+            message=f"正在生成播客：{title}",
+            queue_position=position
         )
     
     except HTTPException:
@@ -25,18 +25,63 @@ class Settings(BaseSettings):
     elevenlabs_voice_id: str = "JBFqnCBsd6RMkjVDRZzb"  # 默认语音ID
     elevenlabs_model_id: str = "eleven_v3"  # v3 模型，支持对话功能
     elevenlabs_output_format: str = "mp3_44100_128"
+    tts_chunk_chars: int = 2500  # 长稿件分段合成时每段的最大字符数（eleven_v3 单次请求上限 3000）
+    tts_max_concurrency: int = 4  # 同时进行的 TTS 请求数（所有任务共享）
+    audio_spool_max_memory: int = 4 * 1024 * 1024  # 合成结果超过该大小时转存到 temp_dir 下的临时文件再上传
+    tts_cache_enabled: bool = True  # 是否缓存 TTS 合成结果
+    tts_cache_max_bytes: int = 512 * 1024 * 1024  # 本地 TTS 缓存上限（512MB）
+    tts_cache_s3: bool = True  # 是否同时把合成结果保存到 S3（多实例 / 重新部署后共享）
+    tts_cache_s3_prefix: str = "tts-cache"  # S3 中 TTS 缓存的键前缀
     
     # Gemini API 配置
     gemini_api_key: str = ""
     gemini_model: str = "gemini-2.5-flash-lite"
     gemini_api_url: str = "https://aiplatform.googleapis.com/v1/publishers/google/models"
+    gemini_http2: bool = True  # 安装了 h2 时使用 HTTP/2（多个请求复用同一连接）
+    gemini_max_connections: int = 100  # 连接池最大连接数
+    gemini_max_keepalive_connections: int = 50  # 空闲时保留的长连接数
+    gemini_keepalive_expiry: float = 60.0  # 空闲连接保留时间（秒）
+    gemini_connect_timeout: float = 10.0  # 建立连接超时（秒）
+    gemini_read_timeout: float = 180.0  # 等待生成结果超时（秒）
+    gemini_write_timeout: float = 30.0  # 发送请求体超时（秒）
+    gemini_pool_timeout: float = 30.0  # 等待连接池空闲连接超时（秒）
+    script_streaming: bool = True  # AI 生成时流式接收稿件，每个完整的说话者轮次立即开始合成音频
+    llm_cache_enabled: bool = True  # 是否缓存 Gemini 生成结果（单个请求可通过 use_cache=false 跳过）
+    llm_cache_ttl: int = 7 * 24 * 3600  # 缓存有效期（秒）
+    llm_cache_max_entries: int = 500  # 最多缓存的响应数
     
     # 数据目录配置
     data_dir: Path = Path(__file__).parent.parent / "data"
     temp_dir: Path = Path(__file__).parent.parent / "temp"
     
+    # 数据存储后端配置
+    data_backend: str = "json"  # json / journal / sqlite
+    journal_compact_threshold: int = 1000  # 日志记录数达到该值（且不少于记录总数）时压缩为快照
+    journal_fsync: bool = False  # 每次追加后是否 fsync（更安全但更慢）
+    sqlite_db_name: str = "echocast.db"  # SQLite 数据库文件名（位于 data_dir 下）
+    
+    # 音频流式传输配置
+    stream_chunk_size: int = 64 * 1024  # 每次向客户端发送的数据块大小（字节）
+    audio_cache_enabled: bool = True  # 是否在本地磁盘缓存热门音频
+    audio_cache_max_bytes: int = 1024 * 1024 * 1024  # 音频缓存上限（1GB）
+    
+    # 后台任务调度
+    job_workers: int = 2  # 同时处理的任务数（调用 Gemini / ElevenLabs 的并发上限）
+    job_queue_max: int = 100  # 最多排队任务数，超出返回 429
+    job_events_heartbeat: float = 15.0  # SSE / WebSocket 无事件时发送心跳的间隔（秒）
+    job_events_history: int = 50  # 每个任务保留的最近事件数（断线重连时补发）
+    job_events_max_jobs: int = 1000  # 事件总线最多记录的任务数
+    job_progress_flush_delay: float = 1.0  # 任务进度更新合并后延迟写入的时间（秒，0 表示每次更新都立即写入）
+    io_max_workers: int = 32  # async 路由中阻塞操作（S3 请求、数据文件读写）专用线程池的线程数
+    
     # 文件上传限制
     max_upload_size: int = 100 * 1024 * 1024  # 100MB
+    upload_part_size: int = 8 * 1024 * 1024  # S3 分段上传每段大小（S3 要求除最后一段外不小于 5MB）
+    upload_max_concurrency: int = 4  # 同时上传的分段数
+    presigned_upload_expires: int = 3600  # 直传 S3 的预签名表单有效期（秒）
+    extract_max_chars: int = 100000  # 文档提取的文本达到该长度后停止（足够约 110 分钟的音频），0 表示不限制
+    pdf_extract_workers: int = 2  # 并行提取 PDF 文本的进程数（0 表示在任务线程内提取）
+    pdf_pages_per_batch: int = 16  # 每批交给子进程提取的页数
     allowed_extensions: list = [".txt", ".pdf", ".doc", ".docx", ".mp3", ".wav", ".mp4", ".mov"]
     
     class Config:
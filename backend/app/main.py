@@ -1,17 +1,40 @@
 """
 EchoCast FastAPI 应用入口
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import podcasts, jobs
+from app.utils.s3_storage import audio_cache
+from app.tasks.process_podcast import job_scheduler
+from app.services.tts_cache import tts_cache
+from app.services.llm_cache import llm_cache
+from app.services.job_events import job_events
+from app.services.ai_service import ai_service
+from app.services.text_extractor import pdf_extractor
+from app.services.data_service import data_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时迁移旧记录中的稿件、开启任务工作线程并恢复上次未完成的任务；退出时停止接收新任务，写入缓冲中的任务进度，关闭异步 HTTP 连接池和文本提取进程池"""
+    data_service.migrate_text_blobs()
+    job_scheduler.start()
+    yield
+    # 正在执行的任务不等待，下次启动时重新排队
+    job_scheduler.stop(timeout=0)
+    data_service.job_buffer.close()
+    await ai_service.aclose()
+    pdf_extractor.shutdown()
+
 
 # 创建 FastAPI 应用实例
 app = FastAPI(
     title=settings.app_name,
     description="AI-powered podcast generation platform",
     version="1.0.0 (Demo)",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # 注册路由
@@ -60,7 +83,14 @@ async def health_check():
         "status": "healthy",
         "service": settings.app_name,
         "data_dir": str(settings.data_dir),
-        "temp_dir": str(settings.temp_dir)
+        "temp_dir": str(settings.temp_dir),
+        "audio_cache": audio_cache.stats(),
+        "jobs": job_scheduler.stats(),
+        "tts_cache": tts_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "job_events": job_events.stats(),
+        "job_progress_buffer": data_service.job_buffer.stats(),
+        "pdf_extractor": pdf_extractor.stats()
     }
 
 
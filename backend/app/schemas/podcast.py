@@ -1,8 +1,9 @@
 """
 Podcast 相关的 Pydantic 模型
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import Optional, List
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -15,11 +16,59 @@ class PodcastResponse(BaseModel):
     transcript: Optional[str] = None
     duration_seconds: Optional[int] = None
     file_size_bytes: Optional[int] = None
-    status: str = Field(description="processing, completed, failed")
+    status: str = Field(description="uploading, processing, completed, failed")
     created_at: str
     updated_at: str
 
 
+class PodcastSummary(BaseModel):
+    """播客列表项模型（不含稿件；需要时通过 fields 参数指定）"""
+    id: str
+    title: str
+    original_filename: str
+    audio_url: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    file_size_bytes: Optional[int] = None
+    status: str = Field(description="uploading, processing, completed, failed")
+    created_at: str
+    updated_at: str
+
+
+class PodcastPage(BaseModel):
+    """游标分页响应模型"""
+    items: List[PodcastSummary]
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标，没有更多数据时为空")
+
+
+# 列表接口可以通过 fields 参数选择的字段，默认返回 PodcastSummary 的字段
+PODCAST_FIELDS = tuple(PodcastResponse.model_fields)
+PODCAST_SUMMARY_FIELDS = tuple(PodcastSummary.model_fields)
+
+
+class PodcastItem(TypedDict, total=False):
+    """列表项的序列化结构：字段同 PodcastResponse，按 fields 参数只包含其中一部分"""
+    id: str
+    title: str
+    original_filename: str
+    audio_url: Optional[str]
+    transcript: Optional[str]
+    duration_seconds: Optional[int]
+    file_size_bytes: Optional[int]
+    status: str
+    created_at: str
+    updated_at: str
+
+
+class PodcastPageItems(TypedDict):
+    items: List[PodcastItem]
+    next_cursor: Optional[str]
+
+
+# 预先构建的序列化器：列表接口直接输出 JSON 字节，不再逐项创建和校验 Pydantic 模型
+podcast_list_adapter = TypeAdapter(List[PodcastItem])
+podcast_page_adapter = TypeAdapter(PodcastPageItems)
+
+
 class JobResponse(BaseModel):
     """任务响应模型"""
     id: str
@@ -28,7 +77,12 @@ class JobResponse(BaseModel):
     inputs: Optional[dict] = Field(default=None, description="任务输入参数")
     status: str = Field(description="pending, processing, completed, failed")
     progress: int = Field(default=0, ge=0, le=100, description="处理进度 0-100")
+    status_message: Optional[str] = Field(default=None, description="当前处理步骤的说明")
     error_message: Optional[str] = None
+    queue_position: Optional[int] = Field(default=None, description="排队位置（1 表示下一个执行，0 表示正在执行）")
+    live_audio_url: Optional[str] = Field(default=None, description="合成过程中可以边合成边收听的音频地址")
+    timings: Optional[dict] = Field(default=None, description="耗时统计（秒）：first_audio_seconds, audio_ready_seconds 等（仅 AI 生成任务）")
+    llm_cache: Optional[dict] = Field(default=None, description="Gemini 响应缓存命中情况 {hits, misses, bypassed}（仅 AI 生成任务）")
     created_at: str
     updated_at: str
 
@@ -39,6 +93,23 @@ class UploadResponse(BaseModel):
     job_id: str
     status: str
     message: str = "文件上传成功，正在处理中"
+    queue_position: Optional[int] = Field(default=None, description="排队位置（1 表示下一个执行）")
+
+
+class UploadUrlRequest(BaseModel):
+    """直传 S3 请求模型"""
+    filename: str = Field(description="原始文件名", min_length=1)
+    content_type: Optional[str] = Field(default=None, description="文件 MIME 类型")
+    file_size: Optional[int] = Field(default=None, ge=1, description="文件大小（字节），用于提前校验")
+
+
+class UploadUrlResponse(BaseModel):
+    """直传 S3 响应模型：浏览器用 url + fields 以 multipart/form-data 提交文件"""
+    podcast_id: str
+    s3_key: str
+    url: str
+    fields: dict
+    expires_in: int
 
 
 class GenerateRequest(BaseModel):
@@ -58,6 +129,10 @@ class GenerateRequest(BaseModel):
         default="en",
         description="播客语言：en (English) / zh (Chinese)"
     )
+    use_cache: bool = Field(
+        default=True,
+        description="是否复用相同参数的 Gemini 生成结果（false 时总是重新生成）"
+    )
 
 
 class ApiResponse(BaseModel):
@@ -5,11 +5,28 @@ AI 服务 - ElevenLabs TTS + Gemini AI
 """
 from elevenlabs.client import ElevenLabs
 from app.config import settings
+from app.utils.audio import write_audio_part
+from app.utils.live_audio import LiveAudio, SegmentAssembler
+from app.utils.script_splitter import SPEAKER_PATTERN, speaker_labels, split_script
+from app.services.tts_cache import tts_cache
+from app.services.llm_cache import llm_cache
+from app.utils.blocking import run_blocking
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple, Union
+import asyncio
+import importlib.util
 import io
+import threading
 import httpx
 import json
 
 
+def http2_available() -> bool:
+    """httpx 的 HTTP/2 支持需要额外安装 h2（pip install httpx[http2]）"""
+    return importlib.util.find_spec("h2") is not None
+
+
 class AIService:
     """AI 服务类 - 文本转语音 + AI 生成"""
     
@@ -44,17 +61,71 @@ class AIService:
             "use_speaker_boost": True  # 使用说话者增强
         }
         
+        # 长稿件分段合成的共享线程池（所有任务共用，限制对 ElevenLabs 的并发请求数）
+        self.tts_pool = ThreadPoolExecutor(
+            max_workers=settings.tts_max_concurrency,
+            thread_name_prefix="tts"
+        )
+        
         # Gemini 配置
         self.gemini_api_key = settings.gemini_api_key
         self.gemini_model = settings.gemini_model
         self.gemini_api_url = settings.gemini_api_url
+        
+        # Gemini HTTP 客户端：长期持有并复用连接，避免每次调用重新建立 TCP/TLS 连接
+        self.gemini_limits = httpx.Limits(
+            max_connections=settings.gemini_max_connections,
+            max_keepalive_connections=settings.gemini_max_keepalive_connections,
+            keepalive_expiry=settings.gemini_keepalive_expiry
+        )
+        self.gemini_timeout = httpx.Timeout(
+            connect=settings.gemini_connect_timeout,
+            read=settings.gemini_read_timeout,  # AI 生成需要较长时间
+            write=settings.gemini_write_timeout,
+            pool=settings.gemini_pool_timeout
+        )
+        self.gemini_http2 = settings.gemini_http2 and http2_available()
+        self.http_client = httpx.Client(
+            limits=self.gemini_limits,
+            timeout=self.gemini_timeout,
+            http2=self.gemini_http2
+        )
+        # 异步客户端的连接池绑定事件循环，首次在事件循环中使用时创建
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def get_async_client(self) -> httpx.AsyncClient:
+        """返回当前事件循环使用的异步 HTTP 客户端（换了事件循环时重新创建）"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client.is_closed or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                limits=self.gemini_limits,
+                timeout=self.gemini_timeout,
+                http2=self.gemini_http2
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    async def aclose(self):
+        """关闭异步 HTTP 客户端（应用退出时调用；同步客户端仍可能被未结束的后台任务使用）"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
     
-    def generate_podcast_audio(self, text: str, language: str = "en") -> bytes:
+    def generate_podcast_audio(
+        self,
+        text: str,
+        language: str = "en",
+        voice_id: Optional[str] = None,
+        on_chunk: Optional[Callable[[bytes], None]] = None
+    ) -> bytes:
         """
         生成播客音频
         
         Args:
             text: 要转换为语音的文本
+            voice_id: 指定语音（默认使用该语言的 primary 声音）
+            on_chunk: 每收到一块音频数据回调一次（边合成边播放）
         
         Returns:
             音频数据（字节）
@@ -68,30 +139,35 @@ class AIService:
             print(f"   语言: {language}")
             
             # 根据语言选择语音
-            voice_id = self.voice_mappings.get(language, self.voice_mappings["en"])["primary"]
+            voice_id = voice_id or self.voice_mappings.get(language, self.voice_mappings["en"])["primary"]
             print(f"   语音ID: {voice_id}")
             print(f"   模型: {self.model_id}")
             
             # 调用 ElevenLabs API（添加语音质量设置）
             from elevenlabs import VoiceSettings
             
-            audio_generator = self.client.text_to_speech.convert(
-                text=text,
-                voice_id=voice_id,
-                model_id=self.model_id,
-                output_format=self.output_format,
-                voice_settings=VoiceSettings(
-                    stability=self.voice_settings["stability"],
-                    similarity_boost=self.voice_settings["similarity_boost"],
-                    use_speaker_boost=self.voice_settings["use_speaker_boost"]
+            def synthesize() -> bytes:
+                audio_generator = self.client.text_to_speech.convert(
+                    text=text,
+                    voice_id=voice_id,
+                    model_id=self.model_id,
+                    output_format=self.output_format,
+                    voice_settings=VoiceSettings(
+                        stability=self.voice_settings["stability"],
+                        similarity_boost=self.voice_settings["similarity_boost"],
+                        use_speaker_boost=self.voice_settings["use_speaker_boost"]
+                    )
                 )
-            )
-            
-            # 收集音频数据
-            audio_data = b''
-            for chunk in audio_generator:
-                audio_data += chunk
+                
+                # 收集音频数据（最后一次性拼接，避免逐块累加时反复复制）
+                chunks = []
+                for chunk in audio_generator:
+                    chunks.append(chunk)
+                    if on_chunk:
+                        on_chunk(chunk)
+                return b"".join(chunks)
             
+            audio_data = self._synthesize_cached("tts", [(text, voice_id)], synthesize, on_chunk)
             print(f"✅ 音频生成成功！大小: {len(audio_data)} bytes")
             return audio_data
         
@@ -99,6 +175,37 @@ class AIService:
             print(f"❌ 音频生成失败: {e}")
             raise Exception(f"ElevenLabs API 调用失败: {str(e)}")
     
+    def _synthesize_cached(
+        self,
+        kind: str,
+        segments: list,
+        synthesize: Callable[[], bytes],
+        on_chunk: Optional[Callable[[bytes], None]] = None
+    ) -> bytes:
+        """
+        带缓存的合成：按 (接口, 文本, 声音, 模型, 输出格式, 语音参数) 查找已合成的音频
+        
+        Args:
+            kind: 合成接口（tts / dialogue）
+            segments: [(文本, voice_id), ...]
+            synthesize: 未命中时调用的合成函数（自行回调 on_chunk）
+            on_chunk: 命中缓存时用整段音频回调一次
+        """
+        if not settings.tts_cache_enabled:
+            return synthesize()
+        
+        key = tts_cache.make_key(kind, segments, self.model_id, self.output_format, self.voice_settings)
+        audio_data = tts_cache.get(key)
+        if audio_data:
+            print(f"♻️  命中 TTS 缓存: {key[:12]} ({len(audio_data)} bytes)")
+            if on_chunk:
+                on_chunk(audio_data)
+            return audio_data
+        
+        audio_data = synthesize()
+        tts_cache.put(key, audio_data)
+        return audio_data
+    
     def generate_conversation_audio(
         self, 
         text_segments: list[tuple[str, str]] = None
@@ -163,7 +270,96 @@ class AIService:
             print(f"❌ 音频转录失败: {e}")
             raise Exception(f"ElevenLabs 转录 API 调用失败: {str(e)}")
     
-    def _call_gemini_api(self, prompt: str, temperature: float = 0.7, max_tokens: int = 4000) -> str:
+    def _gemini_request(self, prompt: str, temperature: float, max_tokens: int, stream: bool = False) -> Tuple[str, dict]:
+        """构建 Gemini 请求的 URL 和请求体（stream=True 时使用 streamGenerateContent 的 SSE 接口）"""
+        # 构建 API URL (参考 TypeScript 第68行)
+        if stream:
+            url = f"{self.gemini_api_url}/{self.gemini_model}:streamGenerateContent?alt=sse&key={self.gemini_api_key}"
+        else:
+            url = f"{self.gemini_api_url}/{self.gemini_model}:generateContent?key={self.gemini_api_key}"
+        
+        # 构建请求体 (参考 TypeScript 第70-76行)
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [{"text": prompt}]
+                }
+            ],
+            "generationConfig": {
+                "temperature": temperature,
+                "maxOutputTokens": max_tokens
+            }
+        }
+        
+        print(f"🤖 调用 Gemini API...")
+        print(f"   模型: {self.gemini_model}")
+        print(f"   提示词长度: {len(prompt)} 字符")
+        return url, payload
+    
+    def _gemini_cache_lookup(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        use_cache: bool,
+        cache_stats: Optional[dict]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        查找 Gemini 响应缓存
+        
+        Returns:
+            (缓存键, 缓存的文本)；缓存关闭时缓存键为 None，未命中时文本为 None
+        """
+        if not settings.llm_cache_enabled:
+            return None, None
+        
+        cache_key = llm_cache.make_key(self.gemini_model, prompt, temperature, max_tokens)
+        cached = llm_cache.get(cache_key) if use_cache else None
+        if cache_stats is not None:
+            outcome = "bypassed" if not use_cache else ("hits" if cached else "misses")
+            cache_stats[outcome] = cache_stats.get(outcome, 0) + 1
+        if cached:
+            print(f"♻️  命中 Gemini 缓存: {cache_key[:12]} ({len(cached)} 字符)")
+        return cache_key, cached
+    
+    @staticmethod
+    def _extract_text(data: dict) -> str:
+        """从 generateContent 响应（或流式响应的一个事件）中取出文本"""
+        # 解析响应 (参考 TypeScript 第83行)
+        return (data.get("candidates") or [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+    
+    def _parse_gemini_response(self, response: httpx.Response, cache_key: Optional[str]) -> str:
+        """检查响应状态并取出生成的文本，成功且 cache_key 不为空时写入缓存"""
+        response.raise_for_status()
+        
+        content = self._extract_text(response.json())
+        
+        if not content:
+            raise Exception("Gemini API 返回空响应")
+        
+        print(f"✅ Gemini API 调用成功！生成文本长度: {len(content)} 字符")
+        if cache_key:
+            llm_cache.put(cache_key, content)
+        return content
+    
+    def _gemini_error(self, e: Exception) -> Exception:
+        """把请求异常转换为统一的错误信息"""
+        if isinstance(e, httpx.HTTPStatusError):
+            error_msg = f"HTTP错误 {e.response.status_code}: {e.response.text}"
+            print(f"❌ Gemini API 调用失败: {error_msg}")
+            return Exception(error_msg)
+        print(f"❌ Gemini API 调用异常: {e}")
+        return Exception(f"Gemini API 调用失败: {str(e)}")
+    
+    def _call_gemini_api(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> str:
         """
         调用 Gemini API 生成文本
         参考 TypeScript 模式: prepGo_tool/src/lib/ai-service.ts
@@ -172,6 +368,8 @@ class AIService:
             prompt: 输入提示词
             temperature: 生成温度 (0.0-1.0)
             max_tokens: 最大输出 token 数
+            use_cache: 是否使用响应缓存（False 时总是重新生成，结果仍会写入缓存）
+            cache_stats: 可选的统计字典，累加 hits / misses / bypassed
         
         Returns:
             生成的文本内容
@@ -179,72 +377,120 @@ class AIService:
         Raises:
             Exception: 如果 API 调用失败
         """
+        cache_key, cached = self._gemini_cache_lookup(prompt, temperature, max_tokens, use_cache, cache_stats)
+        if cached:
+            return cached
+        
         try:
-            # 构建 API URL (参考 TypeScript 第68行)
-            url = f"{self.gemini_api_url}/{self.gemini_model}:generateContent?key={self.gemini_api_key}"
-            
-            # 构建请求体 (参考 TypeScript 第70-76行)
-            payload = {
-                "contents": [
-                    {
-                        "role": "user",
-                        "parts": [{"text": prompt}]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "maxOutputTokens": max_tokens
-                }
-            }
-            
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
-            print(f"🤖 调用 Gemini API...")
-            print(f"   模型: {self.gemini_model}")
-            print(f"   提示词长度: {len(prompt)} 字符")
-            
-            # 发送 POST 请求
-            response = httpx.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=180.0  # 180秒超时（AI生成需要更长时间）
-            )
-            
-            # 检查响应状态
-            response.raise_for_status()
-            
-            # 解析响应 (参考 TypeScript 第83行)
-            data = response.json()
-            content = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+            url, payload = self._gemini_request(prompt, temperature, max_tokens)
+            response = self.http_client.post(url, json=payload)
+            return self._parse_gemini_response(response, cache_key)
+        except Exception as e:
+            raise self._gemini_error(e)
+    
+    def _stream_gemini_api(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> Iterator[str]:
+        """
+        流式调用 Gemini API（streamGenerateContent，SSE），边生成边产出文本片段
+        
+        与 _call_gemini_api 共用响应缓存：命中时一次性产出缓存的文本，完整生成后写入缓存
+        
+        Raises:
+            Exception: 如果 API 调用失败（可能在已经产出部分文本之后）
+        """
+        cache_key, cached = self._gemini_cache_lookup(prompt, temperature, max_tokens, use_cache, cache_stats)
+        if cached:
+            yield cached
+            return
+        
+        pieces = []
+        try:
+            url, payload = self._gemini_request(prompt, temperature, max_tokens, stream=True)
+            with self.http_client.stream("POST", url, json=payload) as response:
+                if response.is_error:
+                    response.read()
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text = self._extract_text(json.loads(line[5:]))
+                    if text:
+                        pieces.append(text)
+                        yield text
             
-            if not content:
+            if not pieces:
                 raise Exception("Gemini API 返回空响应")
-            
-            print(f"✅ Gemini API 调用成功！生成文本长度: {len(content)} 字符")
-            return content
+        except Exception as e:
+            raise self._gemini_error(e)
         
-        except httpx.HTTPStatusError as e:
-            error_msg = f"HTTP错误 {e.response.status_code}: {e.response.text}"
-            print(f"❌ Gemini API 调用失败: {error_msg}")
-            raise Exception(error_msg)
+        content = "".join(pieces)
+        print(f"✅ Gemini 流式生成完成！生成文本长度: {len(content)} 字符")
+        if cache_key:
+            llm_cache.put(cache_key, content)
+    
+    async def _call_gemini_api_async(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 4000,
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> str:
+        """
+        _call_gemini_api 的异步版本：在事件循环中等待响应，不占用线程
+        
+        缓存的读取和写入都是磁盘操作，交给 io_executor 执行，不阻塞事件循环
+        """
+        cache_key, cached = await run_blocking(
+            self._gemini_cache_lookup, prompt, temperature, max_tokens, use_cache, cache_stats
+        )
+        if cached:
+            return cached
+        
+        try:
+            url, payload = self._gemini_request(prompt, temperature, max_tokens)
+            response = await self.get_async_client().post(url, json=payload)
+            content = self._parse_gemini_response(response, None)
         except Exception as e:
-            print(f"❌ Gemini API 调用异常: {e}")
-            raise Exception(f"Gemini API 调用失败: {str(e)}")
+            raise self._gemini_error(e)
+        
+        if cache_key:
+            await run_blocking(llm_cache.put, cache_key, content)
+        return content
     
-    def generate_dialogue_audio(self, script: str, language: str = "en") -> bytes:
+    def generate_dialogue_audio(
+        self,
+        script: str,
+        language: str = "en",
+        speaker_voice_map: Optional[dict] = None,
+        on_chunk: Optional[Callable[[bytes], None]] = None
+    ) -> bytes:
         """
         为对话生成多声音音频（使用 text_to_dialogue API）
         
         Args:
             script: 播客稿件（可能包含多个说话者）
             language: 语言代码 (en/zh)
+            speaker_voice_map: 预先分配好的 说话者 -> voice_id（分段合成时保证各段声音一致）
+            on_chunk: 每收到一块音频数据回调一次（边合成边播放）
         
         Returns:
             音频数据（字节）
         """
+        delivered = [False]  # 是否已经回调过数据（之后回退重新合成时不再回调，避免重复）
+        
+        def deliver(chunk: bytes):
+            delivered[0] = True
+            on_chunk(chunk)
+        
+        sink = deliver if on_chunk else None
+        
         try:
             from elevenlabs import DialogueInput
             
@@ -252,28 +498,45 @@ class AIService:
             print(f"   语言: {language}")
             
             # 解析稿件，分离不同说话者
-            dialogue_inputs = self._parse_dialogue_script(script, language)
+            dialogue_inputs = self._parse_dialogue_script(script, language, speaker_voice_map)
+            
+            if len(dialogue_inputs) == 1 and speaker_voice_map:
+                # 分段后只剩一个轮次：用该说话者的声音合成（不含标签）
+                return self.generate_podcast_audio(
+                    dialogue_inputs[0].text, language, voice_id=dialogue_inputs[0].voice_id, on_chunk=sink
+                )
             
             if len(dialogue_inputs) <= 1:
                 # 如果只有一个说话者，使用普通TTS
                 print("   检测到单人播客，使用标准TTS")
-                return self.generate_podcast_audio(script, language)
+                return self.generate_podcast_audio(script, language, on_chunk=sink)
             
             print(f"   检测到 {len(dialogue_inputs)} 段对话")
             
             # 使用 text_to_dialogue API
             # 注意：text_to_dialogue 不支持全局 voice_settings 参数
             # 语音设置需要在创建 DialogueInput 时单独配置
-            audio_generator = self.client.text_to_dialogue.convert(
-                inputs=dialogue_inputs,
-                model_id=self.model_id,
-                output_format=self.output_format
-            )
+            def synthesize() -> bytes:
+                audio_generator = self.client.text_to_dialogue.convert(
+                    inputs=dialogue_inputs,
+                    model_id=self.model_id,
+                    output_format=self.output_format
+                )
+                
+                # 收集音频数据（最后一次性拼接，避免逐块累加时反复复制）
+                chunks = []
+                for chunk in audio_generator:
+                    chunks.append(chunk)
+                    if sink:
+                        sink(chunk)
+                return b"".join(chunks)
             
-            # 收集音频数据
-            audio_data = b''
-            for chunk in audio_generator:
-                audio_data += chunk
+            audio_data = self._synthesize_cached(
+                "dialogue",
+                [(item.text, item.voice_id) for item in dialogue_inputs],
+                synthesize,
+                sink
+            )
             
             print(f"✅ 多声音音频生成成功！大小: {len(audio_data)} bytes")
             return audio_data
@@ -281,15 +544,221 @@ class AIService:
         except Exception as e:
             print(f"❌ 多声音音频生成失败: {e}")
             print("   回退到单声音TTS")
-            return self.generate_podcast_audio(script, language)
+            return self.generate_podcast_audio(script, language, on_chunk=None if delivered[0] else sink)
+    
+    def _live_assembler(self, live: Optional[LiveAudio]) -> Optional[SegmentAssembler]:
+        """边合成边播放只支持 MP3（可以按帧拼接）；其他格式合成完成后一次性写入"""
+        if live is not None and self.output_format.startswith("mp3"):
+            return SegmentAssembler(live)
+        return None
     
-    def _parse_dialogue_script(self, script: str, language: str) -> list:
+    def _submit_segment(
+        self,
+        index: int,
+        chunk: str,
+        language: str,
+        speaker_voice_map: Optional[dict],
+        assembler: Optional[SegmentAssembler]
+    ) -> Future:
+        """提交第 index 段的合成任务；边合成边播放时把收到的数据按顺序写入 assembler"""
+        if assembler is None:
+            return self.tts_pool.submit(self.generate_dialogue_audio, chunk, language, speaker_voice_map)
+        
+        def run() -> bytes:
+            audio_data = self.generate_dialogue_audio(
+                chunk, language, speaker_voice_map, on_chunk=partial(assembler.feed, index)
+            )
+            assembler.finish_segment(index)
+            return audio_data
+        return self.tts_pool.submit(run)
+    
+    def _write_segments(
+        self,
+        futures: list,
+        output: BinaryIO,
+        live: Optional[LiveAudio] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        按稿件顺序等待各段合成完成，拼接写入 output，返回写入的字节数
+        
+        写入后立即释放该段（futures 中对应位置置为 None），内存中只保留尚未写入的段。
+        live 不为空时同时把该段追加到实时音频（非 MP3 格式没有逐块写入，在这里按段写入）。
+        """
+        size = 0
+        for index, future in enumerate(futures):
+            part = future.result()
+            futures[index] = None
+            size += write_audio_part(part, self.output_format, output, index)
+            if live is not None:
+                live.append(part)
+            if on_progress:
+                on_progress(index + 1, len(futures))
+        return size
+    
+    def generate_long_audio(
+        self,
+        script: str,
+        language: str = "en",
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        live: Optional[LiveAudio] = None,
+        output: Optional[BinaryIO] = None
+    ) -> Union[bytes, int]:
+        """
+        生成长稿件音频：分段并发合成后按帧拼接
+        
+        稿件按说话者轮次 / 句子边界切成不超过 tts_chunk_chars 的片段，
+        在共享线程池中并发合成（最多 tts_max_concurrency 个请求），
+        再按原顺序拼接为一个音频文件（MP3 按帧拼接，不重新编码）。
+        总耗时取决于片段长度而不是稿件总长度。
+        
+        Args:
+            script: 播客稿件（纯文本或带说话者标签的对话）
+            language: 语言代码 (en/zh)
+            on_progress: 每完成一个片段回调一次 (已完成数, 总数)
+            live: 边合成边播放时写入的 LiveAudio（按稿件顺序写入音频帧，不负责结束）
+            output: 拼接结果的写入目标（例如 audio_spool 返回的临时文件），各段完成后依次写入并释放
+        
+        Returns:
+            音频数据（字节）；指定 output 时返回写入的字节数
+        """
+        assembler = self._live_assembler(live)
+        chunks = split_script(script, settings.tts_chunk_chars)
+        if len(chunks) <= 1:
+            if assembler:
+                audio_data = self.generate_dialogue_audio(script, language, on_chunk=partial(assembler.feed, 0))
+            else:
+                audio_data = self.generate_dialogue_audio(script, language)
+                if live is not None:
+                    live.append(audio_data)
+            if audio_data and on_progress:
+                on_progress(1, 1)
+            if output is None:
+                return audio_data
+            if not audio_data:
+                return 0
+            output.write(audio_data)
+            return len(audio_data)
+        
+        # 整篇稿件统一分配声音，避免某段从第二个说话者开始时换了声音
+        speaker_voice_map = self._assign_voices(speaker_labels(script), language)
+        print(f"✂️  稿件 {len(script)} 字符，切分为 {len(chunks)} 段并发合成")
+        
+        futures = [
+            self._submit_segment(index, chunk, language, speaker_voice_map, assembler)
+            for index, chunk in enumerate(chunks)
+        ]
+        target = output if output is not None else io.BytesIO()
+        try:
+            size = self._write_segments(futures, target, live if assembler is None else None, on_progress)
+        except Exception:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+            raise
+        
+        print(f"✅ {len(futures)} 段音频拼接完成！大小: {size} bytes")
+        return size if output is not None else target.getvalue()
+    
+    def generate_streaming_audio(
+        self,
+        turns: Iterable[str],
+        language: str = "en",
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        live: Optional[LiveAudio] = None,
+        output: Optional[BinaryIO] = None
+    ) -> Union[bytes, int]:
+        """
+        边生成稿件边合成音频
+        
+        turns 可以是正在生成的稿件的轮次迭代器（见 iter_turns）：拿到完整的轮次后，
+        只要本次合成占用的请求数未达到 tts_max_concurrency 就立即提交到共享线程池合成；
+        请求都在进行中时先累积后续轮次，下次提交时合并为一个请求（不超过 tts_chunk_chars），
+        避免生成速度超过合成速度时积压大量短请求。全部完成后按原顺序拼接。
+        说话者按出现顺序分配声音（与 generate_long_audio 一致）。
+        
+        Args:
+            turns: 说话者轮次（"名字: 内容"）或段落
+            language: 语言代码 (en/zh)
+            on_progress: 每完成一个片段回调一次 (已完成数, 已提交数)，在合成线程中调用
+            live: 边合成边播放时写入的 LiveAudio（按稿件顺序写入音频帧，不负责结束）
+            output: 拼接结果的写入目标（例如 audio_spool 返回的临时文件）
+        
+        Returns:
+            音频数据（字节），没有任何内容时返回空字节；指定 output 时返回写入的字节数
+        """
+        assembler = self._live_assembler(live)
+        labels = []
+        pending = []
+        futures = []
+        condition = threading.Condition()
+        completed = [0]  # 成功完成的片段数
+        callbacks = [0]  # 已执行完的回调数
+        
+        def on_done(future):
+            with condition:
+                if not future.cancelled() and future.exception() is None:
+                    completed[0] += 1
+                    if on_progress:
+                        on_progress(completed[0], len(futures))
+                callbacks[0] += 1
+                condition.notify_all()
+        
+        def submit_pending():
+            speaker_voice_map = self._assign_voices(labels, language) if labels else None
+            for chunk in split_script("\n".join(pending), settings.tts_chunk_chars):
+                future = self._submit_segment(len(futures), chunk, language, speaker_voice_map, assembler)
+                with condition:
+                    futures.append(future)
+                future.add_done_callback(on_done)
+            pending.clear()
+        
+        target = output if output is not None else io.BytesIO()
+        try:
+            for turn in turns:
+                for label in speaker_labels(turn):
+                    if label not in labels:
+                        labels.append(label)
+                pending.append(turn)
+                
+                with condition:
+                    in_flight = len(futures) - callbacks[0]
+                pending_chars = sum(len(item) + 1 for item in pending)
+                if in_flight < settings.tts_max_concurrency or pending_chars >= settings.tts_chunk_chars:
+                    submit_pending()
+            if pending:
+                submit_pending()
+            
+            size = self._write_segments(futures, target, live if assembler is None else None)
+            # 等待进度回调执行完，返回后调用方不会再收到回调
+            with condition:
+                condition.wait_for(lambda: callbacks[0] == len(futures))
+        except Exception:
+            for future in futures:
+                if future is not None:
+                    future.cancel()
+            raise
+        
+        if futures:
+            print(f"✅ 流式合成完成！{len(futures)} 段音频拼接完成，大小: {size} bytes")
+        return size if output is not None else target.getvalue()
+    
+    def _assign_voices(self, labels: list, language: str) -> dict:
+        """按出现顺序给说话者分配声音：第一个 primary，第二个 secondary，之后交替"""
+        voices = self.voice_mappings.get(language, self.voice_mappings["en"])
+        return {
+            label: voices["primary"] if index % 2 == 0 else voices["secondary"]
+            for index, label in enumerate(labels)
+        }
+    
+    def _parse_dialogue_script(self, script: str, language: str, speaker_voice_map: Optional[dict] = None) -> list:
         """
         解析对话稿件，分离不同说话者
         
         Args:
             script: 播客稿件
             language: 语言代码
+            speaker_voice_map: 预先分配好的 说话者 -> voice_id（可选）
         
         Returns:
             DialogueInput 列表
@@ -314,14 +783,13 @@ class AIService:
         # 识别模式：任何以 "名字:" 或 "名字：" 开头的行
         # 支持: Alex:, Ben:, Host A:, 主持人A：等所有格式
         import re
-        # 匹配任意单词（可能包含空格）后跟冒号
-        speaker_pattern = re.compile(r'^([A-Za-z\u4e00-\u9fa5][A-Za-z\u4e00-\u9fa5\s0-9]*?)[:：]\s*(.*)$')
+        speaker_pattern = SPEAKER_PATTERN
         
         print(f"\n📋 开始解析对话脚本...")
         
         # 用于追踪说话者和分配语音
-        speaker_voice_map = {}  # 说话者名字 -> voice_id
-        speaker_order = []  # 记录说话者出现顺序
+        speaker_voice_map = dict(speaker_voice_map or {})  # 说话者名字 -> voice_id
+        speaker_order = list(speaker_voice_map)  # 记录说话者出现顺序
         
         for line in lines:
             line = line.strip()
@@ -403,37 +871,16 @@ class AIService:
         
         return dialogue_inputs
     
-    def generate_script_from_topic(
-        self, 
-        topic: str, 
-        style: str = "Solo Talk Show",
-        duration_minutes: int = 5,
-        language: str = "en"
-    ) -> str:
+    def _script_prompts(self, topic: str, style: str, duration_minutes: int, language: str) -> Tuple[str, str]:
         """
-        根据主题生成播客稿件（两步法：大纲 → 完整稿件）
-        
-        Args:
-            topic: 播客主题
-            style: 播客风格（单人脱口秀/双人对话/故事叙述）
-            duration_minutes: 目标时长（分钟）
+        构建两步生成的提示词
         
         Returns:
-            完整的播客稿件
-        
-        Raises:
-            Exception: 如果生成失败
+            (大纲提示词, 稿件提示词模板)，模板中的 {outline} 替换为生成的大纲
         """
-        print(f"\n📝 开始生成播客稿件...")
-        print(f"   主题: {topic}")
-        print(f"   风格: {style}")
-        print(f"   语言: {language}")
-        print(f"   目标时长: {duration_minutes} 分钟")
-        
-        try:
-            # 语言配置
-            if language == "zh":
-                outline_prompt = f"""你是一位专业的播客编剧。请为以下主题生成一个播客大纲。
+        # 语言配置
+        if language == "zh":
+            outline_prompt = f"""你是一位专业的播客编剧。请为以下主题生成一个播客大纲。
 
 主题：{topic}
 风格：{style}
@@ -452,7 +899,7 @@ class AIService:
 
 请直接输出大纲内容，不要额外的解释。"""
 
-                script_prompt_base = f"""你是一位专业的播客编剧。根据以下大纲，生成一份完整的播客稿件。
+            script_prompt_base = f"""你是一位专业的播客编剧。根据以下大纲，生成一份完整的播客稿件。
 
 主题：{topic}
 风格：{style}
@@ -493,8 +940,8 @@ CRITICAL - 绝对禁止以下内容：
 - 小明先说，小红回应
 
 请直接输出完整稿件。"""
-            else:  # English
-                outline_prompt = f"""You are a professional podcast scriptwriter. Generate a podcast outline for the following topic.
+        else:  # English
+            outline_prompt = f"""You are a professional podcast scriptwriter. Generate a podcast outline for the following topic.
 
 Topic: {topic}
 Style: {style}
@@ -513,7 +960,7 @@ Requirements:
 
 Output the outline directly without extra explanations."""
 
-                script_prompt_base = f"""You are a professional podcast scriptwriter. Based on the following outline, generate a complete podcast script.
+            script_prompt_base = f"""You are a professional podcast scriptwriter. Based on the following outline, generate a complete podcast script.
 
 Topic: {topic}
 Style: {style}
@@ -554,16 +1001,58 @@ Conversation format guidelines:
 - Mike speaks first, Sarah responds
 
 Output the complete script directly."""
+        
+        return outline_prompt, script_prompt_base
+    
+    def generate_script_from_topic(
+        self, 
+        topic: str, 
+        style: str = "Solo Talk Show",
+        duration_minutes: int = 5,
+        language: str = "en",
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> str:
+        """
+        根据主题生成播客稿件（两步法：大纲 → 完整稿件）
+        
+        Args:
+            topic: 播客主题
+            style: 播客风格（单人脱口秀/双人对话/故事叙述）
+            duration_minutes: 目标时长（分钟）
+            use_cache: 是否复用相同提示词的缓存结果
+            cache_stats: 可选的统计字典，记录两次 Gemini 调用的缓存命中 / 未命中次数
+        
+        Returns:
+            完整的播客稿件
+        
+        Raises:
+            Exception: 如果生成失败
+        """
+        print(f"\n📝 开始生成播客稿件...")
+        print(f"   主题: {topic}")
+        print(f"   风格: {style}")
+        print(f"   语言: {language}")
+        print(f"   目标时长: {duration_minutes} 分钟")
+        
+        try:
+            outline_prompt, script_prompt_base = self._script_prompts(topic, style, duration_minutes, language)
             
             print("\n📋 步骤1: 生成大纲...")
-            outline = self._call_gemini_api(outline_prompt, temperature=0.8, max_tokens=2000)
+            outline = self._call_gemini_api(
+                outline_prompt, temperature=0.8, max_tokens=2000,
+                use_cache=use_cache, cache_stats=cache_stats
+            )
             print(f"✅ 大纲生成完成")
             
             # 步骤2: 根据大纲扩展为完整稿件
             script_prompt = script_prompt_base.replace("{outline}", outline)
             
             print("\n✍️  步骤2: 扩展为完整稿件...")
-            script = self._call_gemini_api(script_prompt, temperature=0.7, max_tokens=4000)
+            script = self._call_gemini_api(
+                script_prompt, temperature=0.7, max_tokens=4000,
+                use_cache=use_cache, cache_stats=cache_stats
+            )
             print(f"✅ 完整稿件生成完成")
             
             print(f"\n🎉 播客稿件生成成功！")
@@ -574,6 +1063,65 @@ Output the complete script directly."""
         except Exception as e:
             print(f"❌ 播客稿件生成失败: {e}")
             raise Exception(f"播客稿件生成失败: {str(e)}")
+    
+    def stream_script_from_topic(
+        self,
+        topic: str,
+        style: str = "Solo Talk Show",
+        duration_minutes: int = 5,
+        language: str = "en",
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> Iterator[str]:
+        """
+        generate_script_from_topic 的流式版本：大纲一次性生成（稿件提示词需要完整大纲），
+        稿件边生成边产出文本片段，拼接后与非流式版本的结果相同
+        """
+        print(f"\n📝 开始流式生成播客稿件: 主题={topic}, 风格={style}, 语言={language}, 时长={duration_minutes}分钟")
+        outline_prompt, script_prompt_base = self._script_prompts(topic, style, duration_minutes, language)
+        
+        print("\n📋 步骤1: 生成大纲...")
+        outline = self._call_gemini_api(
+            outline_prompt, temperature=0.8, max_tokens=2000,
+            use_cache=use_cache, cache_stats=cache_stats
+        )
+        
+        print("\n✍️  步骤2: 流式生成完整稿件...")
+        yield from self._stream_gemini_api(
+            script_prompt_base.replace("{outline}", outline), temperature=0.7, max_tokens=4000,
+            use_cache=use_cache, cache_stats=cache_stats
+        )
+    
+    async def generate_script_from_topic_async(
+        self,
+        topic: str,
+        style: str = "Solo Talk Show",
+        duration_minutes: int = 5,
+        language: str = "en",
+        use_cache: bool = True,
+        cache_stats: Optional[dict] = None
+    ) -> str:
+        """generate_script_from_topic 的异步版本（参数和返回值相同），适合在事件循环中并发调用"""
+        print(f"\n📝 开始生成播客稿件（异步）: 主题={topic}, 风格={style}, 语言={language}, 时长={duration_minutes}分钟")
+        
+        try:
+            outline_prompt, script_prompt_base = self._script_prompts(topic, style, duration_minutes, language)
+            
+            outline = await self._call_gemini_api_async(
+                outline_prompt, temperature=0.8, max_tokens=2000,
+                use_cache=use_cache, cache_stats=cache_stats
+            )
+            script = await self._call_gemini_api_async(
+                script_prompt_base.replace("{outline}", outline), temperature=0.7, max_tokens=4000,
+                use_cache=use_cache, cache_stats=cache_stats
+            )
+            
+            print(f"🎉 播客稿件生成成功！最终字数: {len(script)} 字符")
+            return script
+        
+        except Exception as e:
+            print(f"❌ 播客稿件生成失败: {e}")
+            raise Exception(f"播客稿件生成失败: {str(e)}")
 
 
 # 创建全局实例
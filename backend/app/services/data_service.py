@@ -1,27 +1,93 @@
 """
 JSON 数据服务
-提供线程安全的 JSON 文件读写操作
+提供线程安全的 JSON 文件读写操作：写入持有文件锁并原子替换文件，读取不加锁
 """
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, NamedTuple, Optional, Tuple
 from filelock import FileLock
 from datetime import datetime
 from app.config import settings
+from app.services.sorted_index import SortedIndex, sort_key, encode_cursor, decode_cursor
+from app.services.search_index import SearchIndex, podcast_document, needs_reindex
+from app.services.job_events import job_events
+from app.services.write_behind import JobProgressBuffer
+from app.services.text_blobs import TextBlobStore, BLOB_FIELDS
+from app.utils.blocking import run_blocking
+
+
+# mutate 的修改函数：接收记录的副本，返回要合并的字段；返回 None（或空字典）表示不修改
+Mutator = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+# 文件修改时间距加载时间不足该值时，快照不能仅凭 stat 复用：
+# 同一个时钟周期内的两次写入修改时间相同，inode 和大小也可能相同（文件系统时间戳精度为 1 秒时放宽到 2 秒）
+SNAPSHOT_RACY_NS = 20_000_000
+SNAPSHOT_RACY_COARSE_NS = 2_000_000_000
+
+
+class _Snapshot(NamedTuple):
+    """JSON 文件解析后的只读快照（记录只以副本的形式交给调用方）"""
+    key: Tuple[int, int, int]  # (st_ino, st_mtime_ns, st_size)
+    stable: bool  # 文件未变化时（stat 相同）可以直接复用
+    data: dict
+    by_id: Dict[str, Dict[str, Any]]
+
+
+class _PodcastOrder(NamedTuple):
+    """播客快照的排序结果：按创建时间降序的记录列表 + 用于游标定位的有序索引"""
+    snapshot: _Snapshot
+    ordered: List[Dict[str, Any]]
+    index: SortedIndex
+
+
+def _make_snapshot(stat: os.stat_result, stable: bool, data: dict, name: str) -> _Snapshot:
+    by_id = {}
+    for record in data.get(name, []):
+        by_id.setdefault(record.get("id"), record)  # id 重复时与逐条查找一致，取第一条
+    return _Snapshot((stat.st_ino, stat.st_mtime_ns, stat.st_size), stable, data, by_id)
+
+
+class VersionConflict(Exception):
+    """乐观并发检查失败：记录在读取之后已被其他写入修改"""
+
+    def __init__(self, collection: str, record_id: str, expected: int, actual: int):
+        super().__init__(f"{collection}/{record_id} 版本冲突: 期望 {expected}，当前 {actual}")
+        self.collection = collection
+        self.record_id = record_id
+        self.expected = expected
+        self.actual = actual
 
 
 class DataService:
     """JSON 数据服务类"""
     
-    def __init__(self):
-        self.podcasts_file = settings.data_dir / "podcasts.json"
-        self.jobs_file = settings.data_dir / "jobs.json"
+    def __init__(self, data_dir: Optional[Path] = None):
+        self.data_dir = Path(data_dir) if data_dir else settings.data_dir
+        self.podcasts_file = self.data_dir / "podcasts.json"
+        self.jobs_file = self.data_dir / "jobs.json"
         self.podcasts_lock = FileLock(str(self.podcasts_file) + ".lock")
         self.jobs_lock = FileLock(str(self.jobs_file) + ".lock")
         
         # 确保文件存在
         self._ensure_file_exists(self.podcasts_file, {"podcasts": []})
         self._ensure_file_exists(self.jobs_file, {"jobs": []})
+        
+        # 全文搜索索引（首次搜索时构建，之后随写入增量更新）
+        self._search_index: Optional[SearchIndex] = None
+        self._search_index_lock = threading.RLock()
+        
+        # 稿件等大文本保存在 blob 中，记录里只保留哈希（见 text_blobs.py）
+        self.text_blobs = TextBlobStore(self.data_dir / "blobs")
+        
+        # 各数据文件最近一次读取 / 写入的快照（见 _snapshot）
+        self._snapshots: Dict[Path, _Snapshot] = {}
+        self._podcast_order: Optional[_PodcastOrder] = None
+        
+        # 任务进度的写回缓冲：中间进度合并后批量写入（见 write_behind.py）
+        self.job_buffer = JobProgressBuffer(self._write_job_updates, settings.job_progress_flush_delay)
     
     def _ensure_file_exists(self, file_path: Path, default_data: dict):
         """确保 JSON 文件存在"""
@@ -30,55 +96,338 @@ class DataService:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(default_data, f, ensure_ascii=False, indent=2)
     
-    def _read_json(self, file_path: Path, lock: FileLock) -> dict:
-        """读取 JSON 文件（带锁）"""
-        with lock:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                # 文件不存在或损坏，返回默认结构
-                default_data = {"podcasts": []} if "podcasts" in str(file_path) else {"jobs": []}
-                self._ensure_file_exists(file_path, default_data)
-                return default_data
-    
-    def _write_json(self, file_path: Path, lock: FileLock, data: dict):
-        """写入 JSON 文件（带锁）"""
-        with lock:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+    def _snapshot(self, file_path: Path) -> _Snapshot:
+        """
+        读取 JSON 文件的快照（不加锁）
+        
+        写入时先写临时文件再原子替换，读取总能拿到某个完整的版本，不需要等待写入方。
+        文件的 inode / 修改时间 / 大小都没变时直接复用已解析的快照，只有文件被替换后才重新解析
+        （其他进程的写入同样会被发现，多个 worker 进程共用数据目录时也能读到最新内容）。
+        """
+        name = file_path.stem
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                snapshot = self._snapshots.get(file_path)
+                if snapshot is not None and snapshot.stable and snapshot.key == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                    return snapshot
+                
+                loaded_ns = time.time_ns()
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # 文件不存在或损坏，返回默认结构
+            default_data = {name: []}
+            self._ensure_file_exists(file_path, default_data)
+            return _Snapshot((0, 0, 0), False, default_data, {})
+        
+        racy_ns = SNAPSHOT_RACY_COARSE_NS if stat.st_mtime_ns % 1_000_000_000 == 0 else SNAPSHOT_RACY_NS
+        snapshot = _make_snapshot(stat, stat.st_mtime_ns < loaded_ns - racy_ns, data, name)
+        self._snapshots[file_path] = snapshot
+        return snapshot
+    
+    def _load_json(self, file_path: Path) -> dict:
+        """读取 JSON 文件用于修改（调用方持有锁）：记录是快照的副本，可以直接修改"""
+        snapshot = self._snapshot(file_path)
+        name = file_path.stem
+        return {**snapshot.data, name: [dict(record) for record in snapshot.data.get(name, [])]}
+    
+    def _dump_json(self, file_path: Path, data: dict):
+        """
+        写入 JSON 文件（调用方持有锁）
+        
+        先写入同目录下的临时文件，再用 os.replace 原子替换，读取方不会读到写了一半的文件；
+        写入的内容同时成为新的快照，本进程之后的读取不需要重新解析
+        """
+        tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            stat = os.fstat(f.fileno())
+        os.replace(tmp_path, file_path)
+        
+        # 调用方可能还持有（并修改）写入的记录，快照保存副本
+        name = file_path.stem
+        data = {**data, name: [dict(record) for record in data.get(name, [])]}
+        self._snapshots[file_path] = _make_snapshot(stat, True, data, name)
+    
+    def _read_records(self, file_path: Path) -> List[Dict[str, Any]]:
+        """读取集合中的所有记录（副本）"""
+        return [dict(record) for record in self._snapshot(file_path).data.get(file_path.stem, [])]
+    
+    def _read_record(self, file_path: Path, record_id: str) -> Optional[Dict[str, Any]]:
+        """按 id 读取一条记录（副本）"""
+        record = self._snapshot(file_path).by_id.get(record_id)
+        return dict(record) if record is not None else None
+    
+    def _collection_file(self, collection: str) -> Tuple[Path, FileLock]:
+        """集合名（podcasts / jobs）对应的数据文件和文件锁"""
+        if collection == "podcasts":
+            return self.podcasts_file, self.podcasts_lock
+        if collection == "jobs":
+            return self.jobs_file, self.jobs_lock
+        raise ValueError(f"未知的集合: {collection}")
     
     # ========== Podcast 相关操作 ==========
     
     def read_podcasts(self) -> List[Dict[str, Any]]:
         """读取所有播客"""
-        data = self._read_json(self.podcasts_file, self.podcasts_lock)
-        return data.get("podcasts", [])
+        return self._read_records(self.podcasts_file)
     
     def get_podcast(self, podcast_id: str) -> Optional[Dict[str, Any]]:
         """获取单个播客"""
-        podcasts = self.read_podcasts()
-        for podcast in podcasts:
-            if podcast.get("id") == podcast_id:
-                return podcast
+        return self._read_record(self.podcasts_file, podcast_id)
+    
+    def list_podcasts(
+        self,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        分页查询播客列表
+        
+        Args:
+            search: 搜索关键词（匹配标题和文稿）
+            offset: 跳过的记录数
+            limit: 返回的最大记录数
+        
+        Returns:
+            播客列表；无搜索词时按创建时间降序，有搜索词时按相关度降序
+        """
+        # 有搜索词时按相关度排序
+        if search:
+            return self.search_podcasts(search, offset=offset, limit=limit)
+        
+        # 排序：按创建时间降序（文件未变化时复用排序结果），只复制当前页的记录
+        return [dict(podcast) for podcast in self._sorted_podcasts()[offset:offset + limit]]
+    
+    def _sorted_podcasts(self) -> List[Dict[str, Any]]:
+        """按创建时间降序排列的快照记录（只读）；快照未变化时复用上次的排序结果"""
+        return self._podcast_order_for_snapshot().ordered
+    
+    def _podcast_order_for_snapshot(self) -> _PodcastOrder:
+        """当前快照的排序结果和有序索引（只读，随快照一起失效）"""
+        snapshot = self._snapshot(self.podcasts_file)
+        cached = self._podcast_order
+        if cached is None or cached.snapshot is not snapshot:
+            cached = _PodcastOrder(
+                snapshot,
+                sorted(snapshot.data.get("podcasts", []), key=sort_key, reverse=True),
+                SortedIndex(podcast for podcast_id, podcast in snapshot.by_id.items() if podcast_id)
+            )
+            self._podcast_order = cached
+        return cached
+    
+    def page_podcasts(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        基于游标的分页查询（按创建时间降序）
+        
+        Args:
+            cursor: 上一页返回的 next_cursor，为空时返回第一页
+            limit: 返回的最大记录数
+            search: 搜索关键词（匹配标题和文稿，结果仍按创建时间排序）
+        
+        Returns:
+            (播客列表, 下一页游标)，没有更多数据时游标为 None
+        
+        Raises:
+            ValueError: 游标格式无效
+        """
+        matched = self.get_search_index().match(search) if search else None
+        # 沿当前快照的有序索引定位（文件未变化时复用），只复制返回的记录
+        order = self._podcast_order_for_snapshot()
+        items, next_cursor = self._page_from_index(order.index, order.snapshot.by_id, cursor, limit, matched)
+        return [dict(item) for item in items], next_cursor
+    
+    def _page_from_index(
+        self,
+        index: SortedIndex,
+        records: Dict[str, Dict[str, Any]],
+        cursor: Optional[str],
+        limit: int,
+        matched: Optional[Dict[str, float]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """沿有序索引从游标位置向前取 limit 条记录（matched 不为空时只保留搜索命中的记录）"""
+        before = decode_cursor(cursor) if cursor else None
+        
+        items = []
+        for key in index.iter_desc(before):
+            podcast = records.get(key[1])
+            if podcast is None:
+                continue
+            if matched is not None and key[1] not in matched:
+                continue
+            items.append(podcast)
+            # 多取一条用于判断是否还有下一页
+            if len(items) > limit:
+                break
+        
+        next_cursor = encode_cursor(sort_key(items[limit - 1])) if len(items) > limit else None
+        return items[:limit], next_cursor
+    
+    def get_podcasts_by_ids(self, podcast_ids: List[str]) -> List[Dict[str, Any]]:
+        """按给定顺序批量获取播客（忽略不存在的 id）"""
+        podcasts = self._snapshot(self.podcasts_file).by_id
+        return [dict(podcasts[pid]) for pid in podcast_ids if pid in podcasts]
+    
+    def search_podcasts(self, query: str, offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        全文搜索播客（标题 + 文稿）
+        
+        Args:
+            query: 搜索词，中文按二元组匹配
+            offset: 跳过的记录数
+            limit: 返回的最大记录数
+        
+        Returns:
+            按 BM25 相关度降序排列的播客列表
+        """
+        ranked = self.get_search_index().search(query, offset=offset, limit=limit)
+        return self.get_podcasts_by_ids([podcast_id for podcast_id, _ in ranked])
+    
+    def get_search_index(self) -> SearchIndex:
+        """获取全文搜索索引，首次调用时从全部播客构建"""
+        with self._search_index_lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex.build(self._with_text(p) for p in self.read_podcasts())
+            return self._search_index
+    
+    def _index_podcast(self, podcast: Dict[str, Any], updates: Optional[Dict[str, Any]] = None):
+        """写入后增量更新搜索索引（索引尚未构建时跳过）"""
+        with self._search_index_lock:
+            if self._search_index is not None and needs_reindex(updates):
+                self._search_index.add(podcast["id"], *podcast_document(self._with_text(podcast)))
+    
+    def _unindex_podcast(self, podcast_id: str):
+        """删除后从搜索索引中移除"""
+        with self._search_index_lock:
+            if self._search_index is not None:
+                self._search_index.remove(podcast_id)
+    
+    # ========== 大文本 blob ==========
+    
+    def _store_text_blobs(self, fields: Dict[str, Any]) -> Dict[str, str]:
+        """
+        把 fields 中的大文本存入 blob：原字段置空，记录哈希（原地修改 fields）
+        
+        在获取写锁之前调用（压缩和写文件不占用锁）；返回 {哈希: 文本}，
+        写入记录时在写锁内交给 _ensure_text_blobs 复核
+        """
+        stored = {}
+        for field, blob_field in BLOB_FIELDS.items():
+            text = fields.get(field)
+            if isinstance(text, str) and text:
+                digest = self.text_blobs.put(text)
+                fields[blob_field] = digest
+                fields[field] = None
+                stored[digest] = text
+        return stored
+    
+    def _ensure_text_blobs(self, stored: Dict[str, str]):
+        """
+        复核记录将要引用的 blob 仍然存在（调用方需持有播客写锁）
+        
+        相同文本的 blob 已存在时 put 不会重新写入，但它可能在写入记录之前被 release_text_blobs 删除；
+        清理和复核都在写锁内进行，因此复核之后不会再被删除
+        """
+        for digest, text in stored.items():
+            if not self.text_blobs.path(digest).exists():
+                self.text_blobs.put(text)
+    
+    def _podcast_write_lock(self):
+        """播客记录的写锁（写入记录和清理 blob 互斥）"""
+        return self.podcasts_lock
+    
+    def load_podcast_text(self, podcast: Dict[str, Any]) -> Optional[str]:
+        """读取播客的稿件（没有稿件时取提取的文本）；兼容旧记录中内联保存的文本"""
+        for field, blob_field in BLOB_FIELDS.items():
+            text = podcast.get(field)
+            if not text and podcast.get(blob_field):
+                text = self.text_blobs.get(podcast[blob_field])
+            if text:
+                return text
         return None
     
+    def _with_text(self, podcast: Dict[str, Any]) -> Dict[str, Any]:
+        """建立搜索索引用：带上从 blob 加载的稿件"""
+        if podcast.get("transcript") or not any(podcast.get(field) for field in BLOB_FIELDS.values()):
+            return podcast
+        return {**podcast, "transcript": self.load_podcast_text(podcast)}
+    
+    def release_text_blobs(self, podcast: Dict[str, Any]):
+        """
+        删除播客后清理不再被其他播客引用的 blob
+        
+        检查引用和删除文件都持有播客写锁，与写入记录（及其 _ensure_text_blobs 复核）互斥
+        """
+        digests = {podcast.get(field) for field in BLOB_FIELDS.values()} - {None}
+        if not digests:
+            return
+        with self._podcast_write_lock():
+            for other in self.read_podcasts():
+                digests -= {other.get(field) for field in BLOB_FIELDS.values()}
+            for digest in digests:
+                self.text_blobs.delete(digest)
+    
+    def _inline_text_updates(self, podcast: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """把旧记录中内联保存的大文本存入 blob，返回要写回记录的字段；没有内联文本时返回 None"""
+        if not any(podcast.get(field) for field in BLOB_FIELDS):
+            return None
+        updates = {field: podcast.get(field) for field in BLOB_FIELDS}
+        self._store_text_blobs(updates)
+        return updates
+    
+    def migrate_text_blobs(self) -> int:
+        """
+        把旧记录中内联保存的大文本移到 blob（启动时调用），返回迁移的播客数
+        
+        持有写锁一次完成：写入全部 blob 后只重写一次 podcasts.json。
+        只改变存储方式，不修改 version / updated_at
+        """
+        migrated = 0
+        with self.podcasts_lock:
+            data = self._load_json(self.podcasts_file)
+            for podcast in data.get("podcasts", []):
+                updates = self._inline_text_updates(podcast)
+                if updates:
+                    podcast.update(updates)
+                    migrated += 1
+            if migrated:
+                self._dump_json(self.podcasts_file, data)
+        
+        if migrated:
+            print(f"✅ {migrated} 个播客的稿件已移到 blob 存储")
+        return migrated
+    
     def save_podcast(self, podcast_data: Dict[str, Any]) -> bool:
         """保存新播客"""
         try:
-            data = self._read_json(self.podcasts_file, self.podcasts_lock)
-            podcasts = data.get("podcasts", [])
-            
-            # 添加时间戳
-            if "created_at" not in podcast_data:
-                podcast_data["created_at"] = datetime.now().isoformat()
-            podcast_data["updated_at"] = datetime.now().isoformat()
-            
-            podcasts.append(podcast_data)
-            data["podcasts"] = podcasts
+            # 大文本在获取锁之前写入 blob
+            stored = self._store_text_blobs(podcast_data)
             
-            self._write_json(self.podcasts_file, self.podcasts_lock, data)
-            return True
+            # 读取-修改-写回期间持有文件锁，并发写入不会互相覆盖
+            with self.podcasts_lock:
+                self._ensure_text_blobs(stored)
+                data = self._load_json(self.podcasts_file)
+                podcasts = data.get("podcasts", [])
+                
+                # 添加时间戳和版本号
+                if "created_at" not in podcast_data:
+                    podcast_data["created_at"] = datetime.now().isoformat()
+                podcast_data["updated_at"] = datetime.now().isoformat()
+                podcast_data.setdefault("version", 1)
+                
+                podcasts.append(podcast_data)
+                data["podcasts"] = podcasts
+                
+                self._dump_json(self.podcasts_file, data)
+                self._index_podcast(podcast_data)
+                return True
         except Exception as e:
             print(f"Error saving podcast: {e}")
             return False
@@ -86,20 +435,15 @@ class DataService:
     def update_podcast(self, podcast_id: str, updates: Dict[str, Any]) -> bool:
         """更新播客信息"""
         try:
-            data = self._read_json(self.podcasts_file, self.podcasts_lock)
-            podcasts = data.get("podcasts", [])
+            # 大文本在获取锁之前写入 blob，持有锁时复核
+            updates = dict(updates)
+            stored = self._store_text_blobs(updates)
             
-            for i, podcast in enumerate(podcasts):
-                if podcast.get("id") == podcast_id:
-                    # 更新字段
-                    podcasts[i].update(updates)
-                    podcasts[i]["updated_at"] = datetime.now().isoformat()
-                    
-                    data["podcasts"] = podcasts
-                    self._write_json(self.podcasts_file, self.podcasts_lock, data)
-                    return True
+            def apply(podcast: Dict[str, Any]) -> Dict[str, Any]:
+                self._ensure_text_blobs(stored)
+                return updates
             
-            return False  # 未找到
+            return self.mutate("podcasts", podcast_id, apply) is not None
         except Exception as e:
             print(f"Error updating podcast: {e}")
             return False
@@ -107,15 +451,17 @@ class DataService:
     def delete_podcast(self, podcast_id: str) -> bool:
         """删除播客"""
         try:
-            data = self._read_json(self.podcasts_file, self.podcasts_lock)
-            podcasts = data.get("podcasts", [])
-            
-            # 过滤掉要删除的播客
-            podcasts = [p for p in podcasts if p.get("id") != podcast_id]
-            
-            data["podcasts"] = podcasts
-            self._write_json(self.podcasts_file, self.podcasts_lock, data)
-            return True
+            with self.podcasts_lock:
+                data = self._load_json(self.podcasts_file)
+                podcasts = data.get("podcasts", [])
+                
+                # 过滤掉要删除的播客
+                podcasts = [p for p in podcasts if p.get("id") != podcast_id]
+                
+                data["podcasts"] = podcasts
+                self._dump_json(self.podcasts_file, data)
+                self._unindex_podcast(podcast_id)
+                return True
         except Exception as e:
             print(f"Error deleting podcast: {e}")
             return False
@@ -124,75 +470,267 @@ class DataService:
     
     def read_jobs(self) -> List[Dict[str, Any]]:
         """读取所有任务"""
-        data = self._read_json(self.jobs_file, self.jobs_lock)
-        return data.get("jobs", [])
+        return self._read_records(self.jobs_file)
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """获取单个任务"""
-        jobs = self.read_jobs()
-        for job in jobs:
-            if job.get("id") == job_id:
-                return job
-        return None
+        """获取单个任务（叠加写回缓冲中尚未写入的进度）"""
+        return self.job_buffer.read(job_id, lambda: self._read_record(self.jobs_file, job_id))
+    
+    def list_jobs_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """按创建时间先后返回指定状态的任务（持久化的任务队列）"""
+        jobs = [job for job in self.read_jobs() if job.get("status") in statuses]
+        jobs.sort(key=lambda job: (job.get("created_at", ""), job.get("id", "")))
+        return jobs
     
     def save_job(self, job_data: Dict[str, Any]) -> bool:
         """保存新任务"""
         try:
-            data = self._read_json(self.jobs_file, self.jobs_lock)
-            jobs = data.get("jobs", [])
-            
-            # 添加时间戳
-            if "created_at" not in job_data:
-                job_data["created_at"] = datetime.now().isoformat()
-            job_data["updated_at"] = datetime.now().isoformat()
-            
-            jobs.append(job_data)
-            data["jobs"] = jobs
-            
-            self._write_json(self.jobs_file, self.jobs_lock, data)
-            return True
+            with self.jobs_lock:
+                data = self._load_json(self.jobs_file)
+                jobs = data.get("jobs", [])
+                
+                # 添加时间戳和版本号
+                if "created_at" not in job_data:
+                    job_data["created_at"] = datetime.now().isoformat()
+                job_data["updated_at"] = datetime.now().isoformat()
+                job_data.setdefault("version", 1)
+                
+                jobs.append(job_data)
+                data["jobs"] = jobs
+                
+                self._dump_json(self.jobs_file, data)
+                job_events.publish(job_data)
+                return True
         except Exception as e:
             print(f"Error saving job: {e}")
             return False
     
     def update_job(self, job_id: str, updates: Dict[str, Any]) -> bool:
-        """更新任务状态"""
+        """
+        更新任务状态
+        
+        只更新进度（progress / status_message）时合并到写回缓冲，立即推送给订阅者，稍后批量写入；
+        其他更新（状态变化、结果字段等）连同缓冲中该任务的进度立即写入
+        """
         try:
-            data = self._read_json(self.jobs_file, self.jobs_lock)
-            jobs = data.get("jobs", [])
-            
-            for i, job in enumerate(jobs):
-                if job.get("id") == job_id:
-                    # 更新字段
-                    jobs[i].update(updates)
-                    jobs[i]["updated_at"] = datetime.now().isoformat()
-                    
-                    data["jobs"] = jobs
-                    self._write_json(self.jobs_file, self.jobs_lock, data)
+            if self.job_buffer.accepts(updates):
+                # 事件总线中有任务的最新状态时才缓冲（同时说明任务存在）
+                latest = job_events.latest(job_id)
+                if latest is not None and not latest.terminal:
+                    self.job_buffer.add(job_id, updates)
+                    job_events.publish({**latest.data, **updates, "updated_at": datetime.now().isoformat()})
                     return True
-            
-            return False  # 未找到
+            return self.mutate("jobs", job_id, lambda job: updates) is not None
         except Exception as e:
             print(f"Error updating job: {e}")
             return False
     
+    def _write_job_updates(self, job_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """写回缓冲的定时写入"""
+        return self._mutate("jobs", job_id, lambda job: updates)
+    
     def delete_job(self, job_id: str) -> bool:
         """删除任务"""
         try:
-            data = self._read_json(self.jobs_file, self.jobs_lock)
-            jobs = data.get("jobs", [])
-            
-            # 过滤掉要删除的任务
-            jobs = [j for j in jobs if j.get("id") != job_id]
-            
-            data["jobs"] = jobs
-            self._write_json(self.jobs_file, self.jobs_lock, data)
-            return True
+            with self.jobs_lock:
+                data = self._load_json(self.jobs_file)
+                jobs = data.get("jobs", [])
+                
+                # 过滤掉要删除的任务
+                jobs = [j for j in jobs if j.get("id") != job_id]
+                
+                data["jobs"] = jobs
+                self._dump_json(self.jobs_file, data)
+                job_events.remove(job_id)
+                return True
         except Exception as e:
             print(f"Error deleting job: {e}")
             return False
+    
+    # ========== 原子更新 ==========
+    
+    def mutate(
+        self,
+        collection: str,
+        record_id: str,
+        fn: Mutator,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        原子的读取-修改-写回（update_podcast / update_job 都基于它实现）
+        
+        整个过程只获取一次锁：读出记录 → fn(记录副本) 返回要合并的字段 → 写回，
+        多个字段的修改合并为一次写入。每次写入记录的 version 加 1，
+        传入 expected_version 时先做乐观并发检查。
+        任务的写回缓冲中尚未写入的进度一起写入，fn 看到的是最新状态；
+        播客的稿件等大文本存入 blob，记录中只保存哈希。
+        
+        Args:
+            collection: "podcasts" 或 "jobs"
+            record_id: 记录 ID
+            fn: 修改函数，可根据当前值计算新值；返回 None 表示不修改（不写入）
+            expected_version: 调用方之前读到的版本号（None 表示不检查）
+            
+        Returns:
+            修改后的记录；记录不存在时返回 None
+            
+        Raises:
+            VersionConflict: 当前版本与 expected_version 不一致
+        """
+        if collection == "podcasts":
+            def store_blobs(podcast: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                updates = fn(podcast)
+                if updates:
+                    updates = dict(updates)
+                    self._store_text_blobs(updates)  # fn 在写锁内执行，不需要复核
+                return updates
+            
+            return self._mutate(collection, record_id, store_blobs, expected_version)
+        if collection != "jobs":
+            return self._mutate(collection, record_id, fn, expected_version)
+        
+        def write(pending: Optional[Dict[str, Any]]):
+            if not pending:
+                return self._mutate(collection, record_id, fn, expected_version)
+            return self._mutate(
+                collection,
+                record_id,
+                lambda job: {**pending, **(fn({**job, **pending}) or {})},
+                expected_version
+            )
+        
+        return self.job_buffer.write_through(record_id, write)
+    
+    def _mutate(
+        self,
+        collection: str,
+        record_id: str,
+        fn: Mutator,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """各存储后端的读取-修改-写回实现（JSON：持有文件锁期间读取并重写整个文件）"""
+        file_path, lock = self._collection_file(collection)
+        with lock:
+            data = self._load_json(file_path)
+            for record in data.get(collection, []):
+                if record.get("id") == record_id:
+                    break
+            else:
+                return None
+            
+            updates = self._apply_mutation(collection, record, fn, expected_version)
+            if updates is None:
+                return record
+            record.update(updates)
+            self._dump_json(file_path, data)
+        
+        self._after_mutate(collection, record, updates)
+        return record
+    
+    def _apply_mutation(
+        self,
+        collection: str,
+        record: Dict[str, Any],
+        fn: Mutator,
+        expected_version: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        检查版本并调用 fn（在持有锁时调用，各存储后端共用）
+        
+        Returns:
+            要写入的字段（已加上新的 version 和 updated_at）；fn 不修改时返回 None
+        """
+        current = record.get("version", 0)
+        if expected_version is not None and expected_version != current:
+            raise VersionConflict(collection, record["id"], expected_version, current)
+        
+        updates = fn(dict(record))
+        if not updates:
+            return None
+        return dict(updates, version=current + 1, updated_at=datetime.now().isoformat())
+    
+    def _after_mutate(self, collection: str, record: Dict[str, Any], updates: Dict[str, Any]):
+        """写入后更新搜索索引 / 推送任务进度"""
+        if collection == "podcasts":
+            self._index_podcast(record, updates)
+        else:
+            job_events.publish(record)
+    
+    # ========== 异步接口 ==========
+    # 在 io_executor 中调用上面的同步方法（各存储后端通用），供 async 路由使用，
+    # 文件锁等待和磁盘读写不阻塞事件循环
+    
+    async def get_podcast_async(self, podcast_id: str) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self.get_podcast, podcast_id)
+    
+    async def list_podcasts_async(
+        self,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        return await run_blocking(self.list_podcasts, search=search, offset=offset, limit=limit)
+    
+    async def page_podcasts_async(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await run_blocking(self.page_podcasts, cursor=cursor, limit=limit, search=search)
+    
+    async def save_podcast_async(self, podcast_data: Dict[str, Any]) -> bool:
+        return await run_blocking(self.save_podcast, podcast_data)
+    
+    async def update_podcast_async(self, podcast_id: str, updates: Dict[str, Any]) -> bool:
+        return await run_blocking(self.update_podcast, podcast_id, updates)
+    
+    async def delete_podcast_async(self, podcast_id: str) -> bool:
+        return await run_blocking(self.delete_podcast, podcast_id)
+    
+    async def get_job_async(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self.get_job, job_id)
+    
+    async def save_job_async(self, job_data: Dict[str, Any]) -> bool:
+        return await run_blocking(self.save_job, job_data)
+    
+    async def update_job_async(self, job_id: str, updates: Dict[str, Any]) -> bool:
+        return await run_blocking(self.update_job, job_id, updates)
+    
+    async def delete_job_async(self, job_id: str) -> bool:
+        return await run_blocking(self.delete_job, job_id)
+    
+    async def mutate_async(
+        self,
+        collection: str,
+        record_id: str,
+        fn: Mutator,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        return await run_blocking(self.mutate, collection, record_id, fn, expected_version)
+
+
+def create_data_service(data_dir: Optional[Path] = None) -> DataService:
+    """
+    根据配置创建数据服务实例
+    
+    - json: 整文件读写（默认）
+    - journal: 追加写日志 + 内存索引
+    - sqlite: SQLite 数据库（WAL 模式）
+    """
+    backend = settings.data_backend.lower()
+    
+    if backend == "journal":
+        from app.services.journal_data_service import JournalDataService
+        return JournalDataService(data_dir)
+    
+    if backend == "sqlite":
+        from app.services.sqlite_data_service import SQLiteDataService
+        return SQLiteDataService(data_dir)
+    
+    return DataService(data_dir)
 
 
 # 创建全局实例
-data_service = DataService()
+data_service = create_data_service()
 
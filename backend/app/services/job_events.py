@@ -0,0 +1,211 @@
+"""
+任务进度事件（进程内发布 / 订阅）
+
+数据层每次保存、更新任务后发布任务的最新状态；SSE 和 WebSocket 连接订阅关心的任务，
+收到推送后直接发给客户端，连接期间不再读取任务存储。
+
+每个任务保留最近若干条事件，客户端断线重连时带上 Last-Event-ID 即可补发错过的事件。
+只在单个进程内有效（与任务调度器的前提一致）。
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Set
+
+from app.config import settings
+
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobEvent(NamedTuple):
+    """一条任务事件；data 为任务的完整状态，任务被删除时为 None"""
+    job_id: str
+    id: int
+    data: Optional[Dict[str, Any]]
+
+    @property
+    def terminal(self) -> bool:
+        """任务已结束（完成、失败或被删除），之后不会再有事件"""
+        return self.data is None or self.data.get("status") in TERMINAL_STATUSES
+
+
+class _JobState:
+    """单个任务的最近事件和订阅者"""
+
+    def __init__(self, history_size: int):
+        self.history: Deque[JobEvent] = deque(maxlen=history_size)
+        self.subscribers: Set["JobSubscription"] = set()
+
+
+class JobSubscription:
+    """
+    一个连接的订阅（可以同时订阅多个任务）
+
+    事件从发布线程通过 call_soon_threadsafe 放入连接所在事件循环的队列，按发布顺序到达
+    """
+
+    def __init__(self, bus: "JobEventBus", loop: asyncio.AbstractEventLoop):
+        self._bus = bus
+        self._loop = loop
+        self._queue: "asyncio.Queue[JobEvent]" = asyncio.Queue()
+        self.job_ids: Set[str] = set()
+
+    def _deliver(self, event: JobEvent):
+        """放入事件队列（任意线程调用，调用方持有总线锁）"""
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            pass  # 事件循环已关闭
+
+    def subscribe(self, job_id: str, last_event_id: Optional[int] = None) -> bool:
+        """订阅任务；任务未知时返回 False（需要先 prime）"""
+        return self._bus._add(self, job_id, last_event_id)
+
+    def unsubscribe(self, job_id: str):
+        self._bus._remove(self, job_id)
+
+    def close(self):
+        for job_id in list(self.job_ids):
+            self._bus._remove(self, job_id)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[JobEvent]:
+        """等待下一条事件；超时返回 None（用于发送心跳）"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class JobEventBus:
+    """任务事件总线"""
+
+    def __init__(self, max_jobs: int, history_size: int):
+        """
+        Args:
+            max_jobs: 最多记录的任务数，超出时淘汰最久没有更新且没有订阅者的任务
+            history_size: 每个任务保留的最近事件数（用于断线重连补发）
+        """
+        self.max_jobs = max_jobs
+        self.history_size = history_size
+        self._jobs: "OrderedDict[str, _JobState]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 事件 ID 全局递增；以启动时间（毫秒）为起点，进程重启后客户端带着旧 ID 重连也能拿到当前状态
+        self._next_id = int(time.time() * 1000)
+        self.published = 0
+
+    def subscription(self) -> JobSubscription:
+        """创建绑定到当前事件循环的订阅"""
+        return JobSubscription(self, asyncio.get_running_loop())
+
+    def known(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._jobs
+
+    def latest(self, job_id: str) -> Optional[JobEvent]:
+        with self._lock:
+            state = self._jobs.get(job_id)
+            return state.history[-1] if state and state.history else None
+
+    def publish(self, job: Dict[str, Any]):
+        """发布任务的最新状态（数据层写入成功后调用）"""
+        self._emit(job["id"], dict(job))
+
+    def prime(self, job: Dict[str, Any]):
+        """登记从存储读到的任务（总线还不知道该任务时，例如进程重启后）"""
+        with self._lock:
+            if job["id"] in self._jobs:
+                return
+        self._emit(job["id"], dict(job))
+
+    def remove(self, job_id: str):
+        """任务被删除：通知订阅者并忘掉该任务"""
+        with self._lock:
+            state = self._jobs.pop(job_id, None)
+            if state is None:
+                return
+            event = JobEvent(job_id, self._take_id(), None)
+            for subscriber in state.subscribers:
+                subscriber.job_ids.discard(job_id)
+                subscriber._deliver(event)
+
+    def _take_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def _emit(self, job_id: str, data: Dict[str, Any]):
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                state = self._jobs[job_id] = _JobState(self.history_size)
+                self._evict()
+            else:
+                self._jobs.move_to_end(job_id)
+            event = JobEvent(job_id, self._take_id(), data)
+            state.history.append(event)
+            self.published += 1
+            for subscriber in state.subscribers:
+                subscriber._deliver(event)
+
+    def _evict(self):
+        """淘汰最久没有更新且没有订阅者的任务（调用方需持有锁）"""
+        excess = len(self._jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        # 从最久未更新的一端开始找，找够 excess 个就停止（通常第一个就没有订阅者）
+        victims = []
+        for job_id, state in self._jobs.items():
+            if not state.subscribers:
+                victims.append(job_id)
+                if len(victims) >= excess:
+                    break
+        for job_id in victims:
+            del self._jobs[job_id]
+
+    def _add(self, subscriber: JobSubscription, job_id: str, last_event_id: Optional[int]) -> bool:
+        """
+        登记订阅并补发事件：没有 last_event_id 时发送当前状态；
+        否则补发之后的事件，已经超出保留范围时只发送当前状态（任务已结束时至少发送最后一条）
+        """
+        with self._lock:
+            state = self._jobs.get(job_id)
+            if state is None:
+                return False
+            state.subscribers.add(subscriber)
+            subscriber.job_ids.add(job_id)
+
+            history = list(state.history)
+            if last_event_id is None:
+                backlog = history[-1:]
+            else:
+                backlog = [event for event in history if event.id > last_event_id]
+                if backlog and backlog[0] is history[0] and len(history) == self.history_size:
+                    backlog = history[-1:]  # 中间的事件可能已被丢弃，当前状态已包含全部信息
+                elif not backlog and history and history[-1].terminal:
+                    backlog = history[-1:]  # 任务已结束：重发最后一条，客户端据此结束连接
+            for event in backlog:
+                subscriber._deliver(event)
+            return True
+
+    def _remove(self, subscriber: JobSubscription, job_id: str):
+        with self._lock:
+            subscriber.job_ids.discard(job_id)
+            state = self._jobs.get(job_id)
+            if state:
+                state.subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "subscribers": sum(len(state.subscribers) for state in self._jobs.values()),
+                "published": self.published
+            }
+
+
+# 创建全局实例
+job_events = JobEventBus(
+    max_jobs=settings.job_events_max_jobs,
+    history_size=settings.job_events_history
+)
@@ -0,0 +1,430 @@
+"""
+日志型数据服务
+变更以追加写日志（write-ahead journal）的形式落盘，内存字典按 id 索引，
+日志积累到一定规模后再压缩回 JSON 快照
+"""
+import json
+import os
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from filelock import FileLock
+from datetime import datetime
+from app.config import settings
+from app.services.data_service import DataService, Mutator
+from app.services.job_events import job_events
+from app.services.sorted_index import SortedIndex
+
+
+class JournalCollection:
+    """
+    单个集合（podcasts / jobs）的快照 + 日志存储
+
+    - 快照文件与 JSON 模式格式一致（{"jobs": [...]}），两种模式可以互相切换
+    - 日志每行一条记录：{"op": "put" | "update" | "delete", "id": ..., "data": ...}
+    - 所有操作都是幂等的，压缩过程中崩溃后重放日志不会产生错误数据
+    - 内存中的记录写时复制（更新时替换为新字典，不原地修改），压缩时只需复制字典的引用，
+      快照在后台线程中写入：先把当前日志轮转为 .compacting 文件、新写入追加到新日志，
+      快照落盘后再删除 .compacting。写入方和读取方不会因为压缩而等待整个快照写完
+    """
+
+    def __init__(
+        self,
+        name: str,
+        snapshot_file: Path,
+        compact_threshold: int = 1000,
+        fsync: bool = False
+    ):
+        self.name = name
+        self.snapshot_file = snapshot_file
+        self.journal_file = snapshot_file.with_suffix(".journal")
+        # 正在压缩的日志（压缩开始时由 journal_file 轮转而来，快照写入后删除）
+        self.compacting_file = snapshot_file.with_suffix(".journal.compacting")
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.journal_entries = 0
+
+        self.lock = threading.RLock()
+        self._file_lock = FileLock(str(snapshot_file) + ".lock")
+        self._compaction: Optional[threading.Thread] = None
+
+        with self._file_lock:
+            self._load()
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+
+        # 上次压缩未完成（进程在写快照时退出）：立即重新压缩
+        if self.compacting_file.exists():
+            self.compact()
+
+    def _load(self):
+        """加载快照并重放日志"""
+        if self.snapshot_file.exists():
+            try:
+                with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for record in data.get(self.name, []):
+                    if record.get("id"):
+                        self.records[record["id"]] = record
+            except json.JSONDecodeError as e:
+                print(f"⚠️  快照文件损坏，忽略: {self.snapshot_file} ({e})")
+
+        # 先重放未压缩完成的旧日志，再重放当前日志
+        for journal_file in (self.compacting_file, self.journal_file):
+            if not journal_file.exists():
+                continue
+            with open(journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 进程崩溃时最后一行可能只写了一半，直接丢弃
+                        print(f"⚠️  跳过不完整的日志记录: {journal_file}")
+                        continue
+                    self._apply(entry)
+                    self.journal_entries += 1
+
+    def _apply(self, entry: Dict[str, Any]):
+        """将一条日志记录应用到内存索引"""
+        op = entry.get("op")
+        record_id = entry.get("id")
+
+        if op == "put":
+            self.records[record_id] = entry["data"]
+        elif op == "update":
+            record = self.records.get(record_id)
+            if record is not None:
+                # 写时复制：正在写入的快照可能还引用着旧字典
+                self.records[record_id] = {**record, **entry["data"]}
+        elif op == "delete":
+            self.records.pop(record_id, None)
+
+    def _append(self, entry: Dict[str, Any]):
+        """追加一条日志记录并应用（调用方需持有 self.lock）"""
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        self._journal.write(line + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+        self._apply(entry)
+        self.journal_entries += 1
+
+        # 日志条数不少于记录总数时才压缩，保证每次写入的均摊成本为 O(1)；
+        # 压缩在后台进行，上一次压缩还没完成时先继续追加
+        if self.journal_entries >= max(self.compact_threshold, len(self.records)) and not self.compacting:
+            self._start_compaction()
+
+    @property
+    def compacting(self) -> bool:
+        """是否有后台压缩正在进行"""
+        return self._compaction is not None and self._compaction.is_alive()
+
+    def _rotate(self) -> List[Dict[str, Any]]:
+        """
+        轮转日志并取出当前记录（调用方需持有 self.lock）
+
+        当前日志改名为 .compacting（上次压缩失败遗留的 .compacting 时追加到其后），
+        之后的写入追加到新日志。返回的记录列表只复制了引用（记录写时复制，不会再被修改）
+        """
+        self._journal.close()
+        if self.compacting_file.exists():
+            with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                    open(self.compacting_file, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.unlink(self.journal_file)
+        elif self.journal_file.exists():
+            os.replace(self.journal_file, self.compacting_file)
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self.journal_entries = 0
+        return list(self.records.values())
+
+    def _write_snapshot(self, records: List[Dict[str, Any]]):
+        """写入快照并删除已压缩的日志（不持有 self.lock）"""
+        try:
+            tmp_file = self.snapshot_file.with_suffix(".json.tmp")
+            with self._file_lock:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump({self.name: records}, f, ensure_ascii=False, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.snapshot_file)
+
+                # 快照落盘之后再删除旧日志；若在两者之间崩溃，重放幂等日志即可恢复
+                self.compacting_file.unlink(missing_ok=True)
+        except Exception as e:
+            # 旧日志保留，下次压缩时合并
+            print(f"❌ 压缩 {self.name} 失败: {e}")
+
+    def _start_compaction(self) -> threading.Thread:
+        """轮转日志并在后台线程中写入快照（调用方需持有 self.lock，且没有正在进行的压缩）"""
+        records = self._rotate()
+        self._compaction = threading.Thread(
+            target=self._write_snapshot,
+            args=(records,),
+            name=f"compact-{self.name}",
+            daemon=True
+        )
+        self._compaction.start()
+        return self._compaction
+
+    def wait_compaction(self):
+        """等待后台压缩完成"""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+
+    def compact(self):
+        """立即将内存中的记录写成新快照，并清空日志（先等待正在进行的后台压缩）"""
+        while True:
+            self.wait_compaction()
+            with self.lock:
+                if not self.compacting:
+                    compaction = self._start_compaction()
+                    break
+        compaction.join()
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            record = self.records.get(record_id)
+            return dict(record) if record is not None else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [dict(record) for record in self.records.values()]
+
+    def put(self, record: Dict[str, Any]):
+        with self.lock:
+            self._append({"op": "put", "id": record["id"], "data": dict(record)})
+
+    def update(self, record_id: str, updates: Dict[str, Any]) -> bool:
+        with self.lock:
+            if record_id not in self.records:
+                return False
+            self._append({"op": "update", "id": record_id, "data": dict(updates)})
+            return True
+
+    def delete(self, record_id: str):
+        with self.lock:
+            if record_id in self.records:
+                self._append({"op": "delete", "id": record_id})
+
+    def close(self):
+        self.wait_compaction()
+        with self.lock:
+            self._journal.close()
+
+
+class JournalDataService(DataService):
+    """
+    日志型数据服务
+
+    与 DataService 的方法签名完全一致；get_* 为 O(1) 字典查找，
+    save_* / update_* 只追加一行日志，不再重写整个 JSON 文件。
+
+    注意：内存索引只在当前进程内有效，该模式要求数据目录由单个进程独占
+    """
+
+    def __init__(self, data_dir: Optional[Path] = None):
+        super().__init__(data_dir)
+
+        self.podcasts = JournalCollection(
+            "podcasts",
+            self.podcasts_file,
+            compact_threshold=settings.journal_compact_threshold,
+            fsync=settings.journal_fsync
+        )
+        self.jobs = JournalCollection(
+            "jobs",
+            self.jobs_file,
+            compact_threshold=settings.journal_compact_threshold,
+            fsync=settings.journal_fsync
+        )
+
+        # 播客按 (created_at, id) 排序的二级索引，用于游标分页
+        self.podcast_index = SortedIndex(self.podcasts.records.values())
+
+    def compact(self):
+        """立即压缩所有集合"""
+        self.podcasts.compact()
+        self.jobs.compact()
+
+    def close(self):
+        """写入缓冲中的进度，压缩并关闭日志文件"""
+        self.job_buffer.close()
+        self.compact()
+        self.podcasts.close()
+        self.jobs.close()
+
+    # ========== Podcast 相关操作 ==========
+
+    def read_podcasts(self) -> List[Dict[str, Any]]:
+        """读取所有播客"""
+        return self.podcasts.all()
+
+    def get_podcast(self, podcast_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个播客"""
+        return self.podcasts.get(podcast_id)
+
+    def list_podcasts(
+        self,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """分页查询播客列表，沿内存中的有序索引只取当前页"""
+        if search:
+            return self.search_podcasts(search, offset=offset, limit=limit)
+        with self.podcasts.lock:
+            keys = islice(self.podcast_index.iter_desc(), offset, offset + limit)
+            return [dict(self.podcasts.records[key[1]]) for key in keys]
+
+    def page_podcasts(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """基于游标的分页查询，直接沿内存中的有序索引定位"""
+        matched = self.get_search_index().match(search) if search else None
+        with self.podcasts.lock:
+            items, next_cursor = self._page_from_index(
+                self.podcast_index, self.podcasts.records, cursor, limit, matched
+            )
+            return [dict(item) for item in items], next_cursor
+
+    def _podcast_write_lock(self):
+        return self.podcasts.lock
+
+    def get_podcasts_by_ids(self, podcast_ids: List[str]) -> List[Dict[str, Any]]:
+        """按给定顺序批量获取播客（忽略不存在的 id）"""
+        podcasts = (self.podcasts.get(podcast_id) for podcast_id in podcast_ids)
+        return [podcast for podcast in podcasts if podcast is not None]
+
+    def save_podcast(self, podcast_data: Dict[str, Any]) -> bool:
+        """保存新播客"""
+        try:
+            if "created_at" not in podcast_data:
+                podcast_data["created_at"] = datetime.now().isoformat()
+            podcast_data["updated_at"] = datetime.now().isoformat()
+            podcast_data.setdefault("version", 1)
+            stored = self._store_text_blobs(podcast_data)
+
+            with self.podcasts.lock:
+                self._ensure_text_blobs(stored)
+                existing = self.podcasts.records.get(podcast_data["id"])
+                if existing is not None:
+                    self.podcast_index.remove(existing)
+                self.podcasts.put(podcast_data)
+                self.podcast_index.add(podcast_data)
+            self._index_podcast(podcast_data)
+            return True
+        except Exception as e:
+            print(f"Error saving podcast: {e}")
+            return False
+
+    def migrate_text_blobs(self) -> int:
+        """把旧记录中内联保存的大文本移到 blob，持有集合锁一次完成（每条记录追加一行日志）"""
+        migrated = 0
+        with self.podcasts.lock:
+            for podcast in list(self.podcasts.records.values()):
+                updates = self._inline_text_updates(podcast)
+                if updates:
+                    self.podcasts.update(podcast["id"], updates)
+                    migrated += 1
+
+        if migrated:
+            print(f"✅ {migrated} 个播客的稿件已移到 blob 存储")
+        return migrated
+
+    def delete_podcast(self, podcast_id: str) -> bool:
+        """删除播客"""
+        try:
+            with self.podcasts.lock:
+                existing = self.podcasts.records.get(podcast_id)
+                if existing is not None:
+                    self.podcast_index.remove(existing)
+                self.podcasts.delete(podcast_id)
+            self._unindex_podcast(podcast_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting podcast: {e}")
+            return False
+
+    # ========== Job 相关操作 ==========
+
+    def read_jobs(self) -> List[Dict[str, Any]]:
+        """读取所有任务"""
+        return self.jobs.all()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个任务（叠加写回缓冲中尚未写入的进度）"""
+        return self.job_buffer.read(job_id, lambda: self.jobs.get(job_id))
+
+    def save_job(self, job_data: Dict[str, Any]) -> bool:
+        """保存新任务"""
+        try:
+            if "created_at" not in job_data:
+                job_data["created_at"] = datetime.now().isoformat()
+            job_data["updated_at"] = datetime.now().isoformat()
+            job_data.setdefault("version", 1)
+
+            self.jobs.put(job_data)
+            job_events.publish(job_data)
+            return True
+        except Exception as e:
+            print(f"Error saving job: {e}")
+            return False
+
+    def delete_job(self, job_id: str) -> bool:
+        """删除任务"""
+        try:
+            self.jobs.delete(job_id)
+            job_events.remove(job_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting job: {e}")
+            return False
+
+    # ========== 原子更新 ==========
+
+    def _mutate(
+        self,
+        collection: str,
+        record_id: str,
+        fn: Mutator,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """持有集合锁期间只追加一行 update 日志"""
+        store = self._collection(collection)
+        with store.lock:
+            existing = store.records.get(record_id)
+            if existing is None:
+                return None
+
+            updates = self._apply_mutation(collection, existing, fn, expected_version)
+            if updates is None:
+                return dict(existing)
+
+            store.update(record_id, updates)
+            record = store.records[record_id]
+            if collection == "podcasts" and "created_at" in updates:
+                # 排序键变化时同步更新索引
+                self.podcast_index.remove(existing)
+                self.podcast_index.add(record)
+            record = dict(record)
+
+        self._after_mutate(collection, record, updates)
+        return record
+
+    def _collection(self, collection: str) -> JournalCollection:
+        if collection == "podcasts":
+            return self.podcasts
+        if collection == "jobs":
+            return self.jobs
+        raise ValueError(f"未知的集合: {collection}")
@@ -0,0 +1,173 @@
+"""
+Gemini 响应缓存
+
+键为 sha256(模型 + 提示词 + temperature + max_tokens)，命中时直接返回上次生成的文本，
+不再发起 HTTP 请求。常见于演示用的固定主题、失败任务重试等场景。
+
+- 过期：写入后超过 TTL 的条目视为未命中
+- 淘汰：条目数超过上限时淘汰最久未使用的
+- 持久化：每个条目保存为 llm_cache/<键>.json，写入只涉及该条目的文件，重启后继续使用
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+
+class LLMCache:
+    """带 TTL 和 LRU 淘汰的文本生成缓存"""
+
+    def __init__(self, cache_dir: Path, max_entries: int, ttl: float):
+        """
+        Args:
+            cache_dir: 持久化目录（每个条目一个文件）
+            max_entries: 最多缓存的条目数
+            ttl: 条目有效期（秒）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: "OrderedDict[str, float]" = OrderedDict()  # 键 -> 过期时间（文本保存在文件中）
+        self._lock = threading.Lock()
+
+        # 监控计数器
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """计算缓存键"""
+        payload = json.dumps({
+            "model": model,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load(self):
+        """启动时扫描缓存目录，按修改时间恢复 LRU 顺序（命中时会更新文件的修改时间），丢弃已过期的条目"""
+        for tmp_file in self.cache_dir.glob("*.tmp"):
+            tmp_file.unlink(missing_ok=True)
+
+        now = time.time()
+        for path in sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    expires_at = json.load(f)["expires_at"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                print(f"⚠️  Gemini 缓存文件损坏，已删除: {path.name} ({e})")
+                path.unlink(missing_ok=True)
+                continue
+            if expires_at > now:
+                self._entries[path.stem] = expires_at
+            else:
+                path.unlink(missing_ok=True)
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+
+    def _write_entry(self, key: str, text: str, expires_at: float):
+        """写入一个条目的文件；先写临时文件再替换，避免写到一半崩溃导致文件损坏"""
+        tmp_file = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "text": text, "expires_at": expires_at}, f, ensure_ascii=False)
+        os.replace(tmp_file, self._path(key))
+        self._touch(self._path(key))
+
+    @staticmethod
+    def _touch(path: Path):
+        """用当前时间（而不是文件系统的粗粒度时钟）更新修改时间，重启后按此恢复 LRU 顺序"""
+        now = time.time()
+        os.utime(path, (now, now))
+
+    def get(self, key: str) -> Optional[str]:
+        """查找缓存，未命中或已过期返回 None"""
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self._path(key).unlink(missing_ok=True)
+                expires_at = None
+            if expires_at is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        # 读取文件不持有锁
+        try:
+            path = self._path(key)
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+            self._touch(path)
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            # 刚好被淘汰 / 被覆盖
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        """写入缓存，超出上限时淘汰最久未使用的条目（只写入该条目的文件）"""
+        if not text:
+            return
+        expires_at = time.time() + self.ttl
+        try:
+            self._write_entry(key, text, expires_at)
+        except Exception as e:
+            print(f"⚠️  保存 Gemini 缓存失败: {e}")
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = expires_at
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._path(evicted).unlink(missing_ok=True)
+                self.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for key in self._entries:
+                self._path(key).unlink(missing_ok=True)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """缓存监控指标"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries
+            }
+
+
+# 创建全局实例
+llm_cache = LLMCache(
+    settings.data_dir / "llm_cache",
+    settings.llm_cache_max_entries,
+    settings.llm_cache_ttl
+)
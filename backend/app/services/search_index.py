@@ -0,0 +1,215 @@
+"""
+全文搜索索引
+倒排索引（token → 播客 id 的倒排表），中日韩文字按二元组（bigram）切分，
+查询结果按 BM25 打分排序
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# 中日韩文字（汉字、假名、谚文）
+_CJK = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+_CJK_PATTERN = re.compile(rf"[{_CJK}]")
+
+# 标题中的词权重更高
+TITLE_BOOST = 3
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分文本
+
+    - 拉丁字母 / 数字按单词切分并转小写
+    - 中日韩文字连续片段切分为重叠的二元组："播客测试" → 播客, 客测, 测试
+      （单个字的片段保留为单字）
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def podcast_document(podcast: Dict[str, Any]) -> Tuple[str, str]:
+    """取出播客中需要索引的文本：(标题, 正文)"""
+    body = podcast.get("transcript") or podcast.get("extracted_text") or ""
+    return podcast.get("title", "") or "", body
+
+
+class SearchIndex:
+    """
+    BM25 倒排索引（线程安全）
+
+    支持增量添加 / 删除文档；查询时所有词都必须命中（AND 语义），
+    从最短的倒排表开始求交集，因此常见查询与文档总数基本无关。
+    查询的最后一个英文 / 数字词按前缀匹配（边输入边搜索："pod" 命中 "podcast"），
+    其余的词按整词匹配
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        # 汉字 → 包含它的二元组，用于单字查询扩展
+        self._char_tokens: Dict[str, set] = {}
+        # 有序的英文 / 数字词表，用于末尾词的前缀扩展
+        self._latin_tokens: List[str] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+    def add(self, doc_id: str, title: str, body: str = ""):
+        """添加或替换一篇文档"""
+        terms = Counter(tokenize(body))
+        for token in tokenize(title):
+            terms[token] += TITLE_BOOST
+
+        with self._lock:
+            self.remove(doc_id)
+            for token, tf in terms.items():
+                posting = self._postings.get(token)
+                if posting is None:
+                    posting = self._postings[token] = {}
+                    if _CJK_PATTERN.match(token):
+                        for char in set(token):
+                            self._char_tokens.setdefault(char, set()).add(token)
+                    else:
+                        bisect.insort(self._latin_tokens, token)
+                posting[doc_id] = tf
+            self._doc_terms[doc_id] = dict(terms)
+            length = sum(terms.values())
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    def remove(self, doc_id: str):
+        """删除一篇文档"""
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for token in terms:
+                posting = self._postings.get(token)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self._postings[token]
+                        if not _CJK_PATTERN.match(token):
+                            del self._latin_tokens[bisect.bisect_left(self._latin_tokens, token)]
+                        for char in (set(token) if _CJK_PATTERN.match(token) else ()):
+                            char_tokens = self._char_tokens.get(char)
+                            if char_tokens is not None:
+                                char_tokens.discard(token)
+                                if not char_tokens:
+                                    del self._char_tokens[char]
+            self._total_len -= self._doc_len.pop(doc_id, 0)
+
+    def _query_groups(self, query: str) -> List[List[str]]:
+        """
+        将查询切分为词组：每组内的词是“或”关系，组与组之间是“与”关系
+
+        单个汉字会扩展为所有包含它的二元组（以及它本身）；
+        查询末尾的英文 / 数字词（后面没有空格）扩展为所有以它开头的词
+        """
+        tokens = tokenize(query)
+        prefix = tokens[-1] if tokens and not query[-1].isspace() and not _CJK_PATTERN.match(tokens[-1]) else None
+
+        groups = []
+        for token in dict.fromkeys(tokens):
+            if token == prefix:
+                start = bisect.bisect_left(self._latin_tokens, token)
+                end = bisect.bisect_left(self._latin_tokens, token + "\U0010ffff", start)
+                groups.append(self._latin_tokens[start:end])
+            elif len(token) > 1 or not _CJK_PATTERN.match(token):
+                groups.append([token])
+            else:
+                groups.append(list(self._char_tokens.get(token, ())))
+        return groups
+
+    def match(self, query: str) -> Dict[str, float]:
+        """返回所有命中文档的 BM25 分数 {doc_id: score}"""
+        with self._lock:
+            groups = self._query_groups(query)
+            if not groups or not self._doc_len:
+                return {}
+
+            # 每组合并为一个倒排表（组内求和）
+            merged: List[Dict[str, int]] = []
+            for group in groups:
+                if len(group) == 1:
+                    posting = self._postings.get(group[0], {})
+                else:
+                    posting = {}
+                    for token in group:
+                        for doc_id, tf in self._postings.get(token, {}).items():
+                            posting[doc_id] = posting.get(doc_id, 0) + tf
+                if not posting:
+                    return {}
+                merged.append(posting)
+
+            # 从最短的倒排表开始求交集
+            merged.sort(key=len)
+            candidates = set(merged[0])
+            for posting in merged[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return {}
+
+            total_docs = len(self._doc_len)
+            norm_base = self.k1 * (1 - self.b)
+            norm_scale = self.k1 * self.b * total_docs / self._total_len
+            weighted = [
+                (posting, math.log(1 + (total_docs - len(posting) + 0.5) / (len(posting) + 0.5)) * (self.k1 + 1))
+                for posting in merged
+            ]
+
+            doc_len = self._doc_len
+            scores = {}
+            for doc_id in candidates:
+                length_norm = norm_base + norm_scale * doc_len[doc_id]
+                score = 0.0
+                for posting, idf in weighted:
+                    tf = posting[doc_id]
+                    score += idf * tf / (tf + length_norm)
+                scores[doc_id] = score
+            return scores
+
+    def search(self, query: str, offset: int = 0, limit: int = 20) -> List[Tuple[str, float]]:
+        """按相关度降序返回 [(doc_id, score), ...]"""
+        scores = self.match(query)
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return top[offset:offset + limit]
+
+    @classmethod
+    def build(cls, podcasts: Iterable[Dict[str, Any]]) -> "SearchIndex":
+        """从播客记录批量构建索引"""
+        index = cls()
+        for podcast in podcasts:
+            if podcast.get("id"):
+                index.add(podcast["id"], *podcast_document(podcast))
+        return index
+
+
+def needs_reindex(updates: Optional[Dict[str, Any]]) -> bool:
+    """更新是否涉及被索引的字段"""
+    return updates is None or any(
+        field in updates
+        for field in ("title", "transcript", "extracted_text", "transcript_blob", "extracted_text_blob")
+    )
@@ -0,0 +1,67 @@
+"""
+有序二级索引与分页游标
+按 (created_at, id) 排序，支持 O(log N + limit) 的键集（keyset）分页
+"""
+import base64
+import json
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+SortKey = Tuple[str, str]
+
+
+def sort_key(record: Dict[str, Any]) -> SortKey:
+    """记录的排序键：(created_at, id)"""
+    return (record.get("created_at", ""), record.get("id", ""))
+
+
+def encode_cursor(key: SortKey) -> str:
+    """将排序键编码为不透明的游标字符串"""
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return (str(created_at), str(record_id))
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+
+class SortedIndex:
+    """
+    按 (created_at, id) 升序保存的键列表
+
+    列表倒序遍历即为“最新在前”的展示顺序；
+    游标定位使用二分查找，翻到任意一页的成本与总记录数无关
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self._keys = sorted(sort_key(record) for record in records)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, record: Dict[str, Any]):
+        insort(self._keys, sort_key(record))
+
+    def remove(self, record: Dict[str, Any]):
+        key = sort_key(record)
+        pos = bisect_left(self._keys, key)
+        if pos < len(self._keys) and self._keys[pos] == key:
+            del self._keys[pos]
+
+    def iter_desc(self, before: Optional[SortKey] = None) -> Iterator[SortKey]:
+        """从 before（不含）开始按降序遍历；before 为空时从最新记录开始"""
+        pos = bisect_left(self._keys, before) if before is not None else len(self._keys)
+        for i in range(pos - 1, -1, -1):
+            yield self._keys[i]
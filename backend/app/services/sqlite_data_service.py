@@ -0,0 +1,346 @@
+"""
+SQLite 数据服务
+基于标准库 sqlite3（WAL 模式，每个线程一个连接），
+列表查询的排序 / 分页下推到 SQL
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from app.config import settings
+from app.services.data_service import DataService, Mutator
+from app.services.job_events import job_events
+from app.services.sorted_index import sort_key, encode_cursor, decode_cursor
+
+
+# 每个表中单独建列（可建索引）的字段，完整记录以 JSON 形式保存在 data 列
+PODCAST_COLUMNS = ("id", "title", "status", "created_at", "updated_at")
+JOB_COLUMNS = ("id", "podcast_id", "status", "created_at", "updated_at")
+COLUMNS = {"podcasts": PODCAST_COLUMNS, "jobs": JOB_COLUMNS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS podcasts (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    status TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_podcasts_created_at_id ON podcasts(created_at, id);
+DROP INDEX IF EXISTS idx_podcasts_created_at;
+CREATE INDEX IF NOT EXISTS idx_podcasts_status ON podcasts(status);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    podcast_id TEXT,
+    status TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_podcast_id ON jobs(podcast_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+"""
+
+
+class SQLiteDataService(DataService):
+    """SQLite 数据服务类，方法签名与 DataService 一致"""
+
+    def __init__(self, data_dir: Optional[Path] = None):
+        super().__init__(data_dir)
+        self.db_file = self.data_dir / settings.sqlite_db_name
+        self._local = threading.local()
+
+        is_new_db = not self.db_file.exists()
+        self._conn().executescript(SCHEMA)
+
+        # 首次创建数据库时，自动导入已有的 JSON 数据
+        if is_new_db:
+            import_json_data(self)
+
+    def _conn(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接（每个线程一个连接）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_file), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """写事务（BEGIN IMMEDIATE，避免读后写升级锁时死锁）"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _put(self, conn: sqlite3.Connection, table: str, columns: tuple, record: Dict[str, Any]):
+        """插入或替换一条记录"""
+        values = [record.get(column) for column in columns]
+        values.append(json.dumps(record, ensure_ascii=False))
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}, data) VALUES ({placeholders})",
+            values
+        )
+
+    def _get(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT data FROM {table} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _all(self, table: str) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(f"SELECT data FROM {table} ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _delete(self, table: str, record_id: str):
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM {table} WHERE id = ?", (record_id,))
+
+    # ========== Podcast 相关操作 ==========
+
+    def read_podcasts(self) -> List[Dict[str, Any]]:
+        """读取所有播客"""
+        return self._all("podcasts")
+
+    def get_podcast(self, podcast_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个播客"""
+        return self._get("podcasts", podcast_id)
+
+    def list_podcasts(
+        self,
+        search: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """分页查询播客列表（排序 / 分页在 SQL 中完成，搜索走全文索引）"""
+        if search:
+            return self.search_podcasts(search, offset=offset, limit=limit)
+
+        rows = self._conn().execute(
+            "SELECT data FROM podcasts ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def page_podcasts(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        search: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """基于游标的分页查询，使用 (created_at, id) 复合索引定位"""
+        conditions = []
+        params: list = []
+
+        if cursor:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if search:
+            # 全文索引命中的 id 集合作为过滤条件
+            matched = self.get_search_index().match(search)
+            conditions.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(matched)))
+
+        sql = "SELECT data FROM podcasts"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        items = [json.loads(row[0]) for row in self._conn().execute(sql, params).fetchall()]
+        next_cursor = encode_cursor(sort_key(items[limit - 1])) if len(items) > limit else None
+        return items[:limit], next_cursor
+
+    def get_podcasts_by_ids(self, podcast_ids: List[str]) -> List[Dict[str, Any]]:
+        """按给定顺序批量获取播客（忽略不存在的 id）"""
+        if not podcast_ids:
+            return []
+        rows = self._conn().execute(
+            "SELECT id, data FROM podcasts WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(podcast_ids),)
+        ).fetchall()
+        podcasts = {row[0]: json.loads(row[1]) for row in rows}
+        return [podcasts[pid] for pid in podcast_ids if pid in podcasts]
+
+    def save_podcast(self, podcast_data: Dict[str, Any]) -> bool:
+        """保存新播客"""
+        try:
+            if "created_at" not in podcast_data:
+                podcast_data["created_at"] = datetime.now().isoformat()
+            podcast_data["updated_at"] = datetime.now().isoformat()
+            podcast_data.setdefault("version", 1)
+            stored = self._store_text_blobs(podcast_data)
+
+            with self._transaction() as conn:
+                self._ensure_text_blobs(stored)
+                self._put(conn, "podcasts", PODCAST_COLUMNS, podcast_data)
+            self._index_podcast(podcast_data)
+            return True
+        except Exception as e:
+            print(f"Error saving podcast: {e}")
+            return False
+
+    def _podcast_write_lock(self):
+        """写事务（BEGIN IMMEDIATE）与其他写入互斥"""
+        return self._transaction()
+
+    def migrate_text_blobs(self) -> int:
+        """把旧记录中内联保存的大文本移到 blob，在一个写事务内完成"""
+        migrated = 0
+        with self._transaction() as conn:
+            for (data,) in conn.execute("SELECT data FROM podcasts").fetchall():
+                podcast = json.loads(data)
+                updates = self._inline_text_updates(podcast)
+                if updates:
+                    podcast.update(updates)
+                    self._put(conn, "podcasts", PODCAST_COLUMNS, podcast)
+                    migrated += 1
+
+        if migrated:
+            print(f"✅ {migrated} 个播客的稿件已移到 blob 存储")
+        return migrated
+
+    def delete_podcast(self, podcast_id: str) -> bool:
+        """删除播客"""
+        try:
+            self._delete("podcasts", podcast_id)
+            self._unindex_podcast(podcast_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting podcast: {e}")
+            return False
+
+    # ========== Job 相关操作 ==========
+
+    def read_jobs(self) -> List[Dict[str, Any]]:
+        """读取所有任务"""
+        return self._all("jobs")
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个任务（叠加写回缓冲中尚未写入的进度）"""
+        return self.job_buffer.read(job_id, lambda: self._get("jobs", job_id))
+
+    def list_jobs_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """按创建时间先后返回指定状态的任务（持久化的任务队列）"""
+        rows = self._conn().execute(
+            "SELECT data FROM jobs WHERE status IN (SELECT value FROM json_each(?)) "
+            "ORDER BY created_at, id",
+            (json.dumps(list(statuses)),)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def save_job(self, job_data: Dict[str, Any]) -> bool:
+        """保存新任务"""
+        try:
+            if "created_at" not in job_data:
+                job_data["created_at"] = datetime.now().isoformat()
+            job_data["updated_at"] = datetime.now().isoformat()
+            job_data.setdefault("version", 1)
+
+            with self._transaction() as conn:
+                self._put(conn, "jobs", JOB_COLUMNS, job_data)
+            job_events.publish(job_data)
+            return True
+        except Exception as e:
+            print(f"Error saving job: {e}")
+            return False
+
+    def delete_job(self, job_id: str) -> bool:
+        """删除任务"""
+        try:
+            self._delete("jobs", job_id)
+            job_events.remove(job_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting job: {e}")
+            return False
+
+    # ========== 原子更新 ==========
+
+    def _mutate(
+        self,
+        collection: str,
+        record_id: str,
+        fn: Mutator,
+        expected_version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """在一个 BEGIN IMMEDIATE 事务内完成读取-修改-写回"""
+        columns = COLUMNS.get(collection)
+        if columns is None:
+            raise ValueError(f"未知的集合: {collection}")
+
+        with self._transaction() as conn:
+            row = conn.execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+            if not row:
+                return None
+
+            record = json.loads(row[0])
+            updates = self._apply_mutation(collection, record, fn, expected_version)
+            if updates is None:
+                return record
+            record.update(updates)
+
+            assignments = ", ".join(f"{column} = ?" for column in columns[1:])
+            values = [record.get(column) for column in columns[1:]]
+            conn.execute(
+                f"UPDATE {collection} SET {assignments}, data = ? WHERE id = ?",
+                values + [json.dumps(record, ensure_ascii=False), record_id]
+            )
+
+        self._after_mutate(collection, record, updates)
+        return record
+
+
+def import_json_data(service: SQLiteDataService, data_dir: Optional[Path] = None) -> Dict[str, int]:
+    """
+    一次性从 podcasts.json / jobs.json 导入数据到 SQLite
+
+    已存在的同 id 记录会被覆盖，可以重复执行
+
+    Returns:
+        各集合导入的记录数
+    """
+    data_dir = Path(data_dir) if data_dir else service.data_dir
+    counts = {}
+
+    for table, columns in (("podcasts", PODCAST_COLUMNS), ("jobs", JOB_COLUMNS)):
+        json_file = data_dir / f"{table}.json"
+        if not json_file.exists():
+            counts[table] = 0
+            continue
+
+        with open(json_file, 'r', encoding='utf-8') as f:
+            try:
+                records = json.load(f).get(table, [])
+            except json.JSONDecodeError as e:
+                print(f"⚠️  JSON 文件损坏，跳过导入: {json_file} ({e})")
+                records = []
+
+        records = [record for record in records if record.get("id")]
+        with service._transaction() as conn:
+            for record in records:
+                service._put(conn, table, columns, record)
+
+        counts[table] = len(records)
+        print(f"✅ 导入 {table}: {len(records)} 条记录")
+
+    return counts
+
+
+if __name__ == "__main__":
+    # 用法: python -m app.services.sqlite_data_service [data_dir]
+    import sys
+
+    source_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else settings.data_dir
+    import_json_data(SQLiteDataService(source_dir), source_dir)
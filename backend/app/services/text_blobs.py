@@ -0,0 +1,80 @@
+"""
+大文本（稿件 / 提取的文本）的内容寻址存储
+
+播客记录中只保存文本的 SHA-256，文本本身 gzip 压缩后保存在 data_dir/blobs/ 下（按哈希前两位分目录），
+列表 / 查询 / 更新播客时不再解析和重写整篇稿件：
+
+- 相同的文本只保存一次（transcript 与 extracted_text 通常是同一段文本）
+- 文件写入后不再修改：先写临时文件再原子替换，读取不需要加锁
+- 文件本身就是合法的 gzip 数据，客户端接受 gzip 时可以原样发送
+"""
+import gzip
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+
+# 以 blob 形式保存的文本字段 → 记录中保存哈希的字段
+BLOB_FIELDS = {
+    "transcript": "transcript_blob",
+    "extracted_text": "extracted_text_blob"
+}
+
+
+class TextBlobStore:
+    """本地磁盘上的内容寻址文本存储"""
+
+    def __init__(self, root: Path, compress_level: int = 6):
+        """
+        Args:
+            root: 存储目录
+            compress_level: gzip 压缩级别（1-9）
+        """
+        self.root = Path(root)
+        self.compress_level = compress_level
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.txt.gz"
+
+    def put(self, text: str) -> str:
+        """保存文本，返回其 SHA-256（已存在时不重复写入）"""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'wb') as f:
+                # mtime=0：相同文本压缩结果完全相同
+                f.write(gzip.compress(data, compresslevel=self.compress_level, mtime=0))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """读取文本，不存在时返回 None"""
+        try:
+            with open(self.path(digest), 'rb') as f:
+                return gzip.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            print(f"⚠️  文本 blob 不存在: {digest}")
+            return None
+
+    def open(self, digest: str, compressed: bool = False) -> Optional[BinaryIO]:
+        """
+        打开文本用于流式读取，不存在时返回 None
+
+        Args:
+            compressed: True 时返回 gzip 压缩数据，否则返回解压后的 UTF-8 字节
+        """
+        try:
+            return open(self.path(digest), 'rb') if compressed else gzip.open(self.path(digest), 'rb')
+        except FileNotFoundError:
+            return None
+
+    def delete(self, digest: str):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,206 @@
+"""
+上传文档的文本提取（PDF / Word）
+
+PyPDF2 逐页提取文本是纯 Python 的 CPU 密集计算，在任务线程内执行时一直持有 GIL，
+几百页的 PDF 会拖慢同一进程内的所有请求。PDF 按页分批交给进程池并行提取：
+
+- 文件内容写入 temp_dir 下的临时文件，子进程按路径读取（不通过进程间通信传输整个文件），
+  每个子进程只解析一次同一文件
+- 各批结果按页码顺序收集到列表，最后一次性 join
+- 已提取的文本达到 max_chars（足够生成目标长度的稿件）后不再提交新的批次，并取消排队中的批次
+- 页数不超过一批的小文件直接在当前线程提取，进程池不可用时也回退到当前线程
+"""
+import io
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+from docx import Document
+
+from app.config import settings
+
+
+# 子进程内最近打开的 PDF（同一文件的后续批次不再重新解析）
+_worker_reader: Optional[Tuple[str, PdfReader]] = None
+
+
+def _extract_pages(path: str, start: int, end: int) -> List[str]:
+    """在子进程中提取 [start, end) 页的文本"""
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != path:
+        _worker_reader = (path, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+
+def _join_until(texts, max_chars: int) -> Tuple[str, bool]:
+    """
+    依次收集文本直到达到 max_chars（0 表示不限制）
+
+    Returns:
+        (拼接结果, 是否提前停止)
+    """
+    parts = []
+    collected = 0
+    for text in texts:
+        parts.append(text)
+        collected += len(text) + 1
+        if max_chars and collected >= max_chars:
+            return "\n".join(parts).strip(), True
+    return "\n".join(parts).strip(), False
+
+
+class PdfTextExtractor:
+    """按页分批、多进程并行的 PDF 文本提取"""
+
+    def __init__(self, workers: int, pages_per_batch: int, temp_dir: Path):
+        """
+        Args:
+            workers: 子进程数（0 表示始终在当前线程提取）
+            pages_per_batch: 每批提取的页数
+            temp_dir: 临时文件目录
+        """
+        self.workers = workers
+        self.pages_per_batch = max(1, pages_per_batch)
+        self.temp_dir = Path(temp_dir)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # 监控计数器
+        self.documents = 0
+        self.pages = 0
+        self.stopped_early = 0
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """首次使用时创建进程池（spawn：不复制当前进程的线程和锁）"""
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _discard_pool(self):
+        """子进程异常退出后丢弃进程池，下次使用时重新创建"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def extract(self, file_content: bytes, max_chars: int = 0) -> str:
+        """
+        提取 PDF 文本
+
+        Args:
+            file_content: PDF 文件内容
+            max_chars: 提取到的文本达到该长度后停止（以页为单位，0 表示全部提取）
+
+        Returns:
+            各页文本以换行连接
+        """
+        reader = PdfReader(io.BytesIO(file_content))
+        page_count = len(reader.pages)
+        self.documents += 1
+
+        pool = self._get_pool() if page_count > self.pages_per_batch else None
+        if pool is not None:
+            try:
+                text, stopped, extracted = self._extract_parallel(pool, file_content, page_count, max_chars)
+            except BrokenProcessPool as e:
+                print(f"⚠️  PDF 提取进程异常，改为在当前线程提取: {e}")
+                self._discard_pool()
+                pool = None
+
+        if pool is None:
+            extracted = 0
+
+            def pages():
+                nonlocal extracted
+                for page in reader.pages:
+                    extracted += 1
+                    yield page.extract_text() or ""
+
+            text, stopped = _join_until(pages(), max_chars)
+
+        self.pages += extracted
+        if stopped:
+            self.stopped_early += 1
+            print(f"   📄 已提取 {extracted}/{page_count} 页（{len(text)} 字符），足够生成稿件，停止提取")
+        return text
+
+    def _extract_parallel(self, pool: ProcessPoolExecutor, file_content: bytes, page_count: int, max_chars: int):
+        """分批提交到进程池，按顺序收集；同时在途的批次不超过子进程数的两倍"""
+        path = self.temp_dir / f"extract-{uuid.uuid4().hex}.pdf"
+        path.write_bytes(file_content)
+        pending = deque()
+        next_page = 0
+
+        def submit():
+            nonlocal next_page
+            while next_page < page_count and len(pending) < self.workers * 2:
+                end = min(next_page + self.pages_per_batch, page_count)
+                pending.append((end - next_page, pool.submit(_extract_pages, str(path), next_page, end)))
+                next_page = end
+
+        extracted = 0
+
+        def batches():
+            nonlocal extracted
+            submit()
+            while pending:
+                size, future = pending.popleft()
+                texts = future.result()
+                extracted += size
+                submit()
+                yield from texts
+
+        try:
+            text, stopped = _join_until(batches(), max_chars)
+            return text, stopped, extracted
+        finally:
+            for _, future in pending:
+                future.cancel()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        """关闭进程池（应用退出时调用）"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "documents": self.documents,
+            "pages": self.pages,
+            "stopped_early": self.stopped_early
+        }
+
+
+def extract_docx_text(file_content: bytes, max_chars: int = 0) -> str:
+    """提取 Word 文档的段落文本（达到 max_chars 后停止）"""
+    doc = Document(io.BytesIO(file_content))
+    text, _ = _join_until((para.text for para in doc.paragraphs), max_chars)
+    return text
+
+
+# 创建全局实例
+pdf_extractor = PdfTextExtractor(
+    workers=settings.pdf_extract_workers,
+    pages_per_batch=settings.pdf_pages_per_batch,
+    temp_dir=settings.temp_dir
+)
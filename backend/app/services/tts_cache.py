@@ -0,0 +1,215 @@
+"""
+TTS 合成结果缓存（内容寻址）
+
+键为 sha256(接口类型 + 规范化文本 + voice_id + model_id + output_format + voice_settings)，
+同一段文本用同样的声音和参数合成过一次后，重复上传、任务重试或部分重叠的稿件都可以直接复用。
+
+两级存储：
+- 本地磁盘：有容量上限，按最近最少使用淘汰
+- S3 tts-cache/ 前缀：长期保存，多实例 / 重新部署后共享（可配合 S3 生命周期规则清理）
+"""
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from app.config import settings
+from app.utils.blocking import io_executor
+from app.utils.s3_storage import S3Storage, s3_storage
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：Unicode NFC + 合并空白，避免排版差异导致缓存未命中"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TTSCache:
+    """本地磁盘 LRU + S3 两级 TTS 缓存"""
+
+    def __init__(
+        self,
+        storage: Optional[S3Storage],
+        cache_dir: Path,
+        max_bytes: int,
+        s3_prefix: str = "tts-cache"
+    ):
+        """
+        Args:
+            storage: S3 存储（为 None 时只使用本地缓存）
+            cache_dir: 本地缓存目录
+            max_bytes: 本地缓存容量上限
+            s3_prefix: S3 键前缀
+        """
+        self.storage = storage
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.s3_prefix = s3_prefix.rstrip("/")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # 键 -> 文件大小
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._uploads: "set[Future]" = set()  # 后台进行中的 S3 上传
+
+        # 监控计数器
+        self.hits = 0
+        self.s3_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        segments: Iterable[Tuple[str, str]],
+        model_id: str,
+        output_format: str,
+        voice_settings: dict
+    ) -> str:
+        """
+        计算缓存键
+
+        Args:
+            kind: 合成接口（tts / dialogue），不同接口对同样输入的输出不同
+            segments: [(文本, voice_id), ...]
+            model_id / output_format / voice_settings: 合成参数
+        """
+        payload = json.dumps({
+            "kind": kind,
+            "segments": [[normalize_text(text), voice_id] for text, voice_id in segments],
+            "model_id": model_id,
+            "output_format": output_format,
+            "voice_settings": voice_settings
+        }, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.tts"
+
+    def _s3_key(self, key: str) -> str:
+        return f"{self.s3_prefix}/{key}"
+
+    def _load(self):
+        """启动时扫描缓存目录，按修改时间恢复 LRU 顺序"""
+        for tmp_file in self.cache_dir.glob("*.tmp"):
+            tmp_file.unlink(missing_ok=True)
+        for path in sorted(self.cache_dir.glob("*.tts"), key=lambda p: p.stat().st_mtime):
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的缓存，直到总大小不超过上限（调用方需持有锁或处于初始化阶段）"""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._path(key).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def _store_local(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        tmp_file = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, self._path(key))
+
+        with self._lock:
+            old_size = self._entries.pop(key, None)
+            if old_size is not None:
+                self._total_bytes -= old_size
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """查找缓存：本地磁盘 → S3，都未命中返回 None"""
+        with self._lock:
+            cached = key in self._entries
+            if cached:
+                self._entries.move_to_end(key)
+        if cached:
+            try:
+                data = self._path(key).read_bytes()
+                with self._lock:
+                    self.hits += 1
+                return data
+            except FileNotFoundError:
+                pass  # 刚好被淘汰
+
+        if self.storage is not None:
+            data = self.storage.download_file(self._s3_key(key), missing_ok=True)
+            if data:
+                self._store_local(key, data)
+                with self._lock:
+                    self.s3_hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        """
+        写入本地缓存，S3 上传交给 io_executor 在后台完成（不占用合成线程）
+
+        失败只打印日志，不影响合成结果
+        """
+        if not data:
+            return
+        try:
+            self._store_local(key, data)
+        except Exception as e:
+            print(f"⚠️  写入本地 TTS 缓存失败: {e}")
+        if self.storage is not None:
+            future = io_executor.submit(self._upload, key, data)
+            with self._lock:
+                self._uploads.add(future)
+            future.add_done_callback(self._upload_done)
+
+    def _upload(self, key: str, data: bytes):
+        try:
+            self.storage.put_bytes(self._s3_key(key), data, content_type="application/octet-stream")
+        except Exception as e:
+            print(f"⚠️  上传 TTS 缓存到 S3 失败: {key}: {e}")
+
+    def _upload_done(self, future: Future):
+        with self._lock:
+            self._uploads.discard(future)
+
+    def wait_uploads(self, timeout: Optional[float] = None):
+        """等待后台 S3 上传完成（进程退出时线程池本身也会等待已提交的上传）"""
+        with self._lock:
+            pending = list(self._uploads)
+        wait(pending, timeout=timeout)
+
+    def stats(self) -> dict:
+        """缓存监控指标（本地命中和 S3 命中都计入命中率）"""
+        with self._lock:
+            lookups = self.hits + self.s3_hits + self.misses
+            return {
+                "hits": self.hits,
+                "s3_hits": self.s3_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.s3_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
+
+
+# 创建全局实例
+tts_cache = TTSCache(
+    s3_storage if settings.tts_cache_s3 else None,
+    settings.temp_dir / "tts_cache",
+    settings.tts_cache_max_bytes,
+    settings.tts_cache_s3_prefix
+)
@@ -0,0 +1,133 @@
+"""
+任务进度的写回缓冲（write-behind）
+
+一个任务在处理过程中会更新十几次进度，每次都同步重写任务存储（JSON 模式下是整个 jobs.json），
+写入都在任务线程的关键路径上。只包含 progress / status_message 的中间更新先按任务合并在内存中，
+由定时器在 delay 秒后批量写入；其他更新（状态变化、结果字段等）连同该任务缓冲中的更新立即写入。
+
+- 缓冲的更新在写入完成后才移除，同一进程内的读取（get_job）叠加缓冲中的值，总能看到最新进度
+- 定时写入和立即写入串行执行，较早的进度不会覆盖之后写入的终态
+- 只在单个进程内有效（与任务调度器、事件总线的前提一致），进程退出前调用 flush()
+"""
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# 可以延迟写入的字段（只包含这些字段的更新进入缓冲）
+BUFFERED_FIELDS = frozenset(("progress", "status_message"))
+
+
+class JobProgressBuffer:
+    """按任务合并进度更新，定时批量写入"""
+
+    def __init__(self, write: Callable[[str, Dict[str, Any]], Any], delay: float):
+        """
+        Args:
+            write: 实际写入函数 write(job_id, updates)
+            delay: 第一条缓冲更新到批量写入之间的延迟（秒），0 表示不缓冲
+        """
+        self._write = write
+        self.delay = delay
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # 串行化所有写入：定时写入和立即写入不会交错
+        self._write_lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        # 每次移除已写入的缓冲时加 1，读取据此判断读到的存储内容是否与缓冲一致
+        self._generation = 0
+
+        # 监控计数器
+        self.buffered = 0
+        self.flushed = 0
+
+    def accepts(self, updates: Dict[str, Any]) -> bool:
+        """更新是否可以延迟写入"""
+        return self.delay > 0 and bool(updates) and BUFFERED_FIELDS.issuperset(updates)
+
+    def add(self, job_id: str, updates: Dict[str, Any]):
+        """合并到该任务的缓冲中，必要时启动定时器"""
+        with self._lock:
+            # 每次替换为新的字典：写入线程据此判断写入期间是否又有新的更新
+            self._pending[job_id] = {**self._pending.get(job_id, {}), **updates}
+            self.buffered += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def write_through(self, job_id: str, write: Callable[[Optional[Dict[str, Any]]], Any]) -> Any:
+        """
+        立即写入：write(该任务缓冲中尚未写入的更新) 负责连同这些更新一起写入，返回其结果
+
+        写入成功后移除这部分缓冲；写入失败时缓冲保留
+        """
+        with self._write_lock:
+            with self._lock:
+                pending = self._pending.get(job_id)
+            result = write(pending)
+            if pending is not None:
+                self._discard([(job_id, pending)])
+            return result
+
+    def read(self, job_id: str, load: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        读取存储中的任务并叠加缓冲中的更新
+
+        读取存储期间如果有缓冲被写入并移除，读到的可能是写入前的内容，重新读取
+        """
+        while True:
+            generation = self._generation
+            job = load()
+            with self._lock:
+                if self._generation == generation:
+                    pending = self._pending.get(job_id)
+                    break
+        if job is None or not pending:
+            return job
+        return {**job, **pending}
+
+    def flush(self):
+        """写入所有缓冲中的更新"""
+        with self._write_lock:
+            with self._lock:
+                items = list(self._pending.items())
+            written = []
+            for job_id, updates in items:
+                try:
+                    self._write(job_id, updates)
+                    written.append((job_id, updates))
+                except Exception as e:
+                    print(f"⚠️  任务进度写入失败 ({job_id}): {e}")
+            self._discard(written)
+
+    def _discard(self, written: List[Tuple[str, Dict[str, Any]]]):
+        """移除已写入的缓冲（写入期间又有新更新的任务保留，由下一次定时写入处理）"""
+        with self._lock:
+            for job_id, updates in written:
+                if self._pending.get(job_id) is updates:
+                    del self._pending[job_id]
+            if written:
+                self.flushed += len(written)
+                self._generation += 1
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def close(self):
+        """取消定时器并写入剩余的更新（应用退出时调用）"""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer:
+            timer.cancel()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "delay": self.delay,
+                "pending_jobs": len(self._pending),
+                "buffered_updates": self.buffered,
+                "flushed_writes": self.flushed
+            }
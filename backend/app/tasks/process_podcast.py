@@ -2,51 +2,61 @@
 播客后台处理任务
 提取文本 → 生成音频 → 上传到 S3
 """
-import io
-import threading
 import struct
-from PyPDF2 import PdfReader
-from docx import Document
+import time
+from typing import BinaryIO
 
 from app.services.data_service import data_service
 from app.services.ai_service import ai_service
+from app.services.text_extractor import pdf_extractor, extract_docx_text
 from app.utils.s3_storage import s3_storage
+from app.utils.script_splitter import iter_turns
+from app.utils.live_audio import live_audio
+from app.utils.audio import audio_spool
+from app.utils.audio_info import audio_info, stream_audio_info
+from app.tasks.scheduler import JobScheduler
+from app.config import settings
 
 
-def get_mp3_duration(audio_data: bytes) -> int:
+def get_audio_duration(audio_file: BinaryIO, audio_size: int) -> int:
     """
-    从 MP3 字节数据中提取音频时长（秒）
-    使用简单的比特率估算方法
+    计算音频时长（秒）
+    解析 MP3 帧头 / WAV 文件头得到精确时长，无法解析时按 128kbps 估算
     
     Args:
-        audio_data: MP3 音频字节数据
+        audio_file: 音频文件（读取后回到开头）
+        audio_size: 音频字节数
     
     Returns:
         音频时长（秒）
     """
-    try:
-        # ElevenLabs 通常生成 128kbps 的 MP3
-        # 比特率 = 128000 bits/s = 16000 bytes/s
-        bitrate = 16000  # bytes per second
-        duration = len(audio_data) / bitrate
-        return int(duration)
-    except Exception as e:
-        print(f"   ⚠️  时长计算失败: {e}，使用默认估算")
-        return int(len(audio_data) / 4000)
+    audio_file.seek(0)
+    info = stream_audio_info(audio_file, audio_size)
+    audio_file.seek(0)
+    if info:
+        print(f"   🎚️  {info.format} {info.bitrate}kbps {info.sample_rate}Hz")
+        return round(info.duration)
+    
+    # ElevenLabs 默认输出 128kbps = 16000 bytes/s
+    print("   ⚠️  无法解析音频头，按 128kbps 估算时长")
+    return int(audio_size / 16000)
 
 
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
+def extract_text_from_file(file_content: bytes, filename: str, max_chars: int = None) -> str:
     """
     从文件中提取文本
     
     Args:
         file_content: 文件内容（字节）
         filename: 文件名（用于判断类型）
+        max_chars: PDF / Word 提取到该长度后停止，默认 settings.extract_max_chars
     
     Returns:
         提取的文本
     """
     file_ext = filename.lower().split('.')[-1]
+    if max_chars is None:
+        max_chars = settings.extract_max_chars
     
     try:
         if file_ext == 'txt':
@@ -54,22 +64,12 @@ def extract_text_from_file(file_content: bytes, filename: str) -> str:
             return file_content.decode('utf-8', errors='ignore')
         
         elif file_ext == 'pdf':
-            # PDF 文件
-            pdf_file = io.BytesIO(file_content)
-            reader = PdfReader(pdf_file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text.strip()
+            # PDF 文件：按页分批多进程提取
+            return pdf_extractor.extract(file_content, max_chars)
         
         elif file_ext in ['doc', 'docx']:
             # Word 文件
-            doc_file = io.BytesIO(file_content)
-            doc = Document(doc_file)
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            return text.strip()
+            return extract_docx_text(file_content, max_chars)
         
         elif file_ext in ['mp3', 'wav', 'mp4', 'mov']:
             # 音频/视频文件 - 使用 ElevenLabs 转录
@@ -159,6 +159,12 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
             audio_s3_key = s3_key
             uploaded_key = s3_key
             
+            # 直接解析已下载的内容（MP3 / WAV）
+            info = audio_info(file_content)
+            if info:
+                duration_seconds = round(info.duration)
+                print(f"   ⏱️  音频时长: {duration_seconds} 秒（{info.format} {info.bitrate}kbps {info.sample_rate}Hz）")
+            
             data_service.update_job(job_id, {
                 "progress": 70,
                 "status_message": "🎵 使用原始音频文件"
@@ -173,44 +179,31 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
             detected_language = "zh" if has_chinese else "en"
             print(f"   🌐 检测到语言: {detected_language}")
             
+            # 边合成边播放：合成中即可通过 /stream 收听（与进度合并为一次写入）
+            live = live_audio.start(podcast_id)
             data_service.update_job(job_id, {
                 "progress": 45,
-                "status_message": f"🎭 生成多声道对话音频 (需要3-5分钟)..."
+                "status_message": f"🎭 生成多声道对话音频...",
+                "live_audio_url": f"/api/v1/podcasts/{podcast_id}/stream"
             })
             
-            # 如果文本太长，智能截取适当长度（ElevenLabs 有字符限制）
-            max_chars = 3000
-            if len(text) > max_chars:
-                print(f"   ⚠️  文本过长({len(text)}字符)，智能截取...")
+            # 长文本分段并发合成（ElevenLabs 单次请求有字符限制）
+            def on_tts_progress(done: int, total: int):
                 data_service.update_job(job_id, {
-                    "progress": 47,
-                    "status_message": "✂️ 优化文本长度..."
+                    "progress": 45 + 15 * done // total,
+                    "status_message": f"🎭 生成音频 ({done}/{total} 段)..."
                 })
-                
-                # 智能截断：在句子结束处截断
-                truncated = text[:max_chars]
-                
-                # 尝试在句号、问号、感叹号处截断（优先级从高到低）
-                for delimiter in ['. ', '。', '! ', '！', '? ', '？', '\n\n', '\n']:
-                    last_delimiter_pos = truncated.rfind(delimiter)
-                    if last_delimiter_pos > max_chars * 0.8:  # 至少保留80%的内容
-                        text = truncated[:last_delimiter_pos + len(delimiter)].strip()
-                        print(f"   ✂️  在合适的位置截断，最终长度: {len(text)} 字符")
-                        break
-                else:
-                    # 如果找不到合适的分隔符，在最后一个空格处截断
-                    last_space_pos = truncated.rfind(' ')
-                    if last_space_pos > max_chars * 0.9:
-                        text = truncated[:last_space_pos].strip()
-                    else:
-                        text = truncated.strip()
-                    print(f"   ✂️  在空格处截断，最终长度: {len(text)} 字符")
             
             # 使用多声音对话API（自动检测是否为对话，如果不是对话则回退到单声音）
-            audio_data = ai_service.generate_dialogue_audio(text, detected_language)
+            # 各段合成完成后依次写入临时文件（较大时落盘），直接用于上传
+            audio_file = audio_spool(settings.audio_spool_max_memory, settings.temp_dir)
+            audio_size = ai_service.generate_long_audio(
+                text, detected_language, on_progress=on_tts_progress, live=live, output=audio_file
+            )
             
-            if not audio_data:
+            if not audio_size:
                 raise Exception("音频生成失败")
+            duration_seconds = get_audio_duration(audio_file, audio_size)
             
             data_service.update_job(job_id, {
                 "progress": 60,
@@ -223,7 +216,7 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
                 "progress": 65,
                 "status_message": "📤 上传音频到云端..."
             })
-            audio_file = io.BytesIO(audio_data)
+            audio_file.seek(0)
             audio_s3_key = f"podcasts/{podcast_id}.mp3"
             
             uploaded_key = s3_storage.upload_file(
@@ -232,6 +225,7 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
                 prefix="podcasts",
                 content_type="audio/mpeg"
             )
+            audio_file.close()
             
             if not uploaded_key:
                 raise Exception("音频上传到 S3 失败")
@@ -260,13 +254,14 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
             "status": "completed"
         }
         
-        # 如果是新生成的音频，计算时长
-        if not is_audio_file and 'audio_data' in locals():
-            duration_seconds = get_mp3_duration(audio_data)
+        # 音频时长（上传的 mp4 / mov 等无法解析时不记录）
+        if 'duration_seconds' in locals():
             update_data["duration_seconds"] = duration_seconds
             print(f"   ⏱️  音频时长: {duration_seconds} 秒")
         
         data_service.update_podcast(podcast_id, update_data)
+        # 播客记录已指向 S3 上的完整音频，结束实时音频（正在收听的客户端读完后结束）
+        live_audio.end(podcast_id)
         
         data_service.update_job(job_id, {
             "status": "completed",
@@ -278,14 +273,15 @@ def process_podcast_background(podcast_id: str, job_id: str, s3_key: str):
         print(f"🎉 播客处理完成！")
         print(f"   音频 URL: {audio_url}")
         print(f"   文本长度: {len(text)} 字符")
-        if not is_audio_file and 'audio_data' in locals():
-            print(f"   音频大小: {len(audio_data)} bytes")
+        if not is_audio_file and 'audio_size' in locals():
+            print(f"   音频大小: {audio_size} bytes")
         print(f"{'='*60}\n")
     
     except Exception as e:
         print(f"\n{'='*60}")
         print(f"❌ 播客处理失败: {e}")
         print(f"{'='*60}\n")
+        live_audio.end(podcast_id, error=str(e))
         
         # 更新为失败状态
         data_service.update_podcast(podcast_id, {
@@ -336,69 +332,103 @@ def generate_podcast_background(podcast_id: str, job_id: str):
             "status_message": "🤖 AI 正在创作播客脚本..."
         })
         
-        # 1. 使用 Gemini 生成播客稿件
-        print("🤖 步骤 1/4: 使用 Gemini AI 生成播客稿件...")
-        script = ai_service.generate_script_from_topic(
-            topic=topic,
-            style=style,
-            duration_minutes=duration_minutes,
-            language=language
-        )
-        
-        if not script or len(script) < 50:
-            raise Exception("生成的稿件太短或为空")
-        
-        print(f"✅ 稿件生成完成！长度: {len(script)} 字符")
-        data_service.update_job(job_id, {
-            "progress": 40,
-            "status_message": f"📝 脚本创作完成 ({len(script)} 字符)"
-        })
-        
-        # 2. 使用 ElevenLabs 生成音频（支持多声音对话）
-        print("\n🎙️  步骤 2/4: 使用 ElevenLabs 生成音频...")
-        data_service.update_job(job_id, {
-            "progress": 45,
-            "status_message": "🎭 生成多声道对话音频 (需要3-5分钟)..."
-        })
-        
-        # 如果稿件太长，智能截取适当长度（ElevenLabs 有字符限制）
-        max_chars = 3000
-        if len(script) > max_chars:
-            print(f"   ⚠️  稿件过长({len(script)}字符)，智能截取...")
+        llm_cache_stats = {"hits": 0, "misses": 0, "bypassed": 0}
+        script_params = {
+            "topic": topic,
+            "style": style,
+            "duration_minutes": duration_minutes,
+            "language": language,
+            "use_cache": inputs.get("use_cache", True),
+            "cache_stats": llm_cache_stats
+        }
+        started_at = time.monotonic()
+        timings = {}
+        
+        # 边合成边播放：合成中即可通过 /stream 收听
+        live = live_audio.start(podcast_id)
+        data_service.update_job(job_id, {"live_audio_url": f"/api/v1/podcasts/{podcast_id}/stream"})
+        # 各段合成完成后依次写入临时文件（较大时落盘），直接用于上传
+        audio_file = audio_spool(settings.audio_spool_max_memory, settings.temp_dir)
+        
+        if settings.script_streaming:
+            # 1+2. 流式生成稿件，每个完整的轮次立即送去合成（稿件生成与音频合成重叠进行）
+            print("🤖 步骤 1-2/4: 流式生成稿件并同时合成音频...")
+            script_parts = []
+            
+            def script_pieces():
+                for piece in ai_service.stream_script_from_topic(**script_params):
+                    if not script_parts:
+                        data_service.update_job(job_id, {
+                            "progress": 40,
+                            "status_message": "📝 脚本创作中，已开始合成音频..."
+                        })
+                    script_parts.append(piece)
+                    yield piece
+            
+            def on_stream_progress(done: int, submitted: int):
+                if done == 1:
+                    timings["first_audio_seconds"] = round(time.monotonic() - started_at, 2)
+                data_service.update_job(job_id, {
+                    "progress": min(69, 40 + done),
+                    "status_message": f"🎭 边创作边合成音频 (已完成 {done}/{submitted} 段)..."
+                })
+            
+            audio_size = ai_service.generate_streaming_audio(
+                iter_turns(script_pieces()), language, on_progress=on_stream_progress, live=live, output=audio_file
+            )
+            script = "".join(script_parts)
+            
+            if not script or len(script) < 50:
+                raise Exception("生成的稿件太短或为空")
+            print(f"✅ 稿件生成完成！长度: {len(script)} 字符")
+            data_service.update_job(job_id, {"llm_cache": llm_cache_stats})
+        else:
+            # 1. 使用 Gemini 生成播客稿件
+            print("🤖 步骤 1/4: 使用 Gemini AI 生成播客稿件...")
+            script = ai_service.generate_script_from_topic(**script_params)
+            
+            if not script or len(script) < 50:
+                raise Exception("生成的稿件太短或为空")
+            
+            print(f"✅ 稿件生成完成！长度: {len(script)} 字符")
+            timings["script_seconds"] = round(time.monotonic() - started_at, 2)
             data_service.update_job(job_id, {
-                "progress": 47,
-                "status_message": "✂️ 优化脚本长度..."
+                "progress": 40,
+                "status_message": f"📝 脚本创作完成 ({len(script)} 字符)",
+                "llm_cache": llm_cache_stats
             })
             
-            # 智能截断：在句子结束处截断
-            truncated = script[:max_chars]
+            # 2. 使用 ElevenLabs 生成音频（支持多声音对话）
+            print("\n🎙️  步骤 2/4: 使用 ElevenLabs 生成音频...")
+            data_service.update_job(job_id, {
+                "progress": 45,
+                "status_message": "🎭 生成多声道对话音频..."
+            })
             
-            # 尝试在句号、问号、感叹号处截断（优先级从高到低）
-            for delimiter in ['. ', '。', '! ', '！', '? ', '？', '\n\n', '\n']:
-                last_delimiter_pos = truncated.rfind(delimiter)
-                if last_delimiter_pos > max_chars * 0.8:  # 至少保留80%的内容
-                    script = truncated[:last_delimiter_pos + len(delimiter)].strip()
-                    print(f"   ✂️  在合适的位置截断，最终长度: {len(script)} 字符")
-                    break
-            else:
-                # 如果找不到合适的分隔符，在最后一个空格处截断
-                last_space_pos = truncated.rfind(' ')
-                if last_space_pos > max_chars * 0.9:
-                    script = truncated[:last_space_pos].strip()
-                else:
-                    script = truncated.strip()
-                print(f"   ✂️  在空格处截断，最终长度: {len(script)} 字符")
-        
-        # 使用多声音对话API（自动检测是否为对话，如果不是对话则回退到单声音）
-        audio_data = ai_service.generate_dialogue_audio(script, language)
-        
-        if not audio_data:
+            # 长稿件分段并发合成（ElevenLabs 单次请求有字符限制）
+            def on_tts_progress(done: int, total: int):
+                if done == 1:
+                    timings["first_audio_seconds"] = round(time.monotonic() - started_at, 2)
+                data_service.update_job(job_id, {
+                    "progress": 45 + 25 * done // total,
+                    "status_message": f"🎭 生成音频 ({done}/{total} 段)..."
+                })
+            
+            # 使用多声音对话API（自动检测是否为对话，如果不是对话则回退到单声音）
+            audio_size = ai_service.generate_long_audio(
+                script, language, on_progress=on_tts_progress, live=live, output=audio_file
+            )
+        
+        if not audio_size:
             raise Exception("音频生成失败")
         
-        print(f"✅ 音频生成完成！大小: {len(audio_data)} bytes")
+        timings["audio_ready_seconds"] = round(time.monotonic() - started_at, 2)
+        print(f"✅ 音频生成完成！大小: {audio_size} bytes")
+        duration_seconds = get_audio_duration(audio_file, audio_size)
         data_service.update_job(job_id, {
             "progress": 70,
-            "status_message": "✅ 音频生成完成！"
+            "status_message": "✅ 音频生成完成！",
+            "timings": timings
         })
         
         # 3. 上传音频到 S3
@@ -407,7 +437,7 @@ def generate_podcast_background(podcast_id: str, job_id: str):
             "progress": 75,
             "status_message": "📤 上传音频到云端..."
         })
-        audio_file = io.BytesIO(audio_data)
+        audio_file.seek(0)
         
         uploaded_key = s3_storage.upload_file(
             file_obj=audio_file,
@@ -415,6 +445,7 @@ def generate_podcast_background(podcast_id: str, job_id: str):
             prefix="podcasts",
             content_type="audio/mpeg"
         )
+        audio_file.close()
         
         if not uploaded_key:
             raise Exception("音频上传到 S3 失败")
@@ -434,9 +465,6 @@ def generate_podcast_background(podcast_id: str, job_id: str):
         
         audio_url = f"/api/v1/podcasts/{podcast_id}/stream"
         
-        # 计算音频时长
-        duration_seconds = get_mp3_duration(audio_data)
-        print(f"   ⏱️  音频时长: {duration_seconds} 秒")
         
         data_service.update_podcast(podcast_id, {
             "audio_url": audio_url,
@@ -446,6 +474,7 @@ def generate_podcast_background(podcast_id: str, job_id: str):
             "duration_seconds": duration_seconds,
             "status": "completed"
         })
+        live_audio.end(podcast_id)
         
         data_service.update_job(job_id, {
             "status": "completed",
@@ -456,14 +485,15 @@ def generate_podcast_background(podcast_id: str, job_id: str):
         print(f"🎉 AI 播客生成完成！")
         print(f"   音频 URL: {audio_url}")
         print(f"   稿件长度: {len(script)} 字符")
-        print(f"   音频大小: {len(audio_data)} bytes")
-        print(f"   预计时长: {duration_seconds} 秒")
+        print(f"   音频大小: {audio_size} bytes")
+        print(f"   音频时长: {duration_seconds} 秒")
         print(f"{'='*60}\n")
     
     except Exception as e:
         print(f"\n{'='*60}")
         print(f"❌ AI 播客生成失败: {e}")
         print(f"{'='*60}\n")
+        live_audio.end(podcast_id, error=str(e))
         
         # 更新为失败状态
         data_service.update_podcast(podcast_id, {
@@ -476,42 +506,49 @@ def generate_podcast_background(podcast_id: str, job_id: str):
         })
 
 
-def start_processing_task(podcast_id: str, job_id: str, s3_key: str):
+def run_job(job: dict):
     """
-    启动后台处理任务（在新线程中）
+    执行单个任务（由调度器的工作线程调用）
     根据任务类型路由到不同的处理函数
-    
-    Args:
-        podcast_id: 播客ID
-        job_id: 任务ID
-        s3_key: S3 文件键（AI 生成时为 None）
     """
-    # 获取任务信息以确定类型
-    job = data_service.get_job(job_id)
-    if not job:
-        print(f"❌ 任务不存在: {job_id}")
-        return
-    
     job_type = job.get("type", "upload")
     
-    # 根据任务类型选择处理函数
     if job_type == "generate":
         # AI 生成播客
-        print(f"🤖 启动 AI 生成任务...")
-        thread = threading.Thread(
-            target=generate_podcast_background,
-            args=(podcast_id, job_id)
-        )
+        print(f"🤖 开始执行 AI 生成任务...")
+        generate_podcast_background(job["podcast_id"], job["id"])
     else:
         # 文件上传处理
-        print(f"📁 启动文件处理任务...")
-        thread = threading.Thread(
-            target=process_podcast_background,
-            args=(podcast_id, job_id, s3_key)
-        )
+        print(f"📁 开始执行文件处理任务...")
+        process_podcast_background(job["podcast_id"], job["id"], job.get("s3_key"))
+
+
+# 全局任务调度器
+job_scheduler = JobScheduler(
+    data_service,
+    handler=run_job,
+    workers=settings.job_workers,
+    max_queue=settings.job_queue_max
+)
+
+
+def start_processing_task(podcast_id: str, job_id: str, s3_key: str) -> int:
+    """
+    提交后台处理任务到调度器
     
-    thread.daemon = True
-    thread.start()
+    任务参数（类型、S3 文件键、生成参数）从已保存的任务记录中读取
     
-    print(f"✅ 后台任务已启动 (Thread ID: {thread.ident}, Type: {job_type})")
-
+    Args:
+        podcast_id: 播客ID
+        job_id: 任务ID
+        s3_key: S3 文件键（AI 生成时为 None）
+    
+    Returns:
+        排队位置（1 表示下一个执行）
+    
+    Raises:
+        QueueFull: 任务队列已满
+    """
+    position = job_scheduler.submit(job_id)
+    print(f"✅ 后台任务已排队 (Job ID: {job_id}, 位置: {position})")
+    return position
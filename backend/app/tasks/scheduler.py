@@ -0,0 +1,197 @@
+"""
+后台任务调度器
+固定数量的工作线程 + 持久化任务队列
+
+队列本身就是数据层中 status 为 pending 的任务（按创建时间排序），
+内存中的 deque 只是它的副本；进程重启后 recover() 会重新装载
+pending 任务，并把中断时仍在 processing 的任务重新排队。
+"""
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFull(Exception):
+    """任务队列已满（HTTP 429）"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"任务队列已满（最多 {max_size} 个排队任务）")
+        self.max_size = max_size
+
+
+class JobScheduler:
+    """有界工作线程池"""
+
+    RECOVER_STATUSES = ["pending", "processing"]
+
+    def __init__(
+        self,
+        service,
+        handler: Callable[[Dict[str, Any]], None],
+        workers: int,
+        max_queue: int
+    ):
+        """
+        Args:
+            service: 数据服务（读取 / 更新任务记录）
+            handler: 执行单个任务的函数，参数为任务记录
+            workers: 工作线程数
+            max_queue: 最多排队任务数，超出时 submit 抛出 QueueFull
+        """
+        self.service = service
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._queued = set()
+        self._running = set()
+        self._threads = []
+        self._stopping = False
+
+        self.processed = 0
+        self.rejected = 0
+
+    def start(self):
+        """启动工作线程并恢复未完成的任务（重复调用无副作用）"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+        print(f"✅ 任务调度器已启动 ({self.workers} 个工作线程, 队列上限 {self.max_queue})")
+        self.recover()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止接收新任务并通知工作线程退出
+
+        正在执行的任务不会被打断；仍在排队的任务保持 pending，下次启动时恢复
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+            self._queue.clear()
+            self._queued.clear()
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def recover(self) -> int:
+        """从数据层重新装载未完成的任务，返回恢复的任务数"""
+        jobs = self.service.list_jobs_by_status(self.RECOVER_STATUSES)
+        recovered = []
+
+        for job in jobs:
+            job_id = job["id"]
+            with self._cond:
+                if job_id in self._queued or job_id in self._running:
+                    continue
+            if job.get("status") == "processing":
+                # 上次运行被中断，从头开始处理（读取之后状态已变化的任务不再重置）
+                self.service.mutate("jobs", job_id, lambda current: {
+                    "status": "pending",
+                    "progress": 0,
+                    "status_message": "🔁 服务重启，任务已重新排队"
+                } if current.get("status") == "processing" else None)
+            recovered.append(job_id)
+
+        # 恢复的任务此前已被接受，不受队列上限限制
+        with self._cond:
+            for job_id in recovered:
+                if job_id not in self._queued and job_id not in self._running:
+                    self._queue.append(job_id)
+                    self._queued.add(job_id)
+            self._cond.notify_all()
+
+        if recovered:
+            print(f"🔁 已恢复 {len(recovered)} 个未完成任务")
+        return len(recovered)
+
+    def submit(self, job_id: str) -> int:
+        """
+        提交任务（任务记录需已保存且状态为 pending）
+
+        Returns:
+            排队位置（1 表示下一个执行，0 表示正在执行）
+
+        Raises:
+            QueueFull: 排队任务数已达上限
+        """
+        if not self._threads:
+            self.start()
+
+        with self._cond:
+            if job_id in self._running:
+                return 0
+            if job_id in self._queued:
+                return self._position(job_id)
+            if len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(self.max_queue)
+
+            self._queue.append(job_id)
+            self._queued.add(job_id)
+            self._cond.notify()
+            return len(self._queue)
+
+    def is_full(self) -> bool:
+        """排队任务数是否已达上限"""
+        with self._cond:
+            return len(self._queue) >= self.max_queue
+
+    def position(self, job_id: str) -> Optional[int]:
+        """返回任务的排队位置；正在执行返回 0，不在队列中返回 None"""
+        with self._cond:
+            if job_id in self._running:
+                return 0
+            if job_id in self._queued:
+                return self._position(job_id)
+            return None
+
+    def _position(self, job_id: str) -> int:
+        return self._queue.index(job_id) + 1
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job_id = self._queue.popleft()
+                self._queued.discard(job_id)
+                self._running.add(job_id)
+
+            try:
+                job = self.service.get_job(job_id)
+                if job and job.get("status") in self.RECOVER_STATUSES:
+                    self.handler(job)
+            except Exception as e:
+                print(f"❌ 任务执行异常 ({job_id}): {e}")
+                self.service.update_job(job_id, {
+                    "status": "failed",
+                    "error_message": str(e)
+                })
+            finally:
+                with self._cond:
+                    self._running.discard(job_id)
+                    self.processed += 1
+
+    def stats(self) -> dict:
+        """调度器状态（用于 /health）"""
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                "queued": len(self._queue),
+                "running": len(self._running),
+                "max_queue": self.max_queue,
+                "processed": self.processed,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,242 @@
+"""
+音频工具
+MPEG 音频帧解析与 MP3 按帧拼接（不重新编码）
+"""
+import io
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+
+# 比特率表（kbps），键为 (MPEG 版本组, Layer)：版本组 1 = MPEG1，2 = MPEG2 / MPEG2.5
+_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# 采样率表，键为帧头中的版本位：3 = MPEG1，2 = MPEG2，0 = MPEG2.5
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+class FrameHeader(NamedTuple):
+    """MPEG 音频帧头"""
+    version: int  # 1 = MPEG1，2 = MPEG2，25 = MPEG2.5
+    layer: int  # 1 / 2 / 3
+    bitrate: int  # kbps
+    sample_rate: int  # Hz
+    channels: int
+    length: int  # 整帧字节数（含帧头）
+    samples: int  # 每帧采样数
+
+
+def parse_frame_header(data, offset: int) -> Optional[FrameHeader]:
+    """
+    解析 offset 处的 MPEG 音频帧头
+
+    Returns:
+        帧头信息；不是合法帧头（含自由比特率等不支持的格式）时返回 None
+    """
+    if offset + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples = 576
+        length = 72 * bitrate * 1000 // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate * 1000 // sample_rate + padding
+
+    return FrameHeader(version, layer, bitrate, sample_rate, channels, length, samples)
+
+
+def id3v2_size(data) -> int:
+    """返回文件开头 ID3v2 标签的总字节数（没有标签时为 0）"""
+    if len(data) < 10 or bytes(data[:3]) != b"ID3":
+        return 0
+    # 标签大小为 4 个 7 位的 syncsafe 整数
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data) -> Iterator[Tuple[int, FrameHeader]]:
+    """
+    依次产出 (偏移, 帧头)
+
+    跳过开头的 ID3v2 标签；遇到无法解析的字节时向后查找下一个同步字，
+    直到末尾的 ID3v1（TAG）标签或数据结束
+    """
+    end = len(data)
+    if end >= 128 and bytes(data[end - 128:end - 125]) == b"TAG":
+        end -= 128
+
+    offset = id3v2_size(data)
+    while offset + 4 <= end:
+        header = parse_frame_header(data, offset)
+        if header and offset + header.length <= end:
+            yield offset, header
+            offset += header.length
+        else:
+            offset += 1
+
+
+def is_info_frame(data, offset: int, header: FrameHeader) -> bool:
+    """是否为编码器写入的 Xing / Info / VBRI 信息帧（不含音频，描述整个文件）"""
+    if header.layer != 3:
+        return False
+    if header.version == 1:
+        side_info = 17 if header.channels == 1 else 32
+    else:
+        side_info = 9 if header.channels == 1 else 17
+    xing = offset + 4 + side_info
+    if bytes(data[xing:xing + 4]) in (b"Xing", b"Info"):
+        return True
+    return bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+
+def _mp3_frame_range(view: memoryview, index: int) -> Tuple[int, int]:
+    """
+    一段 MP3 中需要保留的字节区间：去掉 ID3 标签和开头的 Xing / Info / VBRI 信息帧
+
+    Raises:
+        ValueError: 数据中没有可识别的 MP3 帧
+    """
+    start = end = None
+    for offset, header in iter_frames(view):
+        if start is None:
+            if is_info_frame(view, offset, header):
+                continue
+            start = offset
+        end = offset + header.length
+    if start is None:
+        raise ValueError(f"第 {index + 1} 段不是有效的 MP3 数据")
+    return start, end
+
+
+def concat_mp3(parts: Iterable[bytes]) -> bytes:
+    """
+    按帧拼接多段 MP3（不重新编码）
+
+    去掉每段的 ID3 标签和 Xing / Info / VBRI 信息帧（它们记录的是单段的帧数和时长，
+    拼接后会误导播放器），其余音频帧按顺序首尾相接
+
+    Raises:
+        ValueError: 某段数据中没有可识别的 MP3 帧
+    """
+    output = io.BytesIO()
+    for index, part in enumerate(parts):
+        write_audio_part(part, "mp3", output, index)
+    return output.getvalue()
+
+
+def write_audio_part(part: bytes, output_format: str, output: BinaryIO, index: int = 0) -> int:
+    """
+    按 concat_audio 的规则把第 index 段音频追加写入 output，返回写入的字节数
+
+    逐段写入文件（例如 SpooledTemporaryFile）时，内存中不需要同时保留所有段和拼接结果
+    """
+    if output_format.startswith("mp3"):
+        view = memoryview(part)
+        start, end = _mp3_frame_range(view, index)
+        output.write(view[start:end])
+        return end - start
+    if output_format.startswith(("pcm", "ulaw")):
+        output.write(part)
+        return len(part)
+    raise ValueError(f"不支持拼接该音频格式: {output_format}")
+
+
+def concat_audio(parts: Iterable[bytes], output_format: str) -> bytes:
+    """
+    按 ElevenLabs 输出格式拼接多段音频
+
+    mp3_* 按帧拼接；pcm_* / ulaw_* 是无文件头的原始采样，直接首尾相接
+    """
+    output = io.BytesIO()
+    for index, part in enumerate(parts):
+        write_audio_part(part, output_format, output, index)
+    return output.getvalue()
+
+
+def audio_spool(max_memory: int, directory: Optional[Path] = None) -> BinaryIO:
+    """
+    存放合成结果的临时文件：不超过 max_memory 字节时留在内存，超过后转存到 directory 下的磁盘文件，
+    可以直接交给 S3Storage.upload_file 上传
+    """
+    return tempfile.SpooledTemporaryFile(max_size=max_memory, dir=directory)
+
+
+class Mp3FrameStream:
+    """
+    增量版的单段 concat_mp3：边接收一段 MP3 数据边产出其中的音频帧
+
+    与 concat_mp3 对单段的处理一致：跳过开头的 ID3v2 标签和 Xing / Info / VBRI 信息帧，
+    丢弃末尾的 ID3v1 标签；不完整的帧留到下次数据到达后再输出
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._skip: Optional[int] = None  # 还需跳过的 ID3v2 标签字节数（None 表示尚未确定）
+        self._started = False  # 是否已输出过音频帧
+
+    def feed(self, data: bytes) -> bytes:
+        """追加数据，返回本次新得到的完整音频帧"""
+        buffer = self._buffer
+        buffer += data
+
+        if self._skip is None:
+            if len(buffer) < 10 and bytes(buffer[:3]) == b"ID3"[:len(buffer)]:
+                return b""  # 还无法判断开头是否为 ID3v2 标签
+            self._skip = id3v2_size(buffer)
+        if self._skip:
+            skipped = min(self._skip, len(buffer))
+            del buffer[:skipped]
+            self._skip -= skipped
+            if self._skip:
+                return b""
+
+        output = bytearray()
+        offset = 0
+        while offset + 4 <= len(buffer):
+            header = parse_frame_header(buffer, offset)
+            if header is None:
+                if bytes(buffer[offset:offset + 3]) == b"TAG" and len(buffer) - offset <= 128:
+                    break  # 可能是末尾的 ID3v1 标签
+                offset += 1
+                continue
+            if offset + header.length > len(buffer):
+                break
+            if self._started or not is_info_frame(buffer, offset, header):
+                self._started = True
+                output += buffer[offset:offset + header.length]
+            offset += header.length
+        del buffer[:offset]
+        return bytes(output)
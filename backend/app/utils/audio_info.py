@@ -0,0 +1,313 @@
+"""
+音频元数据解析（不解码）
+
+遍历 MPEG 帧头并读取 Xing / Info / VBRI 信息帧和 LAME 标签，或 WAV 的 fmt / data 块，
+单次遍历得到精确时长、平均比特率和采样率。
+
+带帧数的 Xing / VBRI 信息帧和 WAV 只需要文件开头的 HEAD_SIZE 字节，
+S3 上的对象因此只读取开头的字节区间；没有信息帧的 MP3（例如按帧拼接的合成结果）需要扫描全部帧头。
+"""
+import struct
+from typing import BinaryIO, NamedTuple, Optional, Tuple
+
+from app.utils.audio import FrameHeader, id3v2_size, is_info_frame, parse_frame_header
+
+
+HEAD_SIZE = 64 * 1024  # 解析文件头时读取的字节数
+SCAN_CHUNK_SIZE = 1024 * 1024  # 流式扫描时每次读取的字节数
+
+
+class AudioInfo(NamedTuple):
+    """音频元数据"""
+    format: str  # mp3 / wav
+    duration: float  # 秒
+    bitrate: int  # 平均比特率（kbps）
+    sample_rate: int  # Hz
+    channels: int
+
+
+class _InfoFrame(NamedTuple):
+    """Xing / Info / VBRI 信息帧中的内容"""
+    frames: Optional[int]  # 音频帧数（不含信息帧本身）
+    audio_bytes: Optional[int]  # 音频字节数
+    trim: int  # LAME 标签记录的编码延迟 + 末尾填充（采样数）
+
+
+def _uint32(data, offset: int) -> int:
+    return struct.unpack_from(">I", data, offset)[0]
+
+
+def _parse_info_frame(data, offset: int, header: FrameHeader) -> _InfoFrame:
+    """读取信息帧（调用方已用 is_info_frame 确认）"""
+    if bytes(data[offset + 36:offset + 40]) == b"VBRI":
+        # VBRI: 标识(4) 版本(2) 延迟(2) 质量(2) 字节数(4) 帧数(4)
+        return _InfoFrame(_uint32(data, offset + 50), _uint32(data, offset + 46), 0)
+
+    if header.version == 1:
+        side_info = 17 if header.channels == 1 else 32
+    else:
+        side_info = 9 if header.channels == 1 else 17
+    position = offset + 4 + side_info + 4
+    flags = _uint32(data, position)
+    position += 4
+    frames = audio_bytes = None
+    if flags & 0x1:
+        frames = _uint32(data, position)
+        position += 4
+    if flags & 0x2:
+        audio_bytes = _uint32(data, position)
+        position += 4
+    if flags & 0x4:
+        position += 100  # TOC
+    if flags & 0x8:
+        position += 4  # 质量
+
+    # LAME / FFmpeg 写入的扩展标签：编码器名(9) ... 第 21-23 字节为 12 位延迟 + 12 位填充
+    trim = 0
+    if bytes(data[position:position + 4]) in (b"LAME", b"Lavf", b"Lavc", b"L3.9"):
+        b0, b1, b2 = data[position + 21], data[position + 22], data[position + 23]
+        trim = ((b0 << 4) | (b1 >> 4)) + (((b1 & 0x0F) << 8) | b2)
+    return _InfoFrame(frames, audio_bytes, trim)
+
+
+class _FrameStats:
+    """逐帧扫描的累计结果"""
+
+    def __init__(self):
+        self.header: Optional[FrameHeader] = None  # 第一帧
+        self.info: Optional[_InfoFrame] = None
+        self.frames = 0
+        self.samples = 0
+        self.audio_bytes = 0
+
+    def scan(self, view: memoryview, final: bool) -> int:
+        """
+        扫描 view 中的完整帧，返回已处理的字节数（末尾不完整的帧留给下次）
+
+        遇到无法解析的字节时向后查找下一个同步字；final 为 True 时丢弃末尾不完整的帧
+        """
+        offset = 0
+        end = len(view)
+        while offset + 4 <= end:
+            header = parse_frame_header(view, offset)
+            if header is None:
+                offset += 1
+                continue
+            if offset + header.length > end:
+                if final:
+                    return end
+                return offset
+            if self.header is None:
+                self.header = header
+                if is_info_frame(view, offset, header):
+                    self.info = _parse_info_frame(view, offset, header)
+                    offset += header.length
+                    continue
+            self.frames += 1
+            self.samples += header.samples
+            self.audio_bytes += header.length
+            offset += header.length
+        return end if final else offset
+
+    def result(self) -> Optional[AudioInfo]:
+        if not self.frames:
+            return None
+        trim = self.info.trim if self.info else 0
+        return _make_info(self.header, self.samples - trim, self.audio_bytes)
+
+
+def _make_info(header: FrameHeader, samples: int, audio_bytes: int) -> Optional[AudioInfo]:
+    duration = max(samples, 0) / header.sample_rate
+    if duration <= 0:
+        return None
+    return AudioInfo("mp3", duration, round(audio_bytes * 8 / duration / 1000), header.sample_rate, header.channels)
+
+
+def _first_frame(view: memoryview) -> Optional[Tuple[int, FrameHeader]]:
+    """第一个完整的帧"""
+    for offset in range(len(view) - 3):
+        header = parse_frame_header(view, offset)
+        if header and offset + header.length <= len(view):
+            return offset, header
+    return None
+
+
+def _from_info_frame(view: memoryview, audio_size: int) -> Optional[AudioInfo]:
+    """
+    只根据第一帧的信息帧计算（view 为去掉 ID3v2 标签后的开头部分）
+
+    Args:
+        audio_size: 从 view 开头到文件末尾的字节数（信息帧没有记录字节数时用于计算平均比特率）
+    """
+    first = _first_frame(view)
+    if first is None:
+        return None
+    offset, header = first
+    if not is_info_frame(view, offset, header):
+        return None
+    info = _parse_info_frame(view, offset, header)
+    if not info.frames:
+        return None  # 只有 Info 标识没有帧数（CBR 编码器常见），需要扫描
+    audio_bytes = info.audio_bytes or audio_size - offset - header.length
+    return _make_info(header, info.frames * header.samples - info.trim, audio_bytes)
+
+
+def wav_info(data, total_size: Optional[int] = None) -> Optional[AudioInfo]:
+    """
+    解析 WAV（RIFF）文件头：fmt 块给出格式，data 块的长度给出时长
+
+    data 块长度为 0 或 0xFFFFFFFF（边录边写的流式 WAV）时按文件剩余长度计算
+    """
+    view = memoryview(data)
+    if len(view) < 12 or bytes(view[:4]) != b"RIFF" or bytes(view[8:12]) != b"WAVE":
+        return None
+    total_size = total_size or len(view)
+
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        size = struct.unpack_from("<I", view, offset + 4)[0]
+        if chunk_id == b"fmt " and offset + 24 <= len(view):
+            fmt = struct.unpack_from("<HHIIHH", view, offset + 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            _, channels, sample_rate, byte_rate, _, _ = fmt
+            available = total_size - offset - 8
+            if size in (0, 0xFFFFFFFF) or size > available:
+                size = available
+            if not byte_rate:
+                return None
+            return AudioInfo("wav", size / byte_rate, round(byte_rate * 8 / 1000), sample_rate, channels)
+        offset += 8 + size + (size & 1)
+    return None
+
+
+def audio_info(data, total_size: Optional[int] = None) -> Optional[AudioInfo]:
+    """
+    解析内存中的音频（memoryview 切片，不复制数据）
+
+    Args:
+        data: 完整的文件内容，或文件开头的一部分（此时需要给出 total_size）
+        total_size: 文件总字节数；data 只是开头部分时只能从 WAV 文件头或信息帧得到结果，
+            否则返回 None（需要扫描全部帧）
+
+    Returns:
+        元数据；无法识别时返回 None
+    """
+    view = memoryview(data)
+    if bytes(view[:4]) == b"RIFF":
+        return wav_info(view, total_size)
+
+    complete = total_size is None or total_size <= len(view)
+    total_size = len(view) if complete else total_size
+    start = id3v2_size(view)
+    if start >= len(view):
+        return None
+
+    info = _from_info_frame(view[start:start + HEAD_SIZE], total_size - start)
+    if info or not complete:
+        return info
+
+    end = len(view)
+    if end - start >= 128 and bytes(view[end - 128:end - 125]) == b"TAG":
+        end -= 128
+    stats = _FrameStats()
+    stats.scan(view[start:end], final=True)
+    return stats.result()
+
+
+def stream_audio_info(stream: BinaryIO, total_size: Optional[int] = None) -> Optional[AudioInfo]:
+    """
+    从可读流中解析（顺序读取一次，内存占用不超过一个数据块）
+
+    先读取文件开头：WAV 和带帧数的信息帧到此为止；否则继续读取并逐帧扫描
+    """
+    buffer = bytearray(stream.read(HEAD_SIZE))
+    if bytes(buffer[:4]) == b"RIFF":
+        if total_size is None:
+            # 文件总长度用于校验 data 块长度（流式 WAV 没有记录长度）
+            total_size = len(buffer) + sum(iter(lambda: len(stream.read(SCAN_CHUNK_SIZE)), 0))
+        return wav_info(buffer, total_size)
+
+    # 跳过 ID3v2 标签（内嵌封面图时可能比已读取的部分大）
+    skip = id3v2_size(buffer)
+    position = 0
+    while skip >= len(buffer):
+        skip -= len(buffer)
+        position += len(buffer)
+        buffer = bytearray(stream.read(max(SCAN_CHUNK_SIZE, skip + HEAD_SIZE)))
+        if not buffer:
+            return None
+    del buffer[:skip]
+    position += skip
+    if len(buffer) < HEAD_SIZE:
+        buffer += stream.read(HEAD_SIZE - len(buffer))
+
+    if total_size is not None:
+        with memoryview(buffer) as view:
+            info = _from_info_frame(view, total_size - position)
+        if info:
+            return info
+
+    stats = _FrameStats()
+    while True:
+        block = stream.read(SCAN_CHUNK_SIZE)
+        final = not block
+        if final and len(buffer) >= 128 and bytes(buffer[-128:-125]) == b"TAG":
+            del buffer[-128:]
+        with memoryview(buffer) as view:
+            consumed = stats.scan(view, final)
+        del buffer[:consumed]
+        if final:
+            return stats.result()
+        buffer += block
+
+
+def s3_audio_info(storage, key: str) -> Optional[AudioInfo]:
+    """
+    解析 S3 上的音频
+
+    先用 Range 请求读取开头 HEAD_SIZE 字节（ID3v2 标签更大时再读取标签之后的一段），
+    WAV 和带帧数的信息帧到此为止；否则流式读取整个对象逐帧扫描
+
+    Args:
+        storage: S3Storage
+        key: S3 对象键
+    """
+    file_info = storage.get_file_info(key)
+    if not file_info:
+        return None
+    total_size = file_info["size"]
+
+    def read_range(start: int) -> Optional[bytes]:
+        body = storage.open_file_stream(key, start, min(start + HEAD_SIZE, total_size) - 1)
+        if body is None:
+            return None
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    head = read_range(0)
+    if not head:
+        return None
+    skip = id3v2_size(head)
+    if skip + 4096 > len(head) and total_size > skip:
+        head = read_range(skip)  # 内嵌封面图等较大的标签
+        if not head:
+            return None
+        total_size -= skip
+
+    info = audio_info(head, total_size)
+    if info or total_size <= len(head):
+        return info
+
+    body = storage.open_file_stream(key)
+    if body is None:
+        return None
+    try:
+        return stream_audio_info(body, file_info["size"])
+    finally:
+        body.close()
@@ -0,0 +1,28 @@
+"""
+阻塞操作的专用线程池
+
+boto3 请求、磁盘缓存和数据文件读写都是阻塞调用。async 路由通过 run_blocking 把它们交给
+有上限的专用线程池执行：事件循环不会因为一次慢请求而停顿，也不会占用 Starlette 默认线程池
+（同步路由、依赖项）的线程；同时进行的阻塞操作超过上限时在线程池中排队。
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+
+
+T = TypeVar("T")
+
+# 创建全局实例
+io_executor = ThreadPoolExecutor(
+    max_workers=settings.io_max_workers,
+    thread_name_prefix="blocking-io"
+)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在 io_executor 中执行阻塞调用并等待结果"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, functools.partial(func, *args, **kwargs))
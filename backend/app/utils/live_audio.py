@@ -0,0 +1,180 @@
+"""
+合成中的音频（边合成边播放）
+
+合成线程把音频帧追加到 LiveAudio 的临时文件中，/stream 接口从头读取并等待后续数据，
+直到任务结束。多段并发合成时由 SegmentAssembler 按顺序写入。
+
+音频只保存在磁盘上（不在内存中另存一份整集音频）：写入方只追加并推进共享的写入偏移，
+读取方各自按偏移从文件中读取已写入的部分。
+
+只在单个进程内有效（与任务调度器的前提一致）。
+"""
+import asyncio
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.audio import Mp3FrameStream
+from app.utils.blocking import run_blocking
+
+
+class LiveAudio:
+    """
+    不断增长的音频数据：一个写入方，多个读取方（每个读取方从头开始读）
+
+    数据写入无缓冲的匿名临时文件；size 之前的数据已经完整写入文件，读取方不需要加锁即可 pread。
+    文件在 LiveAudio 被回收时关闭（最后一个读取方结束之后）
+    """
+
+    def __init__(self, media_type: str = "audio/mpeg", directory: Optional[Path] = None):
+        """
+        Args:
+            media_type: 音频 MIME 类型
+            directory: 临时文件所在目录（默认为系统临时目录）
+        """
+        self.media_type = media_type
+        self._directory = directory
+        self._file = None  # 第一次写入时创建
+        self._size = 0
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.finished = False
+        self.error: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _wake_readers(self):
+        """唤醒等待数据的读取方（调用方需持有锁）"""
+        for loop, event in self._waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+        self._waiters.clear()
+
+    def append(self, data: bytes):
+        """追加数据（合成线程调用）"""
+        if not data:
+            return
+        with self._lock:
+            if self.finished:
+                return
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(buffering=0, dir=self._directory)
+            view = memoryview(data)
+            while view:
+                written = self._file.write(view)
+                view = view[written:]
+            self._size += len(data)
+            self._wake_readers()
+
+    def finish(self, error: Optional[str] = None):
+        """结束写入：正常完成或失败，读取方读完已有数据后结束"""
+        with self._lock:
+            self.finished = True
+            self.error = error
+            self._wake_readers()
+
+    def read(self, offset: int, max_bytes: int) -> bytes:
+        """读取 offset 开始的最多 max_bytes 字节（没有新数据时返回空字节）"""
+        length = min(max_bytes, self._size - offset)
+        if length <= 0:
+            return b""
+        return os.pread(self._file.fileno(), length, offset)
+
+    def getvalue(self) -> bytes:
+        return self.read(0, self._size)
+
+    async def iter_chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """从头读取，等待后续数据，直到写入结束（文件读取在 io_executor 中执行）"""
+        offset = 0
+        loop = asyncio.get_running_loop()
+        while True:
+            event = asyncio.Event()
+            with self._lock:
+                available = self._size > offset
+                finished = self.finished
+                if not available and not finished:
+                    self._waiters.append((loop, event))
+            if available:
+                data = await run_blocking(self.read, offset, chunk_size)
+                offset += len(data)
+                yield data
+            elif finished:
+                return
+            else:
+                await event.wait()
+
+
+class SegmentAssembler:
+    """
+    把并发合成的多段 MP3 按顺序写入 LiveAudio
+
+    当前段（之前的段都已完成）的数据到达后立即按帧写入；后面的段先缓存，
+    轮到它时再写入。每段按 concat_mp3 的规则去掉标签和信息帧，
+    因此写入的数据与最终拼接得到的文件相同。
+    """
+
+    def __init__(self, live: LiveAudio):
+        self.live = live
+        self._head = 0  # 正在写入的段
+        self._pending: Dict[int, List[bytes]] = {}
+        self._done = set()
+        self._streams: Dict[int, Mp3FrameStream] = {}
+        self._lock = threading.Lock()
+
+    def _write(self, index: int, data: bytes):
+        frames = self._streams.setdefault(index, Mp3FrameStream()).feed(data)
+        self.live.append(frames)
+
+    def feed(self, index: int, data: bytes):
+        """第 index 段收到一块数据（合成线程调用）"""
+        with self._lock:
+            if index == self._head:
+                self._write(index, data)
+            elif index > self._head:
+                self._pending.setdefault(index, []).append(data)
+
+    def finish_segment(self, index: int):
+        """第 index 段合成完成"""
+        with self._lock:
+            self._done.add(index)
+            while self._head in self._done:
+                self._streams.pop(self._head, None)
+                self._head += 1
+                for data in self._pending.pop(self._head, []):
+                    self._write(self._head, data)
+
+
+class LiveAudioRegistry:
+    """按播客 ID 登记合成中的音频"""
+
+    def __init__(self):
+        self._items: Dict[str, LiveAudio] = {}
+        self._lock = threading.Lock()
+
+    def start(self, podcast_id: str, media_type: str = "audio/mpeg") -> LiveAudio:
+        with self._lock:
+            live = LiveAudio(media_type, settings.temp_dir)
+            self._items[podcast_id] = live
+            return live
+
+    def get(self, podcast_id: str) -> Optional[LiveAudio]:
+        with self._lock:
+            return self._items.get(podcast_id)
+
+    def end(self, podcast_id: str, error: Optional[str] = None):
+        """结束并注销（正在读取的客户端读完已有数据后结束）"""
+        with self._lock:
+            live = self._items.pop(podcast_id, None)
+        if live:
+            live.finish(error)
+
+
+# 创建全局实例
+live_audio = LiveAudioRegistry()
@@ -0,0 +1,93 @@
+"""
+HTTP Range 请求工具
+解析 Range 头并按固定大小分块输出数据流
+"""
+import re
+from typing import AsyncIterator, BinaryIO, Iterator, Optional, Tuple
+
+from app.utils.blocking import run_blocking
+
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """请求的范围超出资源大小（HTTP 416）"""
+
+    def __init__(self, total_size: int):
+        super().__init__(f"请求范围无效（文件大小 {total_size} bytes）")
+        self.total_size = total_size
+
+
+def resolve_range(range_header: Optional[str], total_size: int) -> Optional[Tuple[int, int]]:
+    """
+    解析 Range 头为闭区间 (start, end)
+
+    支持 bytes=0-499、bytes=500-、bytes=-500 三种单区间格式；
+    没有 Range 头、格式不支持或包含多个区间时返回 None（按 200 返回整个文件）
+
+    Raises:
+        RangeNotSatisfiable: 区间起点超出文件大小
+    """
+    if not range_header:
+        return None
+
+    match = _RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+
+    if not start_text:
+        # 后缀区间：最后 N 个字节
+        suffix_length = int(end_text)
+        if suffix_length == 0:
+            raise RangeNotSatisfiable(total_size)
+        return max(total_size - suffix_length, 0), total_size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else total_size - 1
+    if start >= total_size or end < start:
+        raise RangeNotSatisfiable(total_size)
+
+    return start, min(end, total_size - 1)
+
+
+def iter_file_chunks(file_obj: BinaryIO, length: int, chunk_size: int) -> Iterator[bytes]:
+    """
+    从文件对象中最多读取 length 字节，每次产出不超过 chunk_size 的数据块
+
+    迭代结束（或提前中断）时关闭文件对象
+    """
+    try:
+        remaining = length
+        while remaining > 0:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+async def aiter_file_chunks(file_obj: BinaryIO, length: Optional[int], chunk_size: int) -> AsyncIterator[bytes]:
+    """
+    iter_file_chunks 的异步版本：每次读取在 io_executor 中执行（S3 响应体的 read 会等待网络）
+
+    length 为 None 时读到文件末尾；迭代结束（或客户端断开）时关闭文件对象
+    """
+    try:
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await run_blocking(file_obj.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        file_obj.close()  # 只释放连接 / 文件句柄，不等待网络
@@ -2,13 +2,24 @@
 AWS S3 存储服务
 提供文件上传、下载、删除和预签名 URL 生成功能
 """
+import asyncio
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 from botocore.config import Config
+import hashlib
+import os
+import re
+import threading
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, BinaryIO
+from typing import Awaitable, Callable, Optional, BinaryIO, Dict, Tuple
 from app.config import settings
+from app.utils.blocking import io_executor, run_blocking
+
+
+class UploadRejected(Exception):
+    """上传内容不符合要求（为空或超过大小限制），对应 HTTP 400"""
 
 
 class S3Storage:
@@ -91,12 +102,152 @@ class S3Storage:
             print(f"❌ 上传异常: {e}")
             return None
     
-    def download_file(self, key: str) -> Optional[bytes]:
+    async def upload_stream(
+        self,
+        read: Callable[[int], Awaitable[bytes]],
+        original_filename: str,
+        prefix: str = "uploads",
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        边读取边上传到 S3（分段上传）
+        
+        每次读取一个分段，最多同时上传 upload_max_concurrency 个分段，
+        内存占用约为 (并发数 + 1) 个分段大小，与文件大小无关。
+        不足一个分段的小文件直接使用 put_object。
+        
+        Args:
+            read: 异步读取函数（如 UploadFile.read），读到末尾返回 b""
+            original_filename: 原始文件名
+            prefix: S3 键前缀
+            content_type: 文件 MIME 类型
+            max_size: 最大允许字节数，读取过程中超出即中止
+        
+        Returns:
+            (S3 对象键, 文件大小)，S3 失败返回 None
+        
+        Raises:
+            UploadRejected: 文件为空或超过大小限制（已上传的分段会被清理）
+        """
+        part_size = settings.upload_part_size
+        loop = asyncio.get_running_loop()
+        key = self._generate_unique_key(original_filename, prefix)
+        extra_args = {'ContentType': content_type} if content_type else {}
+        
+        def check_size(total: int):
+            if max_size is not None and total > max_size:
+                raise UploadRejected(
+                    f"文件过大: 超过 {max_size / (1024 * 1024):.2f}MB 限制"
+                )
+        
+        first = await read(part_size)
+        if not first:
+            raise UploadRejected("文件为空")
+        check_size(len(first))
+        second = await read(part_size)
+        
+        if not second:
+            # 小文件：一次请求即可
+            try:
+                await loop.run_in_executor(io_executor, lambda: self.s3_client.put_object(
+                    Bucket=self.bucket, Key=key, Body=first, **extra_args
+                ))
+                print(f"✅ 文件上传成功: s3://{self.bucket}/{key}")
+                return key, len(first)
+            except Exception as e:
+                print(f"❌ S3 上传失败: {e}")
+                return None
+        
+        try:
+            response = await loop.run_in_executor(io_executor, lambda: self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=key, **extra_args
+            ))
+            upload_id = response['UploadId']
+        except Exception as e:
+            print(f"❌ 创建分段上传失败: {e}")
+            return None
+        
+        slots = asyncio.Semaphore(settings.upload_max_concurrency)
+        tasks = []
+        
+        async def send_part(part_number: int, data: bytes) -> dict:
+            try:
+                result = await loop.run_in_executor(io_executor, lambda: self.s3_client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id,
+                    PartNumber=part_number, Body=data
+                ))
+                return {'PartNumber': part_number, 'ETag': result['ETag']}
+            finally:
+                slots.release()
+        
+        try:
+            total = 0
+            pending = [first, second]
+            del first, second
+            while True:
+                data = pending.pop(0) if pending else await read(part_size)
+                if not data:
+                    break
+                total += len(data)
+                check_size(total)
+                
+                # 等待空闲的上传槽位；已有分段失败则尽早停止
+                await slots.acquire()
+                for task in tasks:
+                    if task.done() and task.exception():
+                        slots.release()
+                        raise task.exception()
+                tasks.append(asyncio.create_task(send_part(len(tasks) + 1, data)))
+                del data
+            
+            parts = await asyncio.gather(*tasks)
+            await loop.run_in_executor(io_executor, lambda: self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket, Key=key, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            ))
+            print(f"✅ 分段上传成功: s3://{self.bucket}/{key} ({len(parts)} 段, {total} bytes)")
+            return key, total
+        
+        except BaseException as e:
+            # 等正在上传的分段结束后再中止，避免中止后又有分段写入
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await loop.run_in_executor(io_executor, lambda: self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id
+                ))
+                print(f"🗑️  已中止分段上传: {key}")
+            except Exception as abort_error:
+                print(f"⚠️  中止分段上传失败: {abort_error}")
+            if isinstance(e, UploadRejected) or not isinstance(e, Exception):
+                raise
+            print(f"❌ 分段上传失败: {e}")
+            return None
+    
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> bool:
+        """
+        以指定键写入 S3 对象（覆盖同名对象）
+        
+        Returns:
+            是否成功
+        """
+        try:
+            upload_args = {'Bucket': self.bucket, 'Key': key, 'Body': data}
+            if content_type:
+                upload_args['ContentType'] = content_type
+            self.s3_client.put_object(**upload_args)
+            return True
+        except Exception as e:
+            print(f"❌ S3 写入失败: {key}: {e}")
+            return False
+    
+    def download_file(self, key: str, missing_ok: bool = False) -> Optional[bytes]:
         """
         从 S3 下载文件
         
         Args:
             key: S3 对象键
+            missing_ok: 对象不存在时不打印错误（用于缓存查找）
         
         Returns:
             文件内容（字节），失败返回 None
@@ -112,7 +263,8 @@ class S3Storage:
         
         except ClientError as e:
             if e.response['Error']['Code'] == 'NoSuchKey':
-                print(f"❌ 文件不存在: {key}")
+                if not missing_ok:
+                    print(f"❌ 文件不存在: {key}")
             else:
                 print(f"❌ S3 下载失败: {e}")
             return None
@@ -120,6 +272,70 @@ class S3Storage:
             print(f"❌ 下载异常: {e}")
             return None
     
+    def get_file_info(self, key: str) -> Optional[dict]:
+        """
+        获取 S3 对象元数据（不下载内容）
+        
+        Args:
+            key: S3 对象键
+        
+        Returns:
+            {"size", "etag", "content_type"}，失败返回 None
+        """
+        try:
+            response = self.s3_client.head_object(
+                Bucket=self.bucket,
+                Key=key
+            )
+            return {
+                "size": response['ContentLength'],
+                "etag": response.get('ETag', '').strip('"'),
+                "content_type": response.get('ContentType')
+            }
+        
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                print(f"❌ 文件不存在: {key}")
+            else:
+                print(f"❌ 获取文件信息失败: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ 获取文件信息异常: {e}")
+            return None
+    
+    def open_file_stream(self, key: str, start: Optional[int] = None, end: Optional[int] = None):
+        """
+        以流的方式打开 S3 对象（可指定字节范围），不把内容读入内存
+        
+        Args:
+            key: S3 对象键
+            start: 起始字节（含），为空时从头读取
+            end: 结束字节（含），为空时读到末尾
+        
+        Returns:
+            可 read(n) / close() 的响应体，失败返回 None
+        """
+        try:
+            params = {
+                'Bucket': self.bucket,
+                'Key': key
+            }
+            if start is not None:
+                params['Range'] = f"bytes={start}-{end if end is not None else ''}"
+            
+            response = self.s3_client.get_object(**params)
+            return response['Body']
+        
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                print(f"❌ 文件不存在: {key}")
+            else:
+                print(f"❌ S3 读取失败: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ 读取异常: {e}")
+            return None
+    
     def delete_file(self, key: str) -> bool:
         """
         删除 S3 文件
@@ -187,6 +403,55 @@ class S3Storage:
             print(f"❌ 生成 URL 异常: {e}")
             return None
     
+    def generate_presigned_post(
+        self,
+        original_filename: str,
+        prefix: str = "uploads",
+        content_type: Optional[str] = None,
+        max_size: Optional[int] = None,
+        expires_in: int = 3600
+    ) -> Optional[dict]:
+        """
+        生成预签名 POST 上传表单（浏览器直接上传到 S3，不经过 API 服务）
+        
+        Args:
+            original_filename: 原始文件名
+            prefix: S3 键前缀
+            content_type: 限定的文件 MIME 类型
+            max_size: 允许的最大字节数（由 S3 校验 content-length-range）
+            expires_in: 有效期（秒），默认 1 小时
+        
+        Returns:
+            {"key", "url", "fields"}，失败返回 None
+        """
+        try:
+            key = self._generate_unique_key(original_filename, prefix)
+            fields = {}
+            conditions = []
+            
+            if content_type:
+                fields['Content-Type'] = content_type
+                conditions.append({'Content-Type': content_type})
+            if max_size:
+                conditions.append(['content-length-range', 1, max_size])
+            
+            post = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket,
+                Key=key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expires_in
+            )
+            print(f"✅ 预签名上传表单生成成功: {key} (有效期: {expires_in}秒)")
+            return {"key": key, "url": post["url"], "fields": post["fields"]}
+        
+        except ClientError as e:
+            print(f"❌ 生成预签名上传表单失败: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ 生成上传表单异常: {e}")
+            return None
+    
     def get_public_url(self, key: str) -> str:
         """
         获取文件的公开 URL（如果存储桶是公开的）
@@ -221,8 +486,244 @@ class S3Storage:
             raise
         except Exception:
             return False
+    
+    # 异步接口：在 io_executor 中执行，供 async 路由使用（不阻塞事件循环）
+    
+    async def get_file_info_async(self, key: str) -> Optional[dict]:
+        return await run_blocking(self.get_file_info, key)
+    
+    async def open_file_stream_async(self, key: str, start: Optional[int] = None, end: Optional[int] = None):
+        return await run_blocking(self.open_file_stream, key, start, end)
+    
+    async def delete_file_async(self, key: str) -> bool:
+        return await run_blocking(self.delete_file, key)
+
+
+class AudioCache:
+    """
+    本地磁盘 LRU 音频缓存（位于 S3Storage 之前）
+    
+    - 缓存文件按 (S3 键, ETag) 命名，调用方传入 head_object 得到的 ETag，不一致即视为过期
+    - 总大小超过上限时按最近最少使用顺序淘汰
+    - 同一对象的并发未命中只触发一次 S3 下载；get 等待下载完成，open 不等待（后台填充）
+    """
+    
+    def __init__(self, storage: S3Storage, cache_dir: Path, max_bytes: int, chunk_size: int = 1024 * 1024):
+        self.storage = storage
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()  # 缓存名 -> {"path", "size", "etag"}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        
+        # 监控计数器
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        
+        self._load()
+    
+    def _load(self):
+        """启动时扫描缓存目录，按修改时间恢复 LRU 顺序"""
+        for part_file in self.cache_dir.glob("*.part"):
+            part_file.unlink(missing_ok=True)
+        
+        for path in sorted(self.cache_dir.glob("*.cache"), key=lambda p: p.stat().st_mtime):
+            name, _, etag = path.stem.partition("_")
+            size = path.stat().st_size
+            self._entries[name] = {"path": path, "size": size, "etag": etag}
+            self._total_bytes += size
+        
+        self._evict()
+    
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:40]
+    
+    @staticmethod
+    def _clean_etag(etag: str) -> str:
+        return re.sub(r"[^A-Za-z0-9-]", "", etag or "")
+    
+    def _evict(self, keep: Optional[str] = None):
+        """淘汰最久未使用的缓存文件，直到总大小不超过上限（调用方需持有锁或处于初始化阶段）"""
+        for name in list(self._entries):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            entry = self._entries.pop(name)
+            self._total_bytes -= entry["size"]
+            entry["path"].unlink(missing_ok=True)
+            self.evictions += 1
+    
+    def _lookup(self, name: str, etag: str) -> Optional[Path]:
+        """查找 ETag 一致的缓存文件（调用方需持有锁）"""
+        entry = self._entries.get(name)
+        if entry and entry["etag"] == etag and entry["path"].exists():
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return entry["path"]
+        return None
+    
+    def _fetch(self, key: str, name: str, etag: str, size: int) -> Optional[Path]:
+        """从 S3 分块下载到缓存目录（内存占用不超过一个数据块）"""
+        body = self.storage.open_file_stream(key)
+        if body is None:
+            return None
+        
+        part_file = self.cache_dir / f"{name}.{uuid.uuid4().hex}.part"
+        written = 0
+        try:
+            with open(part_file, 'wb') as f:
+                while True:
+                    chunk = body.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    written += len(chunk)
+        finally:
+            body.close()
+        
+        if written != size:
+            print(f"⚠️  缓存下载不完整: {key} ({written}/{size} bytes)")
+            part_file.unlink(missing_ok=True)
+            return None
+        
+        path = self.cache_dir / f"{name}_{etag}.cache"
+        os.replace(part_file, path)
+        
+        with self._lock:
+            old_entry = self._entries.pop(name, None)
+            if old_entry:
+                self._total_bytes -= old_entry["size"]
+                if old_entry["path"] != path:
+                    old_entry["path"].unlink(missing_ok=True)
+            
+            self._entries[name] = {"path": path, "size": size, "etag": etag}
+            self._total_bytes += size
+            self._evict(keep=name)
+        
+        print(f"✅ 音频已缓存: {key} ({size} bytes)")
+        return path
+    
+    def get(self, key: str, etag: str, size: int) -> Optional[Path]:
+        """
+        获取与 ETag 一致的本地缓存文件，未命中时从 S3 拉取
+        
+        Args:
+            key: S3 对象键
+            etag: head_object 返回的当前 ETag
+            size: 对象大小（超过缓存上限的对象不缓存）
+        
+        Returns:
+            缓存文件路径，无法缓存时返回 None（调用方应直接读取 S3）
+        """
+        if size > self.max_bytes:
+            return None
+        
+        name = self._name(key)
+        etag = self._clean_etag(etag)
+        
+        with self._lock:
+            path = self._lookup(name, etag)
+            if path:
+                return path
+            
+            event = self._inflight.get(name)
+            is_leader = event is None
+            if is_leader:
+                event = self._inflight[name] = threading.Event()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not is_leader:
+            # 等待正在进行的下载完成后直接读取缓存
+            event.wait(timeout=self.storage.config.read_timeout)
+            with self._lock:
+                return self._lookup(name, etag)
+        
+        return self._fill(key, name, etag, size, event)
+    
+    def _fill(self, key: str, name: str, etag: str, size: int, event: threading.Event) -> Optional[Path]:
+        """下载对象到缓存，结束后唤醒等待同一对象的请求"""
+        try:
+            return self._fetch(key, name, etag, size)
+        except Exception as e:
+            print(f"❌ 缓存音频失败: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+            event.set()
+    
+    @staticmethod
+    def _open_path(path: Path, start: int) -> Optional[BinaryIO]:
+        try:
+            # 已打开的文件即使随后被淘汰（unlink）也能继续读取
+            file_obj = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        file_obj.seek(start)
+        return file_obj
+    
+    def open(self, key: str, etag: str, size: int, start: int = 0) -> Optional[BinaryIO]:
+        """
+        打开已缓存的文件并定位到 start
+        
+        未命中时不等待下载：在后台从 S3 填充缓存（同一对象只有一个下载）并返回 None，
+        调用方按请求的范围直接读取 S3，首字节时间与不使用缓存时相同
+        """
+        if size > self.max_bytes:
+            return None
+        
+        name = self._name(key)
+        etag = self._clean_etag(etag)
+        
+        with self._lock:
+            path = self._lookup(name, etag)
+            if path is None:
+                if name in self._inflight:
+                    self.coalesced += 1
+                    return None
+                event = self._inflight[name] = threading.Event()
+                self.misses += 1
+        
+        if path is None:
+            io_executor.submit(self._fill, key, name, etag, size, event)
+            return None
+        return self._open_path(path, start)
+    
+    async def open_async(self, key: str, etag: str, size: int, start: int = 0) -> Optional[BinaryIO]:
+        """open 的异步版本"""
+        return await run_blocking(self.open, key, etag, size, start)
+    
+    def stats(self) -> dict:
+        """缓存监控指标"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
 
 
 # 创建全局实例
 s3_storage = S3Storage()
+audio_cache = AudioCache(
+    s3_storage,
+    settings.temp_dir / "audio_cache",
+    settings.audio_cache_max_bytes
+)
 
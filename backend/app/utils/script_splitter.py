@@ -0,0 +1,154 @@
+"""
+稿件切分工具
+把长稿件按说话者轮次和句子边界切成不超过 TTS 单次字符上限的片段
+"""
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+# 说话者标签：任何以 "名字:" 或 "名字：" 开头的行（Alex:, Host A:, 主持人A：等）
+SPEAKER_PATTERN = re.compile(r'^([A-Za-z\u4e00-\u9fa5][A-Za-z\u4e00-\u9fa5\s0-9]*?)[:：]\s*(.*)$')
+
+# 句子结束：中文标点直接断开，英文标点后需跟空白
+_SENTENCE_END = re.compile(r'(?<=[。！？；…])|(?<=[.!?;])\s+')
+
+
+def speaker_labels(script: str) -> List[str]:
+    """按首次出现顺序返回稿件中的说话者标签"""
+    labels = []
+    for line in script.splitlines():
+        match = SPEAKER_PATTERN.match(line.strip())
+        if match:
+            label = match.group(1).strip()
+            if label not in labels:
+                labels.append(label)
+    return labels
+
+
+def _turns(script: str) -> List[Tuple[Optional[str], str]]:
+    """
+    把稿件拆成 (说话者, 内容) 序列
+
+    有说话者标签时，标签后的续行归入同一轮次（与 AIService._parse_dialogue_script 一致）；
+    无标签的文本按行（段落）拆分
+    """
+    turns = []
+    current_label = None
+    for line in script.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = SPEAKER_PATTERN.match(line)
+        if match:
+            current_label = match.group(1).strip()
+            turns.append((current_label, match.group(2).strip()))
+        elif current_label is not None:
+            label, text = turns[-1]
+            turns[-1] = (label, f"{text} {line}".strip())
+        else:
+            turns.append((None, line))
+    return [(label, text) for label, text in turns if text]
+
+
+def _push_line(
+    pending: Optional[Tuple[Optional[str], str]],
+    line: str
+) -> Tuple[Optional[Tuple[Optional[str], str]], Optional[Tuple[Optional[str], str]]]:
+    """
+    把一行加入正在累积的轮次（规则与 _turns 一致）
+
+    Returns:
+        (新的待定轮次, 已完成的轮次或 None)
+    """
+    line = line.strip()
+    if not line:
+        return pending, None
+    match = SPEAKER_PATTERN.match(line)
+    if match:
+        return (match.group(1).strip(), match.group(2).strip()), pending
+    if pending is not None and pending[0] is not None:
+        label, text = pending
+        return (label, f"{text} {line}".strip()), None
+    return (None, line), pending
+
+
+def iter_turns(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    从流式生成的文本片段中逐个产出完整的轮次（"名字: 内容"，无标签时为段落）
+
+    一行在收到换行符后才算完整；带标签的轮次要等下一行开始新的轮次（或流结束）
+    才能确定没有续行，因此每个轮次最多比生成进度晚一行
+    """
+    buffer = ""
+    pending = None
+    for piece in pieces:
+        buffer += piece
+        if "\n" not in piece:
+            continue
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            pending, finished = _push_line(pending, line)
+            if finished and finished[1]:
+                yield f"{finished[0]}: {finished[1]}" if finished[0] else finished[1]
+
+    pending, finished = _push_line(pending, buffer)
+    for turn in (finished, pending):
+        if turn and turn[1]:
+            yield f"{turn[0]}: {turn[1]}" if turn[0] else turn[1]
+
+
+def _split_long_text(text: str, limit: int) -> List[str]:
+    """在句子边界切分超长文本；单个句子仍超长时在空白处（或硬性）切断"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > limit:
+            cut = sentence.rfind(" ", 0, limit)
+            if cut <= limit // 2:
+                cut = limit
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        separator = " " if current and not current.endswith(("。", "！", "？", "；", "…")) else ""
+        if len(current) + len(separator) + len(sentence) <= limit:
+            current = f"{current}{separator}{sentence}"
+        else:
+            pieces.append(current)
+            current = sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_script(script: str, max_chars: int) -> List[str]:
+    """
+    把稿件切成不超过 max_chars 的片段
+
+    优先在说话者轮次之间切分；单个轮次过长时在句子边界切分，
+    续写部分保留原说话者标签，保证各片段单独合成时声音一致
+
+    Returns:
+        片段列表（按原顺序），拼接后覆盖原稿件的全部内容
+    """
+    lines = []
+    for label, text in _turns(script):
+        prefix = f"{label}: " if label else ""
+        for piece in _split_long_text(text, max_chars - len(prefix)):
+            lines.append(prefix + piece)
+
+    chunks = []
+    current = ""
+    for line in lines:
+        if current and len(current) + 1 + len(line) > max_chars:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
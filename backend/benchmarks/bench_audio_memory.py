@@ -0,0 +1,203 @@
+"""
+基准测试：合成音频的收集、拼接与上传的内存占用（tracemalloc）
+
+假的 ElevenLabs 客户端按 4KB 一块流式返回合法的 MP3（128kbps，字节数与稿件长度成正比，
+以 50 倍实时的速度返回），默认模拟一期 15 分钟的节目（约 13MB 音频），对比：
+  - 原实现：每段 audio_data += chunk 累加（每次复制已收到的全部数据），全部完成后拼接，
+    拼接结果再整体复制，最后包成 BytesIO 上传
+  - 内存拼接：逐块收集后一次性 join，各段写入 BytesIO 后上传
+  - 临时文件：各段完成后依次写入 SpooledTemporaryFile 并释放，超过 audio_spool_max_memory 落盘，
+    直接把文件交给上传
+  - 临时文件 + 边播放（内存）：任务处理流程总会同时写入 LiveAudio（/stream 边合成边播放），
+    原 LiveAudio 在内存中保存整集音频直到任务结束
+  - 临时文件 + 边播放：LiveAudio 写入磁盘临时文件，读取方按偏移读取（当前实现）
+
+上传使用只读取不保存的 S3 替身（按 1MB 分块读取，与 boto3 流式上传一致）。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_audio_memory
+    python -m benchmarks.bench_audio_memory 30 16384 100   # 节目时长(分钟) 每块字节数 合成速度(倍实时)
+"""
+import io
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.utils.audio import audio_spool
+from app.utils.live_audio import LiveAudio
+from app.utils.script_splitter import split_script
+
+
+FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413  # MPEG1 Layer III 128kbps 44.1kHz，每帧 26ms
+ID3V2 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+INFO_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 32 + b"Info" + b"\x00" * 377
+CHARS_PER_MINUTE = 900  # 朗读速度约 150 词 / 分钟
+BYTES_PER_SECOND = 16000  # 128kbps
+
+
+class FakeElevenLabs:
+    """text_to_speech / text_to_dialogue 的替身：流式返回与文本长度成正比的 MP3"""
+
+    def __init__(self, chunk_size: int, speed: float):
+        self.frames_per_chunk = max(1, chunk_size // len(FRAME))
+        self.chunk = FRAME * self.frames_per_chunk
+        self.chunk_interval = len(self.chunk) / BYTES_PER_SECOND / speed
+        self.text_to_speech = self
+        self.text_to_dialogue = self
+
+    def convert(self, text=None, inputs=None, **kwargs):
+        chars = len(text) if text is not None else sum(len(item.text) for item in inputs)
+        seconds = chars / CHARS_PER_MINUTE * 60
+        frames = int(seconds * BYTES_PER_SECOND / len(FRAME))
+        yield ID3V2 + INFO_FRAME
+        for _ in range(frames // self.frames_per_chunk):
+            time.sleep(self.chunk_interval)
+            yield self.chunk
+        yield FRAME * (frames % self.frames_per_chunk) + b"TAG" + b"\x00" * 125
+
+
+class NullS3:
+    """只读取上传内容、不保存的 S3 替身"""
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        size = 0
+        while True:
+            block = Body.read(1024 * 1024)
+            if not block:
+                break
+            size += len(block)
+        return size
+
+
+def make_script(minutes: float) -> str:
+    lines = []
+    total = 0
+    i = 0
+    while total < minutes * CHARS_PER_MINUTE:
+        speaker = "Alex" if i % 2 == 0 else "Ben"
+        line = f"{speaker}: This is sentence number {i} of our episode, and it keeps the conversation going."
+        lines.append(line)
+        total += len(line) + 1
+        i += 1
+    return "\n".join(lines)
+
+
+def legacy_concat(parts) -> bytes:
+    """原来的拼接：bytearray 累加后整体转换为 bytes"""
+    output = bytearray()
+    for part in parts:
+        view = memoryview(part)
+        output += view[len(ID3V2) + len(INFO_FRAME):len(part) - 128]
+    return bytes(output)
+
+
+def run_legacy(service: AIService, script: str) -> int:
+    voices = service._assign_voices(["Alex", "Ben"], "en")
+
+    def synthesize(chunk: str) -> bytes:
+        inputs = service._parse_dialogue_script(chunk, "en", voices)
+        audio_data = b""
+        for piece in service.client.text_to_dialogue.convert(inputs=inputs):
+            audio_data += piece
+        return audio_data
+
+    parts = list(service.tts_pool.map(synthesize, split_script(script, settings.tts_chunk_chars)))
+    audio_data = legacy_concat(parts)
+    return NullS3().put_object(Bucket="b", Key="k", Body=io.BytesIO(audio_data))
+
+
+def run_in_memory(service: AIService, script: str) -> int:
+    audio_data = service.generate_long_audio(script, "en")
+    return NullS3().put_object(Bucket="b", Key="k", Body=io.BytesIO(audio_data))
+
+
+def run_spooled(service: AIService, script: str) -> int:
+    audio_file = audio_spool(settings.audio_spool_max_memory, settings.temp_dir)
+    service.generate_long_audio(script, "en", output=audio_file)
+    audio_file.seek(0)
+    size = NullS3().put_object(Bucket="b", Key="k", Body=audio_file)
+    audio_file.close()
+    return size
+
+
+class MemoryLiveAudio(LiveAudio):
+    """原 LiveAudio：整集音频保存在内存中的 bytearray 里"""
+
+    def __init__(self, media_type: str = "audio/mpeg"):
+        super().__init__(media_type)
+        self._data = bytearray()
+
+    def append(self, data: bytes):
+        with self._lock:
+            self._data += data
+            self._size = len(self._data)
+
+    def read(self, offset: int, max_bytes: int) -> bytes:
+        with self._lock:
+            return bytes(self._data[offset:offset + max_bytes])
+
+
+def run_spooled_live(service: AIService, script: str, live: LiveAudio) -> int:
+    audio_file = audio_spool(settings.audio_spool_max_memory, settings.temp_dir)
+    service.generate_long_audio(script, "en", live=live, output=audio_file)
+    audio_file.seek(0)
+    size = NullS3().put_object(Bucket="b", Key="k", Body=audio_file)
+    audio_file.close()
+    assert live.size == size
+    live.finish()
+    return size
+
+
+def measure(run, service: AIService, script: str):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):  # 静默服务内的合成日志
+        size = run(service, script)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else 50
+    settings.tts_cache_enabled = False
+
+    service = AIService()
+    service.client = FakeElevenLabs(chunk_size, speed)
+    service.tts_pool = ThreadPoolExecutor(max_workers=settings.tts_max_concurrency)
+    script = make_script(minutes)
+    segments = len(split_script(script, settings.tts_chunk_chars))
+
+    print("=" * 78)
+    print(f"🧠 音频收集内存基准测试（{minutes:g} 分钟节目，{len(script):,} 字符，{segments} 段，"
+          f"每块 {chunk_size} 字节，落盘阈值 {settings.audio_spool_max_memory // 1024 // 1024}MB）")
+    print("=" * 78)
+    print(f"   {'方式':<10}{'音频大小':>12}{'内存峰值':>12}{'峰值/音频':>10}{'耗时':>10}")
+
+    runs = (
+        ("原实现", run_legacy),
+        ("内存拼接", run_in_memory),
+        ("临时文件", run_spooled),
+        ("+边播放(内存)", lambda service, script: run_spooled_live(service, script, MemoryLiveAudio())),
+        ("+边播放", lambda service, script: run_spooled_live(service, script, LiveAudio(directory=settings.temp_dir)))
+    )
+    for name, run in runs:
+        size, peak, elapsed = measure(run, service, script)
+        print(f"   {name:<10}{size / 1024 / 1024:>11.1f}M{peak / 1024 / 1024:>13.1f}M"
+              f"{peak / size:>11.2f}x{elapsed:>11.2f}s")
+
+    print("=" * 78)
+    print("   内存峰值：tracemalloc 记录的 Python 内存分配峰值（包括合成中的各段和待上传的数据）")
+
+
+if __name__ == "__main__":
+    main()
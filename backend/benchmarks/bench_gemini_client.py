@@ -0,0 +1,102 @@
+"""
+基准测试：Gemini 调用的连接复用与并发吞吐
+
+对本地 Gemini 替身服务器发起 N 个并发的播客稿件生成（每个生成两次调用：大纲 + 稿件），对比：
+  - 每次调用 httpx.post：原实现，每个请求新建连接（真实 API 还要加上 TLS 握手），每个请求占用一个线程
+  - 共享同步客户端：连接池复用连接，仍然每个请求占用一个线程
+  - 异步客户端：连接池复用连接，所有请求在一个事件循环中等待
+
+响应缓存在测试期间关闭，每次调用都会真正发起请求。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_gemini_client
+    python -m benchmarks.bench_gemini_client 50 0.2   # 并发生成数 每个请求的延迟(秒)
+"""
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+import httpx
+
+from app.config import settings
+from app.services.ai_service import AIService
+from benchmarks.stub_gemini import StubGeminiServer
+
+
+TOPICS = [f"Episode {i}: how small habits compound over a decade" for i in range(1000)]
+
+
+class PerCallAIService(AIService):
+    """原实现：每次调用使用模块级 httpx.post（每次新建并关闭客户端和连接）"""
+
+    def _call_gemini_api(self, prompt, temperature=0.7, max_tokens=4000, use_cache=True, cache_stats=None):
+        url, payload = self._gemini_request(prompt, temperature, max_tokens)
+        response = httpx.post(url, json=payload, timeout=180.0)
+        return self._parse_gemini_response(response, None)
+
+
+def run_threads(service: AIService, concurrency: int) -> int:
+    """每个生成占用一个线程，返回运行期间的最大线程数"""
+    peak = [threading.active_count()]
+
+    def generate(topic):
+        peak[0] = max(peak[0], threading.active_count())
+        return service.generate_script_from_topic(topic)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(generate, TOPICS[:concurrency]))
+    assert all(results)
+    return peak[0]
+
+
+def run_async(service: AIService, concurrency: int) -> int:
+    async def main():
+        results = await asyncio.gather(*(
+            service.generate_script_from_topic_async(topic) for topic in TOPICS[:concurrency]
+        ))
+        assert all(results)
+        peak = threading.active_count()
+        await service.aclose()
+        return peak
+    return asyncio.run(main())
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    settings.llm_cache_enabled = False
+
+    with StubGeminiServer(latency=latency) as stub:
+        settings.gemini_api_url = stub.url
+
+        print("=" * 78)
+        print(f"🤖 Gemini 客户端基准测试（{concurrency} 个并发生成，每个 2 次调用，每次延迟 {latency}s）")
+        print("=" * 78)
+        print(f"   {'方式':<14}{'耗时':>10}{'生成/秒':>10}{'请求数':>6}{'连接数':>6}{'服务端并发':>6}{'线程数':>6}")
+
+        runs = [
+            ("每次 httpx.post", lambda: run_threads(PerCallAIService(), concurrency)),
+            ("共享同步客户端", lambda: run_threads(AIService(), concurrency)),
+            ("异步客户端", lambda: run_async(AIService(), concurrency)),
+        ]
+        for name, run in runs:
+            stub.reset()
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):  # 静默服务内的调用日志
+                peak_threads = run()
+            elapsed = time.perf_counter() - start
+            print(f"   {name:<14}{elapsed:>9.2f}s{concurrency / elapsed:>11.1f}{stub.requests:>9}"
+                  f"{stub.connections:>9}{stub.peak_active:>12}{peak_threads:>9}")
+
+        print("=" * 78)
+        print("   连接数：服务端接受的 TCP 连接数（真实 API 每个新连接还需要一次 TLS 握手）")
+        print("   线程数：生成期间进程中的最大线程数")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+基准测试：任务进度写回缓冲（每次更新立即写入 vs 合并后延迟写入）
+
+按 process_podcast_background 的顺序更新任务（处理中 10% → 各段合成进度 → 完成 100%），
+每一步之间模拟少量处理时间；JSON 数据服务的每次写入额外等待 disk_latency 秒模拟慢速磁盘。
+多个任务同时运行，对比每个任务的写入次数和完成耗时。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_job_progress
+    python -m benchmarks.bench_job_progress 8 0.05 1.0   # 并发任务数 每次写入延迟（秒） 缓冲延迟（秒）
+"""
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.config import settings
+from app.services.data_service import DataService
+
+
+SEGMENTS = 8  # 音频分段数（每段完成后更新一次进度）
+STEP_SECONDS = 0.02  # 两次更新之间的处理时间
+
+
+def job_updates(podcast_id: str) -> list:
+    """process_podcast_background 中一个任务的进度更新序列"""
+    updates = [
+        {"status": "processing", "progress": 10, "status_message": "📥 下载文件..."},
+        {"progress": 20, "status_message": "📄 提取文本..."},
+        {"progress": 25, "status_message": "🤖 生成脚本..."},
+        {"progress": 40, "status_message": "📝 脚本创作完成"},
+        {"progress": 45, "status_message": "🎭 生成多声道对话音频...", "live_audio_url": f"/api/v1/podcasts/{podcast_id}/stream"},
+    ]
+    updates += [
+        {"progress": 45 + 15 * done // SEGMENTS, "status_message": f"🎭 生成音频 ({done}/{SEGMENTS} 段)..."}
+        for done in range(1, SEGMENTS + 1)
+    ]
+    updates += [
+        {"progress": 65, "status_message": "☁️ 上传音频..."},
+        {"progress": 70, "status_message": "📝 保存稿件..."},
+        {"progress": 90, "status_message": "💾 保存结果..."},
+        {"status": "completed", "progress": 100, "status_message": "✅ 完成"},
+    ]
+    return updates
+
+
+class SlowDiskDataService(DataService):
+    """每次写入 JSON 文件额外等待 disk_latency 秒，并统计写入次数"""
+
+    def __init__(self, data_dir: Path, disk_latency: float):
+        super().__init__(data_dir)
+        self.disk_latency = disk_latency
+        self.job_writes = 0
+
+    def _dump_json(self, file_path: Path, data: dict):
+        time.sleep(self.disk_latency)
+        if file_path == self.jobs_file:
+            self.job_writes += 1
+        super()._dump_json(file_path, data)
+
+
+def run(jobs: int, disk_latency: float, flush_delay: float):
+    settings.job_progress_flush_delay = flush_delay
+    with tempfile.TemporaryDirectory() as tmp:
+        service = SlowDiskDataService(Path(tmp), disk_latency)
+        job_ids = [str(uuid.uuid4()) for _ in range(jobs)]
+        for job_id in job_ids:
+            service.save_job({"id": job_id, "podcast_id": job_id, "status": "pending", "progress": 0})
+        service.job_writes = 0
+        durations = []
+
+        def worker(job_id: str):
+            started = time.perf_counter()
+            for updates in job_updates(job_id):
+                time.sleep(STEP_SECONDS)
+                service.update_job(job_id, updates)
+            durations.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=worker, args=(job_id,)) for job_id in job_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        service.job_buffer.close()
+
+        for job_id in job_ids:
+            job = service.get_job(job_id)
+            assert job["status"] == "completed" and job["progress"] == 100
+        return service.job_writes / jobs, statistics.mean(durations), max(durations)
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    disk_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    flush_delay = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    updates = len(job_updates("p"))
+
+    print("=" * 72)
+    print(f"📊 任务进度写回缓冲基准测试（{jobs} 个并发任务，每个 {updates} 次更新，"
+          f"每次写入 {disk_latency * 1000:.0f}ms）")
+    print("=" * 72)
+    print(f"   {'方式':<14}{'每个任务写入次数':>16}{'平均完成耗时':>14}{'最长完成耗时':>14}")
+
+    baseline = None
+    for name, delay in (("每次立即写入", 0), (f"合并写入 {flush_delay}s", flush_delay)):
+        writes, mean, longest = run(jobs, disk_latency, delay)
+        baseline = baseline or mean
+        print(f"   {name:<14}{writes:>16.1f}{mean:>13.2f}s{longest:>13.2f}s")
+
+    print("=" * 72)
+    print(f"   加速: {baseline / mean:.1f}x（处理时间下限 {updates * STEP_SECONDS:.2f}s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+基准测试：update_job 单次延迟 vs 任务总数
+
+对比 JSON 整文件重写模式与日志模式（journal）。
+日志模式下单次更新只追加一行日志，延迟应与任务总数无关。
+
+日志条数达到 max(压缩阈值, 任务总数) 时压缩为快照，因此日志模式每个规模都运行
+超过任务总数的更新次数，保证至少触发一次压缩，并报告最大延迟：
+  - journal：快照在后台线程中写入（当前实现）
+  - 同步压缩：触发压缩的那次更新等待快照写完（原实现）
+
+用法:
+    cd backend
+    python -m benchmarks.bench_journal_updates              # 1k / 10k / 100k
+    python -m benchmarks.bench_journal_updates 1000000      # 追加 1M 规模
+"""
+import json
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.services.data_service import DataService
+from app.services.journal_data_service import JournalDataService
+
+
+def seed_jobs(data_dir: Path, count: int) -> list:
+    """直接写入快照文件，生成 count 个历史任务"""
+    job_ids = [str(uuid.uuid4()) for _ in range(count)]
+    now = "2025-01-01T00:00:00"
+    jobs = [
+        {
+            "id": job_id,
+            "podcast_id": job_id,
+            "status": "completed",
+            "progress": 100,
+            "created_at": now,
+            "updated_at": now
+        }
+        for job_id in job_ids
+    ]
+    with open(data_dir / "jobs.json", 'w', encoding='utf-8') as f:
+        json.dump({"jobs": jobs}, f, ensure_ascii=False)
+    return job_ids
+
+
+def measure_updates(service, job_ids: list, updates: int) -> list:
+    """测量 updates 次 update_job 的延迟（毫秒）"""
+    latencies = []
+    for i in range(updates):
+        job_id = job_ids[i % len(job_ids)]
+        start = time.perf_counter()
+        service.update_job(job_id, {"progress": i % 100, "status_message": "benchmark"})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def count_compactions(service: JournalDataService, blocking: bool) -> list:
+    """统计任务集合的压缩次数；blocking=True 时触发压缩的更新等待快照写完（模拟原实现）"""
+    compactions = [0]
+    start_compaction = service.jobs._start_compaction
+
+    def counted():
+        compactions[0] += 1
+        compaction = start_compaction()
+        if blocking:
+            compaction.join()
+        return compaction
+
+    service.jobs._start_compaction = counted
+    return compactions
+
+
+def report(label: str, count: int, latencies: list, compactions: str = ""):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"   {label:<8} {count:>9,} 个任务   p50={p50:7.3f}ms   p99={p99:7.3f}ms   "
+          f"max={latencies[-1]:9.3f}ms   {compactions}")
+
+
+def main():
+    sizes = [1_000, 10_000, 100_000]
+    if len(sys.argv) > 1:
+        sizes.append(int(sys.argv[1]))
+
+    print("=" * 96)
+    print("📊 update_job 延迟基准测试")
+    print("=" * 96)
+
+    for count in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = Path(tmp)
+            job_ids = seed_jobs(data_dir, count)
+
+            # 更新次数超过任务总数，至少触发一次压缩
+            updates = max(2000, count + count // 10)
+            for label, blocking in (("journal", False), ("同步压缩", True)):
+                service = JournalDataService(data_dir)
+                compactions = count_compactions(service, blocking)
+                latencies = measure_updates(service, job_ids, updates)
+                service.jobs.wait_compaction()
+                report(label, count, latencies, f"{updates:,} 次更新 / {compactions[0]} 次压缩")
+                service.podcasts.close()
+                service.jobs.close()
+
+            # JSON 模式每次更新都重写整个文件，大规模下只采样少量次数
+            if count <= 10_000:
+                service = DataService(data_dir)
+                report("json", count, measure_updates(service, job_ids, 20))
+
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
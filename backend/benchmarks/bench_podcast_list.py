@@ -0,0 +1,146 @@
+"""
+基准测试：GET /api/v1/podcasts?limit=100 的响应大小和延迟
+
+数据集有 records 个播客，测量三种实现：
+  - 原实现：稿件内联在记录中，每次请求复制并排序全部记录，
+    响应模型为 List[PodcastResponse]（逐项校验，返回完整稿件）
+  - 逐项校验：稿件已移到 blob 存储、复用排序结果，仍逐项经过 PodcastResponse 校验和序列化
+  - 现在：默认字段不含稿件，预先构建的 TypeAdapter 直接输出 JSON（见 get_podcasts）
+
+每种实现随机请求不同页码，统计 p50 / p95 延迟。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_podcast_list
+    python -m benchmarks.bench_podcast_list 10000 3000 200   # 播客数 每篇稿件字符数 请求次数
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+
+from app.api import podcasts as podcasts_api
+from app.schemas.podcast import PodcastResponse
+from app.services.data_service import DataService
+from app.services.sorted_index import sort_key
+
+
+WORDS = "podcast host guest story music science history market climate travel health idea".split()
+
+
+class LegacyListDataService(DataService):
+    """原实现：每次列出播客都复制并排序全部记录"""
+
+    def list_podcasts(self, search=None, offset: int = 0, limit: int = 20):
+        podcasts = self.read_podcasts()
+        podcasts.sort(key=sort_key, reverse=True)
+        return podcasts[offset:offset + limit]
+
+
+def legacy_app(service: DataService) -> FastAPI:
+    """原实现的列表接口"""
+    app = FastAPI()
+
+    @app.get("/api/v1/podcasts", response_model=List[PodcastResponse])
+    async def get_podcasts(page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100)):
+        podcasts = await service.list_podcasts_async(offset=(page - 1) * limit, limit=limit)
+        for podcast in podcasts:
+            if podcast.get("audio_s3_key"):
+                podcast["audio_url"] = f"/api/v1/podcasts/{podcast['id']}/stream"
+        return podcasts
+
+    return app
+
+
+def write_dataset(service: DataService, records: int, chars: int, inline: bool):
+    """直接写入 podcasts.json（逐条保存 10k 个播客太慢）"""
+    rng = random.Random(42)
+    texts = [
+        " ".join(rng.choice(WORDS) for _ in range(chars // 6))[:chars]
+        for _ in range(50)
+    ]
+    podcasts = []
+    for i in range(records):
+        text = texts[i % len(texts)]
+        created_at = f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}"
+        podcast = {
+            "id": f"p{i:05d}",
+            "title": f"Episode {i}",
+            "original_filename": f"episode_{i}.pdf",
+            "status": "completed",
+            "audio_s3_key": f"podcasts/p{i:05d}.mp3",
+            "duration_seconds": 300 + i % 600,
+            "file_size_bytes": 4_000_000 + i,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "version": 1
+        }
+        if inline:
+            podcast.update(transcript=text, extracted_text=text)
+        else:
+            digest = service.text_blobs.put(text)
+            podcast.update(transcript=None, extracted_text=None, transcript_blob=digest, extracted_text_blob=digest)
+        podcasts.append(podcast)
+    service._dump_json(service.podcasts_file, {"podcasts": podcasts})
+
+
+def measure(client: TestClient, records: int, requests: int):
+    rng = random.Random(7)
+    pages = max(1, records // 100)
+    client.get("/api/v1/podcasts", params={"limit": 100})  # 预热：解析文件、构建索引
+    times = []
+    sizes = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get("/api/v1/podcasts", params={"page": rng.randint(1, pages), "limit": 100})
+        times.append(time.perf_counter() - started)
+        assert response.status_code == 200 and len(response.json()) == 100
+        sizes.append(len(response.content))
+    times.sort()
+    return (
+        statistics.mean(sizes),
+        times[len(times) // 2] * 1000,
+        times[int(len(times) * 0.95)] * 1000
+    )
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print("=" * 72)
+    print(f"📋 GET /api/v1/podcasts?limit=100（{records:,} 个播客，每篇稿件 {chars:,} 字符，{requests} 次请求）")
+    print("=" * 72)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as inline_dir, tempfile.TemporaryDirectory() as blob_dir:
+        inline = LegacyListDataService(Path(inline_dir))
+        blob = DataService(Path(blob_dir))
+        write_dataset(inline, records, chars, inline=True)
+        write_dataset(blob, records, chars, inline=False)
+
+        results["原实现"] = measure(TestClient(legacy_app(inline)), records, requests)
+        results["逐项校验"] = measure(TestClient(legacy_app(blob)), records, requests)
+
+        from app.main import app
+        podcasts_api.data_service = blob
+        results["现在"] = measure(TestClient(app), records, requests)
+
+    baseline_size, _, baseline_p95 = results["原实现"]
+    print(f"   {'':<12}{'响应大小':>14}{'p50':>12}{'p95':>12}{'p95 提升':>12}")
+    for name, (size, p50, p95) in results.items():
+        print(f"   {name:<10}{size / 1024:>12,.1f} KB{p50:>9.2f} ms{p95:>9.2f} ms{baseline_p95 / p95:>11.1f}x")
+    print("-" * 72)
+    print(f"   响应大小缩小 {baseline_size / results['现在'][0]:.0f}x")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+基准测试：倒排索引搜索 vs 线性扫描
+
+生成 N 个带中英文文稿的合成播客，对比原先的逐条子串匹配与 BM25 倒排索引的查询延迟。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_search            # 默认 100k 个播客
+    python -m benchmarks.bench_search 20000
+"""
+import random
+import statistics
+import sys
+import time
+from itertools import accumulate
+
+from app.services.search_index import SearchIndex
+
+
+def make_vocabulary(rng: random.Random, size: int = 20000) -> tuple:
+    """生成合成词表（随机汉字词 / 随机英文词），词频服从 Zipf 分布"""
+    zh_words = list(dict.fromkeys(
+        "".join(chr(rng.randint(0x4e00, 0x9fa5)) for _ in range(rng.randint(2, 3)))
+        for _ in range(size)
+    ))
+    en_words = list(dict.fromkeys(
+        "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9)))
+        for _ in range(size)
+    ))
+    zh_cum = list(accumulate(1 / (rank + 1) for rank in range(len(zh_words))))
+    en_cum = list(accumulate(1 / (rank + 1) for rank in range(len(en_words))))
+    return (zh_words, zh_cum), (en_words, en_cum)
+
+
+def make_podcasts(count: int, vocabulary: tuple, words_per_doc: int = 80) -> list:
+    rng = random.Random(7)
+    (zh_words, zh_cum), (en_words, en_cum) = vocabulary
+    podcasts = []
+    for i in range(count):
+        # 三分之二中文稿件，三分之一英文稿件
+        if i % 3:
+            words, cum, separator = zh_words, zh_cum, ""
+        else:
+            words, cum, separator = en_words, en_cum, " "
+        podcasts.append({
+            "id": f"podcast-{i}",
+            "title": separator.join(rng.choices(words, cum_weights=cum, k=3)),
+            "transcript": separator.join(rng.choices(words, cum_weights=cum, k=words_per_doc))
+        })
+    return podcasts
+
+
+def make_queries(vocabulary: tuple) -> list:
+    """按词频排名选取查询词：最常见的词是最坏情况，中频词更接近真实搜索"""
+    (zh_words, _), (en_words, _) = vocabulary
+    return [
+        ("中文 #1 最常见", zh_words[0]),
+        ("中文 #50", zh_words[50]),
+        ("中文 #500", zh_words[500]),
+        ("中文 #20 + #200", f"{zh_words[20]} {zh_words[200]}"),
+        ("单个汉字", zh_words[100][0]),
+        ("英文 #1 最常见", en_words[0]),
+        ("英文 #100", en_words[100]),
+        ("英文 #30 + #300", f"{en_words[30]} {en_words[300]}"),
+    ]
+
+
+def linear_scan(podcasts: list, query: str) -> list:
+    """原有实现：对每条记录做小写子串匹配"""
+    query_lower = query.lower()
+    return [
+        p for p in podcasts
+        if query_lower in p.get("title", "").lower() or query_lower in p.get("transcript", "").lower()
+    ]
+
+
+def timed(fn, repeat: int) -> float:
+    """返回 repeat 次调用的中位数耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("=" * 70)
+    print(f"🔍 全文搜索基准测试（{count:,} 个播客）")
+    print("=" * 70)
+
+    vocabulary = make_vocabulary(random.Random(42))
+    podcasts = make_podcasts(count, vocabulary)
+
+    start = time.perf_counter()
+    index = SearchIndex.build(podcasts)
+    print(f"   索引构建: {time.perf_counter() - start:.2f}s")
+
+    print(f"\n   {'查询':<18}{'命中数':>10}{'线性扫描':>14}{'倒排索引':>14}")
+    for label, query in make_queries(vocabulary):
+        hits = len(index.match(query))
+        scan_ms = timed(lambda: linear_scan(podcasts, query), 3)
+        index_ms = timed(lambda: index.search(query, limit=20), 10)
+        print(f"   {label:<18}{hits:>10,}{scan_ms:>12.1f}ms{index_ms:>12.2f}ms")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
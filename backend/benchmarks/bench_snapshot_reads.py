@@ -0,0 +1,114 @@
+"""
+基准测试：JSON 数据服务的读取吞吐量（加锁逐次解析 vs 不加锁的快照读取）
+
+数据目录中有几百个播客和任务，读取线程不断调用 get_job / get_podcast（模拟前端轮询
+/jobs/{id} 和 /podcasts/{id}），同时一个写入线程每 write_interval 秒更新一次任务。
+  - 原实现：每次读取都获取文件锁并 json.load 整个文件，写入时原地重写文件
+  - 快照读取：读取不加锁，文件未被替换时复用已解析的快照（见 DataService._snapshot）
+
+分别用 1 / 8 / 32 个读取线程测量每秒读取次数。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_snapshot_reads
+    python -m benchmarks.bench_snapshot_reads 500 0.01 3   # 记录数 写入间隔（秒） 每轮时长（秒）
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from app.services.data_service import DataService, _make_snapshot
+
+
+class LockedReadDataService(DataService):
+    """原实现：每次读取都持有文件锁并解析整个文件，写入时原地重写"""
+
+    def _snapshot(self, file_path: Path):
+        lock = self.podcasts_lock if file_path == self.podcasts_file else self.jobs_lock
+        with lock:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                stat = os.fstat(f.fileno())
+                data = json.load(f)
+        return _make_snapshot(stat, False, data, file_path.stem)
+
+    def _dump_json(self, file_path: Path, data: dict):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def populate(service: DataService, records: int):
+    for i in range(records):
+        service.save_podcast({
+            "id": f"p{i}",
+            "title": f"Episode {i}",
+            "status": "completed",
+            "transcript": "Host: hello there. " * 50
+        })
+        service.save_job({"id": f"j{i}", "podcast_id": f"p{i}", "status": "processing", "progress": 0})
+
+
+def measure(service: DataService, readers: int, records: int, write_interval: float, seconds: float):
+    stop = threading.Event()
+    counts = [0] * readers
+    writes = [0]
+
+    def reader(index: int):
+        rng = random.Random(index)
+        while not stop.is_set():
+            i = rng.randrange(records)
+            assert service.get_job(f"j{i}") is not None
+            assert service.get_podcast(f"p{i}") is not None
+            counts[index] += 2
+
+    def writer():
+        progress = 0
+        while not stop.is_set():
+            progress = (progress + 1) % 100
+            service.mutate("jobs", f"j{progress % records}", lambda job: {"status": "processing", "progress": progress})
+            writes[0] += 1
+            time.sleep(write_interval)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / seconds, writes[0] / seconds
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    write_interval = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+
+    print("=" * 72)
+    print(f"📖 JSON 数据服务读取吞吐量（{records} 个播客 + {records} 个任务，"
+          f"写入线程每 {write_interval * 1000:.0f}ms 更新一次任务）")
+    print("=" * 72)
+    print(f"   {'读取线程':<10}{'原实现 读/秒':>16}{'快照 读/秒':>16}{'提升':>10}{'写/秒（原 / 快照）':>22}")
+
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        legacy = LockedReadDataService(Path(legacy_dir))
+        snapshot = DataService(Path(snapshot_dir))
+        populate(legacy, records)
+        populate(snapshot, records)
+
+        for readers in (1, 8, 32):
+            legacy_reads, legacy_writes = measure(legacy, readers, records, write_interval, seconds)
+            snapshot_reads, snapshot_writes = measure(snapshot, readers, records, write_interval, seconds)
+            print(f"   {readers:<14}{legacy_reads:>16,.0f}{snapshot_reads:>16,.0f}"
+                  f"{snapshot_reads / legacy_reads:>9.1f}x{legacy_writes:>12.0f} / {snapshot_writes:.0f}")
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
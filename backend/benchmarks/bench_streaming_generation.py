@@ -0,0 +1,125 @@
+"""
+基准测试：流式稿件生成 + 逐轮次合成 vs 先生成完整稿件再合成
+
+本地 Gemini 替身服务器按固定速度"生成"稿件（流式接口逐段返回，非流式接口生成完才返回），
+TTS 替身的耗时为固定请求延迟 + 与字符数成正比的合成时间。对比：
+  - 批量：generate_script_from_topic 拿到完整稿件后 generate_long_audio 分段并发合成
+  - 流式：stream_script_from_topic 边生成边切出完整轮次，generate_streaming_audio 立即合成
+
+指标：首段音频完成时间（time-to-first-audio）和全部音频完成时间。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_streaming_generation
+    python -m benchmarks.bench_streaming_generation 2000 0.3   # 生成速度(字符/秒) TTS 请求延迟(秒)
+"""
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.utils.script_splitter import iter_turns, split_script
+from benchmarks.stub_gemini import StubGeminiServer
+
+
+FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413  # MPEG1 Layer III 128kbps 44.1kHz
+TTS_PER_CHAR = 0.0005
+OUTLINE = "1. Opening\n2. Three key points about the topic\n3. Closing summary\n" * 8
+
+
+def make_script(turns: int) -> str:
+    lines = []
+    for i in range(turns):
+        speaker = "Mike" if i % 2 == 0 else "Sarah"
+        lines.append(f"{speaker}: This is turn number {i} of the episode. We keep the conversation going "
+                     f"with a couple of sentences, so each turn sounds like a natural reply.")
+    return "\n".join(lines)
+
+
+def make_service(request_latency: float) -> AIService:
+    service = AIService()
+
+    def fake_tts(script: str, language: str = "en", speaker_voice_map=None) -> bytes:
+        time.sleep(request_latency + TTS_PER_CHAR * len(script))
+        return FRAME * max(1, len(script) // 400)
+
+    service.generate_dialogue_audio = fake_tts
+    return service
+
+
+def run_batch(service: AIService) -> dict:
+    start = time.perf_counter()
+    timings = {}
+
+    def on_progress(done, total):
+        timings.setdefault("first_audio", time.perf_counter() - start)
+
+    script = service.generate_script_from_topic("Streaming benchmark topic")
+    timings["script"] = time.perf_counter() - start
+    audio = service.generate_long_audio(script, "en", on_progress=on_progress)
+    timings["total"] = time.perf_counter() - start
+    timings["segments"] = len(split_script(script, settings.tts_chunk_chars))
+    assert audio
+    return timings
+
+
+def run_streaming(service: AIService) -> dict:
+    start = time.perf_counter()
+    timings = {}
+    segments = [0]
+
+    def on_progress(done, submitted):
+        timings.setdefault("first_audio", time.perf_counter() - start)
+        segments[0] = submitted
+
+    def pieces():
+        for piece in service.stream_script_from_topic("Streaming benchmark topic"):
+            yield piece
+        timings["script"] = time.perf_counter() - start
+
+    audio = service.generate_streaming_audio(iter_turns(pieces()), "en", on_progress=on_progress)
+    timings["total"] = time.perf_counter() - start
+    timings["segments"] = segments[0]
+    assert audio
+    return timings
+
+
+def main():
+    chars_per_second = float(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    request_latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    settings.llm_cache_enabled = False
+    settings.tts_cache_enabled = False
+
+    print("=" * 78)
+    print(f"🌊 流式生成基准测试（生成速度 {chars_per_second:.0f} 字符/秒，TTS 请求延迟 {request_latency}s，"
+          f"每字符 {TTS_PER_CHAR * 1000:.1f}ms，并发 {settings.tts_max_concurrency}）")
+    print("=" * 78)
+    print(f"   {'稿件长度':>8}{'方式':>6}{'段数':>8}{'稿件完成':>10}{'首段音频':>10}{'全部完成':>10}")
+
+    for turns in (10, 40, 80):
+        script = make_script(turns)
+        chunk_chars = 40
+        stub = StubGeminiServer(
+            latency=0.1,
+            response_text=lambda prompt: script if "Outline:" in prompt else OUTLINE,
+            stream_chunk_chars=chunk_chars,
+            stream_interval=chunk_chars / chars_per_second
+        )
+        with stub:
+            settings.gemini_api_url = stub.url
+            results = {}
+            for name, run in (("批量", run_batch), ("流式", run_streaming)):
+                with redirect_stdout(io.StringIO()):  # 静默服务内的调用日志
+                    results[name] = run(make_service(request_latency))
+            for name, timings in results.items():
+                print(f"   {len(script):>10,}{name:>6}{timings['segments']:>10}{timings['script']:>13.2f}s"
+                      f"{timings['first_audio']:>13.2f}s{timings['total']:>13.2f}s")
+
+    print("=" * 78)
+    print(f"   两种方式都先生成大纲（{len(OUTLINE)} 字符），稿件完成时间包含大纲")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+基准测试：稿件内联在播客记录中 vs 稿件保存在 blob 存储中
+
+每个播客带一篇约 text_chars 字符的稿件，同时写入 transcript 与 extracted_text
+（与 process_podcast_background / generate_podcast_background 一致）。
+  - 内联：旧格式，稿件直接保存在 podcasts.json 中
+  - blob：migrate_text_blobs() 之后，记录中只保存哈希，稿件 gzip 压缩后单独保存
+
+分别测量元数据文件大小、首次列出播客（解析整个文件）、更新一个播客（重写整个文件）的耗时。
+
+用法:
+    cd backend
+    python -m benchmarks.bench_text_blobs
+    python -m benchmarks.bench_text_blobs 500 50000   # 播客数 每篇稿件字符数
+"""
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.data_service import DataService
+
+
+WORDS = "podcast host guest story music science history market climate travel health idea".split()
+
+
+def make_transcript(rng: random.Random, chars: int) -> str:
+    lines = []
+    size = 0
+    while size < chars:
+        speaker = rng.choice(("Alex", "Ben"))
+        line = f"{speaker}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "."
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def write_legacy(data_dir: Path, podcasts: int, chars: int):
+    rng = random.Random(42)
+    records = []
+    for i in range(podcasts):
+        text = make_transcript(rng, chars)
+        records.append({
+            "id": f"p{i}",
+            "title": f"Episode {i}",
+            "original_filename": f"episode_{i}.pdf",
+            "status": "completed",
+            "audio_url": f"/api/v1/podcasts/p{i}/audio",
+            "transcript": text,
+            "extracted_text": text,
+            "created_at": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "updated_at": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+            "version": 1
+        })
+    with open(data_dir / "podcasts.json", 'w', encoding='utf-8') as f:
+        json.dump({"podcasts": records}, f, ensure_ascii=False, indent=2)
+
+
+def measure(service: DataService, podcasts: int, rounds: int = 20):
+    list_times = []
+    update_times = []
+    for i in range(rounds):
+        # 清空快照，模拟文件被其他进程替换后的首次读取
+        service._snapshots.clear()
+        started = time.perf_counter()
+        assert len(service.list_podcasts(limit=20)) == 20
+        list_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assert service.update_podcast(f"p{i % podcasts}", {"title": f"Episode {i} (edited)"})
+        update_times.append(time.perf_counter() - started)
+    return statistics.median(list_times) * 1000, statistics.median(update_times) * 1000
+
+
+def main():
+    podcasts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    chars = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    print("=" * 72)
+    print(f"📦 稿件内联 vs blob 存储（{podcasts} 个播客，每篇稿件约 {chars:,} 字符）")
+    print("=" * 72)
+
+    with tempfile.TemporaryDirectory() as inline_dir, tempfile.TemporaryDirectory() as blob_dir:
+        write_legacy(Path(inline_dir), podcasts, chars)
+        write_legacy(Path(blob_dir), podcasts, chars)
+
+        inline = DataService(Path(inline_dir))
+        blob = DataService(Path(blob_dir))
+        started = time.perf_counter()
+        blob.migrate_text_blobs()
+        migrate_time = time.perf_counter() - started
+
+        inline_size = inline.podcasts_file.stat().st_size
+        blob_size = blob.podcasts_file.stat().st_size
+        blob_files = list(blob.text_blobs.root.rglob("*.gz"))
+        blob_bytes = sum(path.stat().st_size for path in blob_files)
+
+        inline_list, inline_update = measure(inline, podcasts)
+        blob_list, blob_update = measure(blob, podcasts)
+
+        # 详情接口按需加载单篇稿件
+        podcast = blob.get_podcast("p0")
+        started = time.perf_counter()
+        for _ in range(100):
+            blob.load_podcast_text(podcast)
+        load_time = (time.perf_counter() - started) / 100 * 1000
+
+    print(f"   {'':<22}{'内联':>14}{'blob':>14}{'提升':>10}")
+    print(f"   {'podcasts.json':<22}{inline_size / 1024:>11,.0f} KB{blob_size / 1024:>11,.1f} KB"
+          f"{inline_size / blob_size:>9.0f}x")
+    print(f"   {'每个播客元数据':<16}{inline_size / podcasts:>12,.0f} B{blob_size / podcasts:>12,.0f} B")
+    print(f"   {'列出播客（首次读取）':<12}{inline_list:>11.2f} ms{blob_list:>11.2f} ms"
+          f"{inline_list / blob_list:>9.1f}x")
+    print(f"   {'更新一个播客':<16}{inline_update:>11.2f} ms{blob_update:>11.2f} ms"
+          f"{inline_update / blob_update:>9.1f}x")
+    print("-" * 72)
+    print(f"   blob 文件 {len(blob_files)} 个，共 {blob_bytes / 1024:,.0f} KB（gzip，transcript 与 extracted_text 共用）")
+    print(f"   迁移耗时 {migrate_time:.2f}s，加载单篇稿件 {load_time:.2f} ms")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
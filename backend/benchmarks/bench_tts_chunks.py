@@ -0,0 +1,89 @@
+"""
+基准测试：长稿件分段并发合成 vs 单次合成
+
+用假的 TTS（固定请求延迟 + 与字符数成正比的合成时间，返回合法的 MP3 帧）
+对比不同稿件长度下：
+  - 单次合成：整篇稿件一次请求（真实 API 会因字符上限拒绝，原实现因此截断到 3000 字符）
+  - 顺序分段：切分后逐段请求
+  - 并发分段：切分后在共享线程池中并发请求，再按帧拼接
+
+用法:
+    cd backend
+    python -m benchmarks.bench_tts_chunks
+    python -m benchmarks.bench_tts_chunks 0.2 0.0002   # 请求延迟(秒) 每字符合成时间(秒)
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.utils.script_splitter import split_script
+
+
+FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413  # MPEG1 Layer III 128kbps 44.1kHz
+
+
+def make_fake_tts(request_latency: float, per_char: float):
+    def fake_tts(script: str, language: str = "en", speaker_voice_map=None) -> bytes:
+        time.sleep(request_latency + per_char * len(script))
+        # 帧数与字符数成正比（只用于拼接，不代表真实时长）
+        return FRAME * max(1, len(script) // 400)
+    return fake_tts
+
+
+def make_script(chars: int) -> str:
+    lines = []
+    total = 0
+    i = 0
+    while total < chars:
+        speaker = "Alex" if i % 2 == 0 else "Ben"
+        line = f"{speaker}: This is sentence number {i} of our episode, and it keeps the conversation going. " * 2
+        lines.append(line.strip())
+        total += len(line)
+        i += 1
+    return "\n".join(lines)
+
+
+def main():
+    request_latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    per_char = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0002
+    concurrency = settings.tts_max_concurrency
+
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=concurrency)
+    fake_tts = make_fake_tts(request_latency, per_char)
+    service.generate_dialogue_audio = fake_tts
+
+    print("=" * 78)
+    print(f"🎙️  分段并发 TTS 基准测试（请求延迟 {request_latency}s，每字符 {per_char * 1000:.2f}ms，"
+          f"每段 ≤{settings.tts_chunk_chars} 字符，并发 {concurrency}）")
+    print("=" * 78)
+    print(f"   {'稿件长度':>10}{'分段数':>8}{'单次合成':>12}{'顺序分段':>12}{'并发分段':>12}{'加速':>8}")
+
+    for chars in (3_000, 10_000, 30_000, 60_000):
+        script = make_script(chars)
+        chunks = split_script(script, settings.tts_chunk_chars)
+
+        start = time.perf_counter()
+        fake_tts(script)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for chunk in chunks:
+            fake_tts(chunk)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        audio = service.generate_long_audio(script, "en")
+        parallel = time.perf_counter() - start
+        assert audio
+
+        print(f"   {len(script):>10,}{len(chunks):>8}{single:>11.2f}s{sequential:>11.2f}s"
+              f"{parallel:>11.2f}s{single / parallel:>7.1f}x")
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+生成多页文本 PDF（基准测试和单元测试共用）
+
+直接写出 PDF 对象（Helvetica 字体、每页若干行文本）和交叉引用表，不依赖额外的库；
+每页的文本以 "Page N" 开头，便于校验提取顺序。
+"""
+import zlib
+
+
+LINE = "The quick brown fox jumps over the lazy dog while the podcast host explains the topic"
+
+
+def page_text(number: int, lines: int) -> list:
+    return [f"Page {number}"] + [f"{LINE} {number}-{i}." for i in range(lines - 1)]
+
+
+def make_pdf(pages: int, lines: int = 40) -> bytes:
+    """生成 pages 页、每页 lines 行文本的 PDF"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # 页面树（页面对象编号确定后填入）
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for number in range(1, pages + 1):
+        content = ["BT /F1 10 Tf 12 TL 40 800 Td"]
+        content += [f"({text}) Tj T*" for text in page_text(number, lines)]
+        content.append("ET")
+        stream = zlib.compress("\n".join(content).encode("latin-1"))
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
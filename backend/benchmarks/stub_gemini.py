@@ -0,0 +1,189 @@
+"""
+本地 Gemini 替身服务器（基准测试和单元测试共用）
+
+在后台线程的事件循环中运行一个最小的 HTTP/1.1 服务器：
+- 支持 keep-alive，统计建立的 TCP 连接数和请求数，用于验证连接复用
+- 固定延迟后返回 generateContent 格式的响应
+- streamGenerateContent?alt=sse：以 SSE 事件逐段返回文本，模拟逐步生成
+"""
+import asyncio
+import json
+import threading
+import time
+import zlib
+from typing import Callable, Optional, Union
+
+
+class StubGeminiServer:
+    """本地 Gemini API 替身"""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        host: str = "127.0.0.1",
+        response_text: Union[str, Callable[[str], str], None] = None,
+        stream_chunk_chars: int = 40,
+        stream_interval: float = 0.01
+    ):
+        """
+        Args:
+            latency: 每个请求的模拟生成时间（秒）；流式请求为首个事件之前的等待时间
+            host: 监听地址（端口自动分配）
+            response_text: 返回的文本，或根据提示词返回文本的函数（默认见 make_text）
+            stream_chunk_chars: 流式接口每个事件包含的字符数
+            stream_interval: 每生成 stream_chunk_chars 个字符的耗时（秒），模拟生成速度；
+                非流式接口等全部生成完才返回
+        """
+        self.latency = latency
+        self.host = host
+        self.response_text = response_text
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_interval = stream_interval
+        self.stream_finished_at: Optional[float] = None  # 最近一次流式响应发送完毕的时间（time.monotonic）
+        self.port: Optional[int] = None
+        self.connections = 0
+        self.requests = 0
+        self.peak_active = 0
+        self._active = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """作为 settings.gemini_api_url 使用的地址"""
+        return f"http://{self.host}:{self.port}/v1/publishers/google/models"
+
+    def start(self) -> "StubGeminiServer":
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, 0, backlog=1024)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True, name="stub-gemini")
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            # 关闭仍保持 keep-alive 的连接
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def reset(self):
+        self.connections = 0
+        self.requests = 0
+        self.peak_active = 0
+
+    def __enter__(self) -> "StubGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def make_text(self, prompt: str) -> str:
+        """生成的文本：指定了 response_text 时返回它，否则包含提示词摘要，便于检查请求和响应的对应关系"""
+        if callable(self.response_text):
+            return self.response_text(prompt)
+        if self.response_text is not None:
+            return self.response_text
+        return f"Stub response for prompt {zlib.crc32(prompt.encode('utf-8')):08x} ({len(prompt)} chars): {prompt[:60]}"
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """读取一个请求，连接已关闭时返回 None"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return method, path, headers, body
+
+    async def _respond(self, writer: asyncio.StreamWriter, prompt: str):
+        """返回 generateContent 格式的响应（等待与流式接口相同的生成时间）"""
+        text = self.make_text(prompt)
+        await asyncio.sleep(self.stream_interval * ((len(text) - 1) // self.stream_chunk_chars))
+        body = json.dumps({
+            "candidates": [{"content": {"parts": [{"text": text}]}}]
+        }).encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    async def _respond_stream(self, writer: asyncio.StreamWriter, prompt: str):
+        """以 SSE 事件逐段返回文本（分块传输编码，连接保持 keep-alive）"""
+        text = self.make_text(prompt)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        for start in range(0, len(text), self.stream_chunk_chars):
+            if start:
+                await asyncio.sleep(self.stream_interval)
+            event = json.dumps({
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text[start:start + self.stream_chunk_chars]}]}}]
+            })
+            data = f"data: {event}\r\n\r\n".encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        self.stream_finished_at = time.monotonic()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+
+                self.requests += 1
+                self._active += 1
+                self.peak_active = max(self.peak_active, self._active)
+                try:
+                    await asyncio.sleep(self.latency)
+                    if ":streamGenerateContent" in path:
+                        await self._respond_stream(writer, prompt)
+                    else:
+                        await self._respond(writer, prompt)
+                finally:
+                    self._active -= 1
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass  # 客户端断开或服务器关闭
+        finally:
+            writer.close()
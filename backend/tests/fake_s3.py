@@ -0,0 +1,130 @@
+"""
+本地 S3 替身（用于离线测试）
+实现 S3Storage 用到的 boto3 客户端方法子集
+"""
+import hashlib
+import re
+import time
+
+from botocore.exceptions import ClientError
+
+
+class FakeBody:
+    """模拟 botocore StreamingBody：按需切片，不复制整个对象"""
+
+    def __init__(self, data: memoryview):
+        self._data = data
+        self._pos = 0
+        self.max_read = 0
+        self.closed = False
+
+    def read(self, amt=None):
+        if amt is None:
+            amt = len(self._data) - self._pos
+        self.max_read = max(self.max_read, amt)
+        chunk = bytes(self._data[self._pos:self._pos + amt])
+        self._pos += len(chunk)
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeS3Client:
+    """内存中的 S3 客户端"""
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+        self.bodies = []
+        self.uploads = {}
+        self.fail_parts = set()
+
+    def _missing(self, operation):
+        return ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
+        self.calls.append(("put_object", Key))
+        data = Body.read() if hasattr(Body, "read") else bytes(Body)
+        self.objects[Key] = {"data": data, "content_type": ContentType}
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(("head_object", Key))
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        obj = self.objects[Key]
+        return {
+            "ContentLength": len(obj["data"]),
+            "ETag": f'"{hashlib.md5(obj["data"]).hexdigest()}"',
+            "ContentType": obj["content_type"]
+        }
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.calls.append(("get_object", Key, Range))
+        if Key not in self.objects:
+            raise self._missing("GetObject")
+        data = memoryview(self.objects[Key]["data"])
+        start, end = 0, len(data) - 1
+        if Range:
+            start_text, end_text = re.match(r"bytes=(\d*)-(\d*)", Range).groups()
+            start = int(start_text)
+            end = min(int(end_text), len(data) - 1) if end_text else len(data) - 1
+        body = FakeBody(data[start:end + 1])
+        self.bodies.append(body)
+        return {
+            "Body": body,
+            "ContentLength": end - start + 1,
+            "ETag": f'"{hashlib.md5(self.objects[Key]["data"]).hexdigest()}"'
+        }
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None, **kwargs):
+        self.calls.append(("create_multipart_upload", Key))
+        upload_id = f"upload-{len(self.uploads) + 1}"
+        self.uploads[upload_id] = {"key": Key, "content_type": ContentType, "parts": {}}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self.calls.append(("upload_part", Key, PartNumber))
+        if PartNumber in self.fail_parts:
+            raise ClientError({"Error": {"Code": "InternalError", "Message": "boom"}}, "UploadPart")
+        data = bytes(Body)
+        self.uploads[UploadId]["parts"][PartNumber] = data
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.calls.append(("complete_multipart_upload", Key))
+        upload = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(numbers), "分段必须按编号升序提交"
+        data = b"".join(upload["parts"][n] for n in numbers)
+        self.objects[Key] = {"data": data, "content_type": upload["content_type"]}
+        return {"ETag": f'"{hashlib.md5(data).hexdigest()}-{len(numbers)}"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self.calls.append(("abort_multipart_upload", Key))
+        self.uploads.pop(UploadId, None)
+        return {}
+
+    def generate_presigned_post(self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600):
+        self.calls.append(("generate_presigned_post", Key))
+        self.post_conditions = Conditions
+        fields = dict(Fields or {}, key=Key, policy="fake-policy", signature="fake-signature")
+        return {"url": f"https://{Bucket}.s3.amazonaws.com/", "fields": fields}
+
+    def delete_object(self, Bucket, Key):
+        self.calls.append(("delete_object", Key))
+        self.objects.pop(Key, None)
+        return {}
+
+
+class SlowFakeS3Client(FakeS3Client):
+    """每次 get_object 之前等待一段时间，模拟网络延迟"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def get_object(self, *args, **kwargs):
+        time.sleep(self.delay)
+        return super().get_object(*args, **kwargs)
@@ -0,0 +1,182 @@
+"""
+测试本地磁盘音频缓存
+"""
+import tempfile
+import threading
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.utils.s3_storage import AudioCache, S3Storage
+from fake_s3 import FakeS3Client, SlowFakeS3Client
+
+
+def make_storage(client) -> S3Storage:
+    storage = S3Storage()
+    storage.s3_client = client
+    return storage
+
+
+def test_cache_hit_miss_and_etag_validation():
+    """测试命中、ETag 变化失效与 LRU 淘汰"""
+    print("=" * 50)
+    print("测试音频缓存")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeS3Client()
+        storage = make_storage(client)
+        cache = AudioCache(storage, Path(tmp), max_bytes=250, chunk_size=16)
+
+        for name in ("a", "b", "c"):
+            client.objects[f"podcasts/{name}.mp3"] = {"data": name.encode() * 100, "content_type": "audio/mpeg"}
+
+        def lookup(key):
+            info = storage.get_file_info(key)
+            return cache.get(key, info["etag"], info["size"])
+
+        # 1. 首次未命中，第二次命中
+        path = lookup("podcasts/a.mp3")
+        assert path.read_bytes() == b"a" * 100
+        assert lookup("podcasts/a.mp3") == path
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+        # 2. 对象被覆盖后 ETag 改变，缓存失效并重新下载
+        client.objects["podcasts/a.mp3"]["data"] = b"A" * 100
+        path = lookup("podcasts/a.mp3")
+        assert path.read_bytes() == b"A" * 100
+        assert cache.stats()["misses"] == 2
+        assert len(list(Path(tmp).glob("*.cache"))) == 1
+
+        # 3. 超过 250 字节上限时淘汰最久未使用的 a
+        lookup("podcasts/b.mp3")
+        lookup("podcasts/a.mp3")  # a 变为最近使用
+        lookup("podcasts/c.mp3")  # 淘汰 b
+        stats = cache.stats()
+        print(f"\n统计: {stats}")
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= 250
+        assert lookup("podcasts/a.mp3") is not None
+        assert cache.stats()["misses"] == 4
+
+        # 4. 重启后从磁盘恢复缓存
+        restored = AudioCache(storage, Path(tmp), max_bytes=250)
+        info = storage.get_file_info("podcasts/c.mp3")
+        assert restored.get("podcasts/c.mp3", info["etag"], info["size"]) is not None
+        assert restored.stats()["hits"] == 1
+
+    print("\n✅ 音频缓存测试完成\n")
+
+
+def test_concurrent_misses_are_coalesced():
+    """并发未命中只触发一次 S3 下载"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = SlowFakeS3Client(delay=0.2)
+        client.objects["podcasts/hot.mp3"] = {"data": b"x" * 4096, "content_type": "audio/mpeg"}
+        storage = make_storage(client)
+        cache = AudioCache(storage, Path(tmp), max_bytes=1024 * 1024)
+        info = storage.get_file_info("podcasts/hot.mp3")
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("podcasts/hot.mp3", info["etag"], info["size"])))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        fetches = [call for call in client.calls if call[0] == "get_object"]
+        print(f"\n8 个并发请求，S3 下载次数: {len(fetches)}")
+        assert len(fetches) == 1
+        assert len(set(results)) == 1 and results[0] is not None
+        assert cache.stats()["coalesced"] == 7
+
+
+def test_stream_served_from_cache(monkeypatch):
+    """第二次播放从本地缓存读取，并支持 Range"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.save_podcast({
+            "id": "p1",
+            "title": "缓存测试",
+            "original_filename": "test.txt",
+            "audio_s3_key": "podcasts/p1.mp3",
+            "status": "completed"
+        })
+        client = FakeS3Client()
+        audio = bytes(range(256)) * 1000
+        client.objects["podcasts/p1.mp3"] = {"data": audio, "content_type": "audio/mpeg"}
+        storage = make_storage(client)
+        cache = AudioCache(storage, Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        monkeypatch.setattr(podcasts_api, "s3_storage", storage)
+        monkeypatch.setattr(podcasts_api, "audio_cache", cache)
+        monkeypatch.setattr(podcasts_api.settings, "audio_cache_enabled", True)
+        http = TestClient(app)
+
+        response = http.get("/api/v1/podcasts/p1/stream")
+        assert response.status_code == 200 and response.content == audio
+        assert response.headers["x-cache"] == "MISS"
+
+        # 等待后台填充完成
+        info = storage.get_file_info("podcasts/p1.mp3")
+        assert cache.get("podcasts/p1.mp3", info["etag"], info["size"]) is not None
+        fetches = len([call for call in client.calls if call[0] == "get_object"])
+        assert fetches == 2  # 本次请求 + 后台填充
+
+        response = http.get("/api/v1/podcasts/p1/stream", headers={"Range": "bytes=1000-1999"})
+        assert response.status_code == 206
+        assert response.headers["x-cache"] == "HIT"
+        assert response.content == audio[1000:2000]
+        assert len([call for call in client.calls if call[0] == "get_object"]) == fetches
+
+
+def test_cold_seek_reads_only_requested_range(monkeypatch):
+    """缓存未命中时的拖动播放：按 Range 直接读取 S3，不等待整个对象下载到缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.save_podcast({
+            "id": "p1",
+            "title": "拖动播放",
+            "original_filename": "test.txt",
+            "audio_s3_key": "podcasts/p1.mp3",
+            "status": "completed"
+        })
+        client = SlowFakeS3Client(delay=0.1)
+        audio = bytes(range(256)) * 1000
+        client.objects["podcasts/p1.mp3"] = {"data": audio, "content_type": "audio/mpeg"}
+        storage = make_storage(client)
+        cache = AudioCache(storage, Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        monkeypatch.setattr(podcasts_api, "s3_storage", storage)
+        monkeypatch.setattr(podcasts_api, "audio_cache", cache)
+        monkeypatch.setattr(podcasts_api.settings, "audio_cache_enabled", True)
+        http = TestClient(app)
+
+        response = http.get("/api/v1/podcasts/p1/stream", headers={"Range": "bytes=200000-"})
+        assert response.status_code == 206
+        assert response.headers["x-cache"] == "MISS"
+        assert response.content == audio[200000:]
+        ranges = [call[2] for call in client.calls if call[0] == "get_object"]
+        assert f"bytes=200000-{len(audio) - 1}" in ranges
+
+        # 后续请求不会重复下载整个对象
+        response = http.get("/api/v1/podcasts/p1/stream", headers={"Range": "bytes=0-99"})
+        assert response.content == audio[:100]
+        info = storage.get_file_info("podcasts/p1.mp3")
+        assert cache.get("podcasts/p1.mp3", info["etag"], info["size"]) is not None
+        ranges = [call[2] for call in client.calls if call[0] == "get_object"]
+        assert ranges.count(None) == 1
+
+
+if __name__ == "__main__":
+    test_cache_hit_miss_and_etag_validation()
+    test_concurrent_misses_are_coalesced()
+    print("✅ 所有测试通过！")
@@ -0,0 +1,229 @@
+"""
+测试音频元数据解析：CBR / VBR（Xing、VBRI、LAME 标签）/ WAV，流式扫描与 S3 Range 读取
+"""
+import io
+import struct
+import tempfile
+import wave
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.tasks.process_podcast import get_audio_duration
+from app.utils import audio_info as audio_info_module
+from app.utils.audio import concat_mp3
+from app.utils.audio_info import HEAD_SIZE, audio_info, s3_audio_info, stream_audio_info
+from app.utils.s3_storage import s3_storage
+from fake_s3 import FakeS3Client
+
+
+def frame(bitrate_index: int, size: int) -> bytes:
+    """MPEG1 Layer III 44.1kHz 立体声的一帧（内容全为 0）"""
+    return bytes([0xFF, 0xFB, bitrate_index << 4, 0x00]) + b"\x00" * (size - 4)
+
+
+CBR_FRAME = frame(9, 417)  # 128kbps
+VBR_FRAMES = [frame(5, 208), frame(9, 417), frame(11, 626)]  # 64 / 128 / 192kbps
+FRAME_SECONDS = 1152 / 44100
+
+
+def id3(size: int) -> bytes:
+    syncsafe = bytes([(size >> shift) & 0x7F for shift in (21, 14, 7, 0)])
+    return b"ID3\x04\x00\x00" + syncsafe + b"\x00" * size
+
+
+def xing_frame(frames: int, audio_bytes: int, delay: int = 0, padding: int = 0) -> bytes:
+    """带帧数、字节数和 LAME 延迟 / 填充的 Xing 信息帧"""
+    body = bytearray(CBR_FRAME)
+    body[36:40] = b"Xing"
+    body[40:52] = struct.pack(">III", 0x3, frames, audio_bytes)
+    lame = bytearray(b"LAME3.100" + b"\x00" * 27)
+    lame[21:24] = bytes([delay >> 4, ((delay & 0x0F) << 4) | (padding >> 8), padding & 0xFF])
+    body[52:52 + len(lame)] = lame
+    return bytes(body)
+
+
+def vbri_frame(frames: int, audio_bytes: int) -> bytes:
+    body = bytearray(CBR_FRAME)
+    body[36:40] = b"VBRI"
+    body[46:54] = struct.pack(">II", audio_bytes, frames)
+    return bytes(body)
+
+
+def vbr_audio(count: int) -> bytes:
+    return b"".join(VBR_FRAMES[i % 3] for i in range(count))
+
+
+def make_wav(seconds: float, sample_rate: int = 22050, channels: int = 1) -> bytes:
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * channels * int(seconds * sample_rate))
+    return output.getvalue()
+
+
+def test_cbr_and_vbr_scan():
+    print("=" * 50)
+    print("测试 MP3 帧扫描")
+    print("=" * 50)
+
+    # 128kbps CBR：ID3v2 + 帧 + ID3v1
+    data = id3(300) + CBR_FRAME * 1000 + b"TAG" + b"\x00" * 125
+    info = audio_info(data)
+    print(f"\nCBR: {info}")
+    assert info.format == "mp3"
+    assert info.duration == pytest.approx(1000 * FRAME_SECONDS)
+    assert info.bitrate == 128
+    assert (info.sample_rate, info.channels) == (44100, 2)
+
+    # VBR 没有信息帧：按固定比特率估算会出错，逐帧扫描得到准确值
+    data = vbr_audio(900)
+    info = audio_info(data)
+    print(f"VBR: {info}（按 16000 bytes/s 估算为 {len(data) / 16000:.1f} 秒）")
+    assert info.duration == pytest.approx(900 * FRAME_SECONDS)
+    assert info.bitrate == round(len(data) * 8 / info.duration / 1000)
+
+    # 按帧拼接的合成结果（信息帧被去掉）
+    part = id3(20) + xing_frame(10, 4170) + CBR_FRAME * 10
+    assert audio_info(concat_mp3([part, part, part])).duration == pytest.approx(30 * FRAME_SECONDS)
+
+    assert audio_info(b"not an audio file" * 100) is None
+    assert audio_info(b"") is None
+
+
+def test_info_frames_need_only_the_head():
+    audio = vbr_audio(3000)
+    delay, padding = 576 + 529, 1000
+    data = id3(100) + xing_frame(3000, len(audio), delay, padding) + audio
+    expected = (3000 * 1152 - delay - padding) / 44100
+
+    # 完整文件和只有文件头的结果一致；信息帧本身不计入时长
+    assert audio_info(data).duration == pytest.approx(expected)
+    head = audio_info(data[:HEAD_SIZE], len(data))
+    assert head.duration == pytest.approx(expected)
+    assert head.bitrate == round(len(audio) * 8 / expected / 1000)
+
+    # VBRI
+    data = vbri_frame(3000, len(audio)) + audio
+    assert audio_info(data[:HEAD_SIZE], len(data)).duration == pytest.approx(3000 * FRAME_SECONDS)
+
+    # 没有帧数的 Info 帧或没有信息帧：只有文件头时无法确定
+    assert audio_info(audio[:HEAD_SIZE], len(audio)) is None
+
+
+def test_wav():
+    data = make_wav(2.5)
+    info = audio_info(data)
+    assert info.format == "wav"
+    assert info.duration == pytest.approx(2.5)
+    assert (info.bitrate, info.sample_rate, info.channels) == (353, 22050, 1)
+    assert audio_info(data[:64], len(data)).duration == pytest.approx(2.5)
+
+    # 边录边写的 WAV：data 块长度未知
+    streamed = bytearray(make_wav(1.0, 16000, 2))
+    streamed[40:44] = b"\xff\xff\xff\xff"
+    assert audio_info(streamed).duration == pytest.approx(1.0)
+
+
+def test_stream_scan_matches_in_memory(monkeypatch):
+    monkeypatch.setattr(audio_info_module, "SCAN_CHUNK_SIZE", 1000)  # 帧跨越数据块边界
+    samples = [
+        id3(200 * 1024) + vbr_audio(700),  # 标签比文件头大
+        CBR_FRAME * 500 + b"TAG" + b"\x00" * 125,
+        xing_frame(3000, 0) + vbr_audio(3000),
+        make_wav(3.0),
+    ]
+    for data in samples:
+        expected = audio_info(data)
+        assert expected is not None
+        assert stream_audio_info(io.BytesIO(data), len(data)) == expected
+        assert stream_audio_info(io.BytesIO(data)).duration == pytest.approx(expected.duration)
+
+    # 生成任务：解析写入的临时文件，读取后回到开头
+    audio_file = io.BytesIO(vbr_audio(300))
+    assert get_audio_duration(audio_file, len(audio_file.getvalue())) == round(300 * FRAME_SECONDS)
+    assert audio_file.tell() == 0
+
+
+def test_s3_ranged_reads(monkeypatch):
+    client = FakeS3Client()
+    monkeypatch.setattr(s3_storage, "s3_client", client)
+    audio = vbr_audio(20000)  # 约 8MB
+    client.objects["xing.mp3"] = {"data": xing_frame(20000, len(audio)) + audio, "content_type": "audio/mpeg"}
+    client.objects["cover.mp3"] = {"data": id3(300 * 1024) + xing_frame(20000, len(audio)) + audio, "content_type": "audio/mpeg"}
+    client.objects["plain.mp3"] = {"data": audio, "content_type": "audio/mpeg"}
+
+    def bytes_read(key):
+        client.bodies.clear()
+        info = s3_audio_info(s3_storage, key)
+        return info, sum(body._pos for body in client.bodies), [call[2] for call in client.calls if call[0] == "get_object"]
+
+    info, read, _ = bytes_read("xing.mp3")
+    print(f"\nXing: 读取 {read} / {len(audio)} 字节")
+    assert info.duration == pytest.approx(20000 * FRAME_SECONDS)
+    assert read <= HEAD_SIZE
+
+    client.calls.clear()
+    info, read, ranges = bytes_read("cover.mp3")
+    assert info.duration == pytest.approx(20000 * FRAME_SECONDS)
+    assert read <= 2 * HEAD_SIZE and len(ranges) == 2
+
+    # 没有信息帧：回退到流式扫描整个对象
+    client.calls.clear()
+    info, read, ranges = bytes_read("plain.mp3")
+    assert info.duration == pytest.approx(20000 * FRAME_SECONDS)
+    assert ranges[-1] is None
+    assert all(body.closed for body in client.bodies)
+
+    assert s3_audio_info(s3_storage, "missing.mp3") is None
+
+
+def test_podcast_duration_backfill(monkeypatch):
+    """早期上传、没有记录时长的音频：获取详情时计算一次并保存"""
+    client = FakeS3Client()
+    monkeypatch.setattr(s3_storage, "s3_client", client)
+    client.objects["uploads/p1.wav"] = {"data": make_wav(4.0), "content_type": "audio/wav"}
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.save_podcast({
+            "id": "p1",
+            "title": "上传的音频",
+            "original_filename": "p1.wav",
+            "audio_s3_key": "uploads/p1.wav",
+            "status": "completed"
+        })
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        api = TestClient(app)
+
+        assert api.get("/api/v1/podcasts/p1").json()["duration_seconds"] == 4
+        assert service.get_podcast("p1")["duration_seconds"] == 4
+        client.calls.clear()
+        assert api.get("/api/v1/podcasts/p1").json()["duration_seconds"] == 4
+        assert not client.calls
+
+        # 无法解析的音频只尝试一次
+        client.objects["uploads/p2.mp3"] = {"data": b"not audio" * 100, "content_type": "audio/mpeg"}
+        service.save_podcast({
+            "id": "p2",
+            "title": "损坏的音频",
+            "original_filename": "p2.mp3",
+            "audio_s3_key": "uploads/p2.mp3",
+            "status": "completed"
+        })
+        client.calls.clear()
+        assert api.get("/api/v1/podcasts/p2").json()["duration_seconds"] is None
+        assert client.calls
+        assert service.get_podcast("p2")["duration_unknown"] is True
+        client.calls.clear()
+        assert api.get("/api/v1/podcasts/p2").json()["duration_seconds"] is None
+        assert not client.calls
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
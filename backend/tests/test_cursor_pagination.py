@@ -0,0 +1,118 @@
+"""
+测试游标分页
+"""
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.services.journal_data_service import JournalDataService
+from app.services.sqlite_data_service import SQLiteDataService
+from app.services.sorted_index import decode_cursor
+
+
+def seed(service, count=25):
+    # 部分记录共享同一个 created_at，验证 id 作为次序键
+    for i in range(count):
+        service.save_podcast({
+            "id": f"p{i:02d}",
+            "title": "Cursor 测试" if i % 3 == 0 else "Other",
+            "original_filename": "test.txt",
+            "status": "completed",
+            "created_at": f"2025-01-01T00:00:{i // 2:02d}"
+        })
+
+
+def collect_pages(service, limit, search=None):
+    ids, cursor = [], None
+    while True:
+        items, cursor = service.page_podcasts(cursor=cursor, limit=limit, search=search)
+        ids.extend(p["id"] for p in items)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("service_class", [DataService, JournalDataService, SQLiteDataService])
+def test_page_podcasts_matches_offset_order(service_class):
+    """游标翻页结果应与一次性排序结果完全一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = service_class(Path(tmp))
+        seed(service)
+
+        expected = [p["id"] for p in service.list_podcasts(limit=100)]
+        print(f"\n{service_class.__name__}: {expected[:5]}...")
+        assert len(expected) == 25
+        assert collect_pages(service, limit=4) == expected
+        assert collect_pages(service, limit=25) == expected
+
+        expected_search = [p["id"] for p in service.list_podcasts(search="cursor", limit=100)]
+        assert len(expected_search) == 9
+        assert collect_pages(service, limit=2, search="cursor") == expected_search
+
+        # 删除后索引同步更新
+        service.delete_podcast(expected[0])
+        assert collect_pages(service, limit=7) == expected[1:]
+
+
+def test_json_backend_reuses_snapshot_index():
+    """JSON 后端文件未变化时复用有序索引，返回的记录是副本"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        seed(service)
+
+        items, cursor = service.page_podcasts(limit=5)
+        index = service._podcast_order.index
+        service.page_podcasts(cursor=cursor, limit=5)
+        assert service._podcast_order.index is index
+
+        items[0]["title"] = "被修改"
+        assert service.page_podcasts(limit=1)[0][0]["title"] != "被修改"
+
+        # 写入后快照被替换，索引随之重建
+        service.save_podcast({"id": "p99", "title": "New", "created_at": "2025-01-02T00:00:00"})
+        assert service.page_podcasts(limit=1)[0][0]["id"] == "p99"
+        assert service._podcast_order.index is not index
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_cursor_api(monkeypatch):
+    """测试 API 游标参数与兼容的 page 参数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = JournalDataService(Path(tmp))
+        seed(service)
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        client = TestClient(app)
+
+        # 旧的 page 参数仍返回数组
+        response = client.get("/api/v1/podcasts", params={"page": 2, "limit": 10})
+        assert response.status_code == 200
+        assert isinstance(response.json(), list)
+        assert len(response.json()) == 10
+
+        # 游标分页返回 {items, next_cursor}
+        response = client.get("/api/v1/podcasts", params={"cursor": "", "limit": 10})
+        body = response.json()
+        assert len(body["items"]) == 10
+        assert body["next_cursor"]
+
+        page_two = client.get("/api/v1/podcasts", params={"page": 2, "limit": 10}).json()
+        response = client.get("/api/v1/podcasts", params={"cursor": body["next_cursor"], "limit": 10})
+        assert [p["id"] for p in response.json()["items"]] == [p["id"] for p in page_two]
+
+        response = client.get("/api/v1/podcasts", params={"cursor": "bad", "limit": 10})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    for service_class in (DataService, JournalDataService, SQLiteDataService):
+        test_page_podcasts_matches_offset_order(service_class)
+    test_invalid_cursor()
+    print("✅ 游标分页测试通过")
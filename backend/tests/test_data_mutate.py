@@ -0,0 +1,120 @@
+"""
+测试数据层的原子更新 mutate()：并发下不丢失更新、版本号、乐观并发检查
+
+三种存储后端（JSON / 日志 / SQLite）行为一致。压力测试模拟 32 个同时运行的任务：
+每个线程不断更新自己任务的进度，同时给共享计数器加 1（读取-修改-写回），
+最终计数必须等于总次数，并输出各后端的更新吞吐量。
+"""
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.data_service import DataService, VersionConflict
+from app.services.journal_data_service import JournalDataService
+from app.services.sqlite_data_service import SQLiteDataService
+
+
+JOBS = 32
+UPDATES_PER_JOB = 20
+BACKENDS = {
+    "json": DataService,
+    "journal": JournalDataService,
+    "sqlite": SQLiteDataService
+}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def service(request):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = BACKENDS[request.param](Path(tmp))
+        service.backend = request.param
+        yield service
+        if hasattr(service, "close"):
+            service.close()
+
+
+def test_concurrent_updates_are_not_lost(service):
+    print("=" * 60)
+    print(f"测试 {JOBS} 个任务并发更新（{service.backend}）")
+    print("=" * 60)
+
+    service.save_podcast({"id": "counter", "title": "计数器", "plays": 0})
+    for i in range(JOBS):
+        service.save_job({"id": f"job-{i}", "podcast_id": "counter", "status": "processing", "progress": 0})
+
+    start_barrier = threading.Barrier(JOBS)
+    errors = []
+
+    def worker(i: int):
+        job_id = f"job-{i}"
+        try:
+            start_barrier.wait()
+            for step in range(1, UPDATES_PER_JOB + 1):
+                # 多个字段合并为一次写入
+                assert service.mutate("jobs", job_id, lambda job: {"progress": step, "status_message": f"step {step}"})
+                # 依赖当前值的修改（读取-修改-写回）
+                service.mutate("podcasts", "counter", lambda podcast: {"plays": podcast["plays"] + 1})
+        except Exception as e:  # 在主线程断言
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(JOBS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = JOBS * UPDATES_PER_JOB * 2
+    print(f"\n{total} 次更新，耗时 {elapsed:.2f}s，{total / elapsed:,.0f} 次/秒")
+
+    assert errors == []
+    counter = service.get_podcast("counter")
+    assert counter["plays"] == JOBS * UPDATES_PER_JOB
+    assert counter["version"] == JOBS * UPDATES_PER_JOB + 1
+    for i in range(JOBS):
+        job = service.get_job(f"job-{i}")
+        assert job["progress"] == UPDATES_PER_JOB
+        assert job["status_message"] == f"step {UPDATES_PER_JOB}"
+        assert job["status"] == "processing"
+        assert job["version"] == UPDATES_PER_JOB + 1
+
+
+def test_versions_and_conditional_updates(service):
+    service.save_job({"id": "job-1", "status": "processing", "progress": 0})
+    job = service.get_job("job-1")
+    assert job["version"] == 1
+
+    # 乐观并发：基于读到的版本写入
+    updated = service.mutate("jobs", "job-1", lambda job: {"progress": 10}, expected_version=job["version"])
+    assert updated["progress"] == 10 and updated["version"] == 2
+
+    # 旧版本写入被拒绝，数据不变
+    with pytest.raises(VersionConflict) as exc_info:
+        service.mutate("jobs", "job-1", lambda job: {"progress": 5}, expected_version=1)
+    assert (exc_info.value.expected, exc_info.value.actual) == (1, 2)
+    assert service.get_job("job-1")["progress"] == 10
+
+    # update_* 捕获异常并返回 False（与其他写操作一致）
+    assert service.update_job("missing", {"progress": 1}) is False
+    assert service.mutate("jobs", "missing", lambda job: {"progress": 1}) is None
+
+    # fn 返回 None：不写入，版本不变
+    unchanged = service.mutate("jobs", "job-1", lambda job: None if job["progress"] >= 10 else {"progress": 10})
+    assert unchanged["version"] == 2
+    assert service.get_job("job-1")["version"] == 2
+
+    # 异步接口
+    updated = asyncio.run(service.mutate_async("jobs", "job-1", lambda job: {"status": "completed"}, 2))
+    assert updated["status"] == "completed" and updated["version"] == 3
+
+    with pytest.raises(ValueError):
+        service.mutate("users", "job-1", lambda record: {})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,193 @@
+"""
+测试 async 路由中的阻塞操作不会卡住事件循环
+
+S3 替身的每个请求都阻塞 LATENCY 秒（模拟慢速 S3）。20 个 100MB 文件同时上传、
+以及播放 / 删除等需要访问 S3 的请求进行期间，持续请求 /health，其响应时间应保持平稳：
+S3 请求和数据文件读写都在 io_executor 中执行，事件循环只负责转发数据。
+"""
+import asyncio
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.tasks import process_podcast
+from app.utils.s3_storage import s3_storage
+from fake_s3 import FakeS3Client
+
+
+UPLOADS = 20
+UPLOAD_SIZE = 100 * 1024 * 1024
+LATENCY = 0.3
+
+
+class SlowS3Client(FakeS3Client):
+    """每个请求阻塞 LATENCY 秒；分段上传只记录大小，不保存内容"""
+
+    def __init__(self):
+        super().__init__()
+        self.uploaded = {}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        time.sleep(LATENCY)  # 同步阻塞，和 boto3 一样
+
+    def head_object(self, **kwargs):
+        self._wait()
+        return super().head_object(**kwargs)
+
+    def get_object(self, **kwargs):
+        self._wait()
+        return super().get_object(**kwargs)
+
+    def delete_object(self, **kwargs):
+        self._wait()
+        return super().delete_object(**kwargs)
+
+    def put_object(self, **kwargs):
+        self._wait()
+        return super().put_object(**kwargs)
+
+    def create_multipart_upload(self, **kwargs):
+        self._wait()
+        return super().create_multipart_upload(**kwargs)
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self._wait()
+        with self._lock:
+            self.uploaded[Key] = self.uploaded.get(Key, 0) + len(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._wait()
+        self.uploads.pop(UploadId, None)
+        return {"ETag": '"done"'}
+
+
+class ZeroFile:
+    """size 字节的 0，按需生成（客户端不占用 100MB 内存）"""
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    def read(self, n: int = -1) -> bytes:
+        n = self.remaining if n is None or n < 0 else min(n, self.remaining)
+        self.remaining -= n
+        return b"\0" * n
+
+
+@pytest.fixture
+def env(monkeypatch):
+    client = SlowS3Client()
+    client.objects["podcasts/p1.mp3"] = {"data": b"\xff\xfb\x90\x00" * 4096, "content_type": "audio/mpeg"}
+    monkeypatch.setattr(s3_storage, "s3_client", client)
+    monkeypatch.setattr(podcasts_api.settings, "audio_cache_enabled", False)
+    monkeypatch.setattr(process_podcast, "start_processing_task", lambda podcast_id, job_id, s3_key: 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.save_podcast({
+            "id": "p1",
+            "title": "播放中",
+            "original_filename": "p1.txt",
+            "audio_s3_key": "podcasts/p1.mp3",
+            "duration_seconds": 1,
+            "status": "completed"
+        })
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        yield client, service
+
+
+async def probe_health(api: httpx.AsyncClient, stop: asyncio.Event, interval: float = 0.05) -> list:
+    """
+    每 interval 秒请求一次 /health，返回各次响应时间
+
+    从计划发出请求的时刻开始计时：事件循环被阻塞时，等待期间的停顿也会计入
+    """
+    latencies = []
+    while not stop.is_set():
+        scheduled = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        response = await api.get("/health")
+        latencies.append(time.perf_counter() - scheduled)
+        assert response.status_code == 200
+    return latencies
+
+
+def summary(latencies: list) -> str:
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    return f"{len(ordered)} 次，中位数 {statistics.median(ordered) * 1000:.1f}ms，p95 {p95 * 1000:.1f}ms，最大 {ordered[-1] * 1000:.1f}ms"
+
+
+def test_health_stays_responsive_during_uploads(env):
+    print("=" * 60)
+    print(f"测试 {UPLOADS} 个 {UPLOAD_SIZE // 1024 // 1024}MB 文件同时上传时 /health 的响应时间（S3 每个请求 {LATENCY}s）")
+    print("=" * 60)
+    s3_client, service = env
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as api:
+            # 空闲时的基线
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_health(api, stop))
+            await asyncio.sleep(1.0)
+            stop.set()
+            baseline = await probe
+
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_health(api, stop))
+            started = time.perf_counter()
+
+            async def upload(i: int):
+                files = {"file": (f"talk-{i}.mp3", ZeroFile(UPLOAD_SIZE), "audio/mpeg")}
+                return await api.post("/api/v1/podcasts/upload", files=files)
+
+            uploads_done = asyncio.Event()
+
+            async def other_requests():
+                # 上传期间不断有需要访问 S3 的请求（播放：head_object + get_object；删除：两次 delete_object）
+                responses = []
+                while not uploads_done.is_set():
+                    responses.append(await api.get("/api/v1/podcasts/p1/stream", headers={"Range": "bytes=0-1023"}))
+                    await service.save_podcast_async({"id": "tmp", "title": "tmp", "s3_key": "uploads/tmp.txt"})
+                    responses.append(await api.delete("/api/v1/podcasts/tmp"))
+                return responses
+
+            async def run_uploads():
+                try:
+                    return await asyncio.gather(*(upload(i) for i in range(UPLOADS)))
+                finally:
+                    uploads_done.set()
+
+            uploads, others = await asyncio.gather(run_uploads(), other_requests())
+            elapsed = time.perf_counter() - started
+            stop.set()
+            loaded = await probe
+            return baseline, loaded, uploads, others, elapsed
+
+    baseline, loaded, uploads, others, elapsed = asyncio.run(main())
+
+    print(f"\n空闲: {summary(baseline)}")
+    print(f"上传中: {summary(loaded)}（{UPLOADS} 个上传共 {elapsed:.1f}s，期间 {len(others)} 个播放 / 删除请求）")
+
+    assert all(response.status_code == 200 for response in uploads), [r.text for r in uploads if r.status_code != 200]
+    assert sorted(s3_client.uploaded.values()) == [UPLOAD_SIZE] * UPLOADS
+    assert others and all(response.status_code in (200, 206) for response in others)
+    assert len(service.read_podcasts()) == UPLOADS + 1
+
+    # 上传期间 /health 持续有响应，且没有一次等到某个 S3 请求结束
+    assert len(loaded) >= elapsed / 0.5
+    assert max(loaded) < LATENCY
+    assert statistics.median(loaded) < max(0.05, statistics.median(baseline) * 10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,80 @@
+"""
+测试 Gemini HTTP 客户端：连接复用和异步生成（使用本地 Gemini 替身服务器）
+"""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.ai_service import AIService
+from benchmarks.stub_gemini import StubGeminiServer
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    with StubGeminiServer(latency=0.05) as server:
+        monkeypatch.setattr(settings, "gemini_api_url", server.url)
+        yield server
+
+
+def test_sync_client_reuses_connection(stub):
+    service = AIService()
+    assert service.http_client.timeout.read == settings.gemini_read_timeout
+    assert service.http_client.timeout.connect == settings.gemini_connect_timeout
+
+    results = [service._call_gemini_api(f"prompt {i}") for i in range(5)]
+    assert results == [stub.make_text(f"prompt {i}") for i in range(5)]
+    assert stub.requests == 5
+    assert stub.connections == 1
+
+
+def test_async_generation_concurrent(stub):
+    print("=" * 50)
+    print("测试异步并发生成")
+    print("=" * 50)
+
+    service = AIService()
+    concurrency = 20
+
+    async def main():
+        waves = []
+        for _ in range(2):
+            waves.append(await asyncio.gather(*(
+                service.generate_script_from_topic_async(f"Topic number {i} for testing") for i in range(concurrency)
+            )))
+            connections = stub.connections
+        await service.aclose()
+        return waves, connections
+
+    waves, connections = asyncio.run(main())
+    print(f"\n请求数: {stub.requests}, 连接数: {stub.connections}, 服务端最大并发: {stub.peak_active}")
+
+    # 两个生成结果不同（提示词不同），两轮结果相同
+    assert len(set(waves[0])) == concurrency
+    assert waves[0] == waves[1]
+    assert stub.requests == 4 * concurrency
+    # 请求真正并发执行，第二轮全部复用第一轮的连接
+    assert stub.peak_active == concurrency
+    assert stub.connections == connections <= concurrency
+
+    print("\n✅ 异步并发生成测试完成\n")
+
+
+def test_async_client_follows_event_loop(stub):
+    """每个事件循环使用自己的客户端（连接池不能跨事件循环使用）"""
+    service = AIService()
+
+    async def call():
+        client = service.get_async_client()
+        assert service.get_async_client() is client
+        await service._call_gemini_api_async("hello")
+        return client
+
+    first = asyncio.run(call())
+    second = asyncio.run(call())
+    assert first is not second
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
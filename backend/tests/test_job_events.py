@@ -0,0 +1,200 @@
+"""
+测试任务进度推送：事件总线、SSE（心跳、Last-Event-ID 补发）、多任务 WebSocket
+"""
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import jobs as jobs_api
+from app.services import data_service as data_service_module
+from app.services.data_service import DataService
+from app.services.job_events import JobEventBus
+
+
+class CountingDataService(DataService):
+    """记录 get_job 的调用次数（推送期间不应读取任务存储）"""
+
+    def __init__(self, data_dir):
+        super().__init__(data_dir)
+        self.job_reads = 0
+
+    def get_job(self, job_id):
+        self.job_reads += 1
+        return super().get_job(job_id)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    bus = JobEventBus(max_jobs=100, history_size=50)
+    monkeypatch.setattr(data_service_module, "job_events", bus)
+    monkeypatch.setattr(jobs_api, "job_events", bus)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = CountingDataService(Path(tmp))
+        monkeypatch.setattr(jobs_api, "data_service", service)
+        yield service, bus
+
+
+def make_job(service, job_id):
+    service.save_job({"id": job_id, "podcast_id": f"p-{job_id}", "type": "upload", "status": "processing", "progress": 0})
+
+
+def run_job(service, job_id, delay=0.05):
+    """后台线程模拟任务推进：三次进度更新后完成"""
+    def run():
+        for progress in (30, 60, 90):
+            time.sleep(delay)
+            service.update_job(job_id, {"progress": progress, "status_message": f"step {progress}"})
+        time.sleep(delay)
+        service.update_job(job_id, {"progress": 100, "status": "completed"})
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def parse_sse(body: str) -> list:
+    """解析 SSE 响应，返回 (字段字典) 列表；注释行记为 {"comment": ...}"""
+    events = []
+    for block in body.split("\n\n"):
+        if not block:
+            continue
+        event = {}
+        for line in block.split("\n"):
+            if line.startswith(":"):
+                event["comment"] = line[1:].strip()
+            else:
+                name, _, value = line.partition(": ")
+                event[name] = value
+        events.append(event)
+    return events
+
+
+def test_bus_replay_and_eviction():
+    bus = JobEventBus(max_jobs=2, history_size=3)
+
+    async def main():
+        for progress in range(5):
+            bus.publish({"id": "j1", "progress": progress})
+        ids = [bus.latest("j1").id - offset for offset in (2, 1, 0)]
+
+        # 没有 Last-Event-ID：只发当前状态
+        subscription = bus.subscription()
+        assert subscription.subscribe("j1")
+        assert (await subscription.get(1)).data["progress"] == 4
+        assert await subscription.get(0.01) is None
+        subscription.close()
+
+        # 补发之后的事件
+        subscription = bus.subscription()
+        subscription.subscribe("j1", last_event_id=ids[0])
+        assert [(await subscription.get(1)).data["progress"] for _ in range(2)] == [3, 4]
+
+        # 订阅后的发布按顺序到达（从其他线程发布）
+        threading.Thread(target=lambda: [bus.publish({"id": "j1", "progress": p}) for p in (5, 6)]).start()
+        assert [(await subscription.get(1)).data["progress"] for _ in range(2)] == [5, 6]
+
+        # 有订阅者的任务不会被淘汰
+        bus.publish({"id": "j2"})
+        bus.publish({"id": "j3"})
+        assert bus.known("j1") and not bus.known("j2") and bus.known("j3")
+
+        # 任务删除
+        bus.remove("j1")
+        assert (await subscription.get(1)).data is None
+        assert not subscription.job_ids
+
+    asyncio.run(main())
+
+
+def test_sse_pushes_progress_without_store_reads(env, monkeypatch):
+    print("=" * 50)
+    print("测试 SSE 任务进度推送")
+    print("=" * 50)
+
+    service, bus = env
+    monkeypatch.setattr(jobs_api.settings, "job_events_heartbeat", 0.02)
+    make_job(service, "j1")
+    client = TestClient(app)
+
+    thread = run_job(service, "j1")
+    response = client.get("/api/v1/jobs/j1/events")
+    thread.join()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    jobs = [json.loads(event["data"]) for event in events if event.get("event") == "job"]
+    print(f"\n收到 {len(jobs)} 条事件，{sum('comment' in e for e in events)} 次心跳")
+
+    assert [job["progress"] for job in jobs] == [0, 30, 60, 90, 100]
+    assert jobs[1]["status_message"] == "step 30"
+    assert jobs[-1]["status"] == "completed"
+    assert any(event.get("comment") == "ping" for event in events)
+    assert service.job_reads == 0
+
+    # 断线重连：只补发 Last-Event-ID 之后的事件
+    ids = [event["id"] for event in events if event.get("event") == "job"]
+    response = client.get("/api/v1/jobs/j1/events", headers={"Last-Event-ID": ids[2]})
+    resumed = [json.loads(event["data"])["progress"] for event in parse_sse(response.text) if event.get("event") == "job"]
+    assert resumed == [90, 100]
+
+    # 已结束的任务重连时收到最后一条事件后结束
+    response = client.get("/api/v1/jobs/j1/events", headers={"Last-Event-ID": ids[-1]})
+    assert [event["id"] for event in parse_sse(response.text) if event.get("event") == "job"] == ids[-1:]
+    assert service.job_reads == 0
+
+    print("\n✅ SSE 推送测试完成\n")
+
+
+def test_sse_unknown_and_restarted_jobs(env):
+    service, bus = env
+    client = TestClient(app)
+    assert client.get("/api/v1/jobs/missing/events").status_code == 404
+
+    # 总线不知道的任务（例如进程重启前创建）：从存储读取一次
+    make_job(service, "j2")
+    service.update_job("j2", {"status": "failed", "error_message": "boom"})
+    bus.remove("j2")
+    for _ in range(3):
+        events = parse_sse(client.get("/api/v1/jobs/j2/events").text)
+        assert json.loads(events[-1]["data"])["error_message"] == "boom"
+    assert service.job_reads == 2  # 不存在的任务和 j2 各一次
+
+
+def test_websocket_multiplexes_jobs(env):
+    service, bus = env
+    make_job(service, "a")
+    make_job(service, "b")
+    client = TestClient(app)
+
+    with client.websocket_connect("/api/v1/jobs/ws") as websocket:
+        websocket.send_json({"action": "subscribe", "job_id": "a"})
+        websocket.send_json({"action": "subscribe", "job_id": "b"})
+        websocket.send_json({"action": "subscribe", "job_id": "missing"})
+        threads = [run_job(service, "a", 0.02), run_job(service, "b", 0.03)]
+
+        progress = {"a": [], "b": []}
+        errors = []
+        while len(progress["a"]) < 5 or len(progress["b"]) < 5:
+            message = websocket.receive_json()
+            if message["type"] == "job":
+                progress[message["job_id"]].append(message["data"]["progress"])
+            elif message["type"] == "error":
+                errors.append(message["job_id"])
+        for thread in threads:
+            thread.join()
+
+    assert progress == {"a": [0, 30, 60, 90, 100], "b": [0, 30, 60, 90, 100]}
+    assert errors == ["missing"]
+    assert service.job_reads == 1  # 只有不存在的任务查询了存储
+    assert bus.stats()["subscribers"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,162 @@
+"""
+测试后台任务调度器（有界工作线程 + 持久化队列）
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.tasks.scheduler import JobScheduler, QueueFull
+
+
+@pytest.fixture
+def service():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield DataService(Path(tmp))
+
+
+def add_job(service, job_id, status="pending", created_at=None):
+    job = {"id": job_id, "podcast_id": f"podcast-{job_id}", "status": status, "progress": 0}
+    if created_at:
+        job["created_at"] = created_at
+    service.save_job(job)
+
+
+def wait_idle(scheduler, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        stats = scheduler.stats()
+        if stats["queued"] == 0 and stats["running"] == 0:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"调度器未在 {timeout}s 内完成: {scheduler.stats()}")
+
+
+def test_bounded_concurrency(service):
+    """同时执行的任务数不超过工作线程数"""
+    lock = threading.Lock()
+    active = [0, 0]  # 当前并发, 最大并发
+    done = []
+
+    def handler(job):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+            done.append(job["id"])
+
+    scheduler = JobScheduler(service, handler, workers=3, max_queue=50)
+    scheduler.start()
+    for i in range(12):
+        add_job(service, f"job-{i}")
+    for i in range(12):
+        scheduler.submit(f"job-{i}")
+    wait_idle(scheduler)
+    scheduler.stop()
+
+    print(f"\n12 个任务，最大并发 {active[1]}")
+    assert active[1] == 3
+    assert sorted(done) == sorted(f"job-{i}" for i in range(12))
+    assert scheduler.stats()["processed"] == 12
+
+
+def test_backpressure_and_position(service):
+    """队列已满时拒绝新任务，并返回排队位置"""
+    release = threading.Event()
+    scheduler = JobScheduler(service, lambda job: release.wait(5), workers=1, max_queue=2)
+    scheduler.start()
+
+    for i in range(4):
+        add_job(service, f"job-{i}")
+
+    assert scheduler.submit("job-0") == 1
+    deadline = time.time() + 2
+    while scheduler.position("job-0") != 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert scheduler.position("job-0") == 0  # 正在执行
+
+    assert scheduler.submit("job-1") == 1
+    assert scheduler.submit("job-2") == 2
+    assert scheduler.submit("job-1") == 1  # 重复提交不会重复排队
+    assert scheduler.is_full()
+    with pytest.raises(QueueFull):
+        scheduler.submit("job-3")
+    assert scheduler.stats()["rejected"] == 1
+
+    release.set()
+    wait_idle(scheduler)
+    scheduler.stop()
+
+
+def test_restart_recovery(service):
+    """重启后 pending / processing 任务按创建时间重新排队"""
+    add_job(service, "done", status="completed", created_at="2025-01-01T00:00:00")
+    add_job(service, "interrupted", status="processing", created_at="2025-01-01T00:00:02")
+    add_job(service, "waiting", status="pending", created_at="2025-01-01T00:00:01")
+    service.update_job("interrupted", {"progress": 60})
+
+    order = []
+
+    def handler(job):
+        order.append((job["id"], job["status"], job["progress"]))
+        service.update_job(job["id"], {"status": "completed"})
+
+    scheduler = JobScheduler(service, handler, workers=1, max_queue=10)
+    scheduler.start()
+    wait_idle(scheduler)
+    scheduler.stop()
+
+    print(f"\n恢复顺序: {order}")
+    assert order == [("waiting", "pending", 0), ("interrupted", "pending", 0)]
+    assert service.list_jobs_by_status(["pending", "processing"]) == []
+
+
+def test_handler_exception_marks_failed(service):
+    def handler(job):
+        raise RuntimeError("boom")
+
+    scheduler = JobScheduler(service, handler, workers=1, max_queue=10)
+    scheduler.start()
+    add_job(service, "job-1")
+    scheduler.submit("job-1")
+    wait_idle(scheduler)
+    scheduler.stop()
+
+    job = service.get_job("job-1")
+    assert job["status"] == "failed"
+    assert job["error_message"] == "boom"
+
+
+def test_generate_returns_429_when_queue_full(monkeypatch, service):
+    """队列已满时 /generate 返回 429 且不留下记录"""
+    full = JobScheduler(service, lambda job: None, workers=1, max_queue=0)
+    monkeypatch.setattr("app.tasks.process_podcast.job_scheduler", full)
+    monkeypatch.setattr(podcasts_api, "data_service", service)
+    http = TestClient(app)
+    payload = {"topic": "排队测试的播客主题", "style": "Solo Talk Show"}
+
+    response = http.post("/api/v1/podcasts/generate", json=payload)
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "30"
+
+    # 检查通过后才被挤满：回滚已创建的记录
+    def race(*args):
+        raise QueueFull(0)
+
+    monkeypatch.setattr("app.tasks.process_podcast.job_scheduler", JobScheduler(service, None, 1, 10))
+    monkeypatch.setattr("app.tasks.process_podcast.start_processing_task", race)
+    response = http.post("/api/v1/podcasts/generate", json=payload)
+    assert response.status_code == 429
+    assert service.read_podcasts() == [] and service.read_jobs() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,155 @@
+"""
+测试日志型数据服务
+"""
+import json
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.services.journal_data_service import JournalDataService
+
+
+def test_journal_operations_and_replay():
+    """测试写入、重启重放与压缩"""
+    print("=" * 50)
+    print("测试日志型数据服务")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        service = JournalDataService(data_dir)
+
+        # 1. 保存任务并多次更新进度
+        job_id = str(uuid.uuid4())
+        assert service.save_job({"id": job_id, "podcast_id": "p1", "status": "pending", "progress": 0})
+        for progress in [10, 20, 40, 70, 100]:
+            assert service.update_job(job_id, {"progress": progress})
+        assert service.update_job("missing", {"progress": 1}) is False
+
+        job = service.get_job(job_id)
+        print(f"\n1. 任务进度: {job['progress']}%")
+        assert job["progress"] == 100
+
+        # 返回值是副本，调用方修改不会污染内存索引
+        job["progress"] = 5
+        assert service.get_job(job_id)["progress"] == 100
+
+        # 快照文件未被重写，变更只在日志中；进度更新在写回缓冲中合并，只写入一次
+        service.job_buffer.flush()
+        snapshot = json.loads((data_dir / "jobs.json").read_text(encoding="utf-8"))
+        assert snapshot["jobs"] == []
+        journal_lines = (data_dir / "jobs.journal").read_text(encoding="utf-8").splitlines()
+        print(f"   日志记录数: {len(journal_lines)}")
+        assert len(journal_lines) == 2
+
+        # 2. 保存并删除播客
+        assert service.save_podcast({"id": "p1", "title": "日志测试", "status": "processing"})
+        assert service.update_podcast("p1", {"status": "completed"})
+        assert service.save_podcast({"id": "p2", "title": "待删除", "status": "processing"})
+        assert service.delete_podcast("p2")
+        service.podcasts.close()
+        service.jobs.close()
+
+        # 3. 重启后重放日志（模拟最后一行写了一半）
+        with open(data_dir / "jobs.journal", "a", encoding="utf-8") as f:
+            f.write('{"op":"update","id":"')
+
+        reloaded = JournalDataService(data_dir)
+        print(f"\n3. 重放后任务进度: {reloaded.get_job(job_id)['progress']}%")
+        assert reloaded.get_job(job_id)["progress"] == 100
+        assert reloaded.get_podcast("p1")["status"] == "completed"
+        assert reloaded.get_podcast("p2") is None
+
+        # 4. 压缩后快照与 JSON 模式兼容，日志被清空
+        reloaded.close()
+        snapshot = json.loads((data_dir / "jobs.json").read_text(encoding="utf-8"))
+        assert snapshot["jobs"][0]["progress"] == 100
+        assert (data_dir / "jobs.journal").read_text(encoding="utf-8") == ""
+        print("\n4. 压缩完成，快照记录数:", len(snapshot["jobs"]))
+
+    print("\n✅ 日志型数据服务测试完成\n")
+
+
+def test_journal_auto_compaction():
+    """测试日志达到阈值后自动压缩"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        service = JournalDataService(data_dir)
+        service.jobs.compact_threshold = 5
+
+        service.save_job({"id": "j1", "podcast_id": "p1", "status": "pending", "progress": 0})
+        for progress in range(1, 10):
+            service.update_job("j1", {"status": "processing", "progress": progress})
+
+        # 10 条日志至少触发过一次压缩（后台压缩进行中时新日志继续追加）
+        assert service.jobs.journal_entries < 10
+        service.jobs.wait_compaction()
+        snapshot = json.loads((data_dir / "jobs.json").read_text(encoding="utf-8"))
+        assert len(snapshot["jobs"]) == 1
+        assert not (data_dir / "jobs.journal.compacting").exists()
+        assert service.get_job("j1")["progress"] == 9
+        service.close()
+
+
+def test_background_compaction_does_not_block_writers():
+    """压缩在后台写快照：写入快照期间仍可读写，压缩中途退出后重启可恢复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        service = JournalDataService(data_dir)
+        for i in range(20):
+            service.save_job({"id": f"j{i}", "podcast_id": f"p{i}", "status": "completed", "progress": 0})
+
+        # 模拟写快照很慢：阻塞后台线程，期间继续读写
+        release = threading.Event()
+        writing = threading.Event()
+        write_snapshot = service.jobs._write_snapshot
+
+        def slow_write(records):
+            writing.set()
+            release.wait(5)
+            write_snapshot(records)
+
+        service.jobs._write_snapshot = slow_write
+        service.jobs.compact_threshold = 5
+        for i in range(25):
+            service.update_job("j0", {"status": "completed", "progress": i})
+        assert writing.wait(5) and service.jobs.compacting
+
+        started = time.perf_counter()
+        for i in range(25, 60):
+            assert service.update_job("j1", {"status": "completed", "progress": i})
+            assert service.get_job("j1")["progress"] == i
+        elapsed = time.perf_counter() - started
+        print(f"\n压缩期间 35 次读写耗时 {elapsed * 1000:.1f}ms")
+        assert elapsed < 1
+        assert (data_dir / "jobs.journal.compacting").exists()
+
+        # 快照还没写完时进程退出：重放 .compacting + 新日志即可恢复
+        reloaded = JournalDataService(data_dir)
+        assert reloaded.get_job("j0")["progress"] == 24
+        assert reloaded.get_job("j1")["progress"] == 59
+        assert not (data_dir / "jobs.journal.compacting").exists()  # 启动时已补做压缩
+        reloaded.close()
+
+        release.set()
+        service.jobs.wait_compaction()
+        service.close()
+
+
+if __name__ == "__main__":
+    print("\n🚀 开始测试 JournalDataService\n")
+
+    try:
+        test_journal_operations_and_replay()
+        test_journal_auto_compaction()
+        test_background_compaction_does_not_block_writers()
+
+        print("=" * 50)
+        print("✅ 所有测试通过！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,163 @@
+"""
+测试边合成边播放：增量 MP3 拼接、按顺序写入的实时音频、合成中的 /stream 接口
+"""
+import asyncio
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.ai_service import AIService
+from app.services.data_service import DataService
+from app.utils.audio import Mp3FrameStream, concat_mp3
+from app.utils.live_audio import LiveAudio, LiveAudioRegistry
+
+
+FRAME_HEADER = b"\xff\xfb\x90\x00"  # MPEG1 Layer III 128kbps 44.1kHz，每帧 417 字节
+FRAME_LENGTH = 417
+
+
+def make_mp3(fills) -> bytes:
+    """模拟编码器输出：ID3v2 + Info 帧 + 音频帧 + ID3v1"""
+    info = bytearray(FRAME_LENGTH - 4)
+    info[32:36] = b"Info"
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    frames = b"".join(FRAME_HEADER + bytes([fill]) * (FRAME_LENGTH - 4) for fill in fills)
+    return id3v2 + FRAME_HEADER + bytes(info) + frames + b"TAG" + b"\x00" * 125
+
+
+def split_randomly(data: bytes, pieces: int) -> list:
+    cuts = sorted(random.sample(range(1, len(data)), pieces - 1))
+    return [data[i:j] for i, j in zip([0] + cuts, cuts + [len(data)])]
+
+
+def make_service(delays):
+    """TTS 替身：第 n 段按 delays[n] 的间隔分三块回调 on_chunk，返回完整 MP3"""
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=4)
+
+    def fake_tts(chunk, language, speaker_voice_map=None, on_chunk=None):
+        number = int(chunk.split("#")[1].split()[0])
+        audio = make_mp3([number] * 3)
+        for piece in split_randomly(audio, 3):
+            time.sleep(delays[number % len(delays)])
+            if on_chunk:
+                on_chunk(piece)
+        return audio
+
+    service.generate_dialogue_audio = fake_tts
+    return service
+
+
+def test_frame_stream_matches_concat():
+    audio = make_mp3(range(1, 11))
+    expected = concat_mp3([audio])
+    for _ in range(50):
+        stream = Mp3FrameStream()
+        output = b"".join(stream.feed(piece) for piece in split_randomly(audio, 20))
+        assert output == expected
+
+
+def test_long_audio_written_in_order(monkeypatch):
+    """后面的段先完成时先缓存，实时音频与最终拼接结果完全相同"""
+    monkeypatch.setattr(podcasts_api.settings, "tts_chunk_chars", 60)
+    script = "\n".join(f"{'Alex' if i % 2 == 0 else 'Ben'}: turn #{i} of the show." for i in range(8))
+    service = make_service([0.03, 0.0, 0.01])
+
+    live = LiveAudio()
+    audio = service.generate_long_audio(script, "en", live=live)
+    assert live.getvalue() == audio
+    assert not live.finished  # 由调用方结束
+
+
+def test_iter_chunks_waits_for_writer():
+    live = LiveAudio()
+    received = []
+
+    async def read():
+        async for chunk in live.iter_chunks(4):
+            received.append(chunk)
+
+    def write():
+        for piece in (b"abc", b"defgh", b"i"):
+            time.sleep(0.02)
+            live.append(piece)
+        live.finish()
+
+    threading.Thread(target=write).start()
+    asyncio.run(read())
+    assert b"".join(received) == b"abcdefghi"
+
+
+def test_live_audio_kept_on_disk(tmp_path):
+    """整集音频只写入临时文件，不在内存中另存一份；后加入的读取方仍从头读取"""
+    live = LiveAudio(directory=tmp_path)
+    block = bytes(range(256)) * 4096  # 1MB
+
+    tracemalloc.start()
+    for _ in range(8):
+        live.append(block)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\n写入 8MB 后内存占用 {current / 1024:.0f}KB")
+    assert current < 1024 * 1024
+    assert live.size == 8 * len(block)
+
+    async def read():
+        return b"".join([chunk async for chunk in live.iter_chunks(256 * 1024)])
+
+    live.finish()
+    assert asyncio.run(read()) == block * 8
+    assert live.read(len(block) * 8 - 10, 100) == block[-10:]
+
+
+def test_stream_endpoint_while_synthesizing(monkeypatch):
+    print("=" * 50)
+    print("测试合成中的 /stream 接口")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.save_podcast({"id": "p1", "title": "Live", "status": "processing"})
+        registry = LiveAudioRegistry()
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        monkeypatch.setattr(podcasts_api, "live_audio", registry)
+        client = TestClient(app)
+
+        # 没有合成中的音频时保持原来的 400
+        assert client.get("/api/v1/podcasts/p1/stream").status_code == 400
+
+        live = registry.start("p1")
+        first = concat_mp3([make_mp3([1, 2])])
+        live.append(first)
+
+        def finish_later():
+            time.sleep(0.1)
+            live.append(concat_mp3([make_mp3([3])]))
+            registry.end("p1")
+
+        threading.Thread(target=finish_later).start()
+        started = time.monotonic()
+        response = client.get("/api/v1/podcasts/p1/stream")
+        elapsed = time.monotonic() - started
+
+        print(f"\n读取 {len(response.content)} 字节，耗时 {elapsed:.2f}s")
+        assert response.status_code == 200
+        assert response.headers["x-live"] == "1"
+        assert "content-length" not in response.headers
+        assert response.content == concat_mp3([make_mp3([1, 2, 3])])
+        assert elapsed >= 0.1  # 等到合成结束才结束响应
+
+    print("\n✅ 边合成边播放测试完成\n")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,145 @@
+"""
+测试 Gemini 响应缓存（TTL + LRU + 持久化）
+"""
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService
+from app.services.llm_cache import LLMCache
+
+
+def test_ttl_lru_and_persistence():
+    print("=" * 50)
+    print("测试 Gemini 响应缓存")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp) / "llm_cache"
+        cache = LLMCache(cache_dir, max_entries=2, ttl=60)
+
+        key = LLMCache.make_key("gemini", "prompt", 0.7, 4000)
+        assert key != LLMCache.make_key("gemini", "prompt", 0.8, 4000)
+        assert key != LLMCache.make_key("gemini", "prompt", 0.7, 2000)
+        assert key != LLMCache.make_key("other-model", "prompt", 0.7, 4000)
+
+        cache.put("k1", "one")
+        cache.put("k2", "two")
+        assert cache.get("k1") == "one"  # k1 变为最近使用
+        cache.put("k3", "three")  # 淘汰 k2
+        assert cache.get("k2") is None
+        assert cache.stats()["evictions"] == 1
+
+        # 重启后恢复，LRU 顺序保持不变
+        restored = LLMCache(cache_dir, max_entries=2, ttl=60)
+        assert restored.get("k1") == "one"
+        assert restored.get("k3") == "three"
+        assert restored.get("k1") == "one"
+        assert LLMCache(cache_dir, max_entries=1, ttl=60).get("k1") == "one"  # k3 最久未使用，被淘汰
+
+        # 每个条目一个文件，写入不重写其他条目
+        assert sorted(path.stem for path in cache_dir.glob("*.json")) == ["k1"]
+        cache = LLMCache(cache_dir, max_entries=10, ttl=60)
+        cache.put("k2", "two")
+        k1_mtime = (cache_dir / "k1.json").stat().st_mtime_ns
+        cache.put("k4", "four")
+        assert (cache_dir / "k1.json").stat().st_mtime_ns == k1_mtime
+        assert sorted(path.stem for path in cache_dir.glob("*.json")) == ["k1", "k2", "k4"]
+
+        # 过期条目视为未命中
+        short = LLMCache(Path(tmp) / "short", max_entries=10, ttl=0.05)
+        short.put("k", "value")
+        assert short.get("k") == "value"
+        time.sleep(0.1)
+        assert short.get("k") is None
+        print(f"\n统计: {cache.stats()}")
+
+    print("\n✅ Gemini 响应缓存测试完成\n")
+
+
+def test_generate_script_reuses_cached_responses(monkeypatch):
+    """相同主题第二次生成不发起 HTTP 请求；use_cache=False 时强制重新生成"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp) / "llm_cache", max_entries=100, ttl=3600)
+        monkeypatch.setattr(ai_service_module, "llm_cache", cache)
+        monkeypatch.setattr(settings, "llm_cache_enabled", True)
+
+        calls = []
+
+        def handler(request):
+            calls.append(json.loads(request.content)["contents"][0]["parts"][0]["text"])
+            body = {"candidates": [{"content": {"parts": [{"text": f"response #{len(calls)}"}]}}]}
+            return httpx.Response(200, json=body)
+
+        service = AIService()
+        service.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        stats = {}
+        first = service.generate_script_from_topic("The history of podcasts", cache_stats=stats)
+        assert len(calls) == 2
+        assert stats == {"misses": 2}
+
+        stats = {}
+        second = service.generate_script_from_topic("The history of podcasts", cache_stats=stats)
+        assert second == first
+        assert len(calls) == 2
+        assert stats == {"hits": 2}
+
+        stats = {}
+        third = service.generate_script_from_topic("The history of podcasts", use_cache=False, cache_stats=stats)
+        assert len(calls) == 4
+        assert stats == {"bypassed": 2}
+        assert third != first
+
+        # 强制重新生成的结果会覆盖缓存
+        assert service.generate_script_from_topic("The history of podcasts") == third
+        assert len(calls) == 4
+
+
+def test_async_call_keeps_cache_io_off_event_loop(monkeypatch):
+    """异步调用的缓存读写在线程池中执行，不阻塞事件循环"""
+    with tempfile.TemporaryDirectory() as tmp:
+        threads = []
+
+        class RecordingCache(LLMCache):
+            def get(self, key):
+                threads.append(threading.current_thread())
+                return super().get(key)
+
+            def put(self, key, text):
+                threads.append(threading.current_thread())
+                super().put(key, text)
+
+        cache = RecordingCache(Path(tmp) / "llm_cache", max_entries=10, ttl=60)
+        monkeypatch.setattr(ai_service_module, "llm_cache", cache)
+        monkeypatch.setattr(settings, "llm_cache_enabled", True)
+
+        def handler(request):
+            return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "async response"}]}}]})
+
+        service = AIService()
+
+        async def call():
+            service._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            service._async_client_loop = asyncio.get_running_loop()
+            first = await service._call_gemini_api_async("async prompt")
+            second = await service._call_gemini_api_async("async prompt")
+            return first, second, threading.current_thread()
+
+        first, second, loop_thread = asyncio.run(call())
+        assert first == second == "async response"
+        assert cache.stats()["hits"] == 1
+        assert len(threads) == 3  # 未命中 → 写入 → 命中
+        assert loop_thread not in threads
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
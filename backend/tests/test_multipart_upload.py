@@ -0,0 +1,182 @@
+"""
+测试分段流式上传（使用本地 S3 替身）
+"""
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.utils.s3_storage import S3Storage, UploadRejected, s3_storage
+from fake_s3 import FakeS3Client
+
+
+PART_SIZE = 1024 * 1024
+
+
+class CountingFakeS3Client(FakeS3Client):
+    """记录同时进行中的分段上传数量"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def upload_part(self, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            threading.Event().wait(0.01)
+            return self.store_part(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def store_part(self, *args, **kwargs):
+        return super().upload_part(*args, **kwargs)
+
+
+class DigestFakeS3Client(CountingFakeS3Client):
+    """只保存分段摘要，测量内存时不把替身的存储算进去"""
+
+    def __init__(self):
+        super().__init__()
+        self.digests = {}
+        self.completed = None
+
+    def store_part(self, Bucket, Key, UploadId, PartNumber, Body, **kwargs):
+        self.calls.append(("upload_part", Key, PartNumber))
+        self.digests[PartNumber] = hashlib.md5(Body).hexdigest()
+        return {"ETag": f'"{self.digests[PartNumber]}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self.calls.append(("complete_multipart_upload", Key))
+        self.completed = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        return {}
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setattr(podcasts_api.settings, "upload_part_size", PART_SIZE)
+    monkeypatch.setattr(podcasts_api.settings, "upload_max_concurrency", 3)
+    storage = S3Storage()
+    storage.s3_client = CountingFakeS3Client()
+    return storage
+
+
+def reader(data: bytes):
+    """模拟 UploadFile.read"""
+    stream = io.BytesIO(data)
+
+    async def read(size: int) -> bytes:
+        return stream.read(size)
+    return read
+
+
+def test_multipart_upload(storage):
+    """大文件分段并发上传，峰值内存与文件大小无关"""
+    data = os.urandom(20 * PART_SIZE + 123)
+    storage.s3_client = DigestFakeS3Client()
+
+    tracemalloc.start()
+    result = asyncio.run(storage.upload_stream(reader(data), "big.mp3", content_type="audio/mpeg"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    client = storage.s3_client
+    _, size = result
+    print(f"\n上传 {size} bytes，峰值内存 {peak / 1024 / 1024:.1f} MB，最大并发 {client.max_active}")
+    assert size == len(data)
+    assert client.completed == list(range(1, 22))
+    for number, digest in client.digests.items():
+        offset = (number - 1) * PART_SIZE
+        assert digest == hashlib.md5(data[offset:offset + PART_SIZE]).hexdigest()
+    assert 1 < client.max_active <= 3
+    # 上传中的 3 段 + 等待槽位的 1 段 + 线程池尚未释放的分段引用，远小于 20MB 的文件大小
+    assert peak < 8 * PART_SIZE
+
+
+def test_small_file_uses_put_object(storage):
+    key, size = asyncio.run(storage.upload_stream(reader(b"hello"), "a.txt"))
+    assert size == 5
+    assert [c[0] for c in storage.s3_client.calls] == ["put_object"]
+    assert storage.s3_client.objects[key]["data"] == b"hello"
+
+
+def test_rejects_empty_and_oversized(storage):
+    with pytest.raises(UploadRejected):
+        asyncio.run(storage.upload_stream(reader(b""), "empty.txt"))
+
+    with pytest.raises(UploadRejected):
+        asyncio.run(storage.upload_stream(reader(b"x" * (5 * PART_SIZE)), "big.txt", max_size=3 * PART_SIZE))
+
+    client = storage.s3_client
+    assert ("abort_multipart_upload" in [c[0] for c in client.calls])
+    assert client.uploads == {} and client.objects == {}
+    # 超出限制后不再继续读取和上传
+    assert len([c for c in client.calls if c[0] == "upload_part"]) <= 3
+
+
+def test_failed_part_aborts_upload(storage):
+    client = storage.s3_client
+    client.fail_parts = {3}
+
+    result = asyncio.run(storage.upload_stream(reader(os.urandom(10 * PART_SIZE)), "big.mp3"))
+
+    assert result is None
+    assert client.calls[-1][0] == "abort_multipart_upload"
+    assert client.uploads == {} and client.objects == {}
+
+
+def test_upload_endpoint(monkeypatch):
+    """上传接口：分段上传后创建播客记录"""
+    started = []
+    monkeypatch.setattr(podcasts_api.settings, "upload_part_size", PART_SIZE)
+    monkeypatch.setattr("app.tasks.process_podcast.start_processing_task", lambda *args: started.append(args))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = FakeS3Client()
+        monkeypatch.setattr(podcasts_api, "data_service", DataService(Path(tmp)))
+        monkeypatch.setattr(s3_storage, "s3_client", client)
+        http = TestClient(app)
+
+        data = os.urandom(3 * PART_SIZE + 10)
+        response = http.post(
+            "/api/v1/podcasts/upload",
+            files={"file": ("talk.mp3", io.BytesIO(data), "audio/mpeg")}
+        )
+        assert response.status_code == 200
+        podcast = podcasts_api.data_service.get_podcast(response.json()["podcast_id"])
+        assert podcast["file_size_bytes"] == len(data)
+        assert client.objects[podcast["s3_key"]]["data"] == data
+        assert len(started) == 1
+
+        monkeypatch.setattr(podcasts_api.settings, "max_upload_size", 2 * PART_SIZE)
+        response = http.post(
+            "/api/v1/podcasts/upload",
+            files={"file": ("talk.mp3", io.BytesIO(data), "audio/mpeg")}
+        )
+        assert response.status_code == 400
+        assert "文件过大" in response.json()["detail"]
+
+        response = http.post(
+            "/api/v1/podcasts/upload",
+            files={"file": ("empty.txt", io.BytesIO(b""), "text/plain")}
+        )
+        assert response.status_code == 400
+        assert len(client.objects) == 1 and client.uploads == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,82 @@
+"""
+测试播客列表接口的字段选择：默认不返回稿件、fields 参数投影、游标分页同样适用
+"""
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.schemas.podcast import PODCAST_SUMMARY_FIELDS
+from app.services.data_service import DataService
+
+
+TRANSCRIPT = "Host: a long transcript that list responses should not carry. " * 200
+
+
+@pytest.fixture
+def client(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        for i in range(5):
+            service.save_podcast({
+                "id": f"p{i}",
+                "title": f"Episode {i}",
+                "original_filename": f"episode_{i}.txt",
+                "status": "completed",
+                "audio_s3_key": f"podcasts/p{i}.mp3",
+                "duration_seconds": 60 + i,
+                "transcript": TRANSCRIPT,
+                "created_at": f"2025-01-01T00:00:0{i}"
+            })
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        yield TestClient(app)
+
+
+def test_default_list_excludes_transcript(client):
+    print("=" * 50)
+    print("测试播客列表字段选择")
+    print("=" * 50)
+
+    response = client.get("/api/v1/podcasts", params={"limit": 5})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    items = response.json()
+    print(f"\n默认列表 5 项共 {len(response.content)} 字节")
+    assert [item["id"] for item in items] == ["p4", "p3", "p2", "p1", "p0"]
+    assert list(items[0]) == list(PODCAST_SUMMARY_FIELDS)
+    assert items[0]["audio_url"] == "/api/v1/podcasts/p4/stream"
+    assert items[0]["duration_seconds"] == 64
+    assert items[0]["file_size_bytes"] is None
+    assert len(response.content) < 2000
+
+    # 新保存的播客立即出现在列表首位（排序结果随文件更新失效）
+    podcasts_api.data_service.save_podcast({
+        "id": "p5", "title": "Episode 5", "original_filename": "episode_5.txt", "status": "processing"
+    })
+    assert client.get("/api/v1/podcasts", params={"limit": 1}).json()[0]["id"] == "p5"
+
+
+def test_fields_projection(client):
+    items = client.get("/api/v1/podcasts", params={"fields": "title, status"}).json()
+    assert items[0] == {"id": "p4", "title": "Episode 4", "status": "completed"}
+
+    # 显式请求稿件时从 blob 加载
+    items = client.get("/api/v1/podcasts", params={"fields": "transcript", "limit": 2}).json()
+    assert items == [{"id": "p4", "transcript": TRANSCRIPT}, {"id": "p3", "transcript": TRANSCRIPT}]
+
+    # 游标分页
+    body = client.get("/api/v1/podcasts", params={"cursor": "", "limit": 2, "fields": "title"}).json()
+    assert body["items"] == [{"id": "p4", "title": "Episode 4"}, {"id": "p3", "title": "Episode 3"}]
+    assert body["next_cursor"]
+
+    # 未知字段（包括记录中的内部字段）返回 400
+    response = client.get("/api/v1/podcasts", params={"fields": "title,audio_s3_key"})
+    assert response.status_code == 400
+    assert "audio_s3_key" in response.json()["detail"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,138 @@
+"""
+测试直传 S3 的两步上传流程（使用本地 S3 替身）
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.utils.s3_storage import s3_storage
+from fake_s3 import FakeS3Client
+
+
+@pytest.fixture
+def env(monkeypatch):
+    started = []
+    monkeypatch.setattr("app.tasks.process_podcast.start_processing_task", lambda *args: started.append(args))
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        client = FakeS3Client()
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        monkeypatch.setattr(s3_storage, "s3_client", client)
+        yield TestClient(app), service, client, started
+
+
+def test_presigned_upload_flow(env):
+    """获取上传表单 → 浏览器直传 → 确认并开始处理"""
+    http, service, client, started = env
+
+    response = http.post("/api/v1/podcasts/upload-url", json={
+        "filename": "interview.mp4",
+        "content_type": "video/mp4",
+        "file_size": 50 * 1024 * 1024
+    })
+    assert response.status_code == 200
+    body = response.json()
+    print(f"\n上传表单: {body['url']} {sorted(body['fields'])}")
+    assert body["fields"]["key"] == body["s3_key"]
+    assert body["fields"]["Content-Type"] == "video/mp4"
+    assert ["content-length-range", 1, podcasts_api.settings.max_upload_size] in client.post_conditions
+    assert service.get_podcast(body["podcast_id"])["status"] == "uploading"
+
+    # 上传完成前确认：文件不存在
+    response = http.post(f"/api/v1/podcasts/{body['podcast_id']}/uploaded")
+    assert response.status_code == 400
+    assert started == []
+
+    # 模拟浏览器直传到 S3
+    client.objects[body["s3_key"]] = {"data": b"\x00" * 1024, "content_type": "video/mp4"}
+
+    response = http.post(f"/api/v1/podcasts/{body['podcast_id']}/uploaded")
+    assert response.status_code == 200
+    result = response.json()
+    podcast = service.get_podcast(body["podcast_id"])
+    assert podcast["status"] == "processing"
+    assert podcast["file_size_bytes"] == 1024
+    assert service.get_job(result["job_id"])["s3_key"] == body["s3_key"]
+    assert started == [(body["podcast_id"], result["job_id"], body["s3_key"])]
+
+    # 重复确认不会再创建任务
+    response = http.post(f"/api/v1/podcasts/{body['podcast_id']}/uploaded")
+    assert response.status_code == 409
+    assert len(started) == 1
+
+
+def test_concurrent_confirm_creates_one_job(env, monkeypatch):
+    """双击 / 客户端重试：两个确认请求同时等待 head_object，只有一个创建任务"""
+    http, service, client, started = env
+    body = http.post("/api/v1/podcasts/upload-url", json={"filename": "talk.mp3"}).json()
+    client.objects[body["s3_key"]] = {"data": b"\x00" * 2048, "content_type": "audio/mpeg"}
+
+    get_file_info = s3_storage.get_file_info_async
+
+    async def slow_file_info(key):
+        await asyncio.sleep(0.05)
+        return await get_file_info(key)
+
+    monkeypatch.setattr(s3_storage, "get_file_info_async", slow_file_info)
+
+    async def confirm_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            url = f"/api/v1/podcasts/{body['podcast_id']}/uploaded"
+            return await asyncio.gather(ac.post(url), ac.post(url))
+
+    responses = asyncio.run(confirm_twice())
+    assert sorted(response.status_code for response in responses) == [200, 409]
+    assert len(started) == 1
+    assert len(service.read_jobs()) == 1
+    assert service.get_podcast(body["podcast_id"])["status"] == "processing"
+
+
+def test_failed_confirm_releases_claim(env, monkeypatch):
+    """认领后失败（队列已满、保存任务失败）恢复为 uploading，不留下任务记录"""
+    http, service, client, started = env
+    body = http.post("/api/v1/podcasts/upload-url", json={"filename": "talk.mp3"}).json()
+    client.objects[body["s3_key"]] = {"data": b"\x00" * 2048, "content_type": "audio/mpeg"}
+
+    def queue_full(*args):
+        raise podcasts_api.QueueFull(1)
+
+    monkeypatch.setattr("app.tasks.process_podcast.start_processing_task", queue_full)
+    response = http.post(f"/api/v1/podcasts/{body['podcast_id']}/uploaded")
+    assert response.status_code == 429
+    assert service.get_podcast(body["podcast_id"])["status"] == "uploading"
+    assert service.read_jobs() == []
+
+    monkeypatch.setattr(service, "save_job", lambda job: False)
+    response = http.post(f"/api/v1/podcasts/{body['podcast_id']}/uploaded")
+    assert response.status_code == 500
+    assert service.get_podcast(body["podcast_id"])["status"] == "uploading"
+
+
+def test_upload_url_validation(env):
+    http, _, client, _ = env
+
+    response = http.post("/api/v1/podcasts/upload-url", json={"filename": "virus.exe"})
+    assert response.status_code == 400
+
+    response = http.post("/api/v1/podcasts/upload-url", json={
+        "filename": "huge.mov",
+        "file_size": podcasts_api.settings.max_upload_size + 1
+    })
+    assert response.status_code == 400
+    assert "文件过大" in response.json()["detail"]
+
+    response = http.post("/api/v1/podcasts/missing/uploaded")
+    assert response.status_code == 404
+    assert client.calls == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
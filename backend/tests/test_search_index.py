@@ -0,0 +1,93 @@
+"""
+测试全文搜索索引
+"""
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from app.services.data_service import DataService
+from app.services.journal_data_service import JournalDataService
+from app.services.sqlite_data_service import SQLiteDataService
+from app.services.search_index import SearchIndex, tokenize
+
+
+def test_tokenize():
+    """测试中英文混合切分"""
+    assert tokenize("Hello 播客测试") == ["hello", "播客", "客测", "测试"]
+    assert tokenize("AI生成-v3") == ["ai", "生成", "v3"]
+    assert tokenize("一") == ["一"]
+
+
+def test_bm25_ranking():
+    """测试 BM25 排序与增量更新"""
+    index = SearchIndex()
+    index.add("a", "机器学习入门", "机器学习是人工智能的一个分支。")
+    index.add("b", "烹饪技巧", "今天聊聊如何做红烧肉，顺便提一下机器。")
+    index.add("c", "Deep Learning", "Neural networks and machine learning basics.")
+
+    results = index.search("机器学习")
+    print(f"\n搜索 '机器学习': {results}")
+    assert [doc_id for doc_id, _ in results] == ["a"]
+
+    # 单个汉字扩展为包含它的二元组
+    assert {doc_id for doc_id, _ in index.search("机")} == {"a", "b"}
+
+    # 英文不区分大小写，标题命中的权重更高
+    index.add("d", "Cooking", "learning to cook, learning to bake")
+    ranked = [doc_id for doc_id, _ in index.search("LEARNING")]
+    assert ranked[0] == "c"
+    assert set(ranked) == {"c", "d"}
+
+    # 所有词都必须命中
+    assert index.search("machine 红烧肉") == []
+
+    # 末尾的英文词按前缀匹配（边输入边搜索），前面的词和以空格结尾的词按整词匹配
+    index.add("e", "The Podcast Show", "")
+    assert [doc_id for doc_id, _ in index.search("pod")] == ["e"]
+    assert [doc_id for doc_id, _ in index.search("neural net")] == ["c"]
+    assert index.search("pod ") == []
+    assert index.search("pod show") == []
+    assert index.search("xyz") == []
+    index.remove("e")
+    assert index.search("pod") == []
+
+    # 删除与替换
+    index.remove("a")
+    assert index.search("机器学习") == []
+    index.add("b", "烹饪技巧", "只谈红烧肉")
+    assert index.search("机器") == []
+    assert len(index) == 3
+    assert index._latin_tokens == sorted(token for token in index._postings if token.isascii())
+
+
+@pytest.mark.parametrize("service_class", [DataService, JournalDataService, SQLiteDataService])
+def test_data_service_search(service_class):
+    """测试数据层在写入文稿 / 删除时同步更新索引"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = service_class(Path(tmp))
+        service.save_podcast({"id": "p1", "title": "周末闲聊", "status": "processing", "created_at": "1"})
+        service.save_podcast({"id": "p2", "title": "量子计算", "status": "processing", "created_at": "2"})
+
+        # 构建索引后再写入文稿，验证增量更新
+        assert service.search_podcasts("量子") and service.search_podcasts("黑洞") == []
+        service.update_podcast("p1", {"transcript": "小明：今天我们聊聊黑洞和量子纠缠。", "status": "completed"})
+
+        ids = [p["id"] for p in service.search_podcasts("量子")]
+        print(f"\n{service_class.__name__} 搜索 '量子': {ids}")
+        assert ids == ["p2", "p1"]  # 标题命中排在前面
+        assert [p["id"] for p in service.list_podcasts(search="黑洞")] == ["p1"]
+
+        items, _ = service.page_podcasts(search="量子", limit=10)
+        assert [p["id"] for p in items] == ["p2", "p1"]  # 游标模式仍按时间排序
+
+        service.delete_podcast("p1")
+        assert service.search_podcasts("黑洞") == []
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_bm25_ranking()
+    for service_class in (DataService, JournalDataService, SQLiteDataService):
+        test_data_service_search(service_class)
+    print("✅ 全文搜索测试通过")
@@ -0,0 +1,128 @@
+"""
+测试 JSON 数据服务的快照读取：读取不加锁、文件未变化时复用解析结果、其他进程的写入立即可见
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services.data_service import DataService
+
+
+@pytest.fixture
+def data_dir():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield Path(tmp)
+
+
+def test_reads_do_not_wait_for_writers(data_dir):
+    print("=" * 50)
+    print("测试快照读取")
+    print("=" * 50)
+
+    service = DataService(data_dir)
+    service.save_podcast({"id": "p1", "title": "快照", "status": "processing"})
+
+    # 另一个线程持有文件锁（模拟正在写入），读取不受影响
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with service.podcasts_lock:
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    locked.wait(5)
+    try:
+        started = time.perf_counter()
+        assert service.get_podcast("p1")["title"] == "快照"
+        assert len(service.read_podcasts()) == 1
+        elapsed = time.perf_counter() - started
+        print(f"\n写入方持有锁时读取耗时 {elapsed * 1000:.2f}ms")
+        assert elapsed < 0.5
+    finally:
+        release.set()
+        holder.join()
+
+    # 返回的是副本，修改不影响之后的读取
+    podcast = service.get_podcast("p1")
+    podcast["title"] = "被修改"
+    service.read_podcasts()[0]["status"] = "被修改"
+    assert service.get_podcast("p1") == {**podcast, "title": "快照", "status": "processing"}
+    assert not list(data_dir.glob("*.tmp"))  # 临时文件已替换到位
+
+
+def test_snapshot_reuse_and_other_process_writes(data_dir):
+    service = DataService(data_dir)
+    other = DataService(data_dir)  # 共用数据目录的另一个 worker 进程
+    service.save_job({"id": "j1", "status": "processing", "progress": 0})
+
+    # 本进程写入后，快照直接复用，不再解析文件
+    snapshot = service._snapshot(service.jobs_file)
+    assert service.get_job("j1")["progress"] == 0
+    assert service._snapshot(service.jobs_file) is snapshot
+
+    # 另一个进程写入后立即可见（文件被替换，inode / 修改时间变化）
+    assert other.mutate("jobs", "j1", lambda job: {"status": "completed", "progress": 100})
+    assert service.get_job("j1")["status"] == "completed"
+
+    # 刚写入的文件（修改时间与加载时间相近）每次重新解析；之后稳定的文件复用快照
+    first = other._snapshot(other.jobs_file)
+    assert other._snapshot(other.jobs_file) is first  # other 自己写入的
+    reloaded = service._snapshot(service.jobs_file)
+    assert not reloaded.stable
+    old = time.time() - 10
+    os.utime(service.jobs_file, (old, old))
+    stable = service._snapshot(service.jobs_file)
+    assert stable.stable and service._snapshot(service.jobs_file) is stable
+
+    # 文件内容被外部直接修改（大小不同）也能发现
+    service.jobs_file.write_text(json.dumps({"jobs": [{"id": "j1", "status": "failed", "progress": 5}]}))
+    assert service.get_job("j1")["status"] == "failed"
+
+
+def test_concurrent_readers_see_complete_versions(data_dir):
+    service = DataService(data_dir)
+    for i in range(50):
+        service.save_podcast({"id": f"p{i}", "title": f"Episode {i}", "transcript": "x" * 2000})
+    service.save_job({"id": "j1", "status": "processing", "progress": 0})
+
+    stop = threading.Event()
+    errors = []
+    reads = [0]
+
+    def reader():
+        last = 0
+        while not stop.is_set():
+            try:
+                progress = service.get_job("j1")["progress"]
+                assert progress >= last  # 不会读到旧版本或写了一半的文件
+                last = progress
+                assert len(service.read_podcasts()) == 50
+                reads[0] += 1
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for progress in range(1, 101):
+        service.mutate("jobs", "j1", lambda job: {"progress": progress})
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"\n100 次写入期间完成 {reads[0]} 次读取")
+    assert errors == []
+    assert service.get_job("j1")["progress"] == 100
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
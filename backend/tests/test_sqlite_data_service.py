@@ -0,0 +1,118 @@
+"""
+测试 SQLite 数据服务
+"""
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+from app.services.sqlite_data_service import SQLiteDataService, import_json_data
+
+
+def test_sqlite_operations_and_list_query():
+    """测试 CRUD 与下推到 SQL 的列表查询"""
+    print("=" * 50)
+    print("测试 SQLite 数据服务")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = SQLiteDataService(Path(tmp))
+
+        # 1. 保存播客
+        for i in range(30):
+            service.save_podcast({
+                "id": f"p{i}",
+                "title": f"Episode {i} 测试_播客" if i % 2 == 0 else f"Other {i}",
+                "original_filename": "test.txt",
+                "status": "processing",
+                "created_at": f"2025-01-01T00:00:{i:02d}"
+            })
+        print(f"\n1. 共 {len(service.read_podcasts())} 个播客")
+        assert len(service.read_podcasts()) == 30
+
+        # 2. 更新 / 获取
+        assert service.update_podcast("p3", {"status": "completed", "audio_s3_key": "podcasts/p3.mp3"})
+        assert service.update_podcast("missing", {"status": "completed"}) is False
+        podcast = service.get_podcast("p3")
+        assert podcast["status"] == "completed"
+        assert podcast["audio_s3_key"] == "podcasts/p3.mp3"
+
+        # 3. 列表：按创建时间降序 + 分页
+        page = service.list_podcasts(offset=0, limit=5)
+        print(f"\n3. 第一页: {[p['id'] for p in page]}")
+        assert [p["id"] for p in page] == ["p29", "p28", "p27", "p26", "p25"]
+        page = service.list_podcasts(offset=25, limit=10)
+        assert [p["id"] for p in page] == ["p4", "p3", "p2", "p1", "p0"]
+
+        # 4. 搜索：走全文索引，不区分大小写，标点不参与匹配
+        results = service.list_podcasts(search="episode", limit=100)
+        assert len(results) == 15
+        results = service.list_podcasts(search="测试_", limit=100)
+        assert len(results) == 15
+        results = service.list_podcasts(search="%", limit=100)
+        assert results == []
+
+        # 5. 删除
+        assert service.delete_podcast("p0")
+        assert service.get_podcast("p0") is None
+
+        # 6. 任务操作（多线程各自使用独立连接）
+        service.save_job({"id": "j1", "podcast_id": "p1", "status": "pending", "progress": 0})
+
+        def worker(n):
+            for progress in range(10):
+                service.update_job("j1", {f"worker_{n}": progress})
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        job = service.get_job("j1")
+        assert all(job[f"worker_{n}"] == 9 for n in range(4))
+        assert service.delete_job("j1")
+        assert service.read_jobs() == []
+
+    print("\n✅ SQLite 数据服务测试完成\n")
+
+
+def test_sqlite_import_from_json():
+    """测试从 JSON 文件导入"""
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        with open(data_dir / "podcasts.json", "w", encoding="utf-8") as f:
+            json.dump({"podcasts": [
+                {"id": "a", "title": "A", "status": "completed", "created_at": "1", "updated_at": "1"},
+                {"id": "b", "title": "B", "status": "failed", "created_at": "2", "updated_at": "2"}
+            ]}, f)
+        with open(data_dir / "jobs.json", "w", encoding="utf-8") as f:
+            json.dump({"jobs": [
+                {"id": "j", "podcast_id": "a", "status": "completed", "created_at": "1", "updated_at": "1"}
+            ]}, f)
+
+        # 首次创建数据库时自动导入
+        service = SQLiteDataService(data_dir)
+        assert [p["id"] for p in service.list_podcasts()] == ["b", "a"]
+        assert service.get_job("j")["podcast_id"] == "a"
+
+        # 重复导入是幂等的
+        counts = import_json_data(service)
+        assert counts == {"podcasts": 2, "jobs": 1}
+        assert len(service.read_podcasts()) == 2
+
+
+if __name__ == "__main__":
+    print("\n🚀 开始测试 SQLiteDataService\n")
+
+    try:
+        test_sqlite_operations_and_list_query()
+        test_sqlite_import_from_json()
+
+        print("=" * 50)
+        print("✅ 所有测试通过！")
+        print("=" * 50)
+    except Exception as e:
+        print(f"\n❌ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,188 @@
+"""
+测试流式生成：Gemini SSE 稿件流 → 逐轮次合成音频（使用本地 Gemini 替身服务器）
+"""
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService
+from app.services.data_service import DataService
+from app.services.llm_cache import LLMCache
+from app.tasks import process_podcast
+from app.utils.audio import iter_frames
+from app.utils.s3_storage import S3Storage
+from app.utils.script_splitter import _turns, iter_turns
+from benchmarks.stub_gemini import StubGeminiServer
+from fake_s3 import FakeS3Client
+
+
+FRAME_HEADER = b"\xff\xfb\x90\x00"  # MPEG1 Layer III 128kbps 44.1kHz，每帧 417 字节
+
+SCRIPT = "\n".join(
+    f"{'Alex' if i % 2 == 0 else 'Ben'}: This is turn #{i} of our little show, with a few more words."
+    for i in range(10)
+)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    with StubGeminiServer(latency=0.01, response_text=SCRIPT, stream_chunk_chars=25, stream_interval=0.02) as server:
+        monkeypatch.setattr(settings, "gemini_api_url", server.url)
+        yield server
+
+
+def make_service(calls):
+    """TTS 替身：记录调用时间和声音，返回以轮次编号填充的一帧 MP3"""
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=3)
+    lock = threading.Lock()
+
+    def fake_tts(chunk, language, speaker_voice_map=None, on_chunk=None):
+        with lock:
+            calls.append((time.monotonic(), chunk, speaker_voice_map))
+        time.sleep(0.01)
+        number = int(re.search(r"#(\d+)", chunk).group(1))
+        return FRAME_HEADER + bytes([number]) * 413
+
+    service.generate_dialogue_audio = fake_tts
+    return service
+
+
+def test_iter_turns_matches_batch_parsing():
+    script = "Intro paragraph.\nAlex: Hello there.\ncontinued line\n\nBen: Hi!\nAlex:\nAlex: Final words"
+    expected = [f"{label}: {text}" if label else text for label, text in _turns(script)]
+    for _ in range(100):
+        cuts = sorted(random.sample(range(1, len(script)), 10))
+        pieces = [script[i:j] for i, j in zip([0] + cuts, cuts + [len(script)])]
+        assert list(iter_turns(pieces)) == expected
+
+
+def test_stream_gemini_api(stub, monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(Path(tmp) / "llm_cache", max_entries=10, ttl=60)
+        monkeypatch.setattr(ai_service_module, "llm_cache", cache)
+        monkeypatch.setattr(settings, "llm_cache_enabled", True)
+        service = AIService()
+
+        pieces = list(service._stream_gemini_api("write a script"))
+        assert len(pieces) > 10
+        assert "".join(pieces) == SCRIPT
+
+        # 完整结果写入缓存，流式和非流式调用共用
+        stats = {}
+        assert list(service._stream_gemini_api("write a script", cache_stats=stats)) == [SCRIPT]
+        assert service._call_gemini_api("write a script") == SCRIPT
+        assert stats == {"hits": 1}
+        assert stub.requests == 1
+
+
+def test_streaming_audio_overlaps_generation(stub):
+    print("=" * 50)
+    print("测试流式生成与合成重叠")
+    print("=" * 50)
+
+    calls = []
+    service = make_service(calls)
+    progress = []
+
+    script_parts = []
+
+    def pieces():
+        for piece in service.stream_script_from_topic("A streaming test topic"):
+            script_parts.append(piece)
+            yield piece
+
+    audio = service.generate_streaming_audio(
+        iter_turns(pieces()), "en", on_progress=lambda done, submitted: progress.append((done, submitted))
+    )
+
+    first_call = min(t for t, _, _ in calls)
+    print(f"\n首段合成开始于稿件生成结束前 {stub.stream_finished_at - first_call:.2f}s")
+    assert first_call < stub.stream_finished_at
+    assert "".join(script_parts) == SCRIPT
+
+    # 每个轮次单独合成，按稿件顺序拼接
+    fills = [audio[offset + 4] for offset, _ in iter_frames(audio)]
+    assert fills == list(range(10))
+    assert progress[-1] == (10, 10)
+
+    voices = service.voice_mappings["en"]
+    for _, chunk, voice_map in calls:
+        label = chunk.split(":")[0]
+        assert voice_map[label] == (voices["primary"] if label == "Alex" else voices["secondary"])
+
+    print("\n✅ 流式生成测试完成\n")
+
+
+def test_busy_pool_merges_waiting_turns(monkeypatch):
+    """合成请求都在进行中时，后续到达的轮次合并为一个请求"""
+    monkeypatch.setattr(settings, "tts_max_concurrency", 2)
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def slow_tts(chunk, language, speaker_voice_map=None):
+        calls.append(chunk)
+        release.wait(5)
+        return FRAME_HEADER + bytes([len(calls)]) * 413
+
+    service.generate_dialogue_audio = slow_tts
+
+    def turns():
+        for line in SCRIPT.split("\n"):
+            yield line
+        release.set()
+
+    audio = service.generate_streaming_audio(turns(), "en")
+
+    # 前两个轮次立即提交，其余在线程池忙碌时合并，最后一起提交
+    assert calls[:2] == SCRIPT.split("\n")[:2]
+    assert "\n".join(calls) == SCRIPT
+    assert len(calls) == 3
+    assert len(list(iter_frames(audio))) == 3
+
+
+def test_generate_job_streaming(stub, monkeypatch):
+    """AI 生成任务走流式流程，记录首段音频耗时"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        storage = S3Storage()
+        storage.s3_client = FakeS3Client()
+        monkeypatch.setattr(process_podcast, "data_service", service)
+        monkeypatch.setattr(process_podcast, "s3_storage", storage)
+        monkeypatch.setattr(process_podcast, "ai_service", make_service([]))
+        monkeypatch.setattr(settings, "script_streaming", True)
+
+        service.save_podcast({"id": "p1", "title": "Streaming", "status": "processing"})
+        service.save_job({
+            "id": "j1",
+            "podcast_id": "p1",
+            "type": "generate",
+            "inputs": {"topic": "A streaming test topic", "language": "en"},
+            "status": "pending",
+            "progress": 0
+        })
+        process_podcast.generate_podcast_background("p1", "j1")
+
+        job = service.get_job("j1")
+        podcast = service.get_podcast("p1")
+        print(f"\n耗时: {job['timings']}")
+        assert job["status"] == "completed", job.get("error_message")
+        assert job["timings"]["first_audio_seconds"] < job["timings"]["audio_ready_seconds"]
+        assert podcast["transcript"] is None  # 稿件保存在 blob 中
+        assert service.load_podcast_text(podcast) == SCRIPT
+        assert podcast["status"] == "completed"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
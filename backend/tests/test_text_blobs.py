@@ -0,0 +1,192 @@
+"""
+测试稿件等大文本的 blob 存储：记录只保存哈希、详情按需加载、稿件流式接口、旧数据迁移
+"""
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api import podcasts as podcasts_api
+from app.services.data_service import DataService
+from app.services.journal_data_service import JournalDataService
+from app.services.sqlite_data_service import PODCAST_COLUMNS, SQLiteDataService
+
+
+TRANSCRIPT = "Alex: 欢迎收听本期播客，今天聊聊 blob storage。\n" + "Ben: This is a fairly long transcript line.\n" * 500
+
+
+@pytest.fixture
+def service(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        monkeypatch.setattr(podcasts_api, "data_service", service)
+        yield service
+
+
+def test_records_keep_only_hashes(service):
+    print("=" * 50)
+    print("测试稿件 blob 存储")
+    print("=" * 50)
+
+    service.save_podcast({"id": "p1", "title": "Blob", "original_filename": "a.txt", "status": "processing"})
+    assert service.update_podcast("p1", {"status": "completed", "transcript": TRANSCRIPT, "extracted_text": TRANSCRIPT})
+
+    podcast = service.get_podcast("p1")
+    assert podcast["transcript"] is None and podcast["extracted_text"] is None
+    assert podcast["transcript_blob"] == podcast["extracted_text_blob"]  # 相同文本只保存一次
+    assert service.load_podcast_text(podcast) == TRANSCRIPT
+
+    size = service.podcasts_file.stat().st_size
+    blobs = list((service.data_dir / "blobs").rglob("*.gz"))
+    print(f"\n元数据文件 {size} 字节，稿件 {len(TRANSCRIPT.encode())} 字节 → blob {blobs[0].stat().st_size} 字节")
+    assert size < 1000
+    assert len(blobs) == 1
+    assert blobs[0].stat().st_size < len(TRANSCRIPT.encode()) / 10
+
+    # 搜索索引从 blob 加载稿件
+    assert [p["id"] for p in service.list_podcasts(search="storage")] == ["p1"]
+    assert [p["id"] for p in service.list_podcasts(search="播客")] == ["p1"]
+
+    # mutate 写入的文本同样存入 blob
+    service.mutate("podcasts", "p1", lambda podcast: {"transcript": "short"})
+    assert service.load_podcast_text(service.get_podcast("p1")) == "short"
+    assert [p["id"] for p in service.list_podcasts(search="short")] == ["p1"]
+
+
+def test_transcript_api(service):
+    client = TestClient(app)
+    service.save_podcast({"id": "p1", "title": "Blob", "original_filename": "a.txt", "status": "completed"})
+    service.update_podcast("p1", {"transcript": TRANSCRIPT, "extracted_text": TRANSCRIPT})
+
+    # 列表不返回稿件，详情按需加载
+    assert "transcript" not in client.get("/api/v1/podcasts").json()[0]
+    assert client.get("/api/v1/podcasts/p1").json()["transcript"] == TRANSCRIPT
+
+    # 客户端接受 gzip：原样发送压缩文件
+    response = client.get("/api/v1/podcasts/p1/transcript", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(TRANSCRIPT.encode()) / 10
+    assert response.text == TRANSCRIPT
+    etag = response.headers["etag"]
+
+    # 不接受 gzip：解压后流式发送
+    response = client.get("/api/v1/podcasts/p1/transcript", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == TRANSCRIPT.encode()
+
+    # 内容未变化
+    response = client.get("/api/v1/podcasts/p1/transcript", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    service.save_podcast({"id": "p2", "title": "无稿件", "original_filename": "b.txt", "status": "processing"})
+    assert client.get("/api/v1/podcasts/p2/transcript").status_code == 404
+    assert client.get("/api/v1/podcasts/missing/transcript").status_code == 404
+
+    # 删除后清理不再被引用的 blob
+    blob = service.text_blobs.path(service.get_podcast("p1")["transcript_blob"])
+    assert client.delete("/api/v1/podcasts/p1").status_code == 200
+    assert not blob.exists()
+
+
+@pytest.mark.parametrize("service_class", [DataService, JournalDataService, SQLiteDataService])
+def test_release_does_not_race_with_same_text_save(service_class):
+    """重新上传相同文本：put 发现 blob 已存在跳过写入后，旧播客被删除并清理 blob，新记录的 blob 仍然可用"""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = service_class(Path(tmp))
+        service.save_podcast({"id": "old", "title": "Old", "status": "completed", "transcript": TRANSCRIPT})
+
+        put = service.text_blobs.put
+        deleted = []
+
+        def put_then_release(text):
+            digest = put(text)
+            # 模拟另一个请求在 put 之后、写入记录之前删除了引用同一文本的播客
+            old = service.get_podcast(deleted.pop()) if deleted else None
+            if old is not None:
+                service.delete_podcast(old["id"])
+                service.release_text_blobs(old)
+                assert not service.text_blobs.path(digest).exists()
+            return digest
+
+        service.text_blobs.put = put_then_release
+
+        deleted.append("old")
+        service.save_podcast({"id": "new", "title": "New", "status": "completed", "transcript": TRANSCRIPT})
+        assert service.load_podcast_text(service.get_podcast("new")) == TRANSCRIPT
+
+        # update_podcast 同样在写锁内复核
+        service.save_podcast({"id": "later", "title": "Later", "status": "processing"})
+        deleted.append("new")
+        assert service.update_podcast("later", {"transcript": TRANSCRIPT})
+        assert service.get_podcast("new") is None
+        assert service.load_podcast_text(service.get_podcast("later")) == TRANSCRIPT
+
+
+def test_migrate_inline_text():
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        # 旧格式：稿件内联在记录中
+        legacy = [
+            {"id": f"p{i}", "title": f"Legacy {i}", "status": "completed",
+             "transcript": TRANSCRIPT, "extracted_text": TRANSCRIPT,
+             "created_at": f"2025-01-01T00:00:0{i}", "updated_at": f"2025-01-01T00:00:0{i}"}
+            for i in range(3)
+        ]
+        (data_dir / "podcasts.json").write_text(json.dumps({"podcasts": legacy}), encoding="utf-8")
+        before = (data_dir / "podcasts.json").stat().st_size
+
+        service = DataService(data_dir)
+        assert service.load_podcast_text(service.get_podcast("p0")) == TRANSCRIPT  # 迁移前也能读取
+        dumps = []
+        dump_json = service._dump_json
+        service._dump_json = lambda *args: dumps.append(args) or dump_json(*args)
+        assert service.migrate_text_blobs() == 3
+        assert len(dumps) == 1  # 整个文件只重写一次
+        assert "version" not in service.get_podcast("p0")  # 不修改 version
+        assert service.migrate_text_blobs() == 0
+        after = (data_dir / "podcasts.json").stat().st_size
+        print(f"\n迁移: {before} → {after} 字节")
+        assert after < 2000
+        assert service.load_podcast_text(service.get_podcast("p2")) == TRANSCRIPT
+        assert len(list((data_dir / "blobs").rglob("*.gz"))) == 1
+
+        # SQLite 模式首次启动导入的旧记录同样可以迁移
+        sqlite_service = SQLiteDataService(data_dir / "sqlite")
+        sqlite_service.save_podcast({"id": "s1", "title": "SQLite", "status": "completed", "transcript": TRANSCRIPT})
+        assert sqlite_service.get_podcast("s1")["transcript"] is None
+        blob = sqlite_service.text_blobs.path(sqlite_service.get_podcast("s1")["transcript_blob"])
+        assert gzip.decompress(blob.read_bytes()).decode("utf-8") == TRANSCRIPT
+
+
+@pytest.mark.parametrize("service_class", [JournalDataService, SQLiteDataService])
+def test_migrate_inline_text_other_backends(service_class):
+    with tempfile.TemporaryDirectory() as tmp:
+        service = service_class(Path(tmp))
+        legacy = [{"id": f"p{i}", "title": f"Legacy {i}", "status": "completed", "transcript": TRANSCRIPT} for i in range(3)]
+        legacy.append({"id": "plain", "title": "No text", "status": "completed"})
+        # 绕过 save_podcast，直接写入旧格式的记录
+        if service_class is JournalDataService:
+            for record in legacy:
+                service.podcasts.put(record)
+        else:
+            with service._transaction() as conn:
+                for record in legacy:
+                    service._put(conn, "podcasts", PODCAST_COLUMNS, record)
+
+        assert service.migrate_text_blobs() == 3
+        assert service.migrate_text_blobs() == 0
+        podcast = service.get_podcast("p1")
+        assert podcast["transcript"] is None
+        assert service.load_podcast_text(podcast) == TRANSCRIPT
+        assert service.get_podcast("plain")["title"] == "No text"
+        if service_class is JournalDataService:
+            service.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,84 @@
+"""
+测试文档文本提取：多进程分批提取 PDF、提前停止、Word 文档
+"""
+import io
+import tempfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+from app.services import text_extractor as text_extractor_module
+from app.services.text_extractor import PdfTextExtractor, extract_docx_text
+from app.tasks.process_podcast import extract_text_from_file
+from benchmarks.sample_pdf import make_pdf
+
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield Path(tmp)
+
+
+def test_parallel_matches_serial(temp_dir):
+    print("=" * 50)
+    print("测试 PDF 多进程分批提取")
+    print("=" * 50)
+
+    pdf = make_pdf(30, lines=5)
+    serial = PdfTextExtractor(0, 4, temp_dir).extract(pdf)
+    extractor = PdfTextExtractor(2, 4, temp_dir)
+    try:
+        parallel = extractor.extract(pdf)
+        print(f"\n提取 {len(parallel)} 字符，{extractor.stats()}")
+        assert parallel == serial
+        pages = [line for line in parallel.split("\n") if line.startswith("Page ")]
+        assert pages == [f"Page {n}" for n in range(1, 31)]
+
+        # 同一个进程池处理下一个文档
+        assert extractor.extract(make_pdf(10, lines=3)).startswith("Page 1")
+        assert extractor.stats()["pages"] == 40
+        assert list(temp_dir.iterdir()) == []  # 临时文件已删除
+    finally:
+        extractor.shutdown()
+
+
+def test_stops_early(temp_dir):
+    pdf = make_pdf(200, lines=10)
+    extractor = PdfTextExtractor(2, 5, temp_dir)
+    try:
+        full_page = len(PdfTextExtractor(0, 5, temp_dir).extract(make_pdf(1, lines=10)))
+        text = extractor.extract(pdf, max_chars=full_page * 12)
+        stats = extractor.stats()
+        print(f"\n提前停止: {len(text)} 字符，{stats}")
+        assert text.split("\n")[-10] == "Page 12"  # 在达到上限的那一页之后停止
+        assert stats["stopped_early"] == 1
+        assert stats["pages"] <= 15
+    finally:
+        extractor.shutdown()
+
+    # 单批以内的小文件不使用进程池
+    small = PdfTextExtractor(2, 16, temp_dir)
+    assert small.extract(make_pdf(3), max_chars=1).startswith("Page 1\n")
+    assert small._pool is None
+
+
+def test_docx_and_dispatch(temp_dir, monkeypatch):
+    doc = Document()
+    for i in range(100):
+        doc.add_paragraph(f"Paragraph {i} " + "x" * 50)
+    output = io.BytesIO()
+    doc.save(output)
+    content = output.getvalue()
+
+    assert extract_docx_text(content).count("Paragraph") == 100
+    assert extract_docx_text(content, max_chars=600).count("Paragraph") == 10
+
+    monkeypatch.setattr(text_extractor_module.settings, "extract_max_chars", 0)
+    assert extract_text_from_file(content, "notes.docx").count("Paragraph") == 100
+    assert extract_text_from_file(make_pdf(3), "slides.pdf").startswith("Page 1")
+    assert extract_text_from_file(b"plain text", "a.txt") == "plain text"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
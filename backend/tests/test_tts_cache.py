@@ -0,0 +1,174 @@
+"""
+测试 TTS 合成结果缓存（本地磁盘 + S3 替身）
+"""
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import ai_service as ai_service_module
+from app.services.ai_service import AIService
+from app.services.tts_cache import TTSCache
+from app.utils.s3_storage import S3Storage
+from fake_s3 import FakeS3Client
+
+
+def make_storage() -> S3Storage:
+    storage = S3Storage()
+    storage.s3_client = FakeS3Client()
+    return storage
+
+
+def key_for(text, voice="v1", **overrides):
+    params = {"model_id": "eleven_v3", "output_format": "mp3_44100_128", "voice_settings": {"stability": 0.5}}
+    params.update(overrides)
+    return TTSCache.make_key("tts", [(text, voice)], **params)
+
+
+def test_cache_key():
+    """键对合成参数敏感，对排版空白不敏感"""
+    assert key_for("Hello  world.\n") == key_for("Hello world.")
+    assert key_for("Hello world.") != key_for("Hello world!")
+    assert key_for("Hello world.") != key_for("Hello world.", voice="v2")
+    assert key_for("Hello world.") != key_for("Hello world.", model_id="eleven_v2")
+    assert key_for("Hello world.") != key_for("Hello world.", voice_settings={"stability": 0.6})
+    assert key_for("Hello world.") != TTSCache.make_key(
+        "dialogue", [("Hello world.", "v1")], "eleven_v3", "mp3_44100_128", {"stability": 0.5}
+    )
+
+
+def test_two_tier_cache_and_eviction():
+    print("=" * 50)
+    print("测试 TTS 缓存")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage()
+        cache = TTSCache(storage, Path(tmp) / "a", max_bytes=250)
+
+        assert cache.get("k1") is None
+        cache.put("k1", b"1" * 100)
+        cache.put("k2", b"2" * 100)
+        assert cache.get("k1") == b"1" * 100  # k1 变为最近使用
+        cache.put("k3", b"3" * 100)  # 淘汰 k2
+        assert cache.stats()["evictions"] == 1
+        assert cache.stats()["bytes"] == 200
+        cache.wait_uploads()
+
+        # k2 已从本地淘汰，但仍可从 S3 取回
+        assert cache.get("k2") == b"2" * 100
+        assert storage.s3_client.objects["tts-cache/k2"]["data"] == b"2" * 100
+
+        # 新实例（例如另一台机器）本地为空，从 S3 命中后回填本地
+        other = TTSCache(storage, Path(tmp) / "b", max_bytes=250)
+        assert other.get("k3") == b"3" * 100
+        assert other.get("k3") == b"3" * 100
+        stats = other.stats()
+        print(f"\n统计: {stats}")
+        assert stats["s3_hits"] == 1 and stats["hits"] == 1 and stats["hit_ratio"] == 1.0
+
+        # 重启后从磁盘恢复
+        restored = TTSCache(None, Path(tmp) / "a", max_bytes=250)
+        assert restored.stats()["entries"] == 2
+
+    print("\n✅ TTS 缓存测试完成\n")
+
+
+def test_s3_upload_runs_in_background():
+    """S3 上传不在合成线程上执行，失败只打印日志"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = make_storage()
+        release = threading.Event()
+        threads = []
+        put_object = storage.s3_client.put_object
+
+        def slow_put_object(**kwargs):
+            threads.append(threading.current_thread())
+            release.wait(5)
+            if kwargs["Key"].endswith("bad"):
+                raise RuntimeError("boom")
+            return put_object(**kwargs)
+
+        storage.s3_client.put_object = slow_put_object
+        cache = TTSCache(storage, Path(tmp), max_bytes=1024)
+
+        start = time.perf_counter()
+        cache.put("k1", b"1" * 100)
+        cache.put("bad", b"2" * 100)
+        assert time.perf_counter() - start < 1
+        assert cache.get("k1") == b"1" * 100  # 本地立即可用
+
+        release.set()
+        cache.wait_uploads()
+        assert storage.s3_client.objects["tts-cache/k1"]["data"] == b"1" * 100
+        assert "tts-cache/bad" not in storage.s3_client.objects
+        assert threading.current_thread() not in threads
+
+
+class FakeTextToSpeech:
+    def __init__(self):
+        self.calls = []
+
+    def convert(self, text, voice_id, **kwargs):
+        self.calls.append((text, voice_id))
+        yield f"audio:{voice_id}:{text}".encode()
+
+
+def test_synthesis_reuses_cached_audio(monkeypatch):
+    """重复合成同一段文本只调用一次 ElevenLabs"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSCache(make_storage(), Path(tmp), max_bytes=1024 * 1024)
+        monkeypatch.setattr(ai_service_module, "tts_cache", cache)
+        monkeypatch.setattr(settings, "tts_cache_enabled", True)
+
+        service = AIService()
+        tts = FakeTextToSpeech()
+        service.client = SimpleNamespace(text_to_speech=tts)
+
+        first = service.generate_podcast_audio("A long document about podcasts.", "en")
+        second = service.generate_podcast_audio("A long   document about podcasts.", "en")
+        assert first == second
+        assert len(tts.calls) == 1
+
+        # 换声音需要重新合成
+        service.generate_podcast_audio("A long document about podcasts.", "en", voice_id="other")
+        assert len(tts.calls) == 2
+        assert cache.stats()["hits"] == 1
+
+        # 关闭缓存
+        monkeypatch.setattr(settings, "tts_cache_enabled", False)
+        service.generate_podcast_audio("A long document about podcasts.", "en")
+        assert len(tts.calls) == 3
+
+
+def test_overlapping_scripts_reuse_chunks(monkeypatch):
+    """追加内容后重新生成：已合成的片段直接复用，只合成新增部分"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSCache(None, Path(tmp), max_bytes=1024 * 1024)
+        monkeypatch.setattr(ai_service_module, "tts_cache", cache)
+        monkeypatch.setattr(settings, "tts_cache_enabled", True)
+        monkeypatch.setattr(settings, "tts_chunk_chars", 200)
+
+        frame = b"\xff\xfb\x90\x00" + b"\x00" * 413
+        tts = FakeTextToSpeech()
+        tts.convert = lambda text, voice_id, **kwargs: tts.calls.append(text) or iter([frame])
+        service = AIService()
+        service.client = SimpleNamespace(text_to_speech=tts)
+
+        paragraphs = [f"Paragraph {i} talks about something interesting in detail." for i in range(12)]
+        service.generate_long_audio("\n".join(paragraphs), "en")
+        first_calls = len(tts.calls)
+
+        tts.calls.clear()
+        service.generate_long_audio("\n".join(paragraphs + ["A brand new closing paragraph."]), "en")
+        print(f"\n首次合成 {first_calls} 段，追加后重新合成 {len(tts.calls)} 段")
+        assert first_calls > 2
+        assert len(tts.calls) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,164 @@
+"""
+测试长稿件分段合成：稿件切分、MP3 按帧拼接、并发合成
+"""
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.services.ai_service import AIService
+from app.utils.audio import audio_spool, concat_mp3, iter_frames, parse_frame_header
+from app.utils.script_splitter import split_script, speaker_labels
+
+
+# MPEG1 Layer III, 128kbps, 44.1kHz, 无填充 → 每帧 417 字节
+FRAME_HEADER = b"\xff\xfb\x90\x00"
+FRAME_LENGTH = 417
+
+
+def make_frame(fill: int) -> bytes:
+    return FRAME_HEADER + bytes([fill]) * (FRAME_LENGTH - 4)
+
+
+def make_info_frame() -> bytes:
+    body = bytearray(FRAME_LENGTH - 4)
+    body[32:36] = b"Info"
+    return FRAME_HEADER + bytes(body)
+
+
+def make_mp3(fills, tags=True) -> bytes:
+    """模拟编码器输出：ID3v2 + Info 帧 + 音频帧 + ID3v1"""
+    id3v2 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\x00" * 10
+    id3v1 = b"TAG" + b"\x00" * 125
+    frames = b"".join(make_frame(fill) for fill in fills)
+    if not tags:
+        return make_info_frame() + frames
+    return id3v2 + make_info_frame() + frames + id3v1
+
+
+def test_parse_frame_header():
+    header = parse_frame_header(make_frame(0), 0)
+    assert header.version == 1 and header.layer == 3
+    assert header.bitrate == 128 and header.sample_rate == 44100
+    assert header.length == FRAME_LENGTH and header.samples == 1152
+    assert parse_frame_header(b"\xff\xfb\xf0\x00", 0) is None  # 比特率索引 15 非法
+    assert parse_frame_header(b"ID3\x04", 0) is None
+
+
+def test_concat_mp3_strips_tags_and_info_frames():
+    merged = concat_mp3([make_mp3([1, 1, 1]), make_mp3([2, 2], tags=False)])
+
+    frames = list(iter_frames(merged))
+    assert len(frames) == 5
+    assert merged == b"".join(make_frame(fill) for fill in [1, 1, 1, 2, 2])
+
+    with pytest.raises(ValueError):
+        concat_mp3([make_mp3([1]), b"not an mp3"])
+
+
+def test_split_script_keeps_order_and_speakers():
+    script = "\n".join([
+        "Alex: " + "今天我们聊聊播客制作。" * 30,
+        "Ben: " + "That sounds great, tell me more. " * 20,
+        "Alex: 好的。",
+        "Ben: Let's start.",
+    ])
+    chunks = split_script(script, 300)
+    print(f"\n{len(script)} 字符 → {len(chunks)} 段: {[len(c) for c in chunks]}")
+
+    assert len(chunks) > 3
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    # 每一行都带说话者标签，单独合成时不会丢失声音
+    assert all(re.match(r"^(Alex|Ben): ", line) for chunk in chunks for line in chunk.split("\n"))
+
+    def words(text):
+        return re.sub(r"(Alex|Ben): |\s+", "", text)
+    assert words("".join(chunks)) == words(script)
+
+    # 纯文本按句子切分
+    text = "First sentence here. " * 100
+    chunks = split_script(text, 250)
+    assert all(len(chunk) <= 250 and chunk.endswith(".") for chunk in chunks)
+    assert split_script("short text", 250) == ["short text"]
+
+
+def test_generate_long_audio_parallel_in_order(monkeypatch):
+    monkeypatch.setattr(settings, "tts_chunk_chars", 200)
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=3)
+
+    lock = threading.Lock()
+    active = [0, 0]
+    seen = []
+
+    def fake_tts(chunk, language, speaker_voice_map=None):
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+            seen.append(speaker_voice_map)
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        # 用片段中第一句的编号作为帧内容，便于检查顺序
+        number = int(re.search(r"#(\d+)", chunk).group(1))
+        return make_mp3([number % 256])
+
+    monkeypatch.setattr(service, "generate_dialogue_audio", fake_tts)
+    script = "\n".join(
+        f"{'Alex' if i % 2 == 0 else 'Ben'}: Line #{i} " + "blah " * 30
+        for i in range(20)
+    )
+    progress = []
+    audio = service.generate_long_audio(script, "en", on_progress=lambda done, total: progress.append((done, total)))
+
+    chunks = split_script(script, 200)
+    expected = [int(re.search(r"#(\d+)", chunk).group(1)) for chunk in chunks]
+    fills = [audio[offset + 4] for offset, _ in iter_frames(audio)]
+    print(f"\n{len(chunks)} 段，最大并发 {active[1]}")
+    assert fills == expected
+    assert 1 < active[1] <= 3
+    assert progress[-1] == (len(chunks), len(chunks))
+
+    voices = service.voice_mappings["en"]
+    assert all(m == {"Alex": voices["primary"], "Ben": voices["secondary"]} for m in seen)
+
+
+def test_generate_long_audio_into_spool(monkeypatch):
+    """写入临时文件：内容与返回字节时相同，超过阈值后落盘"""
+    monkeypatch.setattr(settings, "tts_chunk_chars", 200)
+    service = AIService()
+    service.tts_pool = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(
+        service, "generate_dialogue_audio",
+        lambda chunk, language, speaker_voice_map=None: make_mp3([int(re.search(r"#(\d+)", chunk).group(1))] * 5)
+    )
+    script = "\n".join(f"Alex: Line #{i} " + "blah " * 30 for i in range(20))
+
+    expected = service.generate_long_audio(script, "en")
+    spool = audio_spool(max_memory=4 * FRAME_LENGTH)
+    size = service.generate_long_audio(script, "en", output=spool)
+
+    assert size == len(expected) == spool.tell()
+    assert spool._rolled  # 超过阈值后转存到磁盘文件
+    spool.seek(0)
+    assert spool.read() == expected
+
+
+def test_single_turn_chunk_keeps_speaker_voice(monkeypatch):
+    """某段只包含第二个说话者时仍使用 secondary 声音"""
+    service = AIService()
+    voices = service.voice_mappings["en"]
+    voice_map = service._assign_voices(speaker_labels("Alex: hi\nBen: hello"), "en")
+
+    calls = []
+    monkeypatch.setattr(service, "generate_podcast_audio", lambda text, language, voice_id=None, on_chunk=None: calls.append((text, voice_id)) or b"")
+    service.generate_dialogue_audio("Ben: only me talking here", "en", voice_map)
+
+    assert calls == [("only me talking here", voices["secondary"])]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -0,0 +1,100 @@
+"""
+测试任务进度的写回缓冲：中间进度合并写入、终态立即写入、同进程读取看到最新进度
+"""
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.services import data_service as data_service_module
+from app.services.data_service import DataService
+from app.services.job_events import job_events
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(data_service_module.settings, "job_progress_flush_delay", 0.2)
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DataService(Path(tmp))
+        service.writes = 0
+        dump_json = service._dump_json
+
+        def counting_dump(file_path, data):
+            if file_path == service.jobs_file:
+                service.writes += 1
+            dump_json(file_path, data)
+
+        service._dump_json = counting_dump
+        yield service
+        service.job_buffer.close()
+
+
+def stored_job(service, job_id):
+    """直接读取存储中的任务（不叠加缓冲）"""
+    return next(job for job in service.read_jobs() if job["id"] == job_id)
+
+
+def test_progress_is_coalesced(service):
+    print("=" * 50)
+    print("测试任务进度写回缓冲")
+    print("=" * 50)
+
+    job_id = str(uuid.uuid4())
+    assert service.save_job({"id": job_id, "podcast_id": "p1", "status": "processing", "progress": 0})
+    assert service.writes == 1
+
+    # 中间进度只进入缓冲：读取和推送都是最新值，存储尚未写入
+    for progress in (10, 20, 25, 40, 60, 90):
+        assert service.update_job(job_id, {"progress": progress, "status_message": f"{progress}%"})
+    assert service.writes == 1
+    assert service.get_job(job_id)["progress"] == 90
+    assert job_events.latest(job_id).data["progress"] == 90
+    assert stored_job(service, job_id)["progress"] == 0
+
+    # 定时写入：合并为一次
+    time.sleep(0.5)
+    print(f"\n6 次进度更新 → {service.writes - 1} 次写入，{service.job_buffer.stats()}")
+    assert service.writes == 2
+    assert stored_job(service, job_id)["status_message"] == "90%"
+
+    # 终态立即写入，并带上缓冲中尚未写入的进度
+    service.update_job(job_id, {"progress": 95, "status_message": "上传中"})
+    assert service.update_job(job_id, {"status": "completed", "progress": 100})
+    assert service.writes == 3
+    job = stored_job(service, job_id)
+    assert (job["status"], job["progress"], job["status_message"]) == ("completed", 100, "上传中")
+    time.sleep(0.4)
+    assert service.writes == 3
+    assert service.job_buffer.stats()["pending_jobs"] == 0
+
+    # 已结束的任务不再缓冲
+    assert service.update_job(job_id, {"progress": 100, "status_message": "done"})
+    assert service.writes == 4
+
+
+def test_direct_mutate_sees_buffered_progress(service):
+    job_id = str(uuid.uuid4())
+    service.save_job({"id": job_id, "podcast_id": "p1", "status": "processing", "progress": 0})
+    service.update_job(job_id, {"progress": 60})
+
+    # 条件更新基于最新进度；之后的定时写入不会把进度改回缓冲中的旧值
+    seen = []
+    service.mutate("jobs", job_id, lambda job: seen.append(job["progress"]) or {"status": "pending", "progress": 0})
+    assert seen == [60]
+    time.sleep(0.4)
+    assert service.get_job(job_id)["progress"] == 0
+    assert stored_job(service, job_id)["progress"] == 0
+
+    # 未知任务直接写入（返回 False）
+    assert service.update_job("missing", {"progress": 1}) is False
+
+    # 关闭时写入剩余的进度
+    service.update_job(job_id, {"progress": 30})
+    service.job_buffer.close()
+    assert stored_job(service, job_id)["progress"] == 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s"])
@@ -9,14 +9,14 @@ const FileUpload = () => {
   const [error, setError] = useState('');
   const [processingStatus, setProcessingStatus] = useState('');
   const fileInputRef = useRef(null);
-  const pollIntervalRef = useRef(null);
+  const stopWatchRef = useRef(null);
   const navigate = useNavigate();
 
-  // 组件卸载时清理定时器
+  // 组件卸载时取消订阅任务进度
   useEffect(() => {
     return () => {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
+      if (stopWatchRef.current) {
+        stopWatchRef.current();
       }
     };
   }, []);
@@ -52,50 +52,47 @@ const FileUpload = () => {
     return null;
   };
 
-  const pollJobStatus = async (jobId, podcastId) => {
-    const maxAttempts = 120; // 最多轮询 2 分钟 (每秒一次)
-    let attempts = 0;
+  const watchJobStatus = (jobId, podcastId) => {
+    const timeoutMs = 2 * 60 * 1000; // 最多等待 2 分钟
 
-    // 清理旧的定时器
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current);
+    // 取消之前的订阅
+    if (stopWatchRef.current) {
+      stopWatchRef.current();
     }
 
-    pollIntervalRef.current = setInterval(async () => {
-      try {
-        attempts++;
-        const response = await podcastAPI.getJobStatus(jobId);
-        
-        // 后端直接返回 job 对象
-        if (response && response.status === 'completed') {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setProcessingStatus('Completed! Redirecting...');
-          setTimeout(() => {
-            navigate(`/podcast/${podcastId}`);
-          }, 1000);
-        } else if (response && response.status === 'failed') {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setError('Processing failed. Please try again.');
-          setUploading(false);
-          setUploadProgress(0);
-        } else if (response) {
-          // 更新处理状态
-          setProcessingStatus(`Processing: ${response.status}...`);
-        }
-
-        if (attempts >= maxAttempts) {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setError('Processing timeout. Please check your podcast library.');
-          setUploading(false);
-          setUploadProgress(0);
-        }
-      } catch (err) {
-        console.error('Error polling job status:', err);
+    let timeoutId = null;
+    const stop = () => {
+      stopWatch();
+      clearTimeout(timeoutId);
+      stopWatchRef.current = null;
+    };
+
+    // 服务端推送进度变化（不再每秒轮询），收到的是与 getJobStatus 相同的 job 对象
+    const stopWatch = podcastAPI.watchJob(jobId, (response) => {
+      if (response.status === 'completed') {
+        stop();
+        setProcessingStatus('Completed! Redirecting...');
+        setTimeout(() => {
+          navigate(`/podcast/${podcastId}`);
+        }, 1000);
+      } else if (response.status === 'failed') {
+        stop();
+        setError('Processing failed. Please try again.');
+        setUploading(false);
+        setUploadProgress(0);
+      } else {
+        // 更新处理状态
+        setProcessingStatus(`Processing: ${response.status}...`);
       }
-    }, 1000);
+    });
+
+    timeoutId = setTimeout(() => {
+      stop();
+      setError('Processing timeout. Please check your podcast library.');
+      setUploading(false);
+      setUploadProgress(0);
+    }, timeoutMs);
+    stopWatchRef.current = stop;
   };
 
   const handleFileUpload = async (file) => {
@@ -119,8 +116,8 @@ const FileUpload = () => {
       // 后端直接返回数据对象
       if (response && response.job_id && response.podcast_id) {
         setProcessingStatus('File uploaded! Processing...');
-        // 开始轮询任务状态
-        pollJobStatus(response.job_id, response.podcast_id);
+        // 开始订阅任务进度
+        watchJobStatus(response.job_id, response.podcast_id);
       } else {
         throw new Error('Invalid response format');
       }
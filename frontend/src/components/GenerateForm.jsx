@@ -9,14 +9,14 @@ const GenerateForm = () => {
   const [generating, setGenerating] = useState(false);
   const [error, setError] = useState('');
   const [processingStatus, setProcessingStatus] = useState('');
-  const pollIntervalRef = useRef(null);
+  const stopWatchRef = useRef(null);
   const navigate = useNavigate();
 
-  // 组件卸载时清理定时器
+  // 组件卸载时取消订阅任务进度
   useEffect(() => {
     return () => {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
+      if (stopWatchRef.current) {
+        stopWatchRef.current();
       }
     };
   }, []);
@@ -45,58 +45,56 @@ const GenerateForm = () => {
     return null;
   };
 
-  const pollJobStatus = async (jobId, podcastId) => {
-    const maxAttempts = 600; // 最多轮询 10 分钟 (AI 生成和音频处理需要更长时间)
-    let attempts = 0;
+  const watchJobStatus = (jobId, podcastId) => {
+    const timeoutMs = 10 * 60 * 1000; // 最多等待 10 分钟 (AI 生成和音频处理需要更长时间)
 
-    // 清理旧的定时器
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current);
+    // 取消之前的订阅
+    if (stopWatchRef.current) {
+      stopWatchRef.current();
     }
 
-    pollIntervalRef.current = setInterval(async () => {
-      try {
-        attempts++;
-        const response = await podcastAPI.getJobStatus(jobId);
-        
-        if (response && response.status === 'completed') {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setProcessingStatus('Completed! Redirecting...');
-          setTimeout(() => {
-            navigate(`/podcast/${podcastId}`);
-          }, 1000);
-        } else if (response && response.status === 'failed') {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setError(`Generation failed: ${response.error_message || 'Please try again later'}`);
-          setGenerating(false);
-        } else if (response) {
-          // Update processing status with detailed message
-          let progressText = 'Generating...';
-          if (response.status_message) {
-            // Use the detailed status message from backend
-            progressText = response.status_message;
-            if (response.progress) {
-              progressText += ` (${response.progress}%)`;
-            }
-          } else if (response.progress) {
-            // Fallback to simple progress percentage
-            progressText = `Generating... (${response.progress}%)`;
-          }
-          setProcessingStatus(progressText);
-        }
+    let timeoutId = null;
+    const stop = () => {
+      stopWatch();
+      clearTimeout(timeoutId);
+      stopWatchRef.current = null;
+    };
 
-        if (attempts >= maxAttempts) {
-          clearInterval(pollIntervalRef.current);
-          pollIntervalRef.current = null;
-          setError('Generation timeout. Please check your podcast library or try again later');
-          setGenerating(false);
+    // 服务端推送进度变化（不再每秒轮询）
+    const stopWatch = podcastAPI.watchJob(jobId, (response) => {
+      if (response.status === 'completed') {
+        stop();
+        setProcessingStatus('Completed! Redirecting...');
+        setTimeout(() => {
+          navigate(`/podcast/${podcastId}`);
+        }, 1000);
+      } else if (response.status === 'failed') {
+        stop();
+        setError(`Generation failed: ${response.error_message || 'Please try again later'}`);
+        setGenerating(false);
+      } else {
+        // Update processing status with detailed message
+        let progressText = 'Generating...';
+        if (response.status_message) {
+          // Use the detailed status message from backend
+          progressText = response.status_message;
+          if (response.progress) {
+            progressText += ` (${response.progress}%)`;
+          }
+        } else if (response.progress) {
+          // Fallback to simple progress percentage
+          progressText = `Generating... (${response.progress}%)`;
         }
-      } catch (err) {
-        console.error('Error polling job status:', err);
+        setProcessingStatus(progressText);
       }
-    }, 1000);
+    });
+
+    timeoutId = setTimeout(() => {
+      stop();
+      setError('Generation timeout. Please check your podcast library or try again later');
+      setGenerating(false);
+    }, timeoutMs);
+    stopWatchRef.current = stop;
   };
 
   const handleSubmit = async (e) => {
@@ -122,8 +120,8 @@ const GenerateForm = () => {
 
       if (response && response.job_id && response.podcast_id) {
         setProcessingStatus('Script generation in progress...');
-        // Start polling job status
-        pollJobStatus(response.job_id, response.podcast_id);
+        // Start watching job progress
+        watchJobStatus(response.job_id, response.podcast_id);
       } else {
         throw new Error('Invalid response format');
       }
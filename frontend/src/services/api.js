@@ -49,11 +49,33 @@ export const podcastAPI = {
     });
   },
 
+  // 直传 S3：先获取预签名表单，浏览器直接把文件发给 S3，最后通知后端开始处理
+  uploadDirect: async (file, onUploadProgress) => {
+    const { podcast_id, url, fields } = await api.post('/api/v1/podcasts/upload-url', {
+      filename: file.name,
+      content_type: file.type || null,
+      file_size: file.size,
+    });
+
+    const formData = new FormData();
+    Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+    formData.append('file', file);  // S3 要求 file 字段放在最后
+    await axios.post(url, formData, { onUploadProgress });
+
+    return api.post(`/api/v1/podcasts/${podcast_id}/uploaded`);
+  },
+
   // 获取播客列表
   getList: async (params = {}) => {
     return api.get('/api/v1/podcasts', { params });
   },
 
+  // 游标分页获取播客列表（无限滚动）
+  // 第一页不传 cursor，之后传上一页返回的 next_cursor；返回 { items, next_cursor }
+  getPage: async ({ cursor = '', ...params } = {}) => {
+    return api.get('/api/v1/podcasts', { params: { ...params, cursor } });
+  },
+
   // 获取播客详情
   getDetail: async (podcastId) => {
     return api.get(`/api/v1/podcasts/${podcastId}`);
@@ -74,6 +96,53 @@ export const podcastAPI = {
     return api.get(`/api/v1/jobs/${jobId}`);
   },
 
+  // 订阅任务进度（SSE，服务端推送进度变化）；浏览器不支持或连接被拒绝时退回每秒轮询
+  // onUpdate 收到与 getJobStatus 相同的任务对象，任务完成或失败后自动停止；返回取消订阅函数
+  watchJob: (jobId, onUpdate, pollInterval = 1000) => {
+    let stopped = false;
+    let source = null;
+    let timer = null;
+
+    const stop = () => {
+      stopped = true;
+      if (source) source.close();
+      if (timer) clearInterval(timer);
+    };
+
+    const handle = (job) => {
+      if (stopped || !job) return;
+      if (job.status === 'completed' || job.status === 'failed') stop();
+      onUpdate(job);
+    };
+
+    const poll = () => {
+      timer = setInterval(async () => {
+        try {
+          handle(await api.get(`/api/v1/jobs/${jobId}`));
+        } catch (err) {
+          console.error('Error polling job status:', err);
+        }
+      }, pollInterval);
+    };
+
+    if (typeof EventSource === 'undefined') {
+      poll();
+      return stop;
+    }
+
+    // 网络中断时 EventSource 自动重连，并带上 Last-Event-ID 补发错过的事件
+    source = new EventSource(`${API_BASE_URL}/api/v1/jobs/${jobId}/events`);
+    source.addEventListener('job', (event) => handle(JSON.parse(event.data)));
+    source.addEventListener('deleted', () => handle({ status: 'failed', error_message: 'Job was removed' }));
+    source.onerror = () => {
+      if (!stopped && source.readyState === EventSource.CLOSED) {
+        source = null;
+        poll();
+      }
+    };
+    return stop;
+  },
+
   // AI 生成播客
   generate: async (data) => {
     return api.post('/api/v1/podcasts/generate', data);